@@ -51,8 +51,7 @@ from pcapi.core.offers.api import import_offer_validation_config
 from pcapi.core.offers.models import Offer
 from pcapi.core.offers.models import OfferValidationConfig
 from pcapi.core.offers.models import OfferValidationStatus
-from pcapi.core.offers.offer_validation import compute_offer_validation_score
-from pcapi.core.offers.offer_validation import parse_offer_validation_config
+from pcapi.core.offers.offer_validation import get_offer_validation_program
 import pcapi.core.offers.repository as offers_repository
 from pcapi.core.offers.validation import check_user_can_load_config
 from pcapi.domain import admin_emails
@@ -539,8 +538,7 @@ class ValidationBaseView(BaseAdminView):
         form.validation.default = offer.validation.value
         form.process()
         legal_category = offer.venue.managingOfferer.legal_category
-        current_config = offers_repository.get_current_offer_validation_config()
-        validation_items = parse_offer_validation_config(offer, current_config)[1]  # type: ignore [arg-type]
+        validation_program = get_offer_validation_program()
         context = {
             "form": form,
             "cancel_link_url": url_for(f"{self.endpoint}.index_view"),
@@ -549,7 +547,7 @@ class ValidationBaseView(BaseAdminView):
             "pc_offer_url": build_pc_pro_offer_link(offer),
             "metabase_offer_url": _metabase_offer_url(offer.id) if IS_PROD else None,
             "offer_name": offer.name,
-            "offer_score": compute_offer_validation_score(validation_items),
+            "offer_score": validation_program.score(offer) if validation_program else 1.0,
             "venue_name": offer.venue.publicName or offer.venue.name,
             "offerer_name": offer.venue.managingOfferer.name,
             "venue_url": build_pc_pro_venue_link(offer.venue),
@@ -0,0 +1,33 @@
+"""add_spent_amounts_to_deposit
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# pre/post deployment: pre
+# revision identifiers, used by Alembic.
+revision = "c4e2a7d1f5b3"
+down_revision = "53b7d749990e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "deposit",
+        sa.Column("spentAmount", sa.Numeric(precision=10, scale=2), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "deposit",
+        sa.Column("spentDigitalAmount", sa.Numeric(precision=10, scale=2), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "deposit",
+        sa.Column("spentPhysicalAmount", sa.Numeric(precision=10, scale=2), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("deposit", "spentPhysicalAmount")
+    op.drop_column("deposit", "spentDigitalAmount")
+    op.drop_column("deposit", "spentAmount")
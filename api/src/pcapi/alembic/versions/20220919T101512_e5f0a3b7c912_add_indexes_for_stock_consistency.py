@@ -0,0 +1,45 @@
+"""add_indexes_for_stock_consistency
+"""
+from alembic import op
+
+from pcapi import settings
+
+
+# pre/post deployment: pre
+# revision identifiers, used by Alembic.
+revision = "e5f0a3b7c912"
+down_revision = "c4e2a7d1f5b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("COMMIT")
+    op.execute("""SET SESSION statement_timeout = '900s'""")
+    op.execute(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_booking_cancellationDate"
+        ON booking ("cancellationDate")
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_stock_dateModified"
+        ON stock ("dateModified")
+        """
+    )
+    op.execute(f"""SET SESSION statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}""")
+
+
+def downgrade() -> None:
+    op.execute("COMMIT")
+    op.execute(
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS "ix_stock_dateModified"
+        """
+    )
+    op.execute(
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS "ix_booking_cancellationDate"
+        """
+    )
@@ -1,6 +1,8 @@
 import ftplib
 from io import BytesIO
+from io import TextIOWrapper
 import logging
+from typing import Iterator
 from typing import Pattern
 from zipfile import ZipFile
 
@@ -35,6 +37,24 @@ def get_zip_file_from_ftp(zip_file_name: str, folder_name: str) -> ZipFile:
     return ZipFile(data_file, "r")
 
 
+def iter_lines_from_ftp(file_name: str, folder_name: str, encoding: str, offset: int = 0) -> Iterator[str]:
+    """Yield lines of a file as they are downloaded, starting at the
+    byte ``offset``, instead of downloading the whole file first.
+
+    Line endings are not translated, so that the caller can compute
+    the offset of each line, e.g. to resume later.
+    """
+    ftp_titelive = connect_to_titelive_ftp()
+    ftp_titelive.voidcmd("TYPE I")
+    file_path = "RETR " + folder_name + "/" + file_name
+    logger.info("Streaming file %s", file_path, extra={"offset": offset})
+    with ftp_titelive.transfercmd(file_path, rest=offset or None) as connection:
+        with TextIOWrapper(connection.makefile("rb"), encoding=encoding, newline="") as lines:
+            yield from lines
+    ftp_titelive.voidresp()
+    ftp_titelive.quit()
+
+
 def get_files_to_process_from_titelive_ftp(titelive_folder_name: str, date_regexp: Pattern[str]) -> list[str]:
     ftp_titelive = connect_to_titelive_ftp()
     files_list = ftp_titelive.nlst(titelive_folder_name)
@@ -1,11 +1,14 @@
 import datetime
 import logging
+import time
 import typing
 
+from flask import current_app
 import pytz
 import sentry_sdk
 from sqlalchemy.orm import Query
 
+from pcapi import settings
 from pcapi.core import search
 import pcapi.core.booking_providers.api as booking_providers_api
 from pcapi.core.booking_providers.api import _get_venue_booking_provider
@@ -32,6 +35,7 @@ from pcapi.core.offers.models import Stock
 from pcapi.core.offers.validation import check_offer_is_from_current_cinema_provider
 from pcapi.core.users.external import update_external_pro
 from pcapi.core.users.external import update_external_user
+from pcapi.core.users.external import update_external_user_later
 from pcapi.core.users.models import User
 from pcapi.models import db
 from pcapi.models.feature import FeatureToggle
@@ -51,6 +55,14 @@ logger = logging.getLogger(__name__)
 
 QR_CODE_PASS_CULTURE_VERSION = "v3"
 
+# Bookings whose side effects have been deferred to a task that has not
+# run (yet), with the timestamp of the booking as score. Members are
+# "<booking id>:<1 if first booking of the venue, 0 otherwise>".
+REDIS_PENDING_BOOKING_SIDE_EFFECTS = "bookings:pending-side-effects"
+# Side effects that are still pending after this delay (in seconds) are
+# run by the `redispatch_booking_side_effects` cron.
+BOOKING_SIDE_EFFECTS_REDISPATCH_DELAY = 15 * 60
+
 
 def book_offer(
     beneficiary: User,
@@ -61,6 +73,7 @@ def book_offer(
     Return a booking or raise an exception if it's not possible.
     Update a user's credit information on Batch.
     """
+    start = time.perf_counter()
     # The call to transaction here ensures we free the FOR UPDATE lock
     # on the stock if validation issues an exception
     with transaction():
@@ -134,6 +147,40 @@ def book_offer(
         },
     )
 
+    booked_at = time.perf_counter()
+
+    search.async_index_offer_ids([stock.offerId])
+
+    deferred = FeatureToggle.DEFER_BOOKING_SIDE_EFFECTS.is_active()
+    if deferred:
+        _defer_booking_side_effects(individual_booking, first_venue_booking)
+    else:
+        run_booking_side_effects(individual_booking, first_venue_booking)
+
+    end = time.perf_counter()
+    logger.info(
+        "Handled booking request",
+        extra={
+            "booking": booking.id,
+            "deferred_side_effects": deferred,
+            "booking_elapsed": booked_at - start,
+            "side_effects_elapsed": end - booked_at,
+            "elapsed": end - start,
+        },
+    )
+
+    return individual_booking.booking
+
+
+def run_booking_side_effects(
+    individual_booking: IndividualBooking,
+    first_venue_booking: bool,
+    coalesce_user_update: bool = False,
+) -> None:
+    """Send confirmation emails of a new booking and update attributes
+    of the beneficiary and the venue in external services.
+    """
+    booking = individual_booking.booking
     if not transactional_mails.send_user_new_booking_to_pro_email(individual_booking, first_venue_booking):
         logger.warning(
             "Could not send booking confirmation email to offerer",
@@ -142,12 +189,73 @@ def book_offer(
     if not transactional_mails.send_individual_booking_confirmation_email_to_beneficiary(individual_booking):
         logger.warning("Could not send booking=%s confirmation email to beneficiary", booking.id)
 
-    search.async_index_offer_ids([stock.offerId])
+    if coalesce_user_update:
+        update_external_user_later(individual_booking.user)
+    else:
+        update_external_user(individual_booking.user)
+    update_external_pro(booking.stock.offer.venue.bookingEmail)
 
-    update_external_user(individual_booking.user)
-    update_external_pro(stock.offer.venue.bookingEmail)
 
-    return individual_booking.booking
+def _defer_booking_side_effects(individual_booking: IndividualBooking, first_venue_booking: bool) -> None:
+    from pcapi.tasks.booking_tasks import BookingSideEffectsRequest
+    from pcapi.tasks.booking_tasks import run_booking_side_effects_task
+
+    booking_id = individual_booking.booking.id
+    # Record the booking before enqueueing the task, so that side
+    # effects are run by a cron if the task is lost.
+    try:
+        current_app.redis_client.zadd(
+            REDIS_PENDING_BOOKING_SIDE_EFFECTS, {f"{booking_id}:{int(first_venue_booking)}": time.time()}
+        )
+    except Exception:  # pylint: disable=broad-except
+        if settings.IS_RUNNING_TESTS:
+            raise
+        logger.exception("Could not defer side effects of booking, running them now", extra={"booking": booking_id})
+        run_booking_side_effects(individual_booking, first_venue_booking)
+        return
+    run_booking_side_effects_task.delay(
+        BookingSideEffectsRequest(booking_id=booking_id, first_venue_booking=first_venue_booking)
+    )
+
+
+def handle_deferred_booking_side_effects(booking_id: int, first_venue_booking: bool) -> None:
+    member = f"{booking_id}:{int(first_venue_booking)}"
+    # Claim the pending side effects before running them, so that they
+    # are run only once when the cron redispatches a task that is only
+    # delayed.
+    if not current_app.redis_client.zrem(REDIS_PENDING_BOOKING_SIDE_EFFECTS, member):
+        logger.info("Side effects of booking have already been run", extra={"booking": booking_id})
+        return
+    individual_booking = IndividualBooking.query.filter_by(bookingId=booking_id).one_or_none()
+    if not individual_booking:
+        logger.warning("Could not find booking to run its side effects", extra={"booking": booking_id})
+        return
+    try:
+        # Coalesce updates of user attributes, in case the user books
+        # several offers in a short time.
+        run_booking_side_effects(individual_booking, first_venue_booking, coalesce_user_update=True)
+    except Exception:
+        # Release the claim, so that the task or the cron retries.
+        current_app.redis_client.zadd(REDIS_PENDING_BOOKING_SIDE_EFFECTS, {member: time.time()})
+        raise
+
+
+def redispatch_booking_side_effects() -> None:
+    """Run side effects of bookings whose task has not been run, e.g.
+    because it could not be enqueued.
+    """
+    max_timestamp = time.time() - BOOKING_SIDE_EFFECTS_REDISPATCH_DELAY
+    pending = current_app.redis_client.zrangebyscore(REDIS_PENDING_BOOKING_SIDE_EFFECTS, "-inf", max_timestamp)
+    for member in pending:
+        booking_id, first_venue_booking = member.split(":")
+        try:
+            handle_deferred_booking_side_effects(int(booking_id), first_venue_booking == "1")
+        except Exception:  # pylint: disable=broad-except
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception("Could not run side effects of booking", extra={"booking": booking_id})
+    if pending:
+        logger.info("Ran pending side effects of bookings", extra={"count": len(pending)})
 
 
 def _book_external_offer(booking: Booking, stock: Stock) -> None:
@@ -419,27 +527,9 @@ def update_cancellation_limit_dates(
 
 
 def recompute_dnBookedQuantity(stock_ids: list[int]) -> None:
-    query = f"""
-      WITH bookings_per_stock AS (
-        SELECT
-          stock.id AS stock_id,
-          COALESCE(SUM(booking.quantity), 0) AS total_bookings
-        FROM stock
-        -- The `NOT status CANCELLED` condition MUST be part of the JOIN.
-        -- If it were part of the WHERE clause, that would exclude
-        -- stocks that only have cancelled bookings.
-        LEFT OUTER JOIN booking
-          ON booking."stockId" = stock.id
-          AND booking.status != '{BookingStatus.CANCELLED.value}'
-        WHERE stock.id IN :stock_ids
-        GROUP BY stock.id
-      )
-      UPDATE stock
-      SET "dnBookedQuantity" = bookings_per_stock.total_bookings
-      FROM bookings_per_stock
-      WHERE stock.id = bookings_per_stock.stock_id
-    """
-    db.session.execute(query, {"stock_ids": tuple(stock_ids)})
+    if not stock_ids:
+        return
+    offers_repository.recompute_stocks_booked_quantity(stock_ids=stock_ids)
 
 
 def _logs_for_data_purpose(collective_bookings_subquery: Query) -> None:
@@ -126,7 +126,7 @@ class Booking(PcObject, Base, Model):  # type: ignore [valid-type, misc]
 
     amount: Decimal = Column(Numeric(10, 2), nullable=False)
 
-    cancellationDate = Column(DateTime, nullable=True)
+    cancellationDate = Column(DateTime, nullable=True, index=True)
 
     displayAsEnded = Column(Boolean, nullable=True)
 
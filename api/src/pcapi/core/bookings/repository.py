@@ -1,10 +1,7 @@
-import csv
 from datetime import date
 from datetime import datetime
 from datetime import time
 from datetime import timedelta
-from io import BytesIO
-from io import StringIO
 import math
 from operator import and_
 import typing
@@ -24,7 +21,6 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from sqlalchemy.sql.elements import not_
 from sqlalchemy.sql.functions import coalesce
-import xlsxwriter
 
 from pcapi.core.bookings import constants
 from pcapi.core.bookings.models import Booking
@@ -50,6 +46,7 @@ from pcapi.domain.booking_recap.bookings_recap_paginated import BookingsRecapPag
 from pcapi.models import db
 from pcapi.models.api_errors import ResourceNotFoundError
 from pcapi.routes.serialization.bookings_recap_serialize import OfferType
+from pcapi.utils import export as export_utils
 from pcapi.utils.email import sanitize_email
 from pcapi.utils.token import random_token
 
@@ -88,6 +85,7 @@ BOOKING_EXPORT_HEADER = [
     "Date et heure de remboursement",
     "Type d'offre",
 ]
+BOOKING_EXPORT_CURRENCY_COLUMNS = (10,)  # "Prix de la réservation"
 
 
 def find_by(token: str, email: str = None, offer_id: int = None) -> Booking:
@@ -409,6 +407,38 @@ def get_export(
     offer_type: OfferType | None = None,
     export_type: BookingExportType | None = BookingExportType.CSV,
 ) -> str | bytes:
+    bookings_query = _get_export_query(user, booking_period, status_filter, event_date, venue_id, offer_type)
+    if export_type == BookingExportType.EXCEL:
+        return _serialize_excel_report(bookings_query)
+    return _serialize_csv_report(bookings_query)
+
+
+def stream_export(
+    user: User,
+    booking_period: tuple[date, date] | None = None,
+    status_filter: BookingStatusFilter | None = BookingStatusFilter.BOOKED,
+    event_date: datetime | None = None,
+    venue_id: int | None = None,
+    offer_type: OfferType | None = None,
+    export_type: BookingExportType | None = BookingExportType.CSV,
+) -> typing.Iterator[bytes]:
+    """Same as `get_export()`, but yield the file by chunks of bytes
+    (CSV is encoded in UTF-8 with a BOM), as bookings are fetched.
+    """
+    bookings_query = _get_export_query(user, booking_period, status_filter, event_date, venue_id, offer_type)
+    if export_type == BookingExportType.EXCEL:
+        return stream_excel_report(bookings_query)
+    return stream_csv_report(bookings_query)
+
+
+def _get_export_query(
+    user: User,
+    booking_period: tuple[date, date] | None,
+    status_filter: BookingStatusFilter | None,
+    event_date: datetime | None,
+    venue_id: int | None,
+    offer_type: OfferType | None,
+) -> BaseQuery:
     bookings_query = _get_filtered_booking_report(
         pro_user=user,
         period=booking_period,  # type: ignore [arg-type]
@@ -417,10 +447,7 @@ def get_export(
         venue_id=venue_id,
         offer_type=offer_type,
     )
-    bookings_query = _duplicate_booking_when_quantity_is_two(bookings_query)
-    if export_type == BookingExportType.EXCEL:
-        return _serialize_excel_report(bookings_query)
-    return _serialize_csv_report(bookings_query)
+    return _duplicate_booking_when_quantity_is_two(bookings_query)
 
 
 # FIXME (Gautier, 03-25-2022): also used in collective_booking. SHould we move it to core or some other place?
@@ -657,84 +684,73 @@ def _get_booking_status(status: BookingStatus, is_confirmed: bool) -> str:
     return BOOKING_STATUS_LABELS[status]
 
 
-def _serialize_csv_report(query: BaseQuery) -> str:
-    output = StringIO()
-    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
-    writer.writerow(BOOKING_EXPORT_HEADER)
+def _get_csv_report_rows(query: BaseQuery) -> typing.Iterator[tuple]:
     for booking in query.yield_per(1000):
-        writer.writerow(
-            (
-                booking.venueName,
-                booking.offerName,
-                convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking),
-                booking.isbn,
-                f"{booking.beneficiaryLastName} {booking.beneficiaryFirstName}",
-                booking.beneficiaryEmail,
-                booking.beneficiaryPhoneNumber,
-                convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking),
-                convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking),
-                booking_recap_utils.get_booking_token(
-                    booking.token,
-                    booking.status,
-                    booking.isExternal,
-                    booking.stockBeginningDatetime,
-                ),
-                booking.amount,
-                _get_booking_status(booking.status, booking.isConfirmed),
-                convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking),
-                # This method is still used in the old Payment model
-                serialize_offer_type_educational_or_individual(offer_is_educational=False),
-            )
+        yield (
+            booking.venueName,
+            booking.offerName,
+            convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking),
+            booking.isbn,
+            f"{booking.beneficiaryLastName} {booking.beneficiaryFirstName}",
+            booking.beneficiaryEmail,
+            booking.beneficiaryPhoneNumber,
+            convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking),
+            convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking),
+            booking_recap_utils.get_booking_token(
+                booking.token,
+                booking.status,
+                booking.isExternal,
+                booking.stockBeginningDatetime,
+            ),
+            booking.amount,
+            _get_booking_status(booking.status, booking.isConfirmed),
+            convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking),
+            # This method is still used in the old Payment model
+            serialize_offer_type_educational_or_individual(offer_is_educational=False),
         )
 
-    return output.getvalue()
-
-
-def _serialize_excel_report(query: BaseQuery) -> bytes:
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-
-    bold = workbook.add_format({"bold": 1})
-    currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
-    col_width = 18
-
-    worksheet = workbook.add_worksheet()
-    row = 0
 
-    for col_num, title in enumerate(BOOKING_EXPORT_HEADER):
-        worksheet.write(row, col_num, title, bold)
-        worksheet.set_column(col_num, col_num, col_width)
-    row = 1
+def _get_excel_report_rows(query: BaseQuery) -> typing.Iterator[tuple]:
     for booking in query.yield_per(1000):
-        worksheet.write(row, 0, booking.venueName)
-        worksheet.write(row, 1, booking.offerName)
-        worksheet.write(
-            row, 2, str(convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking))
-        )
-        worksheet.write(row, 3, booking.isbn)
-        worksheet.write(row, 4, f"{booking.beneficiaryLastName} {booking.beneficiaryFirstName}")
-        worksheet.write(row, 5, booking.beneficiaryEmail)
-        worksheet.write(row, 6, booking.beneficiaryPhoneNumber)
-        worksheet.write(row, 7, str(convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking)))
-        worksheet.write(row, 8, str(convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking)))
-        worksheet.write(
-            row,
-            9,
+        yield (
+            booking.venueName,
+            booking.offerName,
+            str(convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking)),
+            booking.isbn,
+            f"{booking.beneficiaryLastName} {booking.beneficiaryFirstName}",
+            booking.beneficiaryEmail,
+            booking.beneficiaryPhoneNumber,
+            str(convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking)),
+            str(convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking)),
             booking_recap_utils.get_booking_token(
                 booking.token,
                 booking.status,
                 booking.isExternal,
                 booking.stockBeginningDatetime,
             ),
+            booking.amount,
+            _get_booking_status(booking.status, booking.isConfirmed),
+            str(convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking)),
+            serialize_offer_type_educational_or_individual(offer_is_educational=False),
         )
-        worksheet.write(row, 10, booking.amount, currency_format)
-        worksheet.write(row, 11, _get_booking_status(booking.status, booking.isConfirmed))
-        worksheet.write(row, 12, str(convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking)))
-        worksheet.write(row, 13, serialize_offer_type_educational_or_individual(offer_is_educational=False))
-        row += 1
-
-    workbook.close()
-    return output.getvalue()
+
+
+def stream_csv_report(query: BaseQuery) -> typing.Iterator[bytes]:
+    return export_utils.encode(export_utils.iter_csv(BOOKING_EXPORT_HEADER, _get_csv_report_rows(query)))
+
+
+def stream_excel_report(query: BaseQuery) -> typing.Iterator[bytes]:
+    return export_utils.iter_excel(
+        BOOKING_EXPORT_HEADER, _get_excel_report_rows(query), currency_columns=BOOKING_EXPORT_CURRENCY_COLUMNS
+    )
+
+
+def _serialize_csv_report(query: BaseQuery) -> str:
+    return "".join(export_utils.iter_csv(BOOKING_EXPORT_HEADER, _get_csv_report_rows(query)))
+
+
+def _serialize_excel_report(query: BaseQuery) -> bytes:
+    return b"".join(stream_excel_report(query))
 
 
 def get_soon_expiring_bookings(expiration_days_delta: int) -> typing.Generator[Booking, None, None]:
@@ -592,6 +592,32 @@ def get_collective_booking_report(
     return collective_bookings_serialize.serialize_collective_booking_csv_report(bookings_query)
 
 
+def stream_collective_booking_report(
+    user: User,
+    booking_period: tuple[datetime.date, datetime.date] | None = None,
+    status_filter: educational_models.CollectiveBookingStatusFilter
+    | None = educational_models.CollectiveBookingStatusFilter.BOOKED,
+    event_date: datetime.datetime | None = None,
+    venue_id: int | None = None,
+    export_type: bookings_models.BookingExportType | None = bookings_models.BookingExportType.CSV,
+) -> typing.Iterator[bytes]:
+    """Same as `get_collective_booking_report()`, but yield the file by
+    chunks of bytes (CSV is encoded in UTF-8 with a BOM), as bookings
+    are fetched.
+    """
+    bookings_query = educational_repository.get_filtered_collective_booking_report(
+        pro_user=user,
+        period=booking_period,  # type: ignore [arg-type]
+        status_filter=status_filter,  # type: ignore [arg-type]
+        event_date=event_date,
+        venue_id=venue_id,
+    )
+
+    if export_type == bookings_models.BookingExportType.EXCEL:
+        return collective_bookings_serialize.stream_collective_booking_excel_report(bookings_query)
+    return collective_bookings_serialize.stream_collective_booking_csv_report(bookings_query)
+
+
 def list_collective_offers_for_pro_user(
     user_id: int,
     user_is_admin: bool,
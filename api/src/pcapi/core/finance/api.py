@@ -27,21 +27,30 @@ few more criteria, see `price_bookings()` and
 """
 
 from collections import defaultdict
+from collections import deque
+import concurrent.futures
+import contextlib
 import csv
 import datetime
 import decimal
+import gzip
 import hashlib
+import io
 import itertools
 import logging
 import math
+import multiprocessing
 from operator import attrgetter
 from operator import or_
 import pathlib
+import resource
 import secrets
 import tempfile
+import time
 import typing
 import zipfile
 
+from flask import current_app
 from flask import render_template
 from flask_sqlalchemy import BaseQuery
 import pytz
@@ -140,6 +149,9 @@ _LEGACY_PRICE_BOOKINGS_ORDER_CLAUSE = (
 
 PRICE_BOOKINGS_BATCH_SIZE = 100
 CASHFLOW_BATCH_LABEL_PREFIX = "VIR"
+INVOICE_UPLOAD_BATCH_SIZE = 20
+# Ids of invoices whose PDF file has not been stored yet.
+REDIS_INVOICES_WITHOUT_PDF = "finance:invoices-without-pdf"
 
 
 def price_bookings(
@@ -195,6 +207,54 @@ def price_bookings(
             query = query.filter(clause)
         return query.limit(batch_size)
 
+    def _price_booking_or_log_error(
+        booking: bookings_models.Booking | educational_models.CollectiveBooking,
+    ) -> None:
+        try:
+            business_unit_id = pricing_point_id = None
+            if use_pricing_point:
+                pricing_point_id = _get_pricing_point_link(booking).pricingPointId
+                if pricing_point_id in errored_pricing_point_ids:
+                    return
+            else:
+                business_unit_id = booking.venue.businessUnitId
+                if business_unit_id in errored_business_unit_ids:
+                    return
+            extra = {
+                "booking": booking.id,
+                "business_unit": business_unit_id,
+                "pricing_point": pricing_point_id,
+            }
+            with log_elapsed(logger, "Priced booking", extra):
+                price_booking(booking, use_pricing_point)
+        except Exception as exc:  # pylint: disable=broad-except
+            if use_pricing_point:
+                errored_pricing_point_ids.add(pricing_point_id)
+                logger.info(
+                    "Ignoring further bookings from pricing point",
+                    extra={"pricing_point": pricing_point_id},
+                )
+            else:
+                errored_business_unit_ids.add(business_unit_id)
+                logger.info(
+                    "Ignoring further bookings from business unit",
+                    extra={"business_unit": business_unit_id},
+                )
+            logger.exception(
+                "Could not price booking",
+                extra={
+                    "booking": booking.id,
+                    "business_unit": business_unit_id,
+                    "pricing_point": pricing_point_id,
+                    "exc": str(exc),
+                },
+            )
+
+    # Batch pricing is only implemented for individual bookings and
+    # pricing points. Collective bookings do not depend on the revenue
+    # and are much less numerous, they are priced one by one.
+    price_in_batch = use_pricing_point and FeatureToggle.PRICE_BOOKINGS_IN_BATCH.is_active()
+
     last_booking = None
     last_collective_booking = None
     while loops > 0:
@@ -211,45 +271,15 @@ def price_bookings(
                 last_booking = booking
             else:
                 last_collective_booking = booking
-            try:
-                business_unit_id = pricing_point_id = None
-                if use_pricing_point:
-                    pricing_point_id = _get_pricing_point_link(booking).pricingPointId
-                    if pricing_point_id in errored_pricing_point_ids:
-                        continue
-                else:
-                    business_unit_id = booking.venue.businessUnitId
-                    if business_unit_id in errored_business_unit_ids:
-                        continue
-                extra = {
-                    "booking": booking.id,
-                    "business_unit": business_unit_id,
-                    "pricing_point": pricing_point_id,
-                }
-                with log_elapsed(logger, "Priced booking", extra):
-                    price_booking(booking, use_pricing_point)
-            except Exception as exc:  # pylint: disable=broad-except
-                if use_pricing_point:
-                    errored_pricing_point_ids.add(pricing_point_id)
-                    logger.info(
-                        "Ignoring further bookings from pricing point",
-                        extra={"pricing_point": pricing_point_id},
-                    )
-                else:
-                    errored_business_unit_ids.add(business_unit_id)
-                    logger.info(
-                        "Ignoring further bookings from business unit",
-                        extra={"business_unit": business_unit_id},
-                    )
-                logger.exception(
-                    "Could not price booking",
-                    extra={
-                        "booking": booking.id,
-                        "business_unit": business_unit_id,
-                        "pricing_point": pricing_point_id,
-                        "exc": str(exc),
-                    },
-                )
+        if price_in_batch:
+            individual_bookings = [b for b in bookings if isinstance(b, bookings_models.Booking)]
+            with log_elapsed(logger, "Priced batch of bookings", {"bookings": len(individual_bookings)}):
+                bookings_to_price_one_by_one = _price_bookings_in_batch(individual_bookings, errored_pricing_point_ids)
+            bookings_to_price_one_by_one += [b for b in bookings if not isinstance(b, bookings_models.Booking)]
+        else:
+            bookings_to_price_one_by_one = bookings  # type: ignore [assignment]
+        for booking in bookings_to_price_one_by_one:
+            _price_booking_or_log_error(booking)
         loops -= 1
         # Keep last booking in the session, we'll need it when calling
         # `_get_loop_query()` for the next loop.
@@ -259,6 +289,164 @@ def price_bookings(
                     db.session.expunge(booking)
 
 
+def _price_bookings_in_batch(
+    bookings: list[bookings_models.Booking],
+    errored_pricing_point_ids: set[int],
+) -> list[bookings_models.Booking]:
+    """Price individual bookings, grouped by pricing point (see
+    `_price_bookings_of_pricing_point()`), and return bookings that
+    should be priced one by one instead.
+
+    If a group cannot be priced in batch, nothing is written for this
+    group and its bookings are returned, so that pricing them one by
+    one reports (and isolates) the error exactly like it would have
+    been without batch pricing.
+    """
+    to_price_one_by_one = []
+    bookings_by_pricing_point: dict[int, list[bookings_models.Booking]] = defaultdict(list)
+    for booking in bookings:
+        try:
+            pricing_point_id = _get_pricing_point_link(booking).pricingPointId
+        except ValueError:
+            to_price_one_by_one.append(booking)
+            continue
+        if pricing_point_id not in errored_pricing_point_ids:
+            bookings_by_pricing_point[pricing_point_id].append(booking)
+
+    for pricing_point_id, group in bookings_by_pricing_point.items():
+        extra = {"pricing_point": pricing_point_id, "bookings": len(group)}
+        try:
+            with log_elapsed(logger, "Priced bookings of pricing point", extra):
+                _price_bookings_of_pricing_point(pricing_point_id, group)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.info(
+                "Could not price bookings of pricing point in batch, will price them one by one",
+                extra=extra | {"exc": str(exc)},
+            )
+            to_price_one_by_one.extend(group)
+    return to_price_one_by_one
+
+
+def _price_bookings_of_pricing_point(
+    pricing_point_id: int,
+    bookings: list[bookings_models.Booking],
+) -> int:
+    """Price individual bookings of a pricing point in a single
+    transaction, and return the number of created pricings.
+
+    The result is the same as calling `price_booking()` on each
+    booking (in the given order, which must be the order of
+    `_PRICE_BOOKINGS_ORDER_CLAUSE`), but the pricing point is locked
+    once, the revenue is fetched once per revenue period and then
+    updated in memory, and pricings are inserted in bulk.
+    """
+    with transaction():
+        lock_pricing_point(pricing_point_id)
+
+        # Same checks as in `price_booking()`, now that we have
+        # acquired the lock.
+        booking_ids = [booking.id for booking in bookings]
+        reloaded_bookings = {
+            booking.id: booking
+            for booking in _get_booking_query_for_pricing(use_pricing_point=True).filter(
+                bookings_models.Booking.id.in_(booking_ids)
+            )
+        }
+        already_priced_booking_ids = {
+            booking_id
+            for booking_id, in models.Pricing.query.filter(
+                models.Pricing.bookingId.in_(booking_ids),
+                models.Pricing.status != models.PricingStatus.CANCELLED,
+            ).with_entities(models.Pricing.bookingId)
+        }
+        to_price = []
+        for booking_id in booking_ids:
+            # Raise if the booking has been deleted, like `price_booking()` does.
+            booking = reloaded_bookings[booking_id]
+            if booking.status is not bookings_models.BookingStatus.USED:
+                continue
+            if not booking.venue.pricing_point_links:
+                continue
+            if _get_pricing_point_link(booking).pricingPointId != pricing_point_id:
+                continue
+            if booking.id in already_priced_booking_ids:
+                continue
+            to_price.append(booking)
+
+        # Pricings are inserted at once below, which is correct only
+        # if none of them would have been deleted as a dependent
+        # pricing of a later booking of the batch, i.e. if bookings
+        # are correctly ordered. They should be, but let
+        # `price_booking()` deal with it if they are not.
+        comparison_tuples = [_booking_comparison_tuple(booking) for booking in to_price]
+        if comparison_tuples != sorted(comparison_tuples):
+            raise ValueError(f"Bookings of pricing point {pricing_point_id} are not correctly ordered")
+
+        rule_finder = reimbursement.CustomRuleFinder()
+        revenues: dict[tuple[datetime.datetime, datetime.datetime], int] = {}
+        # Revenue periods where dependent pricings must be looked for
+        # again before pricing the next booking, see below.
+        periods_to_recheck = set()
+        pricings: list[models.Pricing] = []
+        for booking in to_price:
+            assert booking.dateUsed is not None  # helps mypy for `_get_revenue_period()`
+            period = _get_revenue_period(booking.dateUsed)
+            # Dependent pricings of a booking are also dependent
+            # pricings of the previous booking of the same revenue
+            # period, so we only need to delete them once per period.
+            # Except if they were kept because of the special case
+            # for used-then-unused-then-used bookings (that only
+            # applies to the booking being priced).
+            if period not in revenues or period in periods_to_recheck:
+                # Dependent pricings and revenue are computed from the
+                # database: insert pending pricings first.
+                _insert_pricings(pricings)
+                pricings = []
+                _delete_dependent_pricings(booking, "Deleted pricings priced too early", use_pricing_point=True)
+                if {_p.status for _p in booking.pricings} == {models.PricingStatus.CANCELLED}:
+                    periods_to_recheck.add(period)
+                else:
+                    periods_to_recheck.discard(period)
+                _, revenues[period] = _get_pricing_point_id_and_current_revenue(booking)
+            pricing = _build_pricing(booking, revenues[period], rule_finder, pricing_point_id=pricing_point_id)
+            revenues[period] = pricing.revenue
+            pricings.append(pricing)
+        _insert_pricings(pricings)
+    return len(to_price)
+
+
+def _insert_pricings(pricings: list[models.Pricing]) -> None:
+    """Insert (not yet added) pricings and their lines, with one
+    INSERT statement per table.
+    """
+    if not pricings:
+        return
+    # Fetch ids beforehand, so that we can insert lines without
+    # having to fetch pricing ids one by one.
+    pricing_ids = [
+        pricing_id
+        for pricing_id, in db.session.execute(
+            sqla.select([sqla.func.nextval("pricing_id_seq")]).select_from(sqla.func.generate_series(1, len(pricings)))
+        )
+    ]
+    columns = [column.key for column in models.Pricing.__table__.columns if column.key not in ("id", "creationDate")]
+    db.session.execute(
+        sqla.insert(models.Pricing),
+        [
+            {"id": pricing_id} | {column: getattr(pricing, column) for column in columns}
+            for pricing_id, pricing in zip(pricing_ids, pricings)
+        ],
+    )
+    db.session.execute(
+        sqla.insert(models.PricingLine),
+        [
+            {"pricingId": pricing_id, "amount": line.amount, "category": line.category}
+            for pricing_id, pricing in zip(pricing_ids, pricings)
+            for line in pricing.lines
+        ],
+    )
+
+
 def _get_pricing_point_link(
     booking: bookings_models.Booking | educational_models.CollectiveBooking,
 ) -> offerers_models.VenuePricingPointLink:
@@ -627,18 +815,35 @@ def _price_booking(
 ) -> models.Pricing:
     if use_pricing_point:
         pricing_point_id, current_revenue = _get_pricing_point_id_and_current_revenue(booking)
-        siret = None
-        business_unit_id = None
-    else:
-        siret, current_revenue = _get_siret_and_current_revenue(booking)
-        business_unit_id = booking.venue.businessUnitId
-        pricing_point_id = None
+        return _build_pricing(
+            booking, current_revenue, reimbursement.CustomRuleFinder(), pricing_point_id=pricing_point_id
+        )
+    siret, current_revenue = _get_siret_and_current_revenue(booking)
+    return _build_pricing(
+        booking,
+        current_revenue,
+        reimbursement.CustomRuleFinder(),
+        siret=siret,
+        business_unit_id=booking.venue.businessUnitId,
+    )
+
+
+def _build_pricing(
+    booking: bookings_models.Booking | CollectiveBooking,
+    current_revenue: int,
+    rule_finder: reimbursement.CustomRuleFinder,
+    pricing_point_id: int | None = None,
+    siret: str | None = None,
+    business_unit_id: int | None = None,
+) -> models.Pricing:
+    """Return a new (not added) pricing for the requested booking,
+    given the current year revenue, NOT including the booking.
+    """
     new_revenue = current_revenue
     is_booking_collective = isinstance(booking, CollectiveBooking)
     # Collective bookings must not be included in revenue.
     if not is_booking_collective and booking.individualBookingId:
         new_revenue += utils.to_eurocents(booking.total_amount)
-    rule_finder = reimbursement.CustomRuleFinder()
     # FIXME (dbaty, 2021-11-10): `revenue` here is in eurocents but
     # `get_reimbursement_rule` expects euros. Clean that once the
     # old payment code has been removed and the function accepts
@@ -1259,32 +1464,70 @@ def _upload_files_to_google_drive(folder_name: str, paths: typing.Iterable[pathl
             logger.info("Finance file has been uploaded to Google Drive", extra={"path": str(path)})
 
 
+# Number of rows fetched at once (with a server-side cursor) by
+# queries that generate CSV files.
+CSV_QUERY_YIELD_PER = 1_000
+
+
 def _write_csv(
     filename: str,
     header: typing.Iterable,
     rows: typing.Iterable,
     row_formatter: typing.Callable[[typing.Iterable], typing.Iterable] = lambda row: row,
-    compress: bool = False,
+    compression: str | None = None,
 ) -> pathlib.Path:
+    """Write rows to a new CSV file and return its path.
 
+    Rows are written as they are iterated over, and the file is
+    compressed on the fly if ``compression`` is "zip" (a ZIP archive
+    that contains the CSV file) or "gzip". To keep memory usage
+    bounded, ``rows`` should not be a list, but a query that fetches
+    rows in chunks (with ``yield_per()``).
+    """
     # Store file in a dedicated directory within "/tmp". It's easier
     # to clean files in tests that way.
     path = pathlib.Path(tempfile.mkdtemp()) / f"{filename}.csv"
-    with open(path, "w+", encoding="utf-8") as fp:
+    start = time.perf_counter()
+    n_rows = 0
+    with contextlib.ExitStack() as stack:
+        if compression == "zip":
+            zfile = stack.enter_context(
+                zipfile.ZipFile(
+                    f"{path}.zip",
+                    "w",
+                    compression=zipfile.ZIP_DEFLATED,
+                    compresslevel=9,
+                )
+            )
+            # The size of the file is not known beforehand, allow it to
+            # be larger than 2 GB.
+            fp = stack.enter_context(io.TextIOWrapper(zfile.open(path.name, "w", force_zip64=True), encoding="utf-8"))
+            path = pathlib.Path(f"{path}.zip")
+        elif compression == "gzip":
+            path = pathlib.Path(f"{path}.gz")
+            fp = stack.enter_context(gzip.open(path, "wt", encoding="utf-8"))
+        elif compression is None:
+            fp = stack.enter_context(open(path, "w+", encoding="utf-8"))
+        else:
+            raise ValueError(f"Unknown compression: {compression}")
         writer = csv.writer(fp, quoting=csv.QUOTE_NONNUMERIC)
         writer.writerow(header)
         if rows is not None:
-            writer.writerows(row_formatter(row) for row in rows)
-    if compress:
-        compressed_path = pathlib.Path(str(path) + ".zip")
-        with zipfile.ZipFile(
-            compressed_path,
-            "w",
-            compression=zipfile.ZIP_DEFLATED,
-            compresslevel=9,
-        ) as zfile:
-            zfile.write(path, arcname=path.name)
-        path = compressed_path
+            for row in rows:
+                writer.writerow(row_formatter(row))
+                n_rows += 1
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Generated CSV file",
+        extra={
+            "path": str(path),
+            "rows": n_rows,
+            "elapsed": elapsed,
+            "rows_per_second": round(n_rows / elapsed) if elapsed else None,
+            # Peak memory usage of the whole process so far, in kilobytes.
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+    )
     return path
 
 
@@ -1321,7 +1564,12 @@ def _generate_reimbursement_points_file() -> pathlib.Path:
         _clean_for_accounting(row.iban),
         _clean_for_accounting(row.bic),
     )
-    return _write_csv("reimbursement_points", header, rows=query, row_formatter=row_formatter)
+    return _write_csv(
+        "reimbursement_points",
+        header,
+        rows=query.yield_per(CSV_QUERY_YIELD_PER),
+        row_formatter=row_formatter,
+    )
 
 
 def _generate_business_units_file() -> pathlib.Path:
@@ -1362,7 +1610,12 @@ def _generate_business_units_file() -> pathlib.Path:
         _clean_for_accounting(row.iban),
         _clean_for_accounting(row.bic),
     )
-    return _write_csv("business_units", header, rows=query, row_formatter=row_formatter)
+    return _write_csv(
+        "business_units",
+        header,
+        rows=query.yield_per(CSV_QUERY_YIELD_PER),
+        row_formatter=row_formatter,
+    )
 
 
 def _clean_for_accounting(value: str) -> str:
@@ -1524,7 +1777,10 @@ def _generate_payments_file(batch_id: int) -> pathlib.Path:
     return _write_csv(
         "payment_details",
         header,
-        rows=itertools.chain(bookings_query, collective_bookings_query),
+        rows=itertools.chain(
+            bookings_query.yield_per(CSV_QUERY_YIELD_PER),
+            collective_bookings_query.yield_per(CSV_QUERY_YIELD_PER),
+        ),
         row_formatter=_payment_details_row_formatter,
     )
 
@@ -1572,9 +1828,9 @@ def _generate_wallets_file() -> pathlib.Path:
     return _write_csv(
         "soldes_des_utilisateurs",
         header,
-        rows=query,
+        rows=query.yield_per(CSV_QUERY_YIELD_PER),
         row_formatter=row_formatter,
-        compress=True,
+        compression="zip",
     )
 
 
@@ -1638,8 +1894,20 @@ def _make_invoice_line(
     return invoice_line, reimbursed_amount
 
 
-def generate_invoices() -> None:
-    """Generate (and store) all invoices."""
+def generate_invoices(workers: int | None = None) -> None:
+    """Generate (and store) all invoices.
+
+    Invoices are created in the database by the calling process. Their
+    PDF files are rendered by ``workers`` processes (by default, see
+    ``settings.FINANCE_INVOICE_RENDERING_WORKERS``), or sequentially
+    if it's 0.
+
+    This function can be called again after a crash: cashflows that
+    are already linked to an invoice are ignored, and invoices whose
+    PDF file has not been stored are rendered again.
+    """
+    if workers is None:
+        workers = settings.FINANCE_INVOICE_RENDERING_WORKERS
     use_reimbursement_point = FeatureToggle.USE_REIMBURSEMENT_POINT_FOR_CASHFLOWS.is_active()
     rows = (
         db.session.query(
@@ -1665,32 +1933,48 @@ def generate_invoices() -> None:
     else:
         rows = rows.group_by(models.Cashflow.businessUnitId)
 
-    for row in rows:
-        try:
-            with transaction():
-                extra = {
-                    "business_unit_id": row.business_unit_id,
-                    "reimbursement_point_id": row.reimbursement_point_id,
-                }
-                with log_elapsed(logger, "Generated and sent invoice", extra):
-                    generate_and_store_invoice(
-                        business_unit_id=row.business_unit_id,
-                        reimbursement_point_id=row.reimbursement_point_id,
-                        cashflow_ids=row.cashflow_ids,
-                        use_reimbursement_point=use_reimbursement_point,
-                    )
-        except Exception as exc:  # pylint: disable=broad-except
-            if settings.IS_RUNNING_TESTS:
-                raise
-            logger.exception(
-                "Could not generate invoice",
-                extra={
-                    "business_unit": row.business_unit_id,
-                    "reimbursement_point_id": row.reimbursement_point_id,
-                    "cashflow_ids": row.cashflow_ids,
-                    "exc": str(exc),
-                },
-            )
+    def _generate_invoices() -> typing.Iterator[models.Invoice]:
+        for row in rows:
+            extra = {
+                "business_unit_id": row.business_unit_id,
+                "reimbursement_point_id": row.reimbursement_point_id,
+            }
+            try:
+                with transaction():
+                    with log_elapsed(logger, "Generated invoice model instance", extra):
+                        invoice = _generate_invoice(
+                            business_unit_id=row.business_unit_id,
+                            reimbursement_point_id=row.reimbursement_point_id,
+                            cashflow_ids=row.cashflow_ids,
+                        )
+            except Exception as exc:  # pylint: disable=broad-except
+                if settings.IS_RUNNING_TESTS:
+                    raise
+                logger.exception(
+                    "Could not generate invoice",
+                    extra={
+                        "business_unit": row.business_unit_id,
+                        "reimbursement_point_id": row.reimbursement_point_id,
+                        "cashflow_ids": row.cashflow_ids,
+                        "exc": str(exc),
+                    },
+                )
+                continue
+            yield invoice
+
+    # Start with invoices that a previous (crashed) run has generated
+    # but not stored.
+    invoices = itertools.chain(_get_invoices_without_pdf(), _generate_invoices())
+    if workers:
+        _store_and_send_invoices_in_parallel(invoices, use_reimbursement_point, workers)
+    else:
+        for invoice in invoices:
+            try:
+                _store_and_send_invoice(invoice, use_reimbursement_point)
+            except Exception as exc:  # pylint: disable=broad-except
+                if settings.IS_RUNNING_TESTS:
+                    raise
+                logger.exception("Could not store or send invoice", extra={"invoice": invoice.id, "exc": str(exc)})
     with log_elapsed(logger, "Generated CSV invoices file"):
         path = generate_invoice_file(datetime.date.today(), use_reimbursement_point)
     batch_id = models.CashflowBatch.query.order_by(models.CashflowBatch.cutoff.desc()).first().id
@@ -1754,9 +2038,9 @@ def generate_invoice_file(invoice_date: datetime.date, use_reimbursement_point:
     return _write_csv(
         "invoices",
         header,
-        rows=query,
+        rows=query.yield_per(CSV_QUERY_YIELD_PER),
         row_formatter=row_formatter,
-        compress=True,
+        compression="zip",
     )
 
 
@@ -1773,12 +2057,115 @@ def generate_and_store_invoice(
             reimbursement_point_id=reimbursement_point_id,
             cashflow_ids=cashflow_ids,
         )
+    _store_and_send_invoice(invoice, use_reimbursement_point)
+
+
+def _get_invoices_without_pdf() -> list[models.Invoice]:
+    """Return invoices whose PDF file has not been stored (or whose
+    e-mail has not been sent), because the process that generated
+    them crashed.
+    """
+    invoice_ids = {int(invoice_id) for invoice_id in current_app.redis_client.smembers(REDIS_INVOICES_WITHOUT_PDF)}
+    if not invoice_ids:
+        return []
+    invoices = models.Invoice.query.filter(models.Invoice.id.in_(invoice_ids)).order_by(models.Invoice.id).all()
+    # Invoices that have never been committed are not to be found.
+    if unknown_ids := invoice_ids - {invoice.id for invoice in invoices}:
+        current_app.redis_client.srem(REDIS_INVOICES_WITHOUT_PDF, *unknown_ids)
+    logger.info("Found invoices without PDF file", extra={"invoices": [invoice.id for invoice in invoices]})
+    return invoices
+
+
+def _store_and_send_invoice(invoice: models.Invoice, use_reimbursement_point: bool) -> None:
+    log_extra = {"invoice": invoice.id}
     with log_elapsed(logger, "Generated invoice HTML", log_extra):
         invoice_html = _generate_invoice_html(invoice, use_reimbursement_point)
     with log_elapsed(logger, "Generated and stored PDF invoice", log_extra):
         _store_invoice_pdf(invoice_storage_id=invoice.storage_object_id, invoice_html=invoice_html)
-    with log_elapsed(logger, "Sent invoice", log_extra):
+    _send_invoice(invoice, use_reimbursement_point)
+
+
+def _store_and_send_invoices_in_parallel(
+    invoices: typing.Iterable[models.Invoice],
+    use_reimbursement_point: bool,
+    workers: int,
+) -> None:
+    """Render PDF files of invoices in a pool of processes, then store
+    them by batches and send e-mails.
+
+    Everything that needs the database (including HTML rendering) is
+    done by the calling process, workers only turn HTML into PDF.
+    """
+    rendering: deque[tuple[models.Invoice, concurrent.futures.Future]] = deque()
+    rendered: list[tuple[models.Invoice, bytes]] = []
+
+    def _wait_for_oldest_rendering() -> None:
+        invoice, future = rendering.popleft()
+        try:
+            rendered.append((invoice, future.result()))
+        except Exception as exc:  # pylint: disable=broad-except
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception("Could not generate PDF invoice", extra={"invoice": invoice.id, "exc": str(exc)})
+
+    # Use "spawn" and not "fork", so that workers do not inherit the
+    # database connections (and the rest of the state) of this process.
+    mp_context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        for invoice in invoices:
+            try:
+                with log_elapsed(logger, "Generated invoice HTML", {"invoice": invoice.id}):
+                    invoice_html = _generate_invoice_html(invoice, use_reimbursement_point)
+            except Exception as exc:  # pylint: disable=broad-except
+                if settings.IS_RUNNING_TESTS:
+                    raise
+                logger.exception("Could not generate invoice HTML", extra={"invoice": invoice.id, "exc": str(exc)})
+                continue
+            rendering.append((invoice, executor.submit(pdf_utils.generate_pdf_from_html, invoice_html)))
+            # Keep workers busy, but do not hold too many PDF files
+            # in memory.
+            while len(rendering) > 2 * workers:
+                _wait_for_oldest_rendering()
+            if len(rendered) >= INVOICE_UPLOAD_BATCH_SIZE:
+                _store_and_send_rendered_invoices(rendered, use_reimbursement_point)
+                rendered.clear()
+        while rendering:
+            _wait_for_oldest_rendering()
+    _store_and_send_rendered_invoices(rendered, use_reimbursement_point)
+
+
+def _store_and_send_rendered_invoices(
+    rendered: list[tuple[models.Invoice, bytes]],
+    use_reimbursement_point: bool,
+) -> None:
+    if not rendered:
+        return
+    with log_elapsed(logger, "Stored batch of PDF invoices in object storage", {"invoices": len(rendered)}):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(rendered)) as executor:
+            futures = {
+                executor.submit(
+                    store_public_object,
+                    folder="invoices",
+                    object_id=invoice.storage_object_id,
+                    blob=invoice_pdf,
+                    content_type="application/pdf",
+                ): invoice
+                for invoice, invoice_pdf in rendered
+            }
+    for future, invoice in futures.items():
+        try:
+            future.result()
+            _send_invoice(invoice, use_reimbursement_point)
+        except Exception as exc:  # pylint: disable=broad-except
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception("Could not store or send invoice", extra={"invoice": invoice.id, "exc": str(exc)})
+
+
+def _send_invoice(invoice: models.Invoice, use_reimbursement_point: bool) -> None:
+    with log_elapsed(logger, "Sent invoice", {"invoice": invoice.id}):
         transactional_mails.send_invoice_available_to_pro_email(invoice, use_reimbursement_point)
+    current_app.redis_client.srem(REDIS_INVOICES_WITHOUT_PDF, invoice.id)
 
 
 def _generate_invoice(
@@ -1834,6 +2221,10 @@ def _generate_invoice(
     db.session.add(scheme)
     db.session.add(invoice)
     db.session.flush()
+    # Register the invoice before it is committed, so that its PDF
+    # file is generated by the next run if this one crashes before
+    # having stored it. See `_get_invoices_without_pdf()`.
+    current_app.redis_client.sadd(REDIS_INVOICES_WITHOUT_PDF, invoice.id)
     for line in invoice_lines:
         line.invoiceId = invoice.id
     db.session.bulk_save_objects(invoice_lines)
@@ -2184,7 +2575,11 @@ def merge_cashflow_batches(
 
 
 def reload_booking_for_pricing(booking_id: int, use_pricing_point: bool) -> bookings_models.Booking:
-    query = bookings_models.Booking.query.filter_by(id=booking_id).options(
+    return _get_booking_query_for_pricing(use_pricing_point).filter_by(id=booking_id).one()
+
+
+def _get_booking_query_for_pricing(use_pricing_point: bool) -> BaseQuery:
+    query = bookings_models.Booking.query.options(
         sqla_orm.joinedload(bookings_models.Booking.stock, innerjoin=True).joinedload(
             offers_models.Stock.offer, innerjoin=True
         ),
@@ -2201,7 +2596,7 @@ def reload_booking_for_pricing(booking_id: int, use_pricing_point: bool) -> book
             .joinedload(offerers_models.Venue.businessUnit, innerjoin=True)
             .joinedload(models.BusinessUnit.venue_links, innerjoin=True),
         )
-    return query.one()
+    return query
 
 
 def reload_collective_booking_for_pricing(booking_id: int, use_pricing_point: bool) -> CollectiveBooking:
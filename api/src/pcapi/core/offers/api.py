@@ -3,6 +3,7 @@ import decimal
 import logging
 from typing import List
 
+from flask import current_app
 from psycopg2.errorcodes import CHECK_VIOLATION
 from psycopg2.errorcodes import UNIQUE_VIOLATION
 import sentry_sdk
@@ -31,6 +32,7 @@ from pcapi.core.educational import models as educational_models
 import pcapi.core.mails.transactional as transactional_mails
 from pcapi.core.offerers.models import Venue
 from pcapi.core.offers import exceptions as offers_exceptions
+from pcapi.core.offers import offer_validation
 from pcapi.core.offers import validation
 from pcapi.core.offers.exceptions import OfferAlreadyReportedError
 from pcapi.core.offers.exceptions import ReportMalformed
@@ -41,8 +43,6 @@ from pcapi.core.offers.models import OfferValidationConfig
 from pcapi.core.offers.models import OfferValidationStatus
 from pcapi.core.offers.models import Product
 from pcapi.core.offers.models import Stock
-from pcapi.core.offers.offer_validation import compute_offer_validation_score
-from pcapi.core.offers.offer_validation import parse_offer_validation_config
 import pcapi.core.offers.repository as offers_repository
 from pcapi.core.offers.repository import update_stock_quantity_to_dn_booked_quantity
 from pcapi.core.offers.utils import as_utc_without_timezone
@@ -87,6 +87,11 @@ logger = logging.getLogger(__name__)
 
 OFFERS_RECAP_LIMIT = 501
 UNCHANGED = object()
+STOCK_CONSISTENCY_WATERMARK_KEY = "stock-consistency:watermark"
+# Bookings and stocks updated by transactions that were still running
+# when the previous check started may be committed with an earlier
+# date: re-check a bit before the watermark so that they are not missed.
+STOCK_CONSISTENCY_WATERMARK_OVERLAP = datetime.timedelta(minutes=10)
 
 
 def list_offers_for_pro_user(
@@ -116,6 +121,36 @@ def list_offers_for_pro_user(
     )
 
 
+def list_offers_page_for_pro_user(
+    user_id: int,
+    user_is_admin: bool,
+    limit: int,
+    after_id: int | None = None,
+    category_id: str | None = None,
+    offerer_id: int | None = None,
+    venue_id: int | None = None,
+    name_keywords_or_isbn: str | None = None,
+    status: str | None = None,
+    creation_mode: str | None = None,
+    period_beginning_date: str | None = None,
+    period_ending_date: str | None = None,
+) -> list:
+    return offers_repository.get_offers_page_for_filters(
+        user_id=user_id,
+        user_is_admin=user_is_admin,
+        limit=limit,
+        after_id=after_id,
+        offerer_id=offerer_id,
+        status=status,
+        venue_id=venue_id,
+        category_id=category_id,
+        name_keywords_or_isbn=name_keywords_or_isbn,
+        creation_mode=creation_mode,
+        period_beginning_date=period_beginning_date,
+        period_ending_date=period_ending_date,
+    )
+
+
 def create_offer(
     offer_data: PostOfferBodyModel,
     user: User,
@@ -926,14 +961,12 @@ def deactivate_permanently_unavailable_products(isbn: str) -> bool:
 def set_offer_status_based_on_fraud_criteria(
     offer: educational_models.CollectiveOffer | educational_models.CollectiveOfferTemplate | Offer,
 ) -> OfferValidationStatus:
-    current_config = offers_repository.get_current_offer_validation_config()
-    if not current_config:
+    program = offer_validation.get_offer_validation_program()
+    if not program:
         return OfferValidationStatus.APPROVED
 
-    minimum_score, validation_rules = parse_offer_validation_config(offer, current_config)
-
-    score = compute_offer_validation_score(validation_rules)
-    if score < minimum_score:
+    score = program.score(offer)
+    if score < program.minimum_score:
         status = OfferValidationStatus.PENDING
     else:
         status = OfferValidationStatus.APPROVED
@@ -987,6 +1020,8 @@ def import_offer_validation_config(config_as_yaml: str, user: User = None) -> Of
 
     config = OfferValidationConfig(specs=config_as_dict, user=user)  # type: ignore [arg-type]
     repository.save(config)
+    # Other processes compile the new config on their next check.
+    offer_validation.clear_offer_validation_program_cache()
     return config
 
 
@@ -1119,3 +1154,37 @@ def delete_unwanted_existing_product(isbn: str) -> None:
     favorites = users_models.Favorite.query.filter(users_models.Favorite.offerId.in_(offer_ids)).all()
     objects_to_delete = objects_to_delete + favorites
     repository.delete(*objects_to_delete)
+
+
+def check_stock_consistency(full: bool = False, dry_run: bool = False) -> tuple[int, list[int]]:
+    """Check (and fix, unless `dry_run` is set) the booked quantity of
+    stocks that have been modified or booked since the previous run,
+    or of all stocks if `full` is set or if there is no previous run.
+
+    Return the number of checked stocks and the ids of inconsistent
+    stocks.
+    """
+    started_at = datetime.datetime.utcnow()
+    watermark = None if full else current_app.redis_client.get(STOCK_CONSISTENCY_WATERMARK_KEY)  # type: ignore [attr-defined]
+    modified_since = (
+        datetime.datetime.fromisoformat(watermark) - STOCK_CONSISTENCY_WATERMARK_OVERLAP if watermark else None
+    )
+
+    checked, inconsistent_stock_ids = offers_repository.recompute_stocks_booked_quantity(
+        modified_since=modified_since, dry_run=dry_run
+    )
+    if not dry_run:
+        db.session.commit()
+        current_app.redis_client.set(STOCK_CONSISTENCY_WATERMARK_KEY, started_at.isoformat())  # type: ignore [attr-defined]
+
+    logger.info(
+        "Checked stock consistency",
+        extra={
+            "modified_since": modified_since.isoformat() if modified_since else None,
+            "checked": checked,
+            "inconsistent": len(inconsistent_stock_ids),
+            "fixed": 0 if dry_run else len(inconsistent_stock_ids),
+            "duration": round((datetime.datetime.utcnow() - started_at).total_seconds(), 3),
+        },
+    )
+    return checked, inconsistent_stock_ids
@@ -190,9 +190,5 @@ class CollectiveOfferNotFound(Exception):
     pass
 
 
-class UnapplicableModel(Exception):
-    ...
-
-
 class CannotDeleteProductWithBookings(Exception):
     pass
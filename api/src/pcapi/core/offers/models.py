@@ -128,7 +128,7 @@ class Stock(PcObject, Base, Model, ProvidableMixin, SoftDeletableMixin):  # type
         sa.DateTime, nullable=False, default=datetime.utcnow, server_default=sa.func.now()
     )
 
-    dateModified: datetime = sa.Column(sa.DateTime, nullable=False, default=datetime.utcnow)
+    dateModified: datetime = sa.Column(sa.DateTime, nullable=False, default=datetime.utcnow, index=True)
 
     beginningDatetime = sa.Column(sa.DateTime, index=True, nullable=True)
 
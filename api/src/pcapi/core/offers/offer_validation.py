@@ -1,12 +1,19 @@
 from dataclasses import dataclass
+import logging
+import operator
+import typing
 
 from pcapi.core.educational.models import CollectiveOffer
 from pcapi.core.educational.models import CollectiveOfferTemplate
-from pcapi.core.offers.exceptions import UnapplicableModel
 from pcapi.core.offers.models import Offer
 from pcapi.core.offers.models import OfferValidationConfig
-from pcapi.models.pc_object import PcObject
+import pcapi.core.offers.repository as offers_repository
 from pcapi.utils.custom_logic import OPERATIONS
+from pcapi.utils.custom_logic import sanitize_list
+from pcapi.utils.custom_logic import sanitize_str
+
+
+logger = logging.getLogger(__name__)
 
 
 OFFER_LIKE_MODELS = {
@@ -16,84 +23,191 @@ OFFER_LIKE_MODELS = {
 }
 
 
-@dataclass
-class OfferValidationItem:
-    model: PcObject
-    attribute: str
-    type: list[str]
-    condition: dict
+def _get_class_name(obj: any) -> str:  # type: ignore [valid-type]
+    return type(obj).__name__
 
-    def resolve(self) -> bool:
-        target_attribute = getattr(self.model, self.attribute)
-        return OPERATIONS[self.condition["operator"]](target_attribute, self.condition["comparated"])  # type: ignore[operator]
 
+# Compiled rules
+#
+# To score offers, the config is compiled once into an
+# `OfferValidationProgram`: for each offer class, rules that apply to
+# it, with a getter of the attribute (through the venue or offerer, if
+# needed) and a predicate built from the condition. Values of the
+# conditions (e.g. long lists of SIRENs) are sanitized once, at compile
+# time.
 
-@dataclass
-class OfferValidationRuleItem:
-    name: str
-    factor: float
-    offer_validation_items: list[OfferValidationItem]
+# Path from an offer to the model of a condition.
+_MODEL_PATHS = {
+    "Venue": "venue.",
+    "Offerer": "venue.managingOfferer.",
+}
 
-    def resolve(self) -> float:
-        if self.offer_validation_items:
-            if all(item.resolve() for item in self.offer_validation_items):
-                return self.factor
-        return 1.0
 
+def _get_model_path(offer_class: str, parameter_model: str | None) -> str | None:
+    if parameter_model in OFFER_LIKE_MODELS and offer_class == parameter_model:
+        return ""
+    if parameter_model == "CollectiveStock" and offer_class == CollectiveOffer.__name__:
+        return "collectiveStock."
+    return _MODEL_PATHS.get(parameter_model)  # type: ignore [arg-type]
 
-def _get_class_name(obj: any) -> str:  # type: ignore [valid-type]
-    return type(obj).__name__
 
+def _compile_in(comparated: typing.Any, negate: bool) -> typing.Callable[[typing.Any], bool]:
+    sanitized = sanitize_list(comparated)
+    try:
+        sanitized_set: typing.Collection = frozenset(sanitized)
+    except TypeError:
+        sanitized_set = sanitized
 
-def _get_model(offer: CollectiveOffer | CollectiveOfferTemplate | Offer, parameter_model: str) -> any:  # type: ignore [valid-type]
-    if parameter_model in OFFER_LIKE_MODELS and _get_class_name(offer) == parameter_model:
-        model = offer
-    elif parameter_model == "CollectiveStock" and isinstance(offer, CollectiveOffer):
-        model = offer.collectiveStock
-    elif parameter_model == "Venue":
-        model = offer.venue
-    elif parameter_model == "Offerer":
-        model = offer.venue.managingOfferer
-    else:
-        raise UnapplicableModel()
-    return model
-
-
-def parse_offer_validation_config(
-    offer: CollectiveOffer | CollectiveOfferTemplate | Offer, config: OfferValidationConfig
-) -> tuple[float, list[OfferValidationRuleItem]]:
-    minimum_score = float(config.specs["minimum_score"])
-    rules = config.specs["rules"]
-
-    rule_items = []
-    for rule in rules:
-        validation_items = []
-        for parameter in rule["conditions"]:
-            try:
-                model = _get_model(offer, parameter.get("model", None))
-            except UnapplicableModel:
-                break
+    def predicate(value: typing.Any) -> bool:
+        value = sanitize_str(value)
+        try:
+            found = value in sanitized_set
+        except TypeError:  # unhashable value
+            found = value in sanitized
+        return not found if negate else found
+
+    return predicate
+
+
+def _compile_contains(comparated: list) -> typing.Callable[[typing.Any], bool]:
+    sanitized = sanitize_list(comparated)
+
+    def predicate(value: typing.Any) -> bool:
+        if not value:
+            return False
+        value = sanitize_str(value)
+        return any(element in value for element in sanitized)
+
+    return predicate
 
-            validation_item = OfferValidationItem(
-                model=model,
-                attribute=parameter["attribute"],
-                type=parameter.get("type"),
-                condition=parameter["condition"],
-            )
-            validation_items.append(validation_item)
-        else:
-            if validation_items:
-                rule_item = OfferValidationRuleItem(
-                    name=rule["name"], factor=rule["factor"], offer_validation_items=validation_items
-                )
-                rule_items.append(rule_item)
-    return minimum_score, rule_items
 
+def _compile_contains_exact(comparated: list) -> typing.Callable[[typing.Any], bool]:
+    sanitized = sanitize_list(comparated)
 
-def compute_offer_validation_score(validation_items: list[OfferValidationRuleItem]) -> float:
-    score = 1.0
-    for validation_item in validation_items:
-        score *= validation_item.resolve()
-        if score == 0:
-            break
-    return score
+    def predicate(value: typing.Any) -> bool:
+        if not value or not sanitized:
+            return False
+        words = sanitize_list(value.split())
+        return any(element in words for element in sanitized)
+
+    return predicate
+
+
+def _compile_condition(condition: dict) -> typing.Callable[[typing.Any], bool]:
+    operation, comparated = condition["operator"], condition["comparated"]
+    # Fast paths for the usual operators and lists; they behave like
+    # `OPERATIONS`, which are used as is otherwise.
+    if isinstance(comparated, list):
+        if operation in ("in", "not in"):
+            return _compile_in(comparated, negate=operation == "not in")
+        if operation == "contains":
+            return _compile_contains(comparated)
+        if operation == "contains-exact":
+            return _compile_contains_exact(comparated)
+    function = OPERATIONS[operation]
+    return lambda value: function(value, comparated)  # type: ignore [operator]
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    getter: typing.Callable[[typing.Any], typing.Any]
+    predicate: typing.Callable[[typing.Any], bool]
+
+    def resolve(self, offer: typing.Any) -> bool:
+        return self.predicate(self.getter(offer))
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    name: str
+    factor: float
+    conditions: tuple[CompiledCondition, ...]
+
+    def resolve(self, offer: typing.Any) -> float:
+        if all(condition.resolve(offer) for condition in self.conditions):
+            return self.factor
+        return 1.0
+
+
+@dataclass(frozen=True)
+class OfferValidationProgram:
+    config_id: int
+    minimum_score: float
+    rules_by_offer_class: dict[str, tuple[CompiledRule, ...]]
+
+    def score(self, offer: CollectiveOffer | CollectiveOfferTemplate | Offer) -> float:
+        """Return the product of the factors of the rules whose
+        conditions are all met by the offer.
+        """
+        score = 1.0
+        for rule in self.rules_by_offer_class[_get_class_name(offer)]:
+            score *= rule.resolve(offer)
+            if score == 0:
+                break
+        return score
+
+    def score_many(
+        self, offers: typing.Iterable[CollectiveOffer | CollectiveOfferTemplate | Offer]
+    ) -> dict[int, float]:
+        """Return the score of each offer, by id.
+
+        Offers should have been loaded with their venue and offerer
+        (and collective stock), see
+        `offers_repository.get_pending_offers_for_validation()`.
+        """
+        return {offer.id: self.score(offer) for offer in offers}
+
+
+def compile_offer_validation_config(config: OfferValidationConfig) -> OfferValidationProgram:
+    rules_by_offer_class: dict[str, tuple[CompiledRule, ...]] = {}
+    for offer_class in OFFER_LIKE_MODELS:
+        rules = []
+        for rule in config.specs["rules"]:
+            conditions = []
+            for parameter in rule["conditions"]:
+                path = _get_model_path(offer_class, parameter.get("model", None))
+                if path is None:  # rule does not apply to this class
+                    break
+                conditions.append(
+                    CompiledCondition(
+                        getter=operator.attrgetter(path + parameter["attribute"]),
+                        predicate=_compile_condition(parameter["condition"]),
+                    )
+                )
+            else:
+                if conditions:
+                    rules.append(CompiledRule(name=rule["name"], factor=rule["factor"], conditions=tuple(conditions)))
+        rules_by_offer_class[offer_class] = tuple(rules)
+    return OfferValidationProgram(
+        config_id=config.id,
+        minimum_score=float(config.specs["minimum_score"]),
+        rules_by_offer_class=rules_by_offer_class,
+    )
+
+
+# Program of the current config, compiled once per process. Configs are
+# never updated (a new config is stored instead), so the program is
+# still valid as long as the id of the current config has not changed.
+_current_program: OfferValidationProgram | None = None
+
+
+def get_offer_validation_program() -> OfferValidationProgram | None:
+    """Return the compiled program of the current config, if any."""
+    global _current_program  # pylint: disable=global-statement
+
+    config_id = offers_repository.get_current_offer_validation_config_id()
+    if config_id is None:
+        return None
+    program = _current_program
+    if program is None or program.config_id != config_id:
+        config = OfferValidationConfig.query.get(config_id)
+        program = compile_offer_validation_config(config)
+        logger.info("Compiled offer validation config", extra={"config_id": config_id})
+        _current_program = program
+    return program
+
+
+def clear_offer_validation_program_cache() -> None:
+    global _current_program  # pylint: disable=global-statement
+
+    _current_program = None
@@ -11,6 +11,9 @@ from sqlalchemy import false
 from sqlalchemy import func
 from sqlalchemy import not_
 from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import true
 from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.exc import NoResultFound
@@ -34,6 +37,7 @@ from pcapi.core.offers.models import OfferValidationConfig
 from pcapi.core.offers.models import OfferValidationStatus
 from pcapi.core.offers.models import Product
 from pcapi.core.offers.models import Stock
+from pcapi.core.providers.models import Provider
 from pcapi.core.users.models import User
 from pcapi.domain.pro_offers.offers_recap import OffersRecap
 from pcapi.infrastructure.repository.pro_offers.offers_recap_domain_converter import to_domain
@@ -93,6 +97,106 @@ def get_capped_offers_for_filters(
     )
 
 
+def get_offers_page_for_filters(
+    user_id: int,
+    user_is_admin: bool,
+    limit: int,
+    after_id: int | None = None,
+    offerer_id: int | None = None,
+    status: str | None = None,
+    venue_id: int | None = None,
+    category_id: str | None = None,
+    name_keywords_or_isbn: str | None = None,
+    creation_mode: str | None = None,
+    period_beginning_date: str | None = None,
+    period_ending_date: str | None = None,
+) -> list:
+    """Return a page of (at most) ``limit`` offers, ordered by
+    descending id, that come after the ``after_id`` cursor.
+
+    Unlike `get_capped_offers_for_filters()`, only the columns shown
+    in the pro offer list are fetched, and stocks are aggregated by
+    offer in SQL, so that the cost of a page does not depend on the
+    number of offers (and stocks) of the offerer.
+    """
+    query = get_offers_by_filters(
+        user_id=user_id,
+        user_is_admin=user_is_admin,
+        offerer_id=offerer_id,
+        status=status,
+        venue_id=venue_id,
+        category_id=category_id,
+        name_keywords_or_isbn=name_keywords_or_isbn,
+        creation_mode=creation_mode,
+        period_beginning_date=period_beginning_date,  # type: ignore [arg-type]
+        period_ending_date=period_ending_date,  # type: ignore [arg-type]
+    )
+    if after_id is not None:
+        query = query.filter(Offer.id < after_id)
+    page = query.with_entities(Offer.id.label("id")).order_by(Offer.id.desc()).limit(limit).subquery()
+
+    stocks = (
+        Stock.query.join(page, page.c.id == Stock.offerId)
+        .filter(Stock.isSoftDeleted.is_(False))
+        .with_entities(
+            Stock.offerId.label("offerId"),
+            func.count(Stock.id).label("count"),
+            func.bool_or(Stock.quantity.is_(None)).label("hasUnlimitedQuantity"),
+            func.sum(Stock.remainingQuantity).label("remainingQuantity"),
+            func.bool_and(Stock.hasBookingLimitDatetimePassed).label("haveBookingLimitDatetimesPassed"),
+            func.bool_and(Stock.isSoldOut).label("areSoldOut"),
+        )
+        .group_by(Stock.offerId)
+        .subquery()
+    )
+    active_mediation = (
+        select(Mediation.id.label("id"), Mediation.thumbCount.label("thumbCount"))
+        .where(Mediation.offerId == Offer.id, Mediation.isActive)
+        .order_by(Mediation.dateCreated.desc())
+        .limit(1)
+        .lateral()
+    )
+
+    return (
+        Offer.query.join(page, page.c.id == Offer.id)
+        .join(Venue, Offer.venueId == Venue.id)
+        .join(Offerer, Venue.managingOffererId == Offerer.id)
+        .outerjoin(Product, Offer.productId == Product.id)
+        .outerjoin(Provider, Offer.lastProviderId == Provider.id)
+        .outerjoin(stocks, stocks.c.offerId == Offer.id)
+        .outerjoin(active_mediation, true())
+        .with_entities(
+            Offer.id,
+            Offer.name,
+            Offer.isActive,
+            Offer.subcategoryId,
+            Offer.status.label("status"),
+            # Same as `Offer.isEditable`
+            or_(Offer.lastProviderId.is_(None), Provider.localClass == "AllocineStocks").label("isEditable"),
+            Offer.extraData["isbn"].astext.label("isbn"),
+            Offer.extraData["isShowcase"].label("isShowcase"),
+            Product.id.label("productId"),
+            Product.thumbCount.label("productThumbCount"),
+            active_mediation.c.id.label("mediationId"),
+            active_mediation.c.thumbCount.label("mediationThumbCount"),
+            Venue.id.label("venueId"),
+            Venue.isVirtual.label("venueIsVirtual"),
+            Venue.managingOffererId.label("venueManagingOffererId"),
+            Venue.name.label("venueName"),
+            Venue.publicName.label("venuePublicName"),
+            Venue.departementCode.label("venueDepartementCode"),
+            Offerer.name.label("offererName"),
+            func.coalesce(stocks.c.count, 0).label("stocksCount"),
+            func.coalesce(stocks.c.hasUnlimitedQuantity, False).label("hasUnlimitedQuantity"),
+            func.coalesce(stocks.c.remainingQuantity, 0).label("remainingQuantity"),
+            func.coalesce(stocks.c.haveBookingLimitDatetimesPassed, False).label("hasBookingLimitDatetimesPassed"),
+            func.coalesce(stocks.c.areSoldOut, True).label("isSoldOut"),
+        )
+        .order_by(Offer.id.desc())
+        .all()
+    )
+
+
 def get_offers_by_ids(user: User, offer_ids: list[int]) -> BaseQuery:
     query = Offer.query
     if not user.has_admin_role:
@@ -386,6 +490,15 @@ def get_offers_map_by_id_at_provider(id_at_provider_list: list[str], venue: Venu
     return offers_map
 
 
+def get_offers_by_id_at_provider(id_at_provider_list: list[str], venue: Venue) -> dict[str, dict]:
+    offers = (
+        db.session.query(Offer.id, Offer.idAtProvider, Offer.lastProviderId)
+        .filter(Offer.idAtProvider.in_(id_at_provider_list), Offer.venue == venue)
+        .all()
+    )
+    return {offer.idAtProvider: {"id": offer.id, "last_provider_id": offer.lastProviderId} for offer in offers}
+
+
 def get_offers_map_by_venue_reference(id_at_provider_list: list[str], venue_id: int) -> dict[str, int]:
 
     offers_map = {}
@@ -405,14 +518,18 @@ def get_stocks_by_id_at_providers(id_at_providers: list[str]) -> dict:
         Stock.idAtProviders,
         Stock.dnBookedQuantity,
         Stock.quantity,
+        Stock.rawProviderQuantity,
         Stock.price,
+        Stock.lastProviderId,
     )
     return {
         stock.idAtProviders: {
             "id": stock.id,
             "booking_quantity": stock.dnBookedQuantity,
             "quantity": stock.quantity,
+            "raw_provider_quantity": stock.rawProviderQuantity,
             "price": stock.price,
+            "last_provider_id": stock.lastProviderId,
         }
         for stock in stocks
     }
@@ -474,18 +591,90 @@ def get_and_lock_stock(stock_id: int) -> Stock:
     return stock
 
 
-def check_stock_consistency() -> list[int]:
-    return [
-        item[0]
-        for item in db.session.query(Stock.id)
-        .outerjoin(Stock.bookings)
-        .group_by(Stock.id)
-        .having(
-            Stock.dnBookedQuantity
-            != func.coalesce(func.sum(Booking.quantity).filter(Booking.status != BookingStatus.CANCELLED), 0)
+def recompute_stocks_booked_quantity(
+    stock_ids: typing.Collection[int] | None = None,
+    modified_since: datetime | None = None,
+    dry_run: bool = False,
+) -> tuple[int, list[int]]:
+    """Compare the denormalized `dnBookedQuantity` of stocks with the
+    quantity of their non-cancelled bookings, and fix stocks that have
+    drifted in a single `UPDATE ... FROM` statement.
+
+    Only check stocks of `stock_ids` if given, or else only stocks that
+    have been modified, booked or whose bookings have been cancelled,
+    un-cancelled or used since `modified_since`. Otherwise, check all stocks.
+
+    Return the number of checked stocks and the ids of inconsistent
+    stocks (that have been fixed, unless `dry_run` is set).
+    """
+    params: dict[str, typing.Any] = {}
+    if stock_ids is not None:
+        scope = "WHERE stock.id IN :stock_ids"
+        params["stock_ids"] = tuple(stock_ids)
+    elif modified_since is not None:
+        # One query per indexed column, rather than a single query
+        # with `OR`, so that PostgreSQL does not scan the whole table.
+        scope = """
+        WHERE stock.id IN (
+          SELECT booking."stockId" FROM booking WHERE booking."dateCreated" >= :since
+          UNION
+          SELECT booking."stockId" FROM booking WHERE booking."cancellationDate" >= :since
+          UNION
+          -- Un-cancelled bookings have no cancellation date anymore,
+          -- but are marked as used.
+          SELECT booking."stockId" FROM booking WHERE booking."dateUsed" >= :since
+          UNION
+          SELECT modified_stock.id FROM stock AS modified_stock WHERE modified_stock."dateModified" >= :since
         )
-        .all()
-    ]
+        """
+        params["since"] = modified_since
+    else:
+        scope = ""
+
+    if dry_run:
+        inconsistent_stocks = """
+        SELECT stock_id AS id
+        FROM booked_quantity_per_stock
+        WHERE booked_quantity_per_stock.dn_booked_quantity != booked_quantity_per_stock.booked_quantity
+        """
+    else:
+        inconsistent_stocks = """
+        UPDATE stock
+        SET "dnBookedQuantity" = booked_quantity_per_stock.booked_quantity
+        FROM booked_quantity_per_stock
+        WHERE
+          stock.id = booked_quantity_per_stock.stock_id
+          AND booked_quantity_per_stock.dn_booked_quantity != booked_quantity_per_stock.booked_quantity
+        RETURNING stock.id
+        """
+
+    query = f"""
+      WITH booked_quantity_per_stock AS (
+        SELECT
+          stock.id AS stock_id,
+          stock."dnBookedQuantity" AS dn_booked_quantity,
+          COALESCE(SUM(booking.quantity), 0) AS booked_quantity
+        FROM stock
+        -- The `NOT status CANCELLED` condition MUST be part of the JOIN.
+        -- If it were part of the WHERE clause, that would exclude
+        -- stocks that only have cancelled bookings.
+        LEFT OUTER JOIN booking
+          ON booking."stockId" = stock.id
+          AND booking.status != '{BookingStatus.CANCELLED.value}'
+        {scope}
+        GROUP BY stock.id
+      ),
+      inconsistent_stock AS ({inconsistent_stocks})
+      SELECT
+        (SELECT COUNT(*) FROM booked_quantity_per_stock) AS checked,
+        ARRAY(SELECT id FROM inconsistent_stock ORDER BY id) AS inconsistent_stock_ids
+    """
+    checked, inconsistent_stock_ids = db.session.execute(text(query), params).one()
+    return checked, inconsistent_stock_ids
+
+
+def check_stock_consistency() -> list[int]:
+    return recompute_stocks_booked_quantity(dry_run=True)[1]
 
 
 def find_event_stocks_happening_in_x_days(number_of_days: int) -> BaseQuery:
@@ -509,6 +698,30 @@ def get_current_offer_validation_config() -> OfferValidationConfig | None:
     return OfferValidationConfig.query.order_by(OfferValidationConfig.id.desc()).first()
 
 
+def get_current_offer_validation_config_id() -> int | None:
+    return (
+        OfferValidationConfig.query.order_by(OfferValidationConfig.id.desc())
+        .with_entities(OfferValidationConfig.id)
+        .limit(1)
+        .scalar()
+    )
+
+
+def get_pending_offers_for_validation(
+    model: type[Offer] | type[CollectiveOffer] | type[CollectiveOfferTemplate], after_id: int, limit: int
+) -> list[Offer | CollectiveOffer | CollectiveOfferTemplate]:
+    """Return pending offers (by ascending id, after ``after_id``)
+    with everything that validation rules may look at: venue, offerer
+    and collective stock.
+    """
+    query = model.query.filter(model.validation == OfferValidationStatus.PENDING, model.id > after_id).options(
+        joinedload(model.venue).joinedload(Venue.managingOfferer)
+    )
+    if model is CollectiveOffer:
+        query = query.options(joinedload(CollectiveOffer.collectiveStock))
+    return query.order_by(model.id).limit(limit).all()
+
+
 def get_expired_offers(interval: List[datetime]) -> BaseQuery:
     """Return a query of offers whose latest booking limit occurs within
     the given interval.
@@ -0,0 +1,292 @@
+"""Keep track of the amounts spent on each deposit.
+
+The remaining credit of a deposit used to be computed by summing all
+its bookings whenever we needed it (see the `get_wallet_balance` SQL
+function and `users.api.get_domains_credit()`), i.e. on each booking
+attempt and each time the app fetches the account. Instead, we store
+on each deposit the amount spent in total and in each domain
+(digital and physical offers), and update them in the same
+transaction as the booking that is created, cancelled, uncancelled or
+deleted.
+
+Updates are done by session listeners (see `_collect_changes()` and
+`_apply_changes()`), so that all ORM-based changes are taken into
+account, whatever the code path. Bulk updates (`Query.update()`)
+bypass them: callers must call `recompute_deposits()` afterwards.
+
+Recredits do not need any special handling: they increase
+`Deposit.amount` and the remaining credit is the difference.
+
+Stored amounts are used only if the `USE_DEPOSIT_LEDGER` feature
+flag is active. `reconcile_deposits()` checks them against bookings
+(and fixes them if asked to).
+"""
+
+import dataclasses
+from decimal import Decimal
+import logging
+import typing
+
+import sqlalchemy as sa
+import sqlalchemy.orm as sa_orm
+
+import pcapi.core.bookings.models as bookings_models
+from pcapi.core.categories import subcategories
+import pcapi.core.offers.models as offers_models
+import pcapi.core.payments.models as payments_models
+from pcapi.models import db
+
+
+logger = logging.getLogger(__name__)
+
+_SESSION_INFO_KEY = "deposit_ledger_changes"
+_TRACKED_BOOKING_ATTRIBUTES = ("status", "amount", "quantity")
+_SPENT_AMOUNT_ATTRIBUTES = ("spentAmount", "spentDigitalAmount", "spentPhysicalAmount")
+
+
+@dataclasses.dataclass(frozen=True)
+class Spendings:
+    total: Decimal = Decimal("0")
+    digital: Decimal = Decimal("0")
+    physical: Decimal = Decimal("0")
+
+    def __add__(self, other: "Spendings") -> "Spendings":
+        return Spendings(
+            total=self.total + other.total,
+            digital=self.digital + other.digital,
+            physical=self.physical + other.physical,
+        )
+
+    def __neg__(self) -> "Spendings":
+        return Spendings(total=-self.total, digital=-self.digital, physical=-self.physical)
+
+    def __sub__(self, other: "Spendings") -> "Spendings":
+        return self + (-other)
+
+    def __bool__(self) -> bool:
+        return bool(self.total or self.digital or self.physical)
+
+
+def get_booking_spendings(amount: Decimal, quantity: int, is_digital: bool, subcategory_id: str) -> Spendings:
+    # Domains are the same as in `BaseSpecificCaps.digital_cap_applies()`
+    # and `physical_cap_applies()`, regardless of the caps of the
+    # deposit (they are taken into account when reading amounts).
+    total = amount * quantity
+    subcategory = subcategories.ALL_SUBCATEGORIES_DICT[subcategory_id]
+    return Spendings(
+        total=total,
+        digital=total if is_digital and subcategory.is_digital_deposit else Decimal("0"),
+        physical=total if not is_digital and subcategory.is_physical_deposit else Decimal("0"),
+    )
+
+
+def sum_bookings_spendings(bookings: typing.Iterable[bookings_models.Booking]) -> Spendings:
+    """Return amounts spent on the given (non-cancelled) bookings."""
+    spendings = Spendings()
+    for booking in bookings:
+        offer = booking.stock.offer
+        spendings += get_booking_spendings(booking.amount, booking.quantity, offer.isDigital, offer.subcategoryId)
+    return spendings
+
+
+def get_deposit_spendings(deposit: payments_models.Deposit) -> Spendings:
+    """Return amounts spent on the deposit, as stored on it."""
+    return Spendings(
+        total=deposit.spentAmount,
+        digital=deposit.spentDigitalAmount,
+        physical=deposit.spentPhysicalAmount,
+    )
+
+
+def compute_spendings(deposit_ids: typing.Collection[int]) -> dict[int, Spendings]:
+    """Return amounts spent on each requested deposit, computed from
+    its bookings.
+    """
+    spendings = {deposit_id: Spendings() for deposit_id in deposit_ids}
+    if not spendings:
+        return spendings
+
+    Booking = bookings_models.Booking
+    IndividualBooking = bookings_models.IndividualBooking
+    Offer = offers_models.Offer
+    Stock = offers_models.Stock
+    rows = (
+        Booking.query.join(IndividualBooking, Booking.individualBookingId == IndividualBooking.id)
+        .join(Stock, Booking.stockId == Stock.id)
+        .join(Offer, Stock.offerId == Offer.id)
+        .filter(
+            IndividualBooking.depositId.in_(spendings.keys()),
+            Booking.status != bookings_models.BookingStatus.CANCELLED,
+        )
+        .with_entities(IndividualBooking.depositId, Booking.amount, Booking.quantity, Offer.url, Offer.subcategoryId)
+    )
+    for deposit_id, amount, quantity, url, subcategory_id in rows:
+        # `bool(url)` is the same as `Offer.isDigital`.
+        spendings[deposit_id] += get_booking_spendings(amount, quantity, bool(url), subcategory_id)
+    return spendings
+
+
+def _lock_deposits(deposit_ids: typing.Collection[int]) -> None:
+    # Bookings update the deposit row (see `_apply_changes()`), so
+    # concurrent bookings wait for us, and we wait for them before
+    # reading bookings.
+    payments_models.Deposit.query.filter(payments_models.Deposit.id.in_(deposit_ids)).with_for_update().with_entities(
+        payments_models.Deposit.id
+    ).all()
+
+
+def _store_spendings(spendings: dict[int, Spendings]) -> None:
+    if not spendings:
+        return
+    table = payments_models.Deposit.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == sa.bindparam("deposit_id"))
+        .values(
+            spentAmount=sa.bindparam("total"),
+            spentDigitalAmount=sa.bindparam("digital"),
+            spentPhysicalAmount=sa.bindparam("physical"),
+        ),
+        [{"deposit_id": deposit_id, **dataclasses.asdict(amounts)} for deposit_id, amounts in spendings.items()],
+    )
+    for deposit_id in spendings:
+        _expire_deposit(db.session, deposit_id)
+
+
+def recompute_deposits(deposit_ids: typing.Collection[int]) -> None:
+    """Overwrite stored amounts of the requested deposits with amounts
+    computed from their bookings.
+
+    This must be called after bulk updates of bookings. The caller is
+    responsible for committing the transaction.
+    """
+    if not deposit_ids:
+        return
+    _lock_deposits(deposit_ids)
+    _store_spendings(compute_spendings(deposit_ids))
+
+
+def reconcile_deposits(deposit_ids: typing.Collection[int], fix: bool = False) -> list[int]:
+    """Compare stored amounts of the requested deposits with amounts
+    computed from their bookings, and return ids of deposits that do
+    not match. If ``fix`` is set, stored amounts are overwritten (and
+    the caller is responsible for committing the transaction).
+    """
+    if fix:
+        _lock_deposits(deposit_ids)
+    Deposit = payments_models.Deposit
+    stored = {
+        deposit_id: Spendings(total=total, digital=digital, physical=physical)
+        for deposit_id, total, digital, physical in Deposit.query.filter(Deposit.id.in_(deposit_ids)).with_entities(
+            Deposit.id, Deposit.spentAmount, Deposit.spentDigitalAmount, Deposit.spentPhysicalAmount
+        )
+    }
+    computed = compute_spendings(stored.keys())
+    mismatches = [deposit_id for deposit_id in stored if stored[deposit_id] != computed[deposit_id]]
+    for deposit_id in mismatches:
+        logger.warning(
+            "Found mismatch between stored and computed spendings of deposit",
+            extra={
+                "deposit_id": deposit_id,
+                "stored": dataclasses.asdict(stored[deposit_id]),
+                "computed": dataclasses.asdict(computed[deposit_id]),
+                "fixed": fix,
+            },
+        )
+    if fix:
+        _store_spendings({deposit_id: computed[deposit_id] for deposit_id in mismatches})
+    return mismatches
+
+
+def _get_booking_spendings(
+    booking: bookings_models.Booking, status: bookings_models.BookingStatus | None, amount: Decimal, quantity: int
+) -> Spendings:
+    if status == bookings_models.BookingStatus.CANCELLED:
+        return Spendings()
+    # `booking.stock` is not set on new bookings that were only given a `stockId`.
+    stock = booking.stock or offers_models.Stock.query.get(booking.stockId)
+    return get_booking_spendings(amount, quantity, stock.offer.isDigital, stock.offer.subcategoryId)
+
+
+def _get_committed_booking_spendings(booking: bookings_models.Booking) -> Spendings:
+    state = sa.inspect(booking)
+    histories = [state.attrs[attribute].history for attribute in _TRACKED_BOOKING_ATTRIBUTES]
+    if any(history.added and not history.deleted for history in histories):
+        # The attribute was set while it was not loaded (e.g. after a
+        # commit), so we do not know its previous value. The database
+        # does, since we are called before the flush.
+        committed = (
+            bookings_models.Booking.query.filter_by(id=booking.id)
+            .with_entities(*(getattr(bookings_models.Booking, attr) for attr in _TRACKED_BOOKING_ATTRIBUTES))
+            .one()
+        )
+    else:
+        committed = [
+            history.deleted[0] if history.deleted else getattr(booking, attribute)
+            for attribute, history in zip(_TRACKED_BOOKING_ATTRIBUTES, histories)
+        ]
+    return _get_booking_spendings(booking, *committed)
+
+
+def _collect_changes(session: sa_orm.Session, flush_context: typing.Any, instances: typing.Any) -> None:
+    # Deposit ids are not known yet if the deposit (or the individual
+    # booking) is about to be inserted, so we keep the individual
+    # booking and look at its `depositId` after the flush.
+    changes: list[tuple[bookings_models.IndividualBooking, Spendings]] = []
+    session.info[_SESSION_INFO_KEY] = changes
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, bookings_models.Booking) and obj.individualBooking:
+                changes.append(
+                    (obj.individualBooking, _get_booking_spendings(obj, obj.status, obj.amount, obj.quantity))
+                )
+        for obj in session.dirty:
+            if not isinstance(obj, bookings_models.Booking):
+                continue
+            state = sa.inspect(obj)
+            if not any(state.attrs[attribute].history.has_changes() for attribute in _TRACKED_BOOKING_ATTRIBUTES):
+                continue
+            if not obj.individualBooking:
+                continue
+            new = _get_booking_spendings(obj, obj.status, obj.amount, obj.quantity)
+            changes.append((obj.individualBooking, new - _get_committed_booking_spendings(obj)))
+        for obj in session.deleted:
+            if isinstance(obj, bookings_models.Booking) and obj.individualBooking:
+                changes.append((obj.individualBooking, -_get_committed_booking_spendings(obj)))
+
+
+def _apply_changes(session: sa_orm.Session, flush_context: typing.Any) -> None:
+    changes = session.info.pop(_SESSION_INFO_KEY, None)
+    if not changes:
+        return
+    deltas: dict[int, Spendings] = {}
+    for individual_booking, delta in changes:
+        if individual_booking.depositId is not None and delta:
+            deltas[individual_booking.depositId] = deltas.get(individual_booking.depositId, Spendings()) + delta
+
+    table = payments_models.Deposit.__table__
+    for deposit_id, delta in deltas.items():
+        if not delta:
+            continue
+        # Increment in SQL so that concurrent transactions that book
+        # on the same deposit do not overwrite each other.
+        session.execute(
+            table.update()
+            .where(table.c.id == deposit_id)
+            .values(
+                spentAmount=table.c.spentAmount + delta.total,
+                spentDigitalAmount=table.c.spentDigitalAmount + delta.digital,
+                spentPhysicalAmount=table.c.spentPhysicalAmount + delta.physical,
+            )
+        )
+        _expire_deposit(session, deposit_id)
+
+
+def _expire_deposit(session: sa_orm.Session, deposit_id: int) -> None:
+    deposit = session.identity_map.get(sa_orm.util.identity_key(payments_models.Deposit, deposit_id))
+    if deposit is not None:
+        session.expire(deposit, _SPENT_AMOUNT_ATTRIBUTES)
+
+
+sa.event.listen(sa_orm.Session, "before_flush", _collect_changes)
+sa.event.listen(sa_orm.Session, "after_flush_postexec", _apply_changes)
@@ -165,6 +165,12 @@ class Deposit(PcObject, Base, Model):  # type: ignore [valid-type, misc]
 
     recredits = relationship("Recredit", order_by="Recredit.dateCreated.desc()", back_populates="deposit")  # type: ignore [misc]
 
+    # Amounts spent on (non-cancelled) bookings of this deposit. They
+    # are kept up to date by `pcapi.core.payments.ledger`, see there.
+    spentAmount: Decimal = sa.Column(sa.Numeric(10, 2), nullable=False, server_default="0")
+    spentDigitalAmount: Decimal = sa.Column(sa.Numeric(10, 2), nullable=False, server_default="0")
+    spentPhysicalAmount: Decimal = sa.Column(sa.Numeric(10, 2), nullable=False, server_default="0")
+
     __table_args__ = (
         sa.UniqueConstraint(
             "userId",
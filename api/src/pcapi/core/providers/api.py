@@ -250,15 +250,14 @@ def synchronize_stocks(
     # here offers.id_at_providers is the "ref" field that provider api gives use.
     with log_elapsed(
         logger,
-        "get_offers_map_by_id_at_provider",
+        "get_offers_by_id_at_provider",
         extra={
             "venue": venue.id,
             "ref_count": len(offers_provider_references),
         },
     ):
-        offers_by_provider_reference = offers_repository.get_offers_map_by_id_at_provider(
-            offers_provider_references, venue
-        )
+        existing_offers = offers_repository.get_offers_by_id_at_provider(offers_provider_references, venue)
+    offers_by_provider_reference = {reference: offer["id"] for reference, offer in existing_offers.items()}
 
     products_references = [stock_detail.products_provider_reference for stock_detail in stock_details]
     with log_elapsed(
@@ -272,7 +271,9 @@ def synchronize_stocks(
         offers_by_venue_reference = offers_repository.get_offers_map_by_venue_reference(products_references, venue.id)
 
     offers_update_mapping = [
-        {"id": offer_id, "lastProviderId": provider_id} for offer_id in offers_by_provider_reference.values()
+        {"id": offer["id"], "lastProviderId": provider_id}
+        for offer in existing_offers.values()
+        if offer["last_provider_id"] != provider_id
     ]
     db.session.bulk_update_mappings(offers_models.Offer, offers_update_mapping)
 
@@ -293,7 +294,7 @@ def synchronize_stocks(
 
     stocks_provider_references = [stock.stocks_provider_reference for stock in stock_details]
     stocks_by_provider_reference = offers_repository.get_stocks_by_id_at_providers(stocks_provider_references)
-    update_stock_mapping, new_stocks, offer_ids = _get_stocks_to_upsert(
+    update_stock_mapping, new_stocks, offer_ids, unchanged_stocks_count = _get_stocks_to_upsert(
         stock_details,
         stocks_by_provider_reference,
         offers_by_provider_reference,
@@ -308,7 +309,13 @@ def synchronize_stocks(
 
     search.async_index_offer_ids(offer_ids)
 
-    return {"new_offers": len(new_offers), "new_stocks": len(new_stocks), "updated_stocks": len(update_stock_mapping)}
+    return {
+        "new_offers": len(new_offers),
+        "updated_offers": len(offers_update_mapping),
+        "new_stocks": len(new_stocks),
+        "updated_stocks": len(update_stock_mapping),
+        "unchanged_stocks": unchanged_stocks_count,
+    }
 
 
 def _build_new_offers_from_stock_details(
@@ -356,10 +363,11 @@ def _get_stocks_to_upsert(
     offers_by_provider_reference: dict[str, int],
     products_by_provider_reference: dict[str, offers_models.Product],
     provider_id: int | None,
-) -> tuple[list[dict], list[offers_models.Stock], set[int]]:
+) -> tuple[list[dict], list[offers_models.Stock], set[int], int]:
     update_stock_mapping = []
     new_stocks = []
     offer_ids = set()
+    unchanged_stocks_count = 0
 
     for stock_detail in stock_details:
         stock_provider_reference = stock_detail.stocks_provider_reference
@@ -383,15 +391,17 @@ def _get_stocks_to_upsert(
                     },
                 )
 
-            update_stock_mapping.append(
-                {
-                    "id": stock["id"],
-                    "quantity": stock_detail.available_quantity + stock["booking_quantity"],
-                    "rawProviderQuantity": stock_detail.available_quantity,
-                    "price": book_price,
-                    "lastProviderId": provider_id,
-                }
-            )
+            stock_mapping = {
+                "id": stock["id"],
+                "quantity": stock_detail.available_quantity + stock["booking_quantity"],
+                "rawProviderQuantity": stock_detail.available_quantity,
+                "price": book_price,
+                "lastProviderId": provider_id,
+            }
+            if _is_stock_unchanged(stock, stock_mapping):
+                unchanged_stocks_count += 1
+                continue
+            update_stock_mapping.append(stock_mapping)
             if _should_reindex_offer(stock_detail.available_quantity, book_price, stock):
                 offer_ids.add(offers_by_provider_reference[stock_detail.offers_provider_reference])
 
@@ -416,7 +426,19 @@ def _get_stocks_to_upsert(
             new_stocks.append(stock)
             offer_ids.add(stock.offerId)
 
-    return update_stock_mapping, new_stocks, offer_ids
+    return update_stock_mapping, new_stocks, offer_ids, unchanged_stocks_count
+
+
+def _is_stock_unchanged(existing_stock: dict, stock_mapping: dict) -> bool:
+    return (
+        existing_stock["quantity"] == stock_mapping["quantity"]
+        and existing_stock["raw_provider_quantity"] == stock_mapping["rawProviderQuantity"]
+        and existing_stock["last_provider_id"] == stock_mapping["lastProviderId"]
+        # `price` is a `Numeric(10, 2)` column, compare it with the new
+        # price as it would be stored.
+        and decimal.Decimal(str(existing_stock["price"])).quantize(decimal.Decimal("0.01"))
+        == decimal.Decimal(str(stock_mapping["price"])).quantize(decimal.Decimal("0.01"))
+    )
 
 
 def _build_stock_from_stock_detail(
@@ -1,7 +1,11 @@
 from collections.abc import Collection
+import dataclasses
 import logging
+import time
 from typing import Iterable
+from typing import Iterator
 
+from flask import current_app
 from sqlalchemy.orm import joinedload
 
 from pcapi import settings
@@ -11,6 +15,7 @@ from pcapi.core.offers.models import Offer
 from pcapi.core.search.backends import base
 from pcapi.models.feature import FeatureToggle
 from pcapi.repository import offer_queries
+from pcapi.utils import pipeline
 from pcapi.utils.module_loading import import_string
 
 
@@ -115,7 +120,11 @@ def async_index_offers_of_venue_ids(venue_ids: Iterable[int]) -> None:
         )
 
 
-def index_offers_in_queue(stop_only_when_empty: bool = False, from_error_queue: bool = False) -> None:
+def index_offers_in_queue(
+    stop_only_when_empty: bool = False,
+    from_error_queue: bool = False,
+    workers: int | None = None,
+) -> None:
     """Pop offers from indexation queue and reindex them.
 
     If ``from_error_queue`` is True, pop offers from the error queue
@@ -132,8 +141,44 @@ def index_offers_in_queue(stop_only_when_empty: bool = False, from_error_queue:
     If ``stop_only_when_empty`` is True (i.e. if called from the
     ``process_offers`` Flask command), we pop from the queue and stop
     only when the queue is empty.
+
+    If ``workers`` (which defaults to the
+    ``SEARCH_OFFER_INDEXING_WORKERS`` setting) is 0, chunks are
+    processed one after the other. Otherwise, chunks are processed by
+    a pipeline where loading (and serializing) offers and pushing them
+    to the external indexation service are overlapping stages, each
+    with ``workers`` threads.
     """
+    if workers is None:
+        workers = settings.SEARCH_OFFER_INDEXING_WORKERS
     backend = _get_backend()
+    chunks = _pop_offer_ids_chunks_from_queue(backend, stop_only_when_empty, from_error_queue)
+    if workers:
+        _index_offers_in_pipeline(backend, chunks, workers, from_error_queue)
+        return
+
+    for offer_ids in chunks:
+        try:
+            reindex_offer_ids(offer_ids)
+        except Exception as exc:  # pylint: disable=broad-except
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception(
+                "Exception while reindexing offers, must fix manually",
+                extra={"exc": str(exc), "offers": offer_ids},
+            )
+        else:
+            logger.info(
+                "Reindexed offers from queue",
+                extra={"count": len(offer_ids), "from_error_queue": from_error_queue},
+            )
+
+
+def _pop_offer_ids_chunks_from_queue(
+    backend: base.SearchBackend,
+    stop_only_when_empty: bool,
+    from_error_queue: bool,
+) -> Iterator[set[int]]:
     while True:
         # We must pop and not get-and-delete. Otherwise two concurrent
         # cron jobs could delete the wrong offers from the queue:
@@ -151,26 +196,89 @@ def index_offers_in_queue(stop_only_when_empty: bool = False, from_error_queue:
             break
 
         logger.info("Fetched offers from indexation queue", extra={"count": len(offer_ids)})
-        try:
-            reindex_offer_ids(offer_ids)
-        except Exception as exc:  # pylint: disable=broad-except
-            if settings.IS_RUNNING_TESTS:
-                raise
-            logger.exception(
-                "Exception while reindexing offers, must fix manually",
-                extra={"exc": str(exc), "offers": offer_ids},
-            )
-        else:
-            logger.info(
-                "Reindexed offers from queue",
-                extra={"count": len(offer_ids), "from_error_queue": from_error_queue},
-            )
+        yield offer_ids
 
         left_to_process = backend.count_offers_to_index_from_queue(from_error_queue=from_error_queue)
         if not stop_only_when_empty and left_to_process < settings.REDIS_OFFER_IDS_CHUNK_SIZE:
             break
 
 
+@dataclasses.dataclass
+class _OffersToReindex:
+    offer_ids: Collection[int]
+    objects: list[dict]
+    to_delete_ids: list[int]
+
+
+def _index_offers_in_pipeline(
+    backend: base.SearchBackend,
+    chunks: Iterable[set[int]],
+    workers: int,
+    from_error_queue: bool,
+) -> None:
+    # Each worker gets its own application context and thus its own
+    # SQLAlchemy session.
+    app = current_app._get_current_object()  # type: ignore [attr-defined]
+
+    def load_and_serialize(offer_ids: set[int]) -> _OffersToReindex:
+        local_backend = _get_backend()
+        objects, to_delete_ids = _get_offers_to_reindex(local_backend, offer_ids)
+        # some offers changes might make some venue ineligible for search
+        _reindex_venues_from_offers(offer_ids)
+        return _OffersToReindex(offer_ids=offer_ids, objects=objects, to_delete_ids=to_delete_ids)
+
+    def push(chunk: _OffersToReindex) -> None:
+        local_backend = _get_backend()
+        _index_serialized_offers(local_backend, chunk.objects)
+        _unindex_offer_ids(local_backend, chunk.to_delete_ids)
+        logger.info(
+            "Reindexed offers from queue",
+            extra={"count": len(chunk.offer_ids), "from_error_queue": from_error_queue},
+        )
+
+    start = time.perf_counter()
+    try:
+        stats = pipeline.run_pipeline(
+            source=chunks,
+            stages=[
+                pipeline.Stage("load", load_and_serialize, workers, context=app.app_context, count=len),
+                pipeline.Stage(
+                    "push",
+                    push,
+                    workers,
+                    context=app.app_context,
+                    count=lambda chunk: len(chunk.offer_ids),
+                ),
+            ],
+        )
+    except pipeline.PipelineError as exc:
+        if settings.IS_RUNNING_TESTS:
+            raise
+        # Failed chunks have already been popped from the queue: put
+        # them in the error queue so that they are retried.
+        offer_ids = sorted(
+            offer_id
+            for chunk in exc.failed_items
+            for offer_id in (chunk.offer_ids if isinstance(chunk, _OffersToReindex) else chunk)
+        )
+        logger.exception(
+            "Exception while reindexing offers in pipeline, will automatically retry",
+            extra={"exc": str(exc.__cause__), "backend": str(backend), "offers": offer_ids},
+        )
+        backend.enqueue_offer_ids_in_error(offer_ids)
+        return
+
+    logger.info(
+        "Finished reindexing offers from queue in pipeline",
+        extra={
+            "workers": workers,
+            "from_error_queue": from_error_queue,
+            "duration": round(time.perf_counter() - start, 3),
+            "stages": {name: stage_stats.to_dict() for name, stage_stats in stats.items()},
+        },
+    )
+
+
 def index_collective_offers_in_queue(from_error_queue: bool = False) -> None:
     """Pop collective offers from indexation queue and reindex them."""
     backend = _get_backend()
@@ -392,59 +500,69 @@ def reindex_offer_ids(offer_ids: Iterable[int]) -> None:
     """
     backend = _get_backend()
 
-    to_add = []
+    objects, to_delete_ids = _get_offers_to_reindex(backend, offer_ids)
+
+    # Handle new or updated available offers
+    _index_serialized_offers(backend, objects)
+
+    # Handle unavailable offers (deleted, expired, sold out, etc.)
+    _unindex_offer_ids(backend, to_delete_ids)
+
+    # some offers changes might make some venue ineligible for search
+    _reindex_venues_from_offers(offer_ids)
+
+
+def _get_offers_to_reindex(
+    backend: base.SearchBackend,
+    offer_ids: Iterable[int],
+) -> tuple[list[dict], list[int]]:
+    """Return payloads of offers that should be indexed and ids of
+    offers that should be unindexed.
+    """
     to_delete_ids = []
-    offers = (
-        Offer.query.options(joinedload(Offer.venue).joinedload(Venue.managingOfferer))
-        .options(joinedload(Offer.criteria))
-        .options(joinedload(Offer.mediations))
-        .options(joinedload(Offer.product))
-        .options(joinedload(Offer.stocks))
-        .filter(Offer.id.in_(offer_ids))
-    )
+    objects, ineligible_ids = backend.serialize_offers_eligible_for_search(offer_ids)
 
-    for offer in offers:
-        if offer and offer.is_eligible_for_search:
-            to_add.append(offer)
-        elif backend.check_offer_is_indexed(offer):
-            to_delete_ids.append(offer.id)
+    for offer_id in ineligible_ids:
+        if backend.check_offer_is_indexed(offer_id):
+            to_delete_ids.append(offer_id)
         else:
             # FIXME (dbaty, 2021-06-24). I think we could safely do
             # without the hashmap in Redis. Check the logs and see if
             # I am right!
             logger.info(
                 "Redis 'indexed_offers' set avoided unnecessary request to indexation service",
-                extra={"source": "reindex_offer_ids", "offer": offer.id},
+                extra={"source": "reindex_offer_ids", "offer": offer_id},
             )
+    return objects, to_delete_ids
 
-    # Handle new or updated available offers
+
+def _index_serialized_offers(backend: base.SearchBackend, objects: list[dict]) -> None:
     try:
-        backend.index_offers(to_add)
+        backend.index_serialized_offers(objects)
     except Exception as exc:  # pylint: disable=broad-except
         if settings.IS_RUNNING_TESTS:
             raise
+        offer_ids = [obj["objectID"] for obj in objects]
         logger.warning(
             "Could not reindex offers, will automatically retry",
-            extra={"exc": str(exc), "offers": [offer.id for offer in to_add]},
+            extra={"exc": str(exc), "offers": offer_ids},
             exc_info=True,
         )
-        backend.enqueue_offer_ids_in_error([offer.id for offer in to_add])
+        backend.enqueue_offer_ids_in_error(offer_ids)
 
-    # Handle unavailable offers (deleted, expired, sold out, etc.)
+
+def _unindex_offer_ids(backend: base.SearchBackend, offer_ids: list[int]) -> None:
     try:
-        backend.unindex_offer_ids(to_delete_ids)
+        backend.unindex_offer_ids(offer_ids)
     except Exception as exc:  # pylint: disable=broad-except
         if settings.IS_RUNNING_TESTS:
             raise
         logger.warning(
             "Could not unindex offers, will automatically retry",
-            extra={"exc": str(exc), "offers": to_delete_ids},
+            extra={"exc": str(exc), "offers": offer_ids},
             exc_info=True,
         )
-        backend.enqueue_offer_ids_in_error(to_delete_ids)
-
-    # some offers changes might make some venue ineligible for search
-    _reindex_venues_from_offers(offer_ids)
+        backend.enqueue_offer_ids_in_error(offer_ids)
 
 
 def unindex_offer_ids(offer_ids: Iterable[int]) -> None:
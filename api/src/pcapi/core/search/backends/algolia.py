@@ -1,3 +1,6 @@
+import decimal
+import hashlib
+import json
 import logging
 import re
 from typing import Iterable
@@ -32,6 +35,7 @@ REDIS_COLLECTIVE_OFFER_TEMPLATE_IDS_TO_INDEX = "search:algolia:collective-offer-
 REDIS_COLLECTIVE_OFFER_IDS_IN_ERROR_TO_INDEX = "search:algolia:collective-offer-ids-in-error-to-index"
 REDIS_COLLECTIVE_OFFER_TEMPLATE_IDS_IN_ERROR_TO_INDEX = "search:algolia:collective-offer-template-ids-in-error-to-index"
 REDIS_HASHMAP_INDEXED_OFFERS_NAME = "indexed_offers"
+REDIS_OFFER_PUSH_COUNTERS_NAME = "search:algolia:offer-push-counters"
 
 
 DEFAULT_LONGITUDE = 2.409289
@@ -40,6 +44,14 @@ DEFAULT_LATITUDE = 47.158459
 WORD_SPLITTER = re.compile(r"\W+")
 
 
+def get_payload_hash(payload: dict) -> str:
+    """Return a compact hash of a serialized object, to detect whether
+    it has changed since it was last indexed.
+    """
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.blake2b(serialized.encode(), digest_size=8).hexdigest()
+
+
 def url_path(url: str) -> str | None:
     """Return the path component of a URL.
 
@@ -198,42 +210,92 @@ class AlgoliaBackend(base.SearchBackend):
             logger.exception("Could not count offers left to index from queue")
             return 0
 
-    def check_offer_is_indexed(self, offer: offers_models.Offer) -> bool:
+    def check_offer_is_indexed(self, offer_id: int) -> bool:
         try:
-            return self.redis_client.hexists(REDIS_HASHMAP_INDEXED_OFFERS_NAME, offer.id)
+            return self.redis_client.hexists(REDIS_HASHMAP_INDEXED_OFFERS_NAME, offer_id)
         except redis.exceptions.RedisError:
             if settings.IS_RUNNING_TESTS:
                 raise
-            logger.exception("Could not check whether offer exists in cache", extra={"offer": offer.id})
+            logger.exception("Could not check whether offer exists in cache", extra={"offer": offer_id})
             # This function is only used to avoid an unnecessary
             # deletion request to Algolia if the offer is not in the
             # cache. Here we don't know, so we'll say it's in the
             # cache so that we do perform a request to Algolia.
             return True
 
-    def index_offers(self, offers: Iterable[offers_models.Offer]) -> None:
+    def index_offers(self, offers: Iterable[offers_models.Offer], force: bool = False) -> None:
         if not offers:
             return
         objects = [self.serialize_offer(offer) for offer in offers]
-        self.algolia_offers_client.save_objects(objects)
+        self.index_serialized_offers(objects, force=force)
+
+    def index_serialized_offers(self, objects: list[dict], force: bool = False) -> None:
+        """Index offers that have already been serialized with
+        ``serialize_offer()``.
+
+        Unless ``force`` is True, offers whose payload has not changed
+        since they were last indexed are not sent again (see
+        ``ALGOLIA_SKIP_UNCHANGED_OFFERS`` setting).
+        """
+        if not objects:
+            return
+        hashes = {obj["objectID"]: get_payload_hash(obj) for obj in objects}
+        to_push = objects
+        if settings.ALGOLIA_SKIP_UNCHANGED_OFFERS and not force:
+            previous_hashes = self._get_indexed_offer_hashes(list(hashes))
+            to_push = [obj for obj in objects if previous_hashes.get(obj["objectID"]) != hashes[obj["objectID"]]]
+
+        if to_push:
+            self.algolia_offers_client.save_objects(to_push)
+        self._record_offer_push_counters(pushed=len(to_push), skipped=len(objects) - len(to_push))
 
         try:
             # We used to store a summary of each offer, which is why
-            # we used hashmap and not a set. But since we don't need
-            # the value anymore, we can store the lightest object
-            # possible to make Redis use less memory. In the future,
-            # we may even remove the hashmap if it's not proven useful
-            # (see log in reindex_offer_ids)
-            offer_ids = [offer.id for offer in offers]
+            # we used hashmap and not a set. We now store a compact
+            # hash of the payload, to avoid sending offers that have
+            # not changed to Algolia.
+            offer_ids = [obj["objectID"] for obj in to_push]
             pipeline = self.redis_client.pipeline(transaction=True)
             for offer_id in offer_ids:
-                pipeline.hset(REDIS_HASHMAP_INDEXED_OFFERS_NAME, offer_id, "")
+                pipeline.hset(REDIS_HASHMAP_INDEXED_OFFERS_NAME, offer_id, hashes[offer_id])
             pipeline.execute()
         except Exception:  # pylint: disable=broad-except
             logger.exception("Could not add to list of indexed offers", extra={"offers": offer_ids})
         finally:
             pipeline.reset()
 
+    def _get_indexed_offer_hashes(self, offer_ids: list[int]) -> dict[int, str | None]:
+        try:
+            hashes = self.redis_client.hmget(REDIS_HASHMAP_INDEXED_OFFERS_NAME, offer_ids)
+        except redis.exceptions.RedisError:
+            if settings.IS_RUNNING_TESTS:
+                raise
+            # We don't know what has been indexed, send everything.
+            logger.exception("Could not get hashes of indexed offers", extra={"offers": offer_ids})
+            return {}
+        return dict(zip(offer_ids, hashes))
+
+    def _record_offer_push_counters(self, pushed: int, skipped: int) -> None:
+        logger.info("Indexed offers", extra={"pushed": pushed, "skipped": skipped})
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            pipeline.hincrby(REDIS_OFFER_PUSH_COUNTERS_NAME, "pushed", pushed)
+            pipeline.hincrby(REDIS_OFFER_PUSH_COUNTERS_NAME, "skipped", skipped)
+            pipeline.execute()
+        except redis.exceptions.RedisError:
+            logger.exception("Could not update counters of indexed offers")
+
+    def get_offer_push_counters(self) -> dict[str, int]:
+        """Return the number of offers that have been sent to Algolia
+        ("pushed") and that have not been sent because they had not
+        changed ("skipped"), since counters have been reset.
+        """
+        counters = self.redis_client.hgetall(REDIS_OFFER_PUSH_COUNTERS_NAME)
+        return {key: int(counters.get(key, 0)) for key in ("pushed", "skipped")}
+
+    def reset_offer_push_counters(self) -> None:
+        self.redis_client.delete(REDIS_OFFER_PUSH_COUNTERS_NAME)
+
     def index_collective_offers(
         self,
         collective_offers: Iterable[educational_models.CollectiveOffer],
@@ -327,7 +389,9 @@ class AlgoliaBackend(base.SearchBackend):
             ]
         date_created = offer.dateCreated.timestamp()
         stocks_date_created = [stock.dateCreated.timestamp() for stock in offer.bookableStocks]
-        tags = [criterion.name for criterion in offer.criteria]
+        # Tags and times are sorted to get a stable payload (see
+        # `algolia_bulk.serialize_offer_row()`), Algolia does not care.
+        tags = sorted(criterion.name for criterion in offer.criteria)
         extra_data = offer.extraData or {}
         artist = " ".join(extra_data.get(key, "") for key in ("author", "performer", "speaker", "stageDirector"))
 
@@ -363,7 +427,7 @@ class AlgoliaBackend(base.SearchBackend):
                 "subcategoryId": offer.subcategory.id,
                 "thumbUrl": url_path(offer.thumbUrl),
                 "tags": tags,
-                "times": list(set(times)),
+                "times": sorted(set(times)),
             },
             "offerer": {
                 "name": offerer.name,
@@ -379,6 +443,18 @@ class AlgoliaBackend(base.SearchBackend):
 
         return object_to_index
 
+    def serialize_offers_eligible_for_search(self, offer_ids: Iterable[int]) -> tuple[list[dict], list[int]]:
+        """Return payloads of the requested offers that are eligible
+        for search, and ids of the other offers.
+
+        Unlike ``serialize_offer()``, offers are not loaded as ORM
+        objects, which is much faster for large chunks of offers.
+        """
+        # pylint: disable=import-outside-toplevel
+        from pcapi.core.search.backends import algolia_bulk
+
+        return algolia_bulk.serialize_offers_eligible_for_search(offer_ids)
+
     @classmethod
     def serialize_venue(cls, venue: offerers_models.Venue) -> dict:
         social_medias = getattr(venue.contact, "social_medias", {})
@@ -480,9 +556,11 @@ class AlgoliaBackend(base.SearchBackend):
 
 
 def position(venue: offerers_models.Venue) -> dict[str, float]:
-    latitude = venue.latitude or DEFAULT_LATITUDE
-    longitude = venue.longitude or DEFAULT_LONGITUDE
-    return {"lat": float(latitude), "lng": float(longitude)}
+    return geoloc(venue.latitude, venue.longitude)
+
+
+def geoloc(latitude: decimal.Decimal | None, longitude: decimal.Decimal | None) -> dict[str, float]:
+    return {"lat": float(latitude or DEFAULT_LATITUDE), "lng": float(longitude or DEFAULT_LONGITUDE)}
 
 
 def _transform_collective_offer_template_id(collective_offer_template_id: int) -> str:
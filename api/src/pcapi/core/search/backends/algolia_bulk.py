@@ -0,0 +1,312 @@
+"""Serialize offers for Algolia in bulk.
+
+``AlgoliaBackend.serialize_offer`` walks the ORM relationships of
+each offer, which is fine for a handful of offers but makes
+reindexation of thousands of offers dominated by SQLAlchemy overhead.
+Here we load everything that the payload needs with a few set-based
+queries (one per table), and build payloads from plain rows.
+
+The output of ``serialize_offer_ids`` MUST be identical to what
+``AlgoliaBackend.serialize_offer`` returns. If you change one, change
+the other (``tests/core/search/test_serialize_algolia.py`` checks that
+they match).
+"""
+
+import dataclasses
+import datetime
+import decimal
+from typing import Iterable
+
+from pcapi import settings
+from pcapi.core.categories import subcategories
+from pcapi.core.categories import subcategories_v2
+import pcapi.core.criteria.models as criteria_models
+import pcapi.core.offerers.models as offerers_models
+import pcapi.core.offers.models as offers_models
+from pcapi.core.search.backends import algolia
+from pcapi.models.has_thumb_mixin import get_thumb_url
+from pcapi.models.offer_mixin import OfferValidationStatus
+import pcapi.utils.date as date_utils
+from pcapi.utils.human_ids import humanize
+
+
+@dataclasses.dataclass
+class StockRow:
+    price: decimal.Decimal
+    quantity: int | None
+    dnBookedQuantity: int
+    beginningDatetime: datetime.datetime | None
+    bookingLimitDatetime: datetime.datetime | None
+    dateCreated: datetime.datetime
+    isSoftDeleted: bool
+
+    def is_bookable(self, now: datetime.datetime) -> bool:
+        # Same as `Stock._bookable`, i.e. not expired and not sold out.
+        if self.isSoftDeleted:
+            return False
+        if self.beginningDatetime and self.beginningDatetime <= now:
+            return False
+        if self.bookingLimitDatetime and self.bookingLimitDatetime <= now:
+            return False
+        if self.quantity is not None and self.quantity - self.dnBookedQuantity <= 0:
+            return False
+        return True
+
+
+@dataclasses.dataclass
+class MediationRow:
+    id: int
+    dateCreated: datetime.datetime
+    isActive: bool
+    thumbCount: int
+
+
+@dataclasses.dataclass
+class OfferRow:
+    id: int
+    dateCreated: datetime.datetime
+    description: str | None
+    extraData: dict | None
+    isActive: bool
+    isDuo: bool
+    name: str
+    rankingWeight: int | None
+    subcategoryId: str
+    url: str | None
+    validation: OfferValidationStatus
+    productId: int
+    productThumbCount: int
+    venueId: int
+    venueName: str
+    venuePublicName: str | None
+    venueDepartementCode: str | None
+    venueLatitude: decimal.Decimal | None
+    venueLongitude: decimal.Decimal | None
+    venueIsValidated: bool
+    offererName: str
+    offererIsActive: bool
+    offererIsValidated: bool
+    stocks: list[StockRow] = dataclasses.field(default_factory=list)
+    mediations: list[MediationRow] = dataclasses.field(default_factory=list)
+    tags: list[str] = dataclasses.field(default_factory=list)
+
+    @property
+    def is_released(self) -> bool:
+        # Same as `Offer.isReleased`.
+        return (
+            self.isActive
+            and self.validation == OfferValidationStatus.APPROVED
+            and self.venueIsValidated
+            and self.offererIsActive
+            and self.offererIsValidated
+        )
+
+    def get_bookable_stocks(self, now: datetime.datetime) -> list[StockRow]:
+        if not self.is_released:
+            return []
+        return [stock for stock in self.stocks if stock.is_bookable(now)]
+
+    def is_eligible_for_search(self, now: datetime.datetime) -> bool:
+        # Same as `Offer.is_eligible_for_search`.
+        return bool(self.get_bookable_stocks(now))
+
+    @property
+    def thumb_url(self) -> str | None:
+        # Same as `Offer.thumbUrl`: the most recent active mediation
+        # wins, otherwise we fall back on the product.
+        active_mediations = sorted(
+            (mediation for mediation in self.mediations if mediation.isActive),
+            key=lambda mediation: mediation.dateCreated,
+            reverse=True,
+        )
+        if active_mediations and active_mediations[0].thumbCount:
+            return get_thumb_url(offers_models.Mediation.thumb_path_component, active_mediations[0].id)
+        if self.productThumbCount:
+            return get_thumb_url(offers_models.Product.thumb_path_component, self.productId)
+        return None
+
+
+def load_offer_rows(offer_ids: Iterable[int]) -> list[OfferRow]:
+    """Load all data needed to serialize the requested offers, with
+    one query per table.
+    """
+    offer_ids = list(offer_ids)
+    if not offer_ids:
+        return []
+
+    Offer = offers_models.Offer
+    Venue = offerers_models.Venue
+    Offerer = offerers_models.Offerer
+    Product = offers_models.Product
+    query = (
+        Offer.query.join(Venue, Offer.venueId == Venue.id)
+        .join(Offerer, Venue.managingOffererId == Offerer.id)
+        .join(Product, Offer.productId == Product.id)
+        .filter(Offer.id.in_(offer_ids))
+        .order_by(Offer.id)
+        .with_entities(
+            Offer.id,
+            Offer.dateCreated,
+            Offer.description,
+            Offer.extraData,
+            Offer.isActive,
+            Offer.isDuo,
+            Offer.name,
+            Offer.rankingWeight,
+            Offer.subcategoryId,
+            Offer.url,
+            Offer.validation,
+            Offer.productId,
+            Product.thumbCount.label("productThumbCount"),
+            Venue.id.label("venueId"),
+            Venue.name.label("venueName"),
+            Venue.publicName.label("venuePublicName"),
+            Venue.departementCode.label("venueDepartementCode"),
+            Venue.latitude.label("venueLatitude"),
+            Venue.longitude.label("venueLongitude"),
+            Venue.validationToken.is_(None).label("venueIsValidated"),
+            Offerer.name.label("offererName"),
+            Offerer.isActive.label("offererIsActive"),
+            Offerer.validationToken.is_(None).label("offererIsValidated"),
+        )
+    )
+    rows = {row.id: OfferRow(**row._asdict()) for row in query}
+    if not rows:
+        return []
+
+    Stock = offers_models.Stock
+    stocks = (
+        Stock.query.filter(Stock.offerId.in_(rows.keys()))
+        .order_by(Stock.id)
+        .with_entities(
+            Stock.offerId,
+            Stock.price,
+            Stock.quantity,
+            Stock.dnBookedQuantity,
+            Stock.beginningDatetime,
+            Stock.bookingLimitDatetime,
+            Stock.dateCreated,
+            Stock.isSoftDeleted,
+        )
+    )
+    for offer_id, *stock in stocks:
+        rows[offer_id].stocks.append(StockRow(*stock))
+
+    Mediation = offers_models.Mediation
+    mediations = (
+        Mediation.query.filter(Mediation.offerId.in_(rows.keys()))
+        .order_by(Mediation.id)
+        .with_entities(
+            Mediation.offerId,
+            Mediation.id,
+            Mediation.dateCreated,
+            Mediation.isActive,
+            Mediation.thumbCount,
+        )
+    )
+    for offer_id, *mediation in mediations:
+        rows[offer_id].mediations.append(MediationRow(*mediation))
+
+    OfferCriterion = criteria_models.OfferCriterion
+    Criterion = criteria_models.Criterion
+    tags = (
+        OfferCriterion.query.join(Criterion, OfferCriterion.criterionId == Criterion.id)
+        .filter(OfferCriterion.offerId.in_(rows.keys()))
+        .with_entities(OfferCriterion.offerId, Criterion.name)
+    )
+    for offer_id, name in tags:
+        rows[offer_id].tags.append(name)
+
+    return list(rows.values())
+
+
+def serialize_offer_row(row: OfferRow, now: datetime.datetime | None = None) -> dict:
+    """Return the same payload as ``AlgoliaBackend.serialize_offer``
+    for the corresponding offer.
+    """
+    now = now or datetime.datetime.utcnow()
+    subcategory = subcategories.ALL_SUBCATEGORIES_DICT[row.subcategoryId]
+    subcategory_v2 = subcategories_v2.ALL_SUBCATEGORIES_DICT[row.subcategoryId]
+    bookable_stocks = row.get_bookable_stocks(now)
+    prices_sorted = sorted((stock.price for stock in bookable_stocks), key=float)
+    dates = []
+    times = []
+    if subcategory.is_event:
+        dates = [stock.beginningDatetime.timestamp() for stock in bookable_stocks]  # type: ignore[union-attr]
+        times = [
+            date_utils.get_time_in_seconds_from_datetime(stock.beginningDatetime) for stock in bookable_stocks  # type: ignore[arg-type]
+        ]
+    stocks_date_created = [stock.dateCreated.timestamp() for stock in bookable_stocks]
+    # Same as `Offer.is_forbidden_to_underage`.
+    is_forbidden_to_underage = all(
+        (stock.price > 0 and not subcategory.is_bookable_by_underage_when_not_free)
+        or (stock.price == 0 and not subcategory.is_bookable_by_underage_when_free)
+        for stock in bookable_stocks
+    )
+    extra_data = row.extraData or {}
+    artist = " ".join(extra_data.get(key, "") for key in ("author", "performer", "speaker", "stageDirector"))
+
+    distinct = extra_data.get("isbn") or extra_data.get("visa") or str(row.id)
+    distinct += extra_data.get("diffusionVersion", "")
+
+    return {
+        "distinct": distinct,
+        "objectID": row.id,
+        "offer": {
+            "artist": artist.strip() or None,
+            "rankingWeight": row.rankingWeight,
+            "dateCreated": row.dateCreated.timestamp(),
+            "dates": sorted(dates),
+            "description": algolia.remove_stopwords(row.description or ""),
+            "isDigital": bool(row.url),
+            "isDuo": row.isDuo,
+            "isEducational": False,
+            "isEvent": subcategory.is_event,
+            "isForbiddenToUnderage": is_forbidden_to_underage,
+            "isThing": not subcategory.is_event,
+            "name": row.name,
+            "prices": prices_sorted,
+            "searchGroupName": subcategory.search_group_name,
+            "searchGroupNamev2": subcategory_v2.search_group_name,
+            "stocksDateCreated": sorted(stocks_date_created),
+            "students": extra_data.get("students") or [],
+            "subcategoryId": subcategory.id,
+            "thumbUrl": algolia.url_path(row.thumb_url),  # type: ignore[arg-type]
+            "tags": sorted(row.tags),
+            "times": sorted(set(times)),
+        },
+        "offerer": {
+            "name": row.offererName,
+        },
+        "venue": {
+            "departmentCode": row.venueDepartementCode,
+            "id": row.venueId,
+            "name": row.venueName,
+            "publicName": row.venuePublicName,
+        },
+        "_geoloc": algolia.geoloc(row.venueLatitude, row.venueLongitude),
+    }
+
+
+def serialize_offer_ids(offer_ids: Iterable[int]) -> dict[int, dict]:
+    """Return Algolia payloads of the requested offers, indexed by
+    offer id. Unknown ids are ignored.
+    """
+    now = datetime.datetime.utcnow()
+    return {row.id: serialize_offer_row(row, now) for row in load_offer_rows(offer_ids)}
+
+
+def serialize_offers_eligible_for_search(offer_ids: Iterable[int]) -> tuple[list[dict], list[int]]:
+    """Return Algolia payloads of the requested offers that are
+    eligible for search, and ids of the other offers. Unknown ids are
+    ignored.
+    """
+    now = datetime.datetime.utcnow()
+    objects = []
+    ineligible_ids = []
+    for row in load_offer_rows(offer_ids):
+        if row.is_eligible_for_search(now):
+            objects.append(serialize_offer_row(row, now))
+        else:
+            ineligible_ids.append(row.id)
+    return objects, ineligible_ids
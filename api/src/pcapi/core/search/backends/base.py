@@ -48,10 +48,16 @@ class SearchBackend:
     def count_offers_to_index_from_queue(self, from_error_queue: bool = False) -> int:
         raise NotImplementedError()
 
-    def check_offer_is_indexed(self, offer: "offers_models.Offer") -> bool:
+    def check_offer_is_indexed(self, offer_id: int) -> bool:
         raise NotImplementedError()
 
-    def index_offers(self, offers: "Iterable[offers_models.Offer]") -> None:
+    def index_offers(self, offers: "Iterable[offers_models.Offer]", force: bool = False) -> None:
+        raise NotImplementedError()
+
+    def index_serialized_offers(self, objects: list[dict], force: bool = False) -> None:
+        raise NotImplementedError()
+
+    def get_offer_push_counters(self) -> dict[str, int]:
         raise NotImplementedError()
 
     def index_collective_offers(self, collective_offers: "Iterable[educational_models.CollectiveOffer]") -> None:
@@ -107,6 +113,9 @@ class SearchBackend:
     def serialize_offer(cls, offer: "offers_models.Offer") -> dict:
         raise NotImplementedError()
 
+    def serialize_offers_eligible_for_search(self, offer_ids: Iterable[int]) -> tuple[list[dict], list[int]]:
+        raise NotImplementedError()
+
     @classmethod
     def serialize_venue(cls, venue: "offerers_models.Venue") -> dict:
         raise NotImplementedError()
@@ -20,6 +20,7 @@ import sqlalchemy.orm
 from pcapi import settings
 from pcapi.models import db
 from pcapi.models.feature import Feature
+from pcapi.models.feature import invalidate_feature_cache
 
 
 # 1. SELECT the user session.
@@ -270,19 +271,21 @@ class override_features(TestContextDecorator):
                 self.apply_to_revert[name] = not status
                 Feature.query.filter_by(name=name).update({"isActive": status})
                 db.session.commit()
-        # Clear the feature cache on request if any
+        # Clear the feature cache on request if any, and the process-wide cache
         if flask.has_request_context():
             if hasattr(flask.request, "_cached_features"):
                 flask.request._cached_features = {}  # type: ignore [attr-defined]
+        invalidate_feature_cache()
 
     def disable(self) -> None:
         for name, status in self.apply_to_revert.items():
             Feature.query.filter_by(name=name).update({"isActive": status})
             db.session.commit()
-        # Clear the feature cache on request if any
+        # Clear the feature cache on request if any, and the process-wide cache
         if flask.has_request_context():
             if hasattr(flask.request, "_cached_features"):
                 flask.request._cached_features = {}  # type: ignore [attr-defined]
+        invalidate_feature_cache()
 
 
 def clean_temporary_files(test_function: typing.Callable) -> typing.Callable:
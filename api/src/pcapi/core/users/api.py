@@ -19,6 +19,7 @@ from pcapi.core.fraud.common import models as common_fraud_models
 import pcapi.core.mails.transactional as transactional_mails
 import pcapi.core.offerers.api as offerers_api
 import pcapi.core.offerers.models as offerers_models
+from pcapi.core.payments import ledger as payments_ledger
 import pcapi.core.payments.api as payment_api
 from pcapi.core.subscription.phone_validation import exceptions as phone_validation_exceptions
 from pcapi.core.users import constants as users_constants
@@ -31,6 +32,7 @@ from pcapi.models import db
 from pcapi.models.api_errors import ApiErrors
 from pcapi.models.beneficiary_import import BeneficiaryImport
 from pcapi.models.beneficiary_import_status import BeneficiaryImportStatus
+from pcapi.models.feature import FeatureToggle
 from pcapi.repository import repository
 from pcapi.routes.serialization.users import ProUserCreationBodyModel
 from pcapi.tasks import batch_tasks
@@ -535,21 +537,25 @@ def get_domains_credit(
     if not user.deposit:
         return None
 
-    if user_bookings is None:
-        deposit_bookings = bookings_repository.get_bookings_from_deposit(user.deposit.id)
+    if FeatureToggle.USE_DEPOSIT_LEDGER.is_active():
+        spendings = payments_ledger.get_deposit_spendings(user.deposit)
     else:
-        deposit_bookings = [
-            booking
-            for booking in user_bookings
-            if booking.individualBooking is not None
-            and booking.individualBooking.depositId == user.deposit.id
-            and booking.status != bookings_models.BookingStatus.CANCELLED
-        ]
+        if user_bookings is None:
+            deposit_bookings = bookings_repository.get_bookings_from_deposit(user.deposit.id)
+        else:
+            deposit_bookings = [
+                booking
+                for booking in user_bookings
+                if booking.individualBooking is not None
+                and booking.individualBooking.depositId == user.deposit.id
+                and booking.status != bookings_models.BookingStatus.CANCELLED
+            ]
+        spendings = payments_ledger.sum_bookings_spendings(deposit_bookings)
 
     domains_credit = models.DomainsCredit(
         all=models.Credit(
             initial=user.deposit.amount,
-            remaining=max(user.deposit.amount - sum(booking.total_amount for booking in deposit_bookings), Decimal("0"))
+            remaining=max(user.deposit.amount - spendings.total, Decimal("0"))
             if user.has_active_deposit
             else Decimal("0"),
         ),
@@ -557,32 +563,22 @@ def get_domains_credit(
     specific_caps = user.deposit.specific_caps
 
     if specific_caps.DIGITAL_CAP:
-        digital_bookings_total = sum(
-            booking.total_amount
-            for booking in deposit_bookings
-            if specific_caps.digital_cap_applies(booking.stock.offer)
-        )
         domains_credit.digital = models.Credit(
             initial=specific_caps.DIGITAL_CAP,
             remaining=(
                 min(
-                    max(specific_caps.DIGITAL_CAP - digital_bookings_total, Decimal("0")),
+                    max(specific_caps.DIGITAL_CAP - spendings.digital, Decimal("0")),
                     domains_credit.all.remaining,
                 )
             ),
         )
 
     if specific_caps.PHYSICAL_CAP:
-        physical_bookings_total = sum(
-            booking.total_amount
-            for booking in deposit_bookings
-            if specific_caps.physical_cap_applies(booking.stock.offer)
-        )
         domains_credit.physical = models.Credit(
             initial=specific_caps.PHYSICAL_CAP,
             remaining=(
                 min(
-                    max(specific_caps.PHYSICAL_CAP - physical_bookings_total, Decimal("0")),
+                    max(specific_caps.PHYSICAL_CAP - spendings.physical, Decimal("0")),
                     domains_credit.all.remaining,
                 )
             ),
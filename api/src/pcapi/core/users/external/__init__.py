@@ -1,9 +1,15 @@
 from collections import defaultdict
 from dataclasses import dataclass
+from datetime import date
 from datetime import datetime
+from decimal import Decimal
+from typing import Collection
 from typing import List
 
+from flask_sqlalchemy import BaseQuery
+import sqlalchemy as sa
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 
 from pcapi.core.bookings.models import Booking
 from pcapi.core.bookings.models import BookingStatus
@@ -24,6 +30,7 @@ from pcapi.core.users.models import Favorite
 from pcapi.core.users.models import User
 from pcapi.core.users.repository import find_pro_user_by_email
 from pcapi.models import db
+from pcapi.models.feature import FeatureToggle
 
 from .batch import update_user_attributes as update_batch_user
 from .sendinblue import update_contact_attributes as update_sendinblue_user
@@ -56,6 +63,22 @@ def update_external_user(user: User, skip_batch: bool = False, skip_sendinblue:
             update_sendinblue_user(user.email, user_attributes)
 
 
+def update_external_user_later(user: User) -> None:
+    """Same as `update_external_user()`, but in a delayed task, so that
+    several changes of the same user within a minute result in a single
+    update.
+    """
+    from pcapi.tasks.sendinblue_tasks import update_user_attributes_task
+    from pcapi.tasks.serialization.sendinblue_tasks import UpdateUserAttributesRequest
+
+    if user.has_pro_role:
+        update_external_pro(user.email)
+        return
+
+    now = datetime.utcnow()
+    update_user_attributes_task.delay(UpdateUserAttributesRequest(user_id=user.id, time_id=f"{now.hour}:{now.minute}"))
+
+
 def update_external_pro(email: str | None) -> None:
     # Call this function instead of update_external_user in actions which are only available for pro
     # ex. updating a venue, in which bookingEmail is not a User parameter
@@ -170,20 +193,116 @@ def get_pro_attributes(email: str) -> ProAttributes:
 
 
 def get_user_attributes(user: User) -> UserAttributes:
-    from pcapi.core.fraud import api as fraud_api
-    from pcapi.core.users.api import get_domains_credit
-
     is_pro_user = user.has_pro_role or db.session.query(UserOfferer.query.filter_by(userId=user.id).exists()).scalar()
     user_bookings: List[Booking] = _get_user_bookings(user) if not is_pro_user else []
     last_favorite = (
         Favorite.query.filter_by(userId=user.id).order_by(Favorite.id.desc()).first() if not is_pro_user else None
     )
+
+    return _build_user_attributes(
+        user,
+        is_pro_user=is_pro_user,
+        user_bookings=user_bookings,
+        last_favorite_creation_date=last_favorite.dateCreated if last_favorite else None,  # type: ignore [attr-defined]
+        # Call only once to limit to one get_wallet_balance query
+        has_remaining_credit=user.has_remaining_credit,
+    )
+
+
+def get_bulk_user_attributes(user_ids: Collection[int]) -> dict[int, UserAttributes]:
+    """Same as `get_user_attributes()` for many users at once, with a
+    fixed number of queries whatever the number of users (instead of
+    several queries per user).
+
+    Unknown user ids are ignored.
+    """
+    if not user_ids:
+        return {}
+
+    users = (
+        User.query.filter(User.id.in_(user_ids))
+        .options(selectinload(User.deposits))  # type: ignore [attr-defined]
+        .options(selectinload(User.beneficiaryFraudChecks))  # type: ignore [attr-defined]
+        .options(selectinload(User.suspension_history))  # type: ignore [attr-defined]
+        .all()
+    )
+    if not users:
+        return {}
+    user_ids = [user.id for user in users]
+
+    user_offerer_user_ids = {
+        user_offerer.userId
+        for user_offerer in db.session.query(UserOfferer.userId).filter(UserOfferer.userId.in_(user_ids)).distinct()
+    }
+    pro_user_ids = {user.id for user in users if user.has_pro_role or user.id in user_offerer_user_ids}
+    non_pro_user_ids = [user_id for user_id in user_ids if user_id not in pro_user_ids]
+
+    bookings_by_user_id: dict[int, list[Booking]] = defaultdict(list)
+    last_favorite_creation_dates: dict[int, datetime] = {}
+    if non_pro_user_ids:
+        for booking in _get_users_bookings(non_pro_user_ids):
+            bookings_by_user_id[booking.individualBooking.userId].append(booking)
+        last_favorite_creation_dates = dict(
+            db.session.query(Favorite.userId, Favorite.dateCreated)
+            .filter(Favorite.userId.in_(non_pro_user_ids))
+            .distinct(Favorite.userId)
+            .order_by(Favorite.userId, Favorite.id.desc())
+        )
+
+    wallet_balances = _get_wallet_balances(users)
+
+    return {
+        user.id: _build_user_attributes(
+            user,
+            is_pro_user=user.id in pro_user_ids,
+            user_bookings=bookings_by_user_id.get(user.id, []),
+            last_favorite_creation_date=last_favorite_creation_dates.get(user.id),
+            has_remaining_credit=_has_remaining_credit(user, wallet_balances[user.id]),
+        )
+        for user in users
+    }
+
+
+def _get_wallet_balances(users: list[User]) -> dict[int, Decimal]:
+    """Return the same as `User.wallet_balance` for each user, in a
+    single query.
+    """
+    if FeatureToggle.USE_DEPOSIT_LEDGER.is_active():
+        # Stored amounts are already loaded along with deposits.
+        return {user.id: user.wallet_balance for user in users}
+    balances = dict(
+        db.session.query(User.id, sa.func.get_wallet_balance(User.id, False)).filter(
+            User.id.in_([user.id for user in users])
+        )
+    )
+    return {user_id: max(0, balance) for user_id, balance in balances.items()}
+
+
+def _has_remaining_credit(user: User, wallet_balance: Decimal) -> bool:
+    """Same as `User.has_remaining_credit`, with a wallet balance that
+    has already been fetched.
+    """
+    today = datetime.combine(date.today(), datetime.min.time())
+    return (
+        user.deposit is not None
+        and (user.deposit.expirationDate is None or user.deposit.expirationDate > today)
+        and wallet_balance > 0
+    )
+
+
+def _build_user_attributes(
+    user: User,
+    is_pro_user: bool,
+    user_bookings: list[Booking],
+    last_favorite_creation_date: datetime | None,
+    has_remaining_credit: bool,
+) -> UserAttributes:
+    from pcapi.core.fraud import api as fraud_api
+    from pcapi.core.users.api import get_domains_credit
+
     domains_credit = get_domains_credit(user, user_bookings) if not is_pro_user else None
     bookings_attributes = _get_bookings_categories_and_subcategories(user_bookings)
 
-    # Call only once to limit to one get_wallet_balance query
-    has_remaining_credit = user.has_remaining_credit
-
     # A user becomes a former beneficiary only after the last credit is expired or spent or can no longer be claimed
     is_former_beneficiary = (user.has_beneficiary_role and not has_remaining_credit) or (
         user.has_underage_beneficiary_role and get_eligibility_at_date(user.dateOfBirth, datetime.utcnow()) is None
@@ -213,7 +332,7 @@ def get_user_attributes(user: User) -> UserAttributes:
         is_phone_validated=user.is_phone_validated,  # type: ignore [arg-type]
         is_pro=is_pro_user,  # type: ignore [arg-type]
         last_booking_date=user_bookings[0].dateCreated if user_bookings else None,
-        last_favorite_creation_date=last_favorite.dateCreated if last_favorite else None,  # type: ignore [attr-defined]
+        last_favorite_creation_date=last_favorite_creation_date,
         last_name=user.lastName,
         last_visit_date=user.lastConnectionDate,
         marketing_email_subscription=user.get_notification_subscriptions().marketing_email,
@@ -268,6 +387,14 @@ def _get_bookings_categories_and_subcategories(user_bookings: list[Booking]) ->
 
 
 def _get_user_bookings(user: User) -> List[Booking]:
+    return _get_bookings_query().filter(IndividualBooking.userId == user.id).all()
+
+
+def _get_users_bookings(user_ids: Collection[int]) -> List[Booking]:
+    return _get_bookings_query().filter(IndividualBooking.userId.in_(user_ids)).all()
+
+
+def _get_bookings_query() -> BaseQuery:
     return (
         Booking.query.join(IndividualBooking, Booking.individualBookingId == IndividualBooking.id)
         .options(joinedload(Booking.individualBooking))
@@ -278,7 +405,8 @@ def _get_user_bookings(user: User) -> List[Booking]:
             .load_only(Offer.url, Offer.productId, Offer.subcategoryId)
             .joinedload(Offer.venue)
         )
-        .filter(IndividualBooking.userId == user.id, Booking.status != BookingStatus.CANCELLED)
-        .order_by(db.desc(Booking.dateCreated))
-        .all()
+        .filter(Booking.status != BookingStatus.CANCELLED)
+        # Booking id breaks ties so that attributes that depend on the
+        # order of bookings are the same when computed in bulk.
+        .order_by(db.desc(Booking.dateCreated), db.desc(Booking.id))
     )
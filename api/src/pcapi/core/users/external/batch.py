@@ -1,8 +1,17 @@
 from datetime import datetime
+import json
 import logging
+import time
+
+from flask import current_app
+import redis
 
 from pcapi.core.users.external.models import UserAttributes
+from pcapi.models.feature import FeatureToggle
+from pcapi.notifications.push import update_users_attributes
+from pcapi.notifications.push.backends.batch import UserUpdateData
 from pcapi.tasks import batch_tasks
+from pcapi.utils.requests import ExternalAPIException
 
 
 logger = logging.getLogger(__name__)
@@ -10,12 +19,29 @@ logger = logging.getLogger(__name__)
 
 BATCH_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 
+# Latest attributes of each queued user (user id -> JSON attributes)
+REDIS_USER_ATTRIBUTES_QUEUE_NAME = "batch:user-attributes:queue"
+# When each queued user has been queued for the first time since the
+# last flush (user id -> timestamp), which is also the flush order.
+REDIS_USER_ATTRIBUTES_ENQUEUED_AT_NAME = "batch:user-attributes:enqueued-at"
+REDIS_USER_ATTRIBUTES_COUNTERS_NAME = "batch:user-attributes:counters"
+
+# Maximum number of users accepted by the Batch API in a single request
+MAX_USERS_PER_REQUEST = 1000
+
 
 def update_user_attributes(user_id: int, user_attributes: UserAttributes) -> None:
     if user_attributes.is_pro:
         return
 
     formatted_attributes = format_user_attributes(user_attributes)
+    if FeatureToggle.BATCH_COALESCE_USER_ATTRIBUTES_UPDATES.is_active():
+        try:
+            enqueue_user_attributes(user_id, formatted_attributes)
+            return
+        except redis.exceptions.RedisError:
+            logger.exception("Could not enqueue Batch user attributes", extra={"user_id": user_id})
+
     payload = batch_tasks.UpdateBatchAttributesRequest(attributes=formatted_attributes, user_id=user_id)
 
     batch_tasks.update_user_attributes_android_task.delay(payload)
@@ -57,3 +83,136 @@ def format_user_attributes(user_attributes: UserAttributes) -> dict:
 
 def _format_date(date: datetime | None) -> str | None:
     return date.strftime(BATCH_DATETIME_FORMAT) if date else None
+
+
+def enqueue_user_attributes(user_id: int, attributes: dict) -> None:
+    """Queue attributes of a user, to be sent later along with those of
+    other users (see `flush_user_attributes_queue()`).
+
+    If the user is already in the queue, the new attributes replace the
+    previous ones, and the user keeps its place in the queue.
+    """
+    pipeline = current_app.redis_client.pipeline(transaction=True)  # type: ignore [attr-defined]
+    pipeline.hset(REDIS_USER_ATTRIBUTES_QUEUE_NAME, user_id, json.dumps(attributes))
+    pipeline.zadd(REDIS_USER_ATTRIBUTES_ENQUEUED_AT_NAME, {user_id: time.time()}, nx=True)
+    pipeline.hincrby(REDIS_USER_ATTRIBUTES_COUNTERS_NAME, "enqueued", 1)
+    pipeline.execute()
+
+
+def flush_user_attributes_queue(batch_size: int = MAX_USERS_PER_REQUEST) -> int:
+    """Send queued attributes to Batch, oldest first, by batches of
+    `batch_size` users (i.e. a single request per platform for each
+    batch), and return the number of users that have been sent.
+
+    If Batch fails temporarily, the users of the failed batch are put
+    back in the queue (unless they have been queued again in the
+    meantime) and the flush stops there. If Batch rejects the batch,
+    its users are sent one by one through tasks.
+    """
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    sent = 0
+    while True:
+        oldest = redis_client.zrange(REDIS_USER_ATTRIBUTES_ENQUEUED_AT_NAME, 0, batch_size - 1, withscores=True)
+        if not oldest:
+            break
+        enqueued_at = {int(user_id): score for user_id, score in oldest}
+        user_ids = list(enqueued_at)
+
+        pipeline = redis_client.pipeline(transaction=True)
+        pipeline.hmget(REDIS_USER_ATTRIBUTES_QUEUE_NAME, user_ids)
+        pipeline.hdel(REDIS_USER_ATTRIBUTES_QUEUE_NAME, *user_ids)
+        pipeline.zrem(REDIS_USER_ATTRIBUTES_ENQUEUED_AT_NAME, *user_ids)
+        payloads, _, _ = pipeline.execute()
+        # A payload may be missing if another flush popped the same
+        # user in the meantime.
+        payloads_by_user_id = {user_id: payload for user_id, payload in zip(user_ids, payloads) if payload is not None}
+        if not payloads_by_user_id:
+            continue
+
+        users_data = [
+            UserUpdateData(user_id=str(user_id), attributes=json.loads(payload))
+            for user_id, payload in payloads_by_user_id.items()
+        ]
+        try:
+            # Server errors of Batch are retryable: the batch is put
+            # back in the queue instead of being sent by tasks.
+            update_users_attributes(users_data, can_be_asynchronously_retried=True)
+        except ExternalAPIException as exc:
+            logger.exception(
+                "Could not flush Batch user attributes",
+                extra={"users": len(users_data), "is_retryable": exc.is_retryable},
+            )
+            if exc.is_retryable:
+                _requeue_user_attributes(payloads_by_user_id, enqueued_at)
+                break
+            # Batch rejected the batch itself: retrying it would block
+            # the queue forever. Send each user separately instead, so
+            # that only invalid users fail.
+            _send_user_attributes_by_tasks(users_data)
+            redis_client.hincrby(REDIS_USER_ATTRIBUTES_COUNTERS_NAME, "sent_by_tasks", len(users_data))
+            continue
+
+        now = time.time()
+        latencies = [now - enqueued_at[user_id] for user_id in payloads_by_user_id]
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.hincrby(REDIS_USER_ATTRIBUTES_COUNTERS_NAME, "flushed", len(users_data))
+        pipeline.hincrby(REDIS_USER_ATTRIBUTES_COUNTERS_NAME, "flushes", 1)
+        pipeline.hincrbyfloat(REDIS_USER_ATTRIBUTES_COUNTERS_NAME, "latency", sum(latencies))
+        pipeline.execute()
+        sent += len(users_data)
+        logger.info(
+            "Flushed Batch user attributes",
+            extra={
+                "users": len(users_data),
+                "max_latency": round(max(latencies), 3),
+                "mean_latency": round(sum(latencies) / len(latencies), 3),
+            },
+        )
+
+    return sent
+
+
+def _requeue_user_attributes(payloads_by_user_id: dict[int, str], enqueued_at: dict[int, float]) -> None:
+    pipeline = current_app.redis_client.pipeline(transaction=True)  # type: ignore [attr-defined]
+    for user_id, payload in payloads_by_user_id.items():
+        pipeline.hsetnx(REDIS_USER_ATTRIBUTES_QUEUE_NAME, user_id, payload)
+        pipeline.zadd(REDIS_USER_ATTRIBUTES_ENQUEUED_AT_NAME, {user_id: enqueued_at[user_id]}, nx=True)
+    pipeline.execute()
+
+
+def _send_user_attributes_by_tasks(users_data: list[UserUpdateData]) -> None:
+    for user_data in users_data:
+        payload = batch_tasks.UpdateBatchAttributesRequest(
+            attributes=user_data.attributes, user_id=int(user_data.user_id)
+        )
+        batch_tasks.update_user_attributes_android_task.delay(payload)
+        batch_tasks.update_user_attributes_ios_task.delay(payload)
+
+
+def get_user_attributes_queue_metrics() -> dict:
+    """Return metrics of the queue since counters have been reset:
+
+    - the number of updates that have been queued, of users that have
+      been sent and of flushes (each flush is one request per
+      platform, instead of one request per update and per platform);
+    - the coalescing ratio: number of updates per user that has been
+      sent;
+    - the mean flush latency: how long users waited in the queue, in
+      seconds.
+    """
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    counters = redis_client.hgetall(REDIS_USER_ATTRIBUTES_COUNTERS_NAME)
+    enqueued = int(counters.get("enqueued", 0))
+    flushed = int(counters.get("flushed", 0))
+    return {
+        "enqueued": enqueued,
+        "flushed": flushed,
+        "flushes": int(counters.get("flushes", 0)),
+        "pending": redis_client.zcard(REDIS_USER_ATTRIBUTES_ENQUEUED_AT_NAME),
+        "coalescing_ratio": round(enqueued / flushed, 2) if flushed else None,
+        "mean_latency": round(float(counters.get("latency", 0)) / flushed, 3) if flushed else None,
+    }
+
+
+def reset_user_attributes_queue_metrics() -> None:
+    current_app.redis_client.delete(REDIS_USER_ATTRIBUTES_COUNTERS_NAME)  # type: ignore [attr-defined]
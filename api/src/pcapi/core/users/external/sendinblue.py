@@ -6,6 +6,7 @@ import logging
 from typing import Any
 from typing import Callable
 from typing import Iterable
+from typing import Sequence
 import urllib.parse
 
 from flask import url_for
@@ -342,6 +343,22 @@ def _send_import_request(
     return import_response.process_id
 
 
+# Add contacts API is limited to 150 email addresses:
+# https://developers.sendinblue.com/reference/addcontacttolist-1
+# So use bulk import (up to 8 MB CSV data):
+# https://developers.sendinblue.com/reference/importcontacts-1
+# Let's put 200k emails addresses per API call, which allows an average email length of 41 characters to ensure
+# that the body is not bigger than 8 MB. Reading statistics, the average address length is between 20 and 25.
+# We are safe :-)
+MAX_EMAILS_PER_IMPORT = 200000
+
+
+def _get_contacts_api() -> ContactsApi:
+    configuration = sib_api_v3_sdk.Configuration()
+    configuration.api_key["api-key"] = settings.SENDINBLUE_API_KEY
+    return sib_api_v3_sdk.ContactsApi(sib_api_v3_sdk.ApiClient(configuration))
+
+
 def add_contacts_to_list(user_emails: Iterable[str], sib_list_id: int) -> bool:
     """
     Fills in a list of contacts using Sendinblue API.
@@ -357,27 +374,16 @@ def add_contacts_to_list(user_emails: Iterable[str], sib_list_id: int) -> bool:
         bool: True when successful, False otherwise
     """
 
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key["api-key"] = settings.SENDINBLUE_API_KEY
-    contacts_api_instance: ContactsApi = sib_api_v3_sdk.ContactsApi(sib_api_v3_sdk.ApiClient(configuration))
+    contacts_api_instance = _get_contacts_api()
 
     iteration = 1
 
-    # Add contacts API is limited to 150 email addresses:
-    # https://developers.sendinblue.com/reference/addcontacttolist-1
-    # So use bulk import (up to 8 MB CSV data):
-    # https://developers.sendinblue.com/reference/importcontacts-1
-    try:
-        # Let's put 200k emails addresses per API call, which allows an average email length of 41 characters to ensure
-        # that the body is not bigger than 8 MB. Reading statistics, the average address length is between 20 and 25.
-        # We are safe :-)
-        max_emails_per_import = 200000
-
-        def chunk(it, size) -> Iterable:  # type: ignore [no-untyped-def]
-            it = iter(it)
-            return iter(lambda: tuple(islice(it, size)), ())
+    def chunk(it, size) -> Iterable:  # type: ignore [no-untyped-def]
+        it = iter(it)
+        return iter(lambda: tuple(islice(it, size)), ())
 
-        for emails in chunk(user_emails, max_emails_per_import):
+    try:
+        for emails in chunk(user_emails, MAX_EMAILS_PER_IMPORT):
             file_body = "EMAIL\n" + "\n".join(emails)
             _send_import_request(contacts_api_instance, sib_list_id, iteration, len(emails), file_body)
             iteration += 1
@@ -393,3 +399,14 @@ def add_contacts_to_list(user_emails: Iterable[str], sib_list_id: int) -> bool:
         return False
 
     return True
+
+
+def import_contacts_in_list(user_emails: Sequence[str], sib_list_id: int, iteration: int) -> int:
+    """Add a single chunk of contacts (at most `MAX_EMAILS_PER_IMPORT`)
+    to a list, and return the id of the import process.
+
+    Unlike `add_contacts_to_list()`, exceptions are not caught: it is
+    up to the caller to decide what to do with the other chunks.
+    """
+    file_body = "EMAIL\n" + "\n".join(user_emails)
+    return _send_import_request(_get_contacts_api(), sib_list_id, iteration, len(user_emails), file_body)
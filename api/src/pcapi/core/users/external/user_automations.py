@@ -1,48 +1,153 @@
+from collections import deque
 from collections.abc import Iterable
+import concurrent.futures
 from datetime import date
 from datetime import datetime
+from itertools import islice
+import logging
 from math import ceil
+import time
 from typing import List
 
 from dateutil.relativedelta import relativedelta
+from flask import current_app
 from flask_sqlalchemy import BaseQuery
+from sib_api_v3_sdk.rest import ApiException as SendinblueApiException
 from sqlalchemy import func
 from sqlalchemy.sql.expression import and_
 from sqlalchemy.sql.expression import or_
 
 from pcapi import settings
+from pcapi.core.bookings.models import Booking
+from pcapi.core.bookings.models import BookingStatus
+from pcapi.core.bookings.models import IndividualBooking
 from pcapi.core.payments.models import Deposit
 from pcapi.core.users.external import update_external_user
-from pcapi.core.users.external.sendinblue import add_contacts_to_list
+from pcapi.core.users.external.sendinblue import MAX_EMAILS_PER_IMPORT
+from pcapi.core.users.external.sendinblue import import_contacts_in_list
 from pcapi.core.users.models import User
 from pcapi.models import db
+from pcapi.models.feature import FeatureToggle
+from pcapi.tasks import cloud_task
 
 
+logger = logging.getLogger(__name__)
+
 YIELD_COUNT_PER_DB_QUERY = 1000
 
 # 4 or 5 leap years in 18 years
 DAYS_IN_18_YEARS = 365 * 14 + 366 * 4
 
+# A failed automation resumes from its checkpoint only if it is run
+# again the same day.
+CHECKPOINT_TTL = 24 * 60 * 60
+
+
+def _get_checkpoint_key(automation_name: str) -> str:
+    return f"sendinblue:automation:{automation_name}:{date.today().isoformat()}"
+
+
+def add_users_to_list(automation_name: str, users_query: BaseQuery, sib_list_id: int) -> bool:
+    """Add users returned by `users_query` (rows of user id and email,
+    ordered by user id) to a Sendinblue list.
+
+    Emails are sent by chunks of `SENDINBLUE_AUTOMATION_CHUNK_SIZE`,
+    with up to `SENDINBLUE_AUTOMATION_WORKERS` requests in flight. The
+    id of the last user whose chunk (and all previous ones) has been
+    sent is stored in Redis, so that a failed automation that is run
+    again the same day resumes from there instead of starting over.
+
+    Return True when successful, False otherwise.
+    """
+    redis = current_app.redis_client  # type: ignore [attr-defined]
+    checkpoint_key = _get_checkpoint_key(automation_name)
+    resumed_from = redis.get(checkpoint_key)
+    if resumed_from:
+        users_query = users_query.filter(User.id > int(resumed_from))
+
+    chunk_size = min(settings.SENDINBLUE_AUTOMATION_CHUNK_SIZE, MAX_EMAILS_PER_IMPORT)
+    workers = max(settings.SENDINBLUE_AUTOMATION_WORKERS, 1)
+    app = current_app._get_current_object()  # type: ignore [attr-defined]
+    pending: deque[tuple[int, concurrent.futures.Future]] = deque()
+    iteration = 1
+    rows = 0
+    start = time.perf_counter()
+
+    def _import(emails: list[str], iteration: int) -> int:
+        # `url_for()` (to build the notification URL) needs an
+        # application context.
+        with app.app_context():
+            return import_contacts_in_list(emails, sib_list_id, iteration)
+
+    def _wait_for_oldest_import() -> None:
+        last_user_id, future = pending.popleft()
+        future.result()
+        redis.set(checkpoint_key, last_user_id, ex=CHECKPOINT_TTL)
+
+    users = iter(users_query.yield_per(YIELD_COUNT_PER_DB_QUERY))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while chunk := list(islice(users, chunk_size)):
+                emails = [email for _user_id, email in chunk]
+                pending.append((chunk[-1][0], executor.submit(_import, emails, iteration)))
+                iteration += 1
+                rows += len(chunk)
+                while len(pending) >= workers:
+                    _wait_for_oldest_import()
+            while pending:
+                _wait_for_oldest_import()
+        except SendinblueApiException as exception:
+            executor.shutdown(cancel_futures=True)
+            logger.exception(
+                "Exception when calling ContactsApi->import_contacts: %s",
+                exception,
+                extra={
+                    "automation": automation_name,
+                    "list_id": sib_list_id,
+                    "iteration": iteration,
+                    "checkpoint": redis.get(checkpoint_key),
+                },
+            )
+            return False
+
+    redis.delete(checkpoint_key)
+    duration = time.perf_counter() - start
+    logger.info(
+        "Sendinblue automation finished",
+        extra={
+            "automation": automation_name,
+            "list_id": sib_list_id,
+            "resumed_from": int(resumed_from) if resumed_from else None,
+            "rows": rows,
+            "imports": iteration - 1,
+            "duration": round(duration, 3),
+            "rows_per_second": round(rows / duration, 1) if duration else None,
+        },
+    )
+    return True
+
 
-def get_young_users_emails_query() -> BaseQuery:
+def get_young_users_query() -> BaseQuery:
     return (
-        db.session.query(User.email)
-        .yield_per(YIELD_COUNT_PER_DB_QUERY)
+        db.session.query(User.id, User.email)
         .filter(User.has_pro_role.is_(False))  # type: ignore [attr-defined]
         .filter(User.has_admin_role.is_(False))  # type: ignore [attr-defined]
+        .order_by(User.id)
     )
 
 
-def get_emails_who_will_turn_eighteen_in_one_month() -> Iterable[str]:
+def get_users_who_will_turn_eighteen_in_one_month() -> BaseQuery:
     # Keep in days and not years and months to ensure that we get birth dates continuously day after day
     # Otherwise, 2022-02-28 - 18y + 30m = 2004-03-29
     #            2022-03-01 - 18y + 30m = 2004-03-31
     #            => users born on 2004-03-30 would be missed
     expected_birth_date = date.today() - relativedelta(days=DAYS_IN_18_YEARS - 30)
 
-    return (
-        email for email, in get_young_users_emails_query().filter(func.date(User.dateOfBirth) == expected_birth_date)
-    )
+    return get_young_users_query().filter(func.date(User.dateOfBirth) == expected_birth_date)
+
+
+def get_emails_who_will_turn_eighteen_in_one_month() -> Iterable[str]:
+    return (email for _user_id, email in get_users_who_will_turn_eighteen_in_one_month())
 
 
 def users_turned_eighteen_automation() -> bool:
@@ -51,16 +156,16 @@ def users_turned_eighteen_automation() -> bool:
 
     List: jeunes-18-m-1
     """
-    return add_contacts_to_list(
-        get_emails_who_will_turn_eighteen_in_one_month(),
+    return add_users_to_list(
+        "users_turned_eighteen",
+        get_users_who_will_turn_eighteen_in_one_month(),
         settings.SENDINBLUE_AUTOMATION_YOUNG_18_IN_1_MONTH_LIST_ID,
     )
 
 
-def get_users_beneficiary_credit_expiration_within_next_3_months() -> List[User]:
+def get_users_beneficiary_credit_expiration_within_next_3_months() -> BaseQuery:
     return (
-        db.session.query(User.email)
-        .yield_per(YIELD_COUNT_PER_DB_QUERY)
+        db.session.query(User.id, User.email)
         .join(User.deposits)
         .filter(User.is_beneficiary.is_(True))  # type: ignore [attr-defined]
         .filter(
@@ -69,6 +174,7 @@ def get_users_beneficiary_credit_expiration_within_next_3_months() -> List[User]
                 datetime.combine(date.today() + relativedelta(days=90), datetime.max.time()),
             )
         )
+        .order_by(User.id)
     )
 
 
@@ -81,25 +187,50 @@ def users_beneficiary_credit_expiration_within_next_3_months_automation() -> boo
 
     List: jeunes-expiration-M-3
     """
-    user_emails = (email for email, in get_users_beneficiary_credit_expiration_within_next_3_months())
-    return add_contacts_to_list(user_emails, settings.SENDINBLUE_AUTOMATION_YOUNG_EXPIRATION_M3_ID)
+    return add_users_to_list(
+        "users_beneficiary_credit_expiration_within_next_3_months",
+        get_users_beneficiary_credit_expiration_within_next_3_months(),
+        settings.SENDINBLUE_AUTOMATION_YOUNG_EXPIRATION_M3_ID,
+    )
+
 
+def get_users_ex_beneficiary() -> BaseQuery:
+    today = datetime.combine(date.today(), datetime.min.time())
+    query = db.session.query(User.id, User.email).join(User.deposits)
+
+    # Same as `get_wallet_balance(User.id, False) <= 0` for a deposit
+    # that has not expired, without calling that function for each row.
+    if FeatureToggle.USE_DEPOSIT_LEDGER.is_active():
+        remaining_credit = Deposit.amount - Deposit.spentAmount
+    else:
+        spendings = (
+            db.session.query(
+                IndividualBooking.depositId.label("depositId"),
+                func.sum(Booking.amount * Booking.quantity).label("amount"),
+            )
+            .select_from(Booking)
+            .join(IndividualBooking, Booking.individualBookingId == IndividualBooking.id)
+            .filter(Booking.status != BookingStatus.CANCELLED)
+            .group_by(IndividualBooking.depositId)
+            .subquery()
+        )
+        query = query.outerjoin(spendings, spendings.c.depositId == Deposit.id)
+        remaining_credit = Deposit.amount - func.coalesce(spendings.c.amount, 0)
 
-def get_users_ex_beneficiary() -> List[User]:
     return (
-        db.session.query(User.email)
-        .join(User.deposits)
-        .filter(User.is_beneficiary.is_(True))  # type: ignore [attr-defined]
+        query.filter(User.is_beneficiary.is_(True))  # type: ignore [attr-defined]
         .filter(
             or_(
-                Deposit.expirationDate <= datetime.combine(date.today(), datetime.min.time()),
+                Deposit.expirationDate <= today,
                 and_(
-                    Deposit.expirationDate > datetime.combine(date.today(), datetime.min.time()),
-                    func.get_wallet_balance(User.id, False) <= 0,
+                    Deposit.expirationDate > today,
+                    # `get_wallet_balance` returns 0 as soon as the
+                    # deposit has expired.
+                    or_(Deposit.expirationDate <= func.now(), remaining_credit <= 0),
                 ),
             )
         )
-        .yield_per(YIELD_COUNT_PER_DB_QUERY)
+        .order_by(User.id)
     )
 
 
@@ -112,23 +243,27 @@ def users_ex_beneficiary_automation() -> bool:
 
     List: jeunes-ex-benefs
     """
-    user_emails = (email for email, in get_users_ex_beneficiary())
-    return add_contacts_to_list(user_emails, settings.SENDINBLUE_AUTOMATION_YOUNG_EX_BENEFICIARY_ID)
+    return add_users_to_list(
+        "users_ex_beneficiary",
+        get_users_ex_beneficiary(),
+        settings.SENDINBLUE_AUTOMATION_YOUNG_EX_BENEFICIARY_ID,
+    )
 
 
-def get_email_for_inactive_user_since_thirty_days() -> Iterable[str]:
+def get_users_inactive_since_thirty_days() -> BaseQuery:
     # Keep 15 days range after 30 days so that inactive users may be added the day(s) after in case automation fails
     date_30_days_ago = date.today() - relativedelta(days=30)
     date_45_days_ago = date.today() - relativedelta(days=45)
 
-    return (
-        email
-        for email, in get_young_users_emails_query().filter(
-            func.date(User.lastConnectionDate).between(date_45_days_ago, date_30_days_ago)
-        )
+    return get_young_users_query().filter(
+        func.date(User.lastConnectionDate).between(date_45_days_ago, date_30_days_ago)
     )
 
 
+def get_email_for_inactive_user_since_thirty_days() -> Iterable[str]:
+    return (email for _user_id, email in get_users_inactive_since_thirty_days())
+
+
 def users_inactive_since_30_days_automation() -> bool:
     """
     This automation called every day updates the list of users who are inactive since 30 days: adds any young user who
@@ -137,27 +272,29 @@ def users_inactive_since_30_days_automation() -> bool:
 
     List: jeunes-utilisateurs-inactifs
     """
-    return add_contacts_to_list(
-        get_email_for_inactive_user_since_thirty_days(),
+    return add_users_to_list(
+        "users_inactive_since_30_days",
+        get_users_inactive_since_thirty_days(),
         settings.SENDINBLUE_AUTOMATION_YOUNG_INACTIVE_30_DAYS_LIST_ID,
     )
 
 
-def get_email_for_users_created_one_year_ago_per_month() -> Iterable[str]:
+def get_users_created_one_year_ago_per_month() -> BaseQuery:
     first_day_of_month = (date.today() - relativedelta(months=12)).replace(day=1)
     last_day_of_month = first_day_of_month + relativedelta(months=1, days=-1)
 
-    return (
-        email
-        for email, in get_young_users_emails_query().filter(
-            User.dateCreated.between(
-                datetime.combine(first_day_of_month, datetime.min.time()),
-                datetime.combine(last_day_of_month, datetime.max.time()),
-            )
+    return get_young_users_query().filter(
+        User.dateCreated.between(
+            datetime.combine(first_day_of_month, datetime.min.time()),
+            datetime.combine(last_day_of_month, datetime.max.time()),
         )
     )
 
 
+def get_email_for_users_created_one_year_ago_per_month() -> Iterable[str]:
+    return (email for _user_id, email in get_users_created_one_year_ago_per_month())
+
+
 def users_one_year_with_pass_automation() -> bool:
     """
     This automation is called once a month and includes young users who created their PassCulture account in the same
@@ -167,8 +304,9 @@ def users_one_year_with_pass_automation() -> bool:
 
     List: jeunes-un-an-sur-le-pass
     """
-    return add_contacts_to_list(
-        get_email_for_users_created_one_year_ago_per_month(),
+    return add_users_to_list(
+        "users_one_year_with_pass",
+        get_users_created_one_year_ago_per_month(),
         settings.SENDINBLUE_AUTOMATION_YOUNG_1_YEAR_WITH_PASS_LIST_ID,
     )
 
@@ -211,8 +349,9 @@ def users_whose_credit_expired_today_automation() -> None:
     expiration, when they are no longer current beneficiaries and/or become former beneficiaries.
     Ex underage beneficiaries who don't get 18y credit on time become former beneficiaries after their birthday.
     """
-    for user in get_users_whose_credit_expired_today():
-        update_external_user(user)
+    with cloud_task.buffered_tasks():
+        for user in get_users_whose_credit_expired_today():
+            update_external_user(user)
 
-    for user in get_ex_underage_beneficiaries_who_can_no_longer_recredit():
-        update_external_user(user)
+        for user in get_ex_underage_beneficiaries_who_can_no_longer_recredit():
+            update_external_user(user)
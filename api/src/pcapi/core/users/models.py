@@ -28,6 +28,7 @@ from pcapi.models import Base
 from pcapi.models import Model
 from pcapi.models import db
 from pcapi.models.deactivable_mixin import DeactivableMixin
+from pcapi.models.feature import FeatureToggle
 from pcapi.models.needs_validation_mixin import NeedsValidationMixin
 from pcapi.models.pc_object import PcObject
 from pcapi.utils import crypto
@@ -394,6 +395,11 @@ class User(PcObject, Base, Model, NeedsValidationMixin, DeactivableMixin):  # ty
 
     @property
     def wallet_balance(self):  # type: ignore [no-untyped-def]
+        if FeatureToggle.USE_DEPOSIT_LEDGER.is_active():
+            # Same as `get_wallet_balance`, from amounts stored on the deposit.
+            if not self.has_active_deposit:
+                return 0
+            return max(0, self.deposit.amount - self.deposit.spentAmount)  # type: ignore [union-attr]
         balance = db.session.query(sa.func.get_wallet_balance(self.id, False)).scalar()
         return max(0, balance)
 
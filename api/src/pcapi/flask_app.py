@@ -25,6 +25,7 @@ from pcapi.core.logging import install_logging
 from pcapi.models import db
 from pcapi.models import install_models
 from pcapi.scripts.install import install_commands
+from pcapi.tasks import cloud_task
 from pcapi.utils.json_encoder import EnumJSONEncoder
 from pcapi.utils.rate_limiting import rate_limiter
 from pcapi.utils.sentry import init_sentry_sdk
@@ -163,6 +164,17 @@ def remove_db_session(
         pass
 
 
+@app.before_request
+def start_buffering_cloud_tasks() -> None:
+    if settings.CLOUD_TASK_BUFFERING:
+        g.cloud_tasks_buffering = cloud_task.start_buffering()
+
+
+@app.teardown_request  # type: ignore [arg-type]
+def stop_buffering_cloud_tasks(exc: Exception | None = None) -> None:
+    cloud_task.stop_buffering(g.pop("cloud_tasks_buffering", None), exc)
+
+
 install_models()
 db.init_app(app)
 orm.configure_mappers()
@@ -1,6 +1,8 @@
 from datetime import datetime
 import decimal
+import functools
 import re
+from typing import Callable
 from typing import cast
 
 from dateutil.parser import parse
@@ -216,10 +218,13 @@ class AllocineStocks(LocalProvider):
         raise AllocineStocksPriceRule("Aucun prix par défaut n'a été trouvé")
 
     def get_object_thumb(self) -> bytes:
+        return self.get_object_thumb_loader()()
+
+    def get_object_thumb_loader(self) -> Callable[[], bytes]:
         if "poster_url" in self.movie_information:  # type: ignore [operator]
             image_url = self.movie_information["poster_url"]  # type: ignore [index]
-            return get_movie_poster(image_url)
-        return bytes()
+            return functools.partial(get_movie_poster, image_url)
+        return bytes
 
     def get_object_thumb_index(self) -> int:
         return 1
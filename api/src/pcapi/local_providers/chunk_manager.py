@@ -1,24 +1,65 @@
+from collections import defaultdict
+
 from pcapi.local_providers.providable_info import ProvidableInfo
 from pcapi.models import Model
+from pcapi.models.feature import FeatureToggle
 from pcapi.repository.providable_queries import get_existing_object
+from pcapi.repository.providable_queries import get_existing_objects
 from pcapi.repository.providable_queries import insert_chunk
+from pcapi.repository.providable_queries import insert_chunk_with_copy
 from pcapi.repository.providable_queries import update_chunk
+from pcapi.repository.providable_queries import update_chunk_with_copy
+
+
+def get_chunk_key(providable_info: ProvidableInfo) -> str:
+    return f"{providable_info.id_at_providers}|{providable_info.type.__name__}"  # type: ignore [attr-defined]
 
 
 def get_existing_pc_obj(
-    providable_info: ProvidableInfo, chunk_to_insert: dict, chunk_to_update: dict
+    providable_info: ProvidableInfo,
+    chunk_to_insert: dict,
+    chunk_to_update: dict,
+    prefetched_objects: dict[str, Model | None] | None = None,  # type: ignore [valid-type]
 ) -> Model | None:  # type: ignore [valid-type]
     object_in_current_chunk = get_object_from_current_chunks(providable_info, chunk_to_insert, chunk_to_update)
-    if object_in_current_chunk is None:
-        return get_existing_object(providable_info.type, providable_info.id_at_providers)
+    if object_in_current_chunk is not None:
+        return object_in_current_chunk
+
+    chunk_key = get_chunk_key(providable_info)
+    if prefetched_objects is not None and chunk_key in prefetched_objects:
+        return prefetched_objects[chunk_key]
 
-    return object_in_current_chunk
+    return get_existing_object(providable_info.type, providable_info.id_at_providers)
+
+
+def prefetch_existing_pc_objects(
+    providable_infos: list[ProvidableInfo], chunk_to_insert: dict, chunk_to_update: dict
+) -> dict[str, Model | None]:  # type: ignore [valid-type]
+    """Look up existing objects of a block of providable infos, with a
+    single query per model type, instead of one query per object.
+
+    The returned dictionary is indexed by chunk key. Objects that do
+    not exist in the database are mapped to None. Objects that are in
+    the current chunks are left out: `get_existing_pc_obj()` finds
+    them there.
+    """
+    ids_per_type = defaultdict(set)
+    for providable_info in providable_infos:
+        if get_object_from_current_chunks(providable_info, chunk_to_insert, chunk_to_update) is None:
+            ids_per_type[providable_info.type].add(providable_info.id_at_providers)
+
+    prefetched_objects: dict[str, Model | None] = {}  # type: ignore [valid-type]
+    for model_type, ids_at_providers in ids_per_type.items():
+        existing_objects = get_existing_objects(model_type, ids_at_providers)
+        for id_at_providers in ids_at_providers:
+            prefetched_objects[f"{id_at_providers}|{model_type.__name__}"] = existing_objects.get(id_at_providers)
+    return prefetched_objects
 
 
 def get_object_from_current_chunks(
     providable_info: ProvidableInfo, chunk_to_insert: dict, chunk_to_update: dict
 ) -> Model | None:  # type: ignore [valid-type]
-    chunk_key = f"{providable_info.id_at_providers}|{providable_info.type.__name__}"  # type: ignore [attr-defined]
+    chunk_key = get_chunk_key(providable_info)
     pc_object = chunk_to_insert.get(chunk_key)
     if isinstance(pc_object, providable_info.type):
         return pc_object
@@ -29,8 +70,18 @@ def get_object_from_current_chunks(
 
 
 def save_chunks(chunk_to_insert: dict[str, Model], chunk_to_update: dict[str, Model]):  # type: ignore [no-untyped-def, valid-type]
+    if not chunk_to_insert and not chunk_to_update:
+        return
+    use_copy = FeatureToggle.SAVE_PROVIDABLES_WITH_COPY.is_active()
+
     if len(chunk_to_insert) > 0:
-        insert_chunk(chunk_to_insert)
+        if use_copy:
+            insert_chunk_with_copy(chunk_to_insert)
+        else:
+            insert_chunk(chunk_to_insert)
 
     if len(chunk_to_update) > 0:
-        update_chunk(chunk_to_update)
+        if use_copy:
+            update_chunk_with_copy(chunk_to_update)
+        else:
+            update_chunk(chunk_to_update)
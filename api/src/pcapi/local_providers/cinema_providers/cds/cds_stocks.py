@@ -1,4 +1,6 @@
 from datetime import datetime
+import functools
+from typing import Callable
 from typing import Iterator
 from typing import cast
 
@@ -163,10 +165,13 @@ class CDSStocks(LocalProvider):
         obj.extraData = {"visa": self.movie_information.visa}
 
     def get_object_thumb(self) -> bytes:
+        return self.get_object_thumb_loader()()
+
+    def get_object_thumb_loader(self) -> Callable[[], bytes]:
         if self.movie_information.posterpath:
             image_url = self.movie_information.posterpath
-            return self._get_cds_movie_poster(image_url)
-        return bytes()
+            return functools.partial(self._get_cds_client().get_movie_poster, image_url)
+        return bytes
 
     def get_object_thumb_index(self) -> int:
         return 1
@@ -196,16 +201,15 @@ class CDSStocks(LocalProvider):
         )
         return client_cds.get_venue_movies()
 
-    def _get_cds_movie_poster(self, image_url: str) -> bytes:
+    def _get_cds_client(self) -> CineDigitalServiceAPI:
         if not self.apiUrl:
             raise Exception("CDS API URL not configured in this env")
-        client_cds = CineDigitalServiceAPI(
+        return CineDigitalServiceAPI(
             cinema_id=self.venue_provider.venueIdAtOfferProvider,
             account_id=self.accountId,
             api_url=self.apiUrl,
             cinema_api_token=self.apiToken,
         )
-        return client_cds.get_movie_poster(image_url)
 
     def _get_cds_shows(self) -> list[dict]:
         if not self.apiUrl:
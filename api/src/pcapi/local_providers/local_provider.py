@@ -2,16 +2,21 @@ from abc import abstractmethod
 from collections.abc import Iterator
 from datetime import datetime
 import logging
+import typing
 
-from pcapi.connectors.thumb_storage import create_thumb
+from pcapi import settings
 from pcapi.core import search
 from pcapi.core.offers.models import Offer
 from pcapi.core.offers.models import Stock
 import pcapi.core.providers.models as providers_models
 from pcapi.core.providers.repository import get_provider_by_local_class
 from pcapi.local_providers.chunk_manager import get_existing_pc_obj
+from pcapi.local_providers.chunk_manager import prefetch_existing_pc_objects
 from pcapi.local_providers.chunk_manager import save_chunks
 from pcapi.local_providers.providable_info import ProvidableInfo
+from pcapi.local_providers.thumbs_pipeline import ThumbJob
+from pcapi.local_providers.thumbs_pipeline import ThumbStatus
+from pcapi.local_providers.thumbs_pipeline import ThumbsPipeline
 from pcapi.models import Model
 from pcapi.models import db
 from pcapi.models.api_errors import ApiErrors
@@ -38,7 +43,9 @@ class LocalProvider(Iterator):
         self.updatedThumbs = 0
         self.checkedThumbs = 0
         self.erroredThumbs = 0
+        self.unchangedThumbs = 0
         self.provider = get_provider_by_local_class(self.__class__.__name__)
+        self.thumbs_pipeline: ThumbsPipeline | None = None
 
     @property
     @abstractmethod
@@ -64,6 +71,32 @@ class LocalProvider(Iterator):
     def get_object_thumb(self) -> bytes:
         return bytes()
 
+    def get_object_thumb_loader(self) -> typing.Callable[[], bytes]:
+        """Return a function that returns the thumb of the current
+        object.
+
+        It is called from another thread, once the provider has moved
+        on to the next objects: providers that download thumbs should
+        override it to return a function that does not depend on their
+        current state. By default, the thumb is read right away.
+        """
+        thumb = self.get_object_thumb()
+        return lambda: thumb
+
+    def get_position(self) -> typing.Any:
+        """Return where the provider is, after the objects returned by
+        the latest call to ``__next__``. It is passed to ``checkpoint()``
+        once these objects have been saved.
+        """
+        return None
+
+    def checkpoint(self, position: typing.Any) -> None:
+        """Called with a value returned by ``get_position()``, once all
+        objects returned until then have been saved. Providers may
+        override it to record where to resume from if the
+        synchronization is interrupted.
+        """
+
     def get_object_thumb_index(self) -> int:
         return 0
 
@@ -81,12 +114,24 @@ class LocalProvider(Iterator):
             return
         self.checkedThumbs += 1
 
-        new_thumb = self.get_object_thumb()
-        if not new_thumb:
-            return
-
-        _save_same_thumb_from_thumb_count_to_index(pc_object, new_thumb_index, new_thumb, self.get_keep_poster_ratio())
-        self.createdThumbs += new_thumb_index
+        # Outside of `updateObjects()`, process the thumb right away.
+        pipeline = self.thumbs_pipeline or ThumbsPipeline()
+        pipeline.submit(pc_object, new_thumb_index, self.get_object_thumb_loader(), self.get_keep_poster_ratio())
+        self._record_thumbs(pipeline.collect(wait=pipeline is not self.thumbs_pipeline))
+
+    def _record_thumbs(self, jobs: list[ThumbJob]) -> None:
+        for job in jobs:
+            if job.status == ThumbStatus.STORED:
+                self.createdThumbs += job.thumb_index
+            elif job.status == ThumbStatus.UNCHANGED:
+                self.unchangedThumbs += 1
+            elif job.status == ThumbStatus.ERROR:
+                self._record_thumb_error(job.error)  # type: ignore [arg-type]
+
+    def _record_thumb_error(self, error: Exception) -> None:
+        self.log_provider_event(providers_models.LocalProviderEventType.SyncError, error.__class__.__name__)
+        self.erroredThumbs += 1
+        logger.info("ERROR during handle thumb: %s", error, exc_info=error)
 
     def _create_object(self, providable_info: ProvidableInfo) -> Model:  # type: ignore [valid-type]
         pc_object = providable_info.type()  # type: ignore [misc]
@@ -145,11 +190,12 @@ class LocalProvider(Iterator):
             self.erroredObjects,
         )
         logger.info(
-            "Synchronization of thumbs of venue=%s, checked=%d, created=%d, updated=%d, errors=%s",
+            "Synchronization of thumbs of venue=%s, checked=%d, created=%d, updated=%d, unchanged=%d, errors=%s",
             venue_id,
             self.checkedThumbs,
             self.createdThumbs,
             self.updatedThumbs,
+            self.unchangedThumbs,
             self.erroredThumbs,
         )
 
@@ -167,77 +213,117 @@ class LocalProvider(Iterator):
         # TODO (asaunier,2021-03-18): We may replace this log in BDD with logs in the monitoring system
         self.log_provider_event(providers_models.LocalProviderEventType.SyncStart)
 
-        chunk_to_insert = {}
-        chunk_to_update = {}
-
-        for providable_infos in self:
-            objects_limit_reached = limit and self.checkedObjects >= limit
-            if objects_limit_reached:
-                break
-
-            has_no_providables_info = len(providable_infos) == 0
-            if has_no_providables_info:
-                self.checkedObjects += 1
-                continue
-
-            for providable_info in providable_infos:
-                chunk_key = providable_info.id_at_providers + "|" + str(providable_info.type.__name__)
-                pc_object = get_existing_pc_obj(providable_info, chunk_to_insert, chunk_to_update)
-
-                if pc_object is None:
-                    if not self.can_create:
-                        continue
-
-                    try:
-                        pc_object = self._create_object(providable_info)
-                        chunk_to_insert[chunk_key] = pc_object
-                    except ApiErrors:
-                        continue
-                else:
-                    last_update_for_current_provider = get_last_update_for_provider(self.provider.id, pc_object)
-                    object_need_update = (
-                        last_update_for_current_provider is None
-                        or last_update_for_current_provider < providable_info.date_modified_at_provider
+        self.thumbs_pipeline = ThumbsPipeline(
+            workers=settings.PROVIDERS_THUMBS_WORKERS,
+            conversion_workers=settings.PROVIDERS_THUMBS_CONVERSION_WORKERS,
+        )
+        try:
+            chunk_to_insert = {}
+            chunk_to_update = {}
+            # Position after the last block that has been fully processed.
+            completed_position = None
+
+            for providable_infos in self:
+                objects_limit_reached = limit and self.checkedObjects >= limit
+                if objects_limit_reached:
+                    break
+                position = self.get_position()
+
+                has_no_providables_info = len(providable_infos) == 0
+                if has_no_providables_info:
+                    self.checkedObjects += 1
+                    completed_position = position
+                    if not chunk_to_insert and not chunk_to_update:
+                        self.checkpoint(position)
+                    continue
+
+                # Providers may return many providable infos at once (e.g. a
+                # product, its offer and all its stocks). Look up all existing
+                # objects of the block upfront, instead of one query per object.
+                prefetched_objects = prefetch_existing_pc_objects(providable_infos, chunk_to_insert, chunk_to_update)
+
+                for providable_info in providable_infos:
+                    chunk_key = providable_info.id_at_providers + "|" + str(providable_info.type.__name__)
+                    pc_object = get_existing_pc_obj(
+                        providable_info, chunk_to_insert, chunk_to_update, prefetched_objects
                     )
 
-                    if object_need_update:
-                        try:
-                            self._handle_update(pc_object, providable_info)
-                            if chunk_key in chunk_to_insert:
-                                chunk_to_insert[chunk_key] = pc_object
-                            else:
-                                chunk_to_update[chunk_key] = pc_object
-                        except ApiErrors:
+                    if pc_object is None:
+                        if not self.can_create:
                             continue
 
-                if isinstance(pc_object, HasThumbMixin):
-                    initial_thumb_count = pc_object.thumbCount
-                    try:
-                        self._handle_thumb(pc_object)
-                    except Exception as e:  # pylint: disable=broad-except
-                        self.log_provider_event(providers_models.LocalProviderEventType.SyncError, e.__class__.__name__)
-                        self.erroredThumbs += 1
-                        logger.info("ERROR during handle thumb: %s", e, exc_info=True)
-                    pc_object_has_new_thumbs = pc_object.thumbCount != initial_thumb_count
-                    if pc_object_has_new_thumbs:
-                        errors = entity_validator.validate(pc_object)
-                        if errors and len(errors.errors) > 0:
-                            self.log_provider_event(providers_models.LocalProviderEventType.SyncError, "ApiErrors")
+                        try:
+                            pc_object = self._create_object(providable_info)
+                            chunk_to_insert[chunk_key] = pc_object
+                        except ApiErrors:
                             continue
-
-                        chunk_to_update[chunk_key] = pc_object
-
-                self.checkedObjects += 1
-
-                if len(chunk_to_insert) + len(chunk_to_update) >= CHUNK_MAX_SIZE:
-                    save_chunks(chunk_to_insert, chunk_to_update)
-                    _reindex_offers(list(chunk_to_insert.values()) + list(chunk_to_update.values()))
-                    chunk_to_insert = {}
-                    chunk_to_update = {}
-
-        if len(chunk_to_insert) + len(chunk_to_update) > 0:
-            save_chunks(chunk_to_insert, chunk_to_update)
-            _reindex_offers(list(chunk_to_insert.values()) + list(chunk_to_update.values()))
+                    else:
+                        last_update_for_current_provider = get_last_update_for_provider(self.provider.id, pc_object)
+                        object_need_update = (
+                            last_update_for_current_provider is None
+                            or last_update_for_current_provider < providable_info.date_modified_at_provider
+                        )
+
+                        if object_need_update:
+                            try:
+                                self._handle_update(pc_object, providable_info)
+                                if chunk_key in chunk_to_insert:
+                                    chunk_to_insert[chunk_key] = pc_object
+                                else:
+                                    chunk_to_update[chunk_key] = pc_object
+                            except ApiErrors:
+                                continue
+
+                    if isinstance(pc_object, HasThumbMixin):
+                        initial_thumb_count = pc_object.thumbCount
+                        try:
+                            self._handle_thumb(pc_object)
+                        except Exception as e:  # pylint: disable=broad-except
+                            self._record_thumb_error(e)
+                        pc_object_has_new_thumbs = pc_object.thumbCount != initial_thumb_count
+                        if pc_object_has_new_thumbs:
+                            errors = entity_validator.validate(pc_object)
+                            if errors and len(errors.errors) > 0:
+                                self.log_provider_event(providers_models.LocalProviderEventType.SyncError, "ApiErrors")
+                                continue
+
+                            chunk_to_update[chunk_key] = pc_object
+
+                    self.checkedObjects += 1
+
+                    if len(chunk_to_insert) + len(chunk_to_update) >= CHUNK_MAX_SIZE:
+                        self._record_thumbs(self.thumbs_pipeline.collect(wait=True))
+                        save_chunks(chunk_to_insert, chunk_to_update)
+                        _reindex_offers(list(chunk_to_insert.values()) + list(chunk_to_update.values()))
+                        # Saved objects are not in the chunks anymore, and may
+                        # have been prefetched as missing: look them up again
+                        # if they show up later in the block.
+                        for saved_chunk_key in list(chunk_to_insert) + list(chunk_to_update):
+                            prefetched_objects.pop(saved_chunk_key, None)
+                        chunk_to_insert = {}
+                        chunk_to_update = {}
+                        # Objects of the current block that come after
+                        # this one have not been saved yet.
+                        if completed_position is not None:
+                            self.checkpoint(completed_position)
+
+                completed_position = position
+                # Checkpoint at every block boundary where everything
+                # has been saved, including blocks of unchanged objects.
+                if not chunk_to_insert and not chunk_to_update:
+                    self.checkpoint(position)
+
+            self._record_thumbs(self.thumbs_pipeline.collect(wait=True))
+            if len(chunk_to_insert) + len(chunk_to_update) > 0:
+                save_chunks(chunk_to_insert, chunk_to_update)
+                _reindex_offers(list(chunk_to_insert.values()) + list(chunk_to_update.values()))
+                # If the limit has been reached, the last block returned by
+                # `__next__` has not been processed.
+                if completed_position is not None:
+                    self.checkpoint(completed_position)
+        finally:
+            self.thumbs_pipeline.shutdown()
+            self.thumbs_pipeline = None
 
         self._print_objects_summary()
         self.log_provider_event(providers_models.LocalProviderEventType.SyncEnd)
@@ -247,19 +333,6 @@ class LocalProvider(Iterator):
             repository.save(self.venue_provider)
 
 
-def _save_same_thumb_from_thumb_count_to_index(pc_object: Model, thumb_index: int, image_as_bytes: bytes, keep_poster_ratio: bool = False):  # type: ignore [no-untyped-def, valid-type]
-    if pc_object.thumbCount is None:  # type: ignore [attr-defined]
-        pc_object.thumbCount = 0  # type: ignore [attr-defined]
-    if thumb_index <= pc_object.thumbCount:  # type: ignore [attr-defined]
-        # replace existing thumb
-        create_thumb(pc_object, image_as_bytes, thumb_index, keep_ratio=keep_poster_ratio)
-    else:
-        # add new thumb
-        for index in range(pc_object.thumbCount, thumb_index):  # type: ignore [attr-defined]
-            create_thumb(pc_object, image_as_bytes, index, keep_ratio=keep_poster_ratio)
-            pc_object.thumbCount += 1  # type: ignore [attr-defined]
-
-
 def _reindex_offers(created_or_updated_objects):  # type: ignore [no-untyped-def]
     offer_ids = set()
     for obj in created_or_updated_objects:
@@ -1,14 +1,19 @@
+import concurrent.futures
 import logging
+import time
 from typing import Callable
 
+from flask import current_app
 from urllib3 import exceptions as urllib3_exceptions
 
+from pcapi import settings
 import pcapi.connectors.notion as notion_connector
 from pcapi.core.providers.models import VenueProvider
 import pcapi.core.providers.repository as providers_repository
 from pcapi.infrastructure.repository.stock_provider import provider_api
 import pcapi.local_providers
 from pcapi.local_providers.provider_api import synchronize_provider_api
+from pcapi.models import db
 from pcapi.repository import transaction
 from pcapi.scheduled_tasks.logger import CronStatus
 from pcapi.scheduled_tasks.logger import build_cron_log_message
@@ -27,29 +32,92 @@ def synchronize_data_for_provider(provider_name: str, limit: int | None = None)
         logger.exception(build_cron_log_message(name=provider_name, status=CronStatus.FAILED))
 
 
-def synchronize_venue_providers_for_provider(provider_id: int, limit: int | None = None) -> None:
+def synchronize_venue_providers_for_provider(provider_id: int, limit: int | None = None) -> dict[int, float]:
+    """Synchronize all active venue providers of a provider, and return
+    the duration of the synchronization of each venue provider.
+
+    Venue providers are synchronized by a pool of threads if the
+    PROVIDERS_SYNCHRONIZATION_WORKERS setting is set, each in its own
+    session and transaction. The pool size is capped for each provider
+    by the PROVIDERS_SYNCHRONIZATION_MAX_WORKERS setting, to respect
+    the rate limits of partners.
+    """
     venue_providers = providers_repository.get_active_venue_providers_by_provider(provider_id)
-    for venue_provider in venue_providers:
-        log_data = {
-            "venue_provider": venue_provider.id,
-            "venue": venue_provider.venueId,
-            "provider": venue_provider.providerId,
+    if not venue_providers:
+        return {}
+
+    provider = venue_providers[0].provider
+    workers = min(
+        settings.PROVIDERS_SYNCHRONIZATION_WORKERS,
+        settings.PROVIDERS_SYNCHRONIZATION_MAX_WORKERS.get(provider.localClass or provider.name, len(venue_providers)),
+    )
+
+    start = time.perf_counter()
+    if workers > 0:
+        app = current_app._get_current_object()  # type: ignore [attr-defined]
+
+        def _synchronize(venue_provider_id: int) -> float:
+            # An exception raised here would be re-raised by `pool.map`
+            # and abort the synchronization of all other venue providers.
+            start = time.perf_counter()
+            try:
+                with app.app_context():
+                    venue_provider = providers_repository.get_venue_provider_by_id(venue_provider_id)
+                    return _synchronize_venue_provider_and_report_errors(venue_provider, limit)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Could not synchronize venue provider", extra={"venue_provider": venue_provider_id})
+                return round(time.perf_counter() - start, 3)
+
+        venue_provider_ids = [venue_provider.id for venue_provider in venue_providers]
+        # Each thread has its own session: do not leave the connection
+        # of this one idle in transaction while they run.
+        db.session.rollback()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="venue-providers") as pool:
+            durations = dict(zip(venue_provider_ids, pool.map(_synchronize, venue_provider_ids)))
+    else:
+        durations = {
+            venue_provider.id: _synchronize_venue_provider_and_report_errors(venue_provider, limit)
+            for venue_provider in venue_providers
         }
-        try:
-            with transaction():
-                synchronize_venue_provider(venue_provider, limit)
-        except (urllib3_exceptions.HTTPError, requests.exceptions.RequestException) as exception:
-            notion_connector.add_to_synchronization_error_database(exception, venue_provider)
-            logger.error("Connexion error while synchronizing venue_provider", extra=log_data | {"exc": exception})
-        except provider_api.ProviderAPIException as exception:
-            notion_connector.add_to_synchronization_error_database(exception, venue_provider)
-            logger.error(  # pylint: disable=logging-fstring-interpolation
-                f"ProviderAPIException with code {exception.status_code} while synchronizing venue_provider",
-                extra=log_data | {"exc": exception},
-            )
-        except Exception as exception:  # pylint: disable=broad-except
-            notion_connector.add_to_synchronization_error_database(exception, venue_provider)
-            logger.exception("Unexpected error while synchronizing venue provider", extra=log_data)
+
+    logger.info(
+        "Synchronized venue providers",
+        extra={
+            "provider": provider_id,
+            "venue_providers": len(durations),
+            "workers": workers,
+            "duration": round(time.perf_counter() - start, 3),
+            "durations": durations,
+        },
+    )
+    return durations
+
+
+def _synchronize_venue_provider_and_report_errors(venue_provider: VenueProvider, limit: int | None) -> float:
+    log_data = {
+        "venue_provider": venue_provider.id,
+        "venue": venue_provider.venueId,
+        "provider": venue_provider.providerId,
+    }
+    start = time.perf_counter()
+    try:
+        with transaction():
+            synchronize_venue_provider(venue_provider, limit)
+    except (urllib3_exceptions.HTTPError, requests.exceptions.RequestException) as exception:
+        notion_connector.add_to_synchronization_error_database(exception, venue_provider)
+        logger.error("Connexion error while synchronizing venue_provider", extra=log_data | {"exc": exception})
+    except provider_api.ProviderAPIException as exception:
+        notion_connector.add_to_synchronization_error_database(exception, venue_provider)
+        logger.error(  # pylint: disable=logging-fstring-interpolation
+            f"ProviderAPIException with code {exception.status_code} while synchronizing venue_provider",
+            extra=log_data | {"exc": exception},
+        )
+    except Exception as exception:  # pylint: disable=broad-except
+        notion_connector.add_to_synchronization_error_database(exception, venue_provider)
+        logger.exception("Unexpected error while synchronizing venue provider", extra=log_data)
+    duration = round(time.perf_counter() - start, 3)
+    logger.info("Synchronized venue provider", extra=log_data | {"duration": duration})
+    return duration
 
 
 def get_local_provider_class_by_name(class_name: str) -> Callable:
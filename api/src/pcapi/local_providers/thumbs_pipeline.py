@@ -0,0 +1,206 @@
+"""Download, convert and store thumbs of objects synchronized by local
+providers, concurrently with the synchronization loop.
+
+Downloads and uploads run in a pool of threads, conversions (which are
+CPU-bound) run in a pool of processes. The number of pending thumbs is
+bounded: `submit()` blocks until the oldest pending thumb has been
+processed, so that a slow storage does not pile up images in memory.
+
+Thumbs whose content has not changed since they were last stored
+(according to a hash kept in Redis for `CONTENT_HASH_TTL` seconds) are
+not converted nor stored again.
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import enum
+import hashlib
+import logging
+import multiprocessing
+import typing
+
+from flask import current_app
+import redis
+
+from pcapi import settings
+from pcapi.core import object_storage
+from pcapi.models.has_thumb_mixin import HasThumbMixin
+from pcapi.utils.image_conversion import ImageRatio
+from pcapi.utils.image_conversion import process_original_image
+from pcapi.utils.image_conversion import standardize_image
+
+
+logger = logging.getLogger(__name__)
+
+
+# One key per stored thumb, that expires so that hashes of thumbs that
+# are not synchronized anymore do not pile up in Redis. A thumb whose
+# hash has expired is only stored again.
+CONTENT_HASH_KEY_PREFIX = "thumbs:content-hash:"
+CONTENT_HASH_TTL = 60 * 60 * 24 * 90  # 90 days
+
+
+def _get_content_hash_key(storage_id: str) -> str:
+    return CONTENT_HASH_KEY_PREFIX + storage_id
+
+
+class ThumbStatus(enum.Enum):
+    STORED = "stored"
+    UNCHANGED = "unchanged"
+    EMPTY = "empty"
+    ERROR = "error"
+
+
+@dataclasses.dataclass
+class ThumbJob:
+    pc_object: HasThumbMixin
+    thumb_index: int
+    previous_thumb_count: int
+    storage_ids: list[str]
+    future: concurrent.futures.Future
+    status: ThumbStatus | None = None
+    error: Exception | None = None
+
+
+def convert_thumb(content: bytes, keep_ratio: bool) -> bytes:
+    if keep_ratio:
+        return process_original_image(content)
+    return standardize_image(content, ratio=ImageRatio.PORTRAIT)
+
+
+def get_content_hash(content: bytes, keep_ratio: bool) -> str:
+    return hashlib.blake2b(content + (b"1" if keep_ratio else b"0"), digest_size=16).hexdigest()
+
+
+class ThumbsPipeline:
+    """Process thumbs in `workers` threads (and convert them in
+    `conversion_workers` processes), or sequentially in `submit()` if
+    `workers` is 0.
+    """
+
+    def __init__(self, workers: int = 0, conversion_workers: int = 0, max_pending: int | None = None):
+        # Worker threads have no application context.
+        self._redis = current_app.redis_client  # type: ignore [attr-defined]
+        self._threads = (
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs") if workers else None
+        )
+        # Use "spawn" and not "fork", so that workers do not inherit the
+        # database connections (and the rest of the state) of this process.
+        self._processes = (
+            concurrent.futures.ProcessPoolExecutor(
+                max_workers=conversion_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            if workers and conversion_workers
+            else None
+        )
+        self._max_pending = max_pending or 2 * max(workers, 1)
+        self._pending: collections.deque[ThumbJob] = collections.deque()
+        self._finished: list[ThumbJob] = []
+
+    def submit(
+        self,
+        pc_object: HasThumbMixin,
+        thumb_index: int,
+        load: typing.Callable[[], bytes],
+        keep_ratio: bool = False,
+    ) -> None:
+        """Set the thumb at `thumb_index` of `pc_object` with the image
+        returned by `load`, which is called from a worker thread.
+
+        `thumbCount` is updated right away. It is restored by `collect()`
+        if the thumb could not be stored.
+        """
+        previous_thumb_count = pc_object.thumbCount or 0
+        if thumb_index <= previous_thumb_count:
+            # replace existing thumb
+            indexes: typing.Iterable[int] = [thumb_index]
+        else:
+            # add new thumbs
+            indexes = range(previous_thumb_count, thumb_index)
+        storage_ids = [pc_object.get_thumb_storage_id(index) for index in indexes]
+
+        # Do not store two images at the same place at the same time.
+        concurrent.futures.wait(
+            [job.future for job in self._pending if not set(job.storage_ids).isdisjoint(storage_ids)]
+        )
+
+        if self._threads:
+            future = self._threads.submit(self._process, load, storage_ids, keep_ratio)
+        else:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(self._process(load, storage_ids, keep_ratio))
+            except Exception as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+
+        pc_object.thumbCount = max(previous_thumb_count, thumb_index)
+        self._pending.append(ThumbJob(pc_object, thumb_index, previous_thumb_count, storage_ids, future))
+
+        while len(self._pending) > self._max_pending:
+            self._finish_oldest()
+
+    def collect(self, wait: bool = False) -> list[ThumbJob]:
+        """Return thumbs that have been processed since the previous
+        call, in the order in which they have been submitted. Wait for
+        all pending thumbs if `wait` is set.
+        """
+        while self._pending and (wait or self._pending[0].future.done()):
+            self._finish_oldest()
+        finished, self._finished = self._finished, []
+        return finished
+
+    def shutdown(self) -> None:
+        if self._threads:
+            self._threads.shutdown(cancel_futures=True)
+        if self._processes:
+            self._processes.shutdown(cancel_futures=True)
+
+    def _finish_oldest(self) -> None:
+        job = self._pending.popleft()
+        try:
+            job.status = job.future.result()
+        except Exception as exc:  # pylint: disable=broad-except
+            job.status = ThumbStatus.ERROR
+            job.error = exc
+        if job.status in (ThumbStatus.EMPTY, ThumbStatus.ERROR):
+            job.pc_object.thumbCount = min(job.pc_object.thumbCount, job.previous_thumb_count)
+        self._finished.append(job)
+
+    def _process(self, load: typing.Callable[[], bytes], storage_ids: list[str], keep_ratio: bool) -> ThumbStatus:
+        content = load()
+        if not content:
+            return ThumbStatus.EMPTY
+
+        content_hash = get_content_hash(content, keep_ratio)
+        try:
+            stored_hashes = self._redis.mget([_get_content_hash_key(storage_id) for storage_id in storage_ids])
+        except redis.exceptions.RedisError:
+            logger.warning("Could not get hashes of stored thumbs", exc_info=True)
+            stored_hashes = [None] * len(storage_ids)
+        storage_ids = [
+            storage_id for storage_id, stored_hash in zip(storage_ids, stored_hashes) if stored_hash != content_hash
+        ]
+        if not storage_ids:
+            return ThumbStatus.UNCHANGED
+
+        if self._processes:
+            thumb = self._processes.submit(convert_thumb, content, keep_ratio).result()
+        else:
+            thumb = convert_thumb(content, keep_ratio)
+        for storage_id in storage_ids:
+            object_storage.store_public_object(
+                folder=settings.THUMBS_FOLDER_NAME,
+                object_id=storage_id,
+                blob=thumb,
+                content_type="image/jpeg",
+            )
+
+        try:
+            with self._redis.pipeline(transaction=False) as pipeline:
+                for storage_id in storage_ids:
+                    pipeline.set(_get_content_hash_key(storage_id), content_hash, ex=CONTENT_HASH_TTL)
+                pipeline.execute()
+        except redis.exceptions.RedisError:
+            logger.warning("Could not store hashes of stored thumbs", exc_info=True)
+        return ThumbStatus.STORED
@@ -1,10 +1,13 @@
-from io import BytesIO
-from io import TextIOWrapper
+import itertools
+import json
 import logging
 import re
+from typing import Iterator
+
+from flask import current_app
 
-from pcapi.connectors.ftp_titelive import connect_to_titelive_ftp
 from pcapi.connectors.ftp_titelive import get_files_to_process_from_titelive_ftp
+from pcapi.connectors.ftp_titelive import iter_lines_from_ftp
 from pcapi.core.categories import subcategories
 import pcapi.core.offers.api as offers_api
 from pcapi.core.offers.api import deactivate_permanently_unavailable_products
@@ -25,6 +28,10 @@ logger = logging.getLogger(__name__)
 DATE_REGEXP = re.compile(r"([a-zA-Z]+)(\d+).tit")
 THINGS_FOLDER_NAME_TITELIVE = "livre3_11"
 NUMBER_OF_ELEMENTS_PER_LINE = 46  # (45 elements from line + \n)
+LINES_PER_BLOCK = 100
+# A single-byte encoding: the length of a line is its size in bytes.
+THINGS_FILE_ENCODING = "iso-8859-1"
+REDIS_CHECKPOINT = "titelive:things:checkpoint"
 PAPER_PRESS_TVA = "2,10"
 PAPER_PRESS_SUPPORT_CODE = "R"
 SCHOOL_RELATED_CSR_CODE = [
@@ -90,32 +97,59 @@ class TiteLiveThings(LocalProvider):
 
         self.data_lines = None
         self.products_file = None
-        self.product_extra_data = {}
-
-    def __next__(self) -> list[ProvidableInfo] | None:
+        # Infos of the products of the current block, by EAN.
+        self.product_infos: dict[str, dict] = {}
+        # Position in the current file, after the last line that has
+        # been read.
+        self.line_number = 0
+        self.offset = 0
+
+    def __next__(self) -> list[ProvidableInfo]:
+        # Return the products of up to LINES_PER_BLOCK lines, so that
+        # existing products are looked up with a single query per
+        # block. A block never spans two files.
         if self.data_lines is None:
             self.open_next_file()
-
-        try:
-            data_lines = next(self.data_lines)  # type: ignore [arg-type]
-            elements = data_lines.split("~")
-        except StopIteration:
+        data_lines = list(itertools.islice(self.data_lines, LINES_PER_BLOCK))  # type: ignore [arg-type]
+        while not data_lines:
             self.open_next_file()
-            elements = next(self.data_lines).split("~")  # type: ignore [arg-type]
-
-        if len(elements) != NUMBER_OF_ELEMENTS_PER_LINE:
-            self.log_provider_event(providers_models.LocalProviderEventType.SyncError, "number of elements mismatch")
-            return []
-
-        self.product_infos = get_infos_from_data_line(elements)
+            data_lines = list(itertools.islice(self.data_lines, LINES_PER_BLOCK))  # type: ignore [arg-type]
 
-        (
-            self.product_subcategory_id,
-            self.product_extra_data["bookFormat"],
-        ) = get_subcategory_and_extra_data_from_titelive_type(self.product_infos["code_support"])
-        book_unique_identifier = self.product_infos["ean13"]
+        self.product_infos = {}
+        providable_infos: dict[str, ProvidableInfo] = {}
+        for data_line in data_lines:
+            self.line_number += 1
+            self.offset += len(data_line)
+            elements = data_line.split("~")
 
-        ineligibility_reason = self.get_ineligibility_reason()
+            if len(elements) != NUMBER_OF_ELEMENTS_PER_LINE:
+                self.log_provider_event(
+                    providers_models.LocalProviderEventType.SyncError, "number of elements mismatch"
+                )
+                continue
+
+            product_infos = get_infos_from_data_line(elements)
+            book_unique_identifier = product_infos["ean13"]
+            # A later line about the same product wins.
+            self.product_infos.pop(book_unique_identifier, None)
+            providable_infos.pop(book_unique_identifier, None)
+            if not self.must_synchronize_product(product_infos):
+                continue
+
+            self.product_infos[book_unique_identifier] = product_infos
+            book_information_last_update = read_things_date(product_infos["date_updated"])
+            providable_infos[book_unique_identifier] = self.create_providable_info(
+                offers_models.Product, book_unique_identifier, book_information_last_update, book_unique_identifier
+            )
+        return list(providable_infos.values())
+
+    def must_synchronize_product(self, product_infos: dict) -> bool:
+        """Return whether the product must be created or updated. If
+        not, delete or deactivate the existing product, if any.
+        """
+        book_unique_identifier = product_infos["ean13"]
+
+        ineligibility_reason = get_ineligibility_reason(product_infos)
         if ineligibility_reason:
             logger.info("Ignoring isbn=%s because reason=%s", book_unique_identifier, ineligibility_reason)
             try:
@@ -123,11 +157,11 @@ class TiteLiveThings(LocalProvider):
             except offers_exceptions.CannotDeleteProductWithBookings:
                 self.log_provider_event(
                     providers_models.LocalProviderEventType.SyncError,
-                    f"Error deleting product with ISBN: {self.product_infos['ean13']}",
+                    f"Error deleting product with ISBN: {book_unique_identifier}",
                 )
-            return []
+            return False
 
-        if is_unreleased_book(self.product_infos):
+        if is_unreleased_book(product_infos):
             products = offers_models.Product.query.filter(
                 offers_models.Product.extraData["isbn"].astext == book_unique_identifier
             ).all()
@@ -142,52 +176,63 @@ class TiteLiveThings(LocalProvider):
                     "Ignoring isbn=%s because it has 'xxx' in 'titre' and 'auteurs' fields, which means it is not yet released",
                     book_unique_identifier,
                 )
-            return []
-
-        book_information_last_update = read_things_date(self.product_infos["date_updated"])
-        providable_info = self.create_providable_info(
-            offers_models.Product, book_unique_identifier, book_information_last_update, book_unique_identifier
-        )
-        return [providable_info]
-
-    def get_ineligibility_reason(self) -> str | None:
-        if self.product_infos["is_scolaire"] == "1" or self.product_infos["code_csr"] in SCHOOL_RELATED_CSR_CODE:
-            return "school"
+            return False
 
-        if (
-            self.product_infos["taux_tva"] == PAPER_PRESS_TVA
-            and self.product_infos["code_support"] == PAPER_PRESS_SUPPORT_CODE
-        ):
-            return "press"
-
-        if not self.product_subcategory_id:
-            return "uneligible-product-subcategory"
-
-        return None
+        return True
 
     def fill_object_attributes(self, product: offers_models.Product) -> None:
-        product.name = trim_with_elipsis(self.product_infos["titre"], 140)
-        product.datePublished = read_things_date(self.product_infos["date_parution"])
-        subcategory = subcategories.ALL_SUBCATEGORIES_DICT[self.product_subcategory_id]
+        product_infos = self.product_infos[product.idAtProviders]
+        subcategory_id, book_format = get_subcategory_and_extra_data_from_titelive_type(product_infos["code_support"])
+        product.name = trim_with_elipsis(product_infos["titre"], 140)
+        product.datePublished = read_things_date(product_infos["date_parution"])
+        subcategory = subcategories.ALL_SUBCATEGORIES_DICT[subcategory_id]
         product.subcategoryId = subcategory.id
-        product.extraData = self.product_extra_data.copy()
-        product.extraData.update(get_extra_data_from_infos(self.product_infos))
+        product.extraData = {"bookFormat": book_format}
+        product.extraData.update(get_extra_data_from_infos(product_infos))
 
-        if self.product_infos["url_extrait_pdf"] != "":
+        if product_infos["url_extrait_pdf"] != "":
             if product.mediaUrls is None:
                 product.mediaUrls = []
 
-            product.mediaUrls.append(self.product_infos["url_extrait_pdf"])
+            product.mediaUrls.append(product_infos["url_extrait_pdf"])
 
     def open_next_file(self):  # type: ignore [no-untyped-def]
         if self.products_file:
             file_date = get_date_from_filename(self.products_file, DATE_REGEXP)
             self.log_provider_event(providers_models.LocalProviderEventType.SyncPartEnd, file_date)
+            current_app.redis_client.delete(REDIS_CHECKPOINT)
+            self.products_file = None
         self.products_file = next(self.thing_files)
         file_date = get_date_from_filename(self.products_file, DATE_REGEXP)
         self.log_provider_event(providers_models.LocalProviderEventType.SyncPartStart, file_date)
 
-        self.data_lines = get_lines_from_thing_file(str(self.products_file))
+        self.line_number = 0
+        self.offset = 0
+        raw_checkpoint = current_app.redis_client.get(REDIS_CHECKPOINT)
+        if raw_checkpoint:
+            checkpoint = json.loads(raw_checkpoint)
+            if checkpoint["file"] == str(self.products_file):
+                self.line_number = checkpoint["line"]
+                self.offset = checkpoint["offset"]
+                logger.info(
+                    "Resuming synchronization of Titelive things file",
+                    extra={"file": self.products_file, "line": self.line_number, "offset": self.offset},
+                )
+        self.data_lines = get_lines_from_thing_file(str(self.products_file), self.offset)
+
+    def get_position(self) -> dict | None:
+        if not self.products_file:
+            return None
+        return {"file": str(self.products_file), "line": self.line_number, "offset": self.offset}
+
+    def checkpoint(self, position: dict | None) -> None:
+        # Lines that have been read until `position` have been saved:
+        # if the synchronization is interrupted, the next one will
+        # resume after these lines instead of starting the file over.
+        # Once a file has been fully processed, its checkpoint is useless.
+        if not position or position["file"] != str(self.products_file):
+            return
+        current_app.redis_client.set(REDIS_CHECKPOINT, json.dumps(position))
 
     def get_remaining_files_to_check(self, ordered_thing_files: list) -> iter:  # type: ignore [valid-type]
         latest_sync_part_end_event = providers_repository.find_latest_sync_part_end_event(self.provider)
@@ -199,17 +244,22 @@ class TiteLiveThings(LocalProvider):
         return iter([])
 
 
-def get_lines_from_thing_file(thing_file: str):  # type: ignore [no-untyped-def]
-    data_file = BytesIO()
-    data_wrapper = TextIOWrapper(
-        data_file,
-        encoding="iso-8859-1",
-        line_buffering=True,
-    )
-    file_path = "RETR " + THINGS_FOLDER_NAME_TITELIVE + "/" + thing_file
-    connect_to_titelive_ftp().retrbinary(file_path, data_file.write)
-    data_wrapper.seek(0, 0)
-    return iter(data_wrapper.readlines())
+def get_ineligibility_reason(product_infos: dict) -> str | None:
+    if product_infos["is_scolaire"] == "1" or product_infos["code_csr"] in SCHOOL_RELATED_CSR_CODE:
+        return "school"
+
+    if product_infos["taux_tva"] == PAPER_PRESS_TVA and product_infos["code_support"] == PAPER_PRESS_SUPPORT_CODE:
+        return "press"
+
+    subcategory_id, _ = get_subcategory_and_extra_data_from_titelive_type(product_infos["code_support"])
+    if not subcategory_id:
+        return "uneligible-product-subcategory"
+
+    return None
+
+
+def get_lines_from_thing_file(thing_file: str, offset: int = 0) -> Iterator[str]:
+    return iter_lines_from_ftp(thing_file, THINGS_FOLDER_NAME_TITELIVE, THINGS_FILE_ENCODING, offset)
 
 
 def get_subcategory_and_extra_data_from_titelive_type(titelive_type):  # type: ignore [no-untyped-def]
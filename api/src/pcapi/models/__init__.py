@@ -20,6 +20,7 @@ def install_models() -> None:
     import pcapi.core.mails.models
     import pcapi.core.offerers.models
     import pcapi.core.offers.models
+    import pcapi.core.payments.ledger  # not a model, but registers listeners that update `Deposit`
     import pcapi.core.payments.models
     import pcapi.core.permissions.models
     import pcapi.core.providers.models
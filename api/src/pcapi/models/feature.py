@@ -1,5 +1,7 @@
+import dataclasses
 import enum
 import logging
+import time
 
 from alembic import op
 import flask
@@ -8,6 +10,7 @@ from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy.sql import text
 
+from pcapi import settings
 from pcapi.models import Base
 from pcapi.models import Model
 from pcapi.models import db
@@ -18,6 +21,9 @@ from pcapi.models.pc_object import PcObject
 logger = logging.getLogger(__name__)
 
 
+REDIS_FEATURE_FLAGS_VERSION = "feature_flags:version"
+
+
 class DisabledFeatureError(Exception):
     pass
 
@@ -33,7 +39,13 @@ class FeatureToggle(enum.Enum):
     API_SIRENE_AVAILABLE = "Active les fonctionnalitées liées à l'API Sirene"
     APP_ENABLE_AUTOCOMPLETE = "Active l'autocomplete sur la barre de recherche relative au rework de la homepage"
     APP_ENABLE_CATEGORY_FILTER_PAGE = "Active le filtre des catégories dans les résultats de la recherche"
+    BATCH_COALESCE_USER_ATTRIBUTES_UPDATES = (
+        "Regroupe les mises à jour des attributs des utilisateurs dans Batch et les envoie par lots"
+    )
     BENEFICIARY_VALIDATION_AFTER_FRAUD_CHECKS = "Active la validation d'un bénéficiaire via les contrôles de sécurité"
+    DEFER_BOOKING_SIDE_EFFECTS = (
+        "Envoie les e-mails et met à jour les services externes dans une tâche asynchrone après une réservation"
+    )
     DISABLE_ENTERPRISE_API = "Désactiver les appels à l'API entreprise"
     DISABLE_USER_NAME_AND_FIRST_NAME_VALIDATION_IN_TESTING_AND_STAGING = "Désactiver la validation des noms et prénoms"
     DISPLAY_DMS_REDIRECTION = "Affiche une redirection vers DMS si ID Check est KO"
@@ -91,12 +103,15 @@ class FeatureToggle(enum.Enum):
         "Inclure les anciens modèles de données pour le téléchargement des remboursements "
     )
     PRICE_BOOKINGS = "Active la valorisation des réservations"
+    PRICE_BOOKINGS_IN_BATCH = "Valorise les réservations par lot, groupées par point de valorisation"
+    SAVE_PROVIDABLES_WITH_COPY = "Enregistre les objets synchronisés depuis les fournisseurs avec COPY (PostgreSQL)"
     PRO_DISABLE_EVENTS_QRCODE = "Active la possibilité de différencier le type d’envoi des billets sur une offre et le retrait du QR code sur la réservation"
     SYNCHRONIZE_ALLOCINE = "Permettre la synchronisation journalière avec Allociné"
     SYNCHRONIZE_TITELIVE_PRODUCTS = "Permettre limport journalier du référentiel des livres"
     SYNCHRONIZE_TITELIVE_PRODUCTS_DESCRIPTION = "Permettre limport journalier des résumés des livres"
     SYNCHRONIZE_TITELIVE_PRODUCTS_THUMBS = "Permettre limport journalier des couvertures de livres"
     UPDATE_BOOKING_USED = "Permettre la validation automatique des contremarques 48h après la fin de lévènement"
+    USE_DEPOSIT_LEDGER = "Utilise les montants dépensés enregistrés sur le crédit au lieu de sommer les réservations"
     USER_PROFILING_FRAUD_CHECK = "Détection de la fraude basée sur le profil de l'utilisateur"
     # FIXME (dbaty, 2022-02-21): remove WEBAPP_V2_ENABLED when no user
     # accessed the old webapp (through its old URL) anymore. Until
@@ -132,7 +147,7 @@ class FeatureToggle(enum.Enum):
             if cached_value is not None:
                 return cached_value
 
-        value = Feature.query.filter_by(name=self.name).one().isActive
+        value = _get_cached_status(self)
 
         if flask.has_request_context():
             flask.request._cached_features[self.name] = value  # type: ignore [attr-defined]
@@ -149,9 +164,79 @@ class Feature(PcObject, Base, Model, DeactivableMixin):  # type: ignore [valid-t
         return str(self.name).replace("FeatureToggle.", "")
 
 
+@dataclasses.dataclass(frozen=True)
+class _FeatureCache:
+    statuses: dict[str, bool]
+    version: str | None  # value of `REDIS_FEATURE_FLAGS_VERSION` when loaded
+    checked_at: float
+
+
+# Process-wide cache of the status of all feature flags. When it is
+# older than `FEATURE_FLAGS_CACHE_TTL` seconds, we check whether a flag
+# has been toggled (see `invalidate_feature_cache()`) since it has been
+# loaded. If so, all flags are loaded again, with a single query.
+_feature_cache: _FeatureCache | None = None
+
+
+def _get_feature_cache_version() -> str | None:
+    try:
+        return flask.current_app.redis_client.get(REDIS_FEATURE_FLAGS_VERSION)  # type: ignore [attr-defined]
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Could not get version of feature flags cache")
+        return None
+
+
+def _load_feature_cache(version: str | None) -> _FeatureCache:
+    statuses = dict(Feature.query.with_entities(Feature.name, Feature.isActive))
+    return _FeatureCache(statuses=statuses, version=version, checked_at=time.monotonic())
+
+
+def _get_cached_status(feature: FeatureToggle) -> bool:
+    global _feature_cache  # pylint: disable=global-statement
+
+    if not settings.FEATURE_FLAGS_CACHE_TTL:
+        return Feature.query.filter_by(name=feature.name).one().isActive
+
+    cache = _feature_cache
+    if cache is None:
+        cache = _load_feature_cache(_get_feature_cache_version())
+    elif time.monotonic() - cache.checked_at > settings.FEATURE_FLAGS_CACHE_TTL:
+        version = _get_feature_cache_version()
+        # If we cannot tell whether a flag has been toggled, reload.
+        if version is None or version != cache.version:
+            cache = _load_feature_cache(version)
+        else:
+            cache = dataclasses.replace(cache, checked_at=time.monotonic())
+    _feature_cache = cache
+
+    if feature.name not in cache.statuses:
+        # Not installed yet, let the query fail like it does without cache.
+        return Feature.query.filter_by(name=feature.name).one().isActive
+    return cache.statuses[feature.name]
+
+
+def invalidate_feature_cache() -> None:
+    """Make this process reload feature flags from the database on the
+    next check, and other processes within `FEATURE_FLAGS_CACHE_TTL`
+    seconds.
+
+    This must be called after the change has been committed, otherwise
+    other processes could load and cache the old status.
+    """
+    global _feature_cache  # pylint: disable=global-statement
+
+    _feature_cache = None
+    try:
+        flask.current_app.redis_client.incr(REDIS_FEATURE_FLAGS_VERSION)  # type: ignore [attr-defined]
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Could not invalidate feature flags cache")
+
+
 FEATURES_DISABLED_BY_DEFAULT = (
     FeatureToggle.ALLOW_IDCHECK_REGISTRATION_FOR_EDUCONNECT_ELIGIBLE,
     FeatureToggle.APP_ENABLE_CATEGORY_FILTER_PAGE,
+    FeatureToggle.BATCH_COALESCE_USER_ATTRIBUTES_UPDATES,
+    FeatureToggle.DEFER_BOOKING_SIDE_EFFECTS,
     FeatureToggle.DISABLE_ENTERPRISE_API,
     FeatureToggle.ENABLE_AUTO_VALIDATION_FOR_EXTERNAL_BOOKING,
     FeatureToggle.ENABLE_BACKOFFICE_API,
@@ -173,8 +258,11 @@ FEATURES_DISABLED_BY_DEFAULT = (
     FeatureToggle.ID_CHECK_ADDRESS_AUTOCOMPLETION,
     FeatureToggle.OFFER_DRAFT_ENABLED,
     FeatureToggle.OFFER_FORM_V3,
+    FeatureToggle.PRICE_BOOKINGS_IN_BATCH,
     FeatureToggle.PRO_DISABLE_EVENTS_QRCODE,
+    FeatureToggle.SAVE_PROVIDABLES_WITH_COPY,
     FeatureToggle.USER_PROFILING_FRAUD_CHECK,
+    FeatureToggle.USE_DEPOSIT_LEDGER,
     FeatureToggle.USE_PRICING_POINT_FOR_PRICING,
     FeatureToggle.USE_REIMBURSEMENT_POINT_FOR_CASHFLOWS,
     FeatureToggle.ENABLE_EAC_FINANCIAL_PROTECTION,
@@ -254,6 +342,8 @@ def install_feature_flags() -> None:
         )
 
     db.session.commit()
+    if to_install_flags:
+        invalidate_feature_cache()
 
     if to_remove_flags:
         logger.error("The following feature flags are present in database but not present in code: %s", to_remove_flags)
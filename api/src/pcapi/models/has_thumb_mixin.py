@@ -6,6 +6,10 @@ from pcapi import settings
 from pcapi.utils.human_ids import humanize
 
 
+def get_thumb_url(thumb_path_component: str, object_id: int) -> str:
+    return "{}/thumbs/{}/{}".format(settings.OBJECT_STORAGE_URL, thumb_path_component, humanize(object_id))
+
+
 @declarative_mixin
 class HasThumbMixin:
     thumbCount: int = Column(Integer(), nullable=False, default=0)
@@ -35,4 +39,4 @@ class HasThumbMixin:
     def thumbUrl(self):  # type: ignore [no-untyped-def]
         if self.thumbCount == 0:
             return None
-        return "{}/{}/{}".format(self.thumb_base_url, self.thumb_path_component, humanize(self.id))
+        return get_thumb_url(self.thumb_path_component, self.id)  # type: ignore [attr-defined]
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import cast
 
 from dateutil import parser
+import flask
 from flask import request
 from flask_login import current_user
 from flask_login import login_required
@@ -133,7 +133,7 @@ def get_user_has_bookings() -> UserHasBookingResponse:
         "Content-Disposition": "attachment; filename=reservations_pass_culture.csv",
     },
 )
-def get_bookings_csv(query: ListBookingsQueryModel) -> bytes:
+def get_bookings_csv(query: ListBookingsQueryModel) -> flask.Response:
 
     return _create_booking_export_file(query, BookingExportType.CSV)
 
@@ -147,7 +147,7 @@ def get_bookings_csv(query: ListBookingsQueryModel) -> bytes:
         "Content-Disposition": "attachment; filename=reservations_pass_culture.xlsx",
     },
 )
-def get_bookings_excel(query: ListBookingsQueryModel) -> bytes:
+def get_bookings_excel(query: ListBookingsQueryModel) -> flask.Response:
     return _create_booking_export_file(query, BookingExportType.EXCEL)
 
 
@@ -172,7 +172,7 @@ def _create_response_to_get_booking_by_token(booking: Booking) -> dict:
     return response
 
 
-def _create_booking_export_file(query: ListBookingsQueryModel, export_type: BookingExportType) -> bytes:
+def _create_booking_export_file(query: ListBookingsQueryModel, export_type: BookingExportType) -> flask.Response:
     venue_id = query.venue_id
     event_date = parser.parse(query.event_date) if query.event_date else None
     booking_period = None
@@ -184,7 +184,9 @@ def _create_booking_export_file(query: ListBookingsQueryModel, export_type: Book
     booking_status = query.booking_status_filter
     offer_type = query.offer_type
 
-    export_data = booking_repository.get_export(
+    # Stream the file as bookings are fetched, instead of building it
+    # in memory: exports of large offerers may be huge.
+    export_data = booking_repository.stream_export(
         user=current_user._get_current_object(),  # for tests to succeed, because current_user is actually a LocalProxy
         booking_period=booking_period,
         status_filter=booking_status,
@@ -193,7 +195,4 @@ def _create_booking_export_file(query: ListBookingsQueryModel, export_type: Book
         offer_type=offer_type,
         export_type=export_type,
     )
-
-    if export_type == BookingExportType.CSV:
-        return cast(str, export_data).encode("utf-8-sig")
-    return cast(bytes, export_data)
+    return flask.Response(flask.stream_with_context(export_data))
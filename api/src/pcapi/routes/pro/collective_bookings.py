@@ -1,9 +1,9 @@
 from datetime import datetime
 import logging
 import math
-from typing import cast
 
 from dateutil import parser
+import flask
 from flask_login import current_user
 from flask_login import login_required
 
@@ -93,7 +93,7 @@ def get_collective_booking_by_id(booking_id: str) -> collective_bookings_seriali
 )
 def get_collective_bookings_csv(
     query: collective_bookings_serialize.ListCollectiveBookingsQueryModel,
-) -> str | bytes:
+) -> flask.Response:
     return _create_collective_bookings_export_file(query, BookingExportType.CSV)
 
 
@@ -108,13 +108,13 @@ def get_collective_bookings_csv(
 )
 def get_collective_bookings_excel(
     query: collective_bookings_serialize.ListCollectiveBookingsQueryModel,
-) -> str | bytes:
+) -> flask.Response:
     return _create_collective_bookings_export_file(query, BookingExportType.EXCEL)
 
 
 def _create_collective_bookings_export_file(
     query: collective_bookings_serialize.ListCollectiveBookingsQueryModel, export_type: BookingExportType
-) -> str | bytes:
+) -> flask.Response:
     venue_id = query.venue_id
     event_date = parser.parse(query.event_date) if query.event_date else None
     booking_period = None
@@ -125,7 +125,7 @@ def _create_collective_bookings_export_file(
         )
     booking_status = query.booking_status_filter
 
-    export_data = collective_api.get_collective_booking_report(
+    export_data = collective_api.stream_collective_booking_report(
         user=current_user._get_current_object(),  # for tests to succeed, because current_user is actually a LocalProxy
         booking_period=booking_period,
         status_filter=booking_status,
@@ -133,10 +133,7 @@ def _create_collective_bookings_export_file(
         venue_id=venue_id,
         export_type=export_type,
     )
-
-    if export_type == BookingExportType.CSV:
-        return cast(str, export_data).encode("utf-8-sig")
-    return cast(bytes, export_data)
+    return flask.Response(flask.stream_with_context(export_data))
 
 
 @blueprint.pro_private_api.route("/collective/bookings/pro/userHasBookings", methods=["GET"])
@@ -16,6 +16,7 @@ from pcapi.core.offers.validation import check_offer_withdrawal
 from pcapi.models.api_errors import ApiErrors
 from pcapi.routes.apis import private_api
 from pcapi.routes.serialization import offers_serialize
+from pcapi.routes.serialization.offers_recap_serialize import serialize_offers_page
 from pcapi.routes.serialization.offers_recap_serialize import serialize_offers_recap_paginated
 from pcapi.routes.serialization.thumbnails_serialize import CreateThumbnailBodyModel
 from pcapi.routes.serialization.thumbnails_serialize import CreateThumbnailResponseModel
@@ -54,6 +55,31 @@ def list_offers(query: offers_serialize.ListOffersQueryModel) -> offers_serializ
     return offers_serialize.ListOffersResponseModel(__root__=serialize_offers_recap_paginated(paginated_offers))
 
 
+@private_api.route("/offers/paginated", methods=["GET"])
+@login_required
+@spectree_serialize(
+    response_model=offers_serialize.ListOffersPageResponseModel,
+    api=blueprint.pro_private_schema,
+)
+def list_offers_page(query: offers_serialize.ListOffersPageQueryModel) -> offers_serialize.ListOffersPageResponseModel:
+    rows = offers_api.list_offers_page_for_pro_user(
+        user_id=current_user.id,
+        user_is_admin=current_user.has_admin_role,
+        limit=query.limit,
+        after_id=query.after_id,
+        category_id=query.categoryId,
+        offerer_id=query.offerer_id,
+        venue_id=query.venue_id,
+        name_keywords_or_isbn=query.nameOrIsbn,
+        status=query.status,
+        creation_mode=query.creation_mode,
+        period_beginning_date=query.period_beginning_date,
+        period_ending_date=query.period_ending_date,
+    )
+
+    return offers_serialize.ListOffersPageResponseModel(**serialize_offers_page(rows, query.limit))
+
+
 @private_api.route("/offers/<offer_id>", methods=["GET"])
 @login_required
 @spectree_serialize(
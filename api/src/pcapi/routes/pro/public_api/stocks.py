@@ -8,7 +8,7 @@ from pcapi.routes.serialization.stock_serialize import UpdateVenueStocksBodyMode
 from pcapi.serialization.decorator import spectree_serialize
 from pcapi.validation.routes.users_authentifications import api_key_required
 from pcapi.validation.routes.users_authentifications import current_api_key
-from pcapi.workers.synchronize_stocks_job import synchronize_stocks_job
+from pcapi.workers.synchronize_stocks_job import enqueue_stocks_synchronization
 
 
 logger = logging.getLogger(__name__)
@@ -41,7 +41,7 @@ def update_stocks(venue_id: int, body: UpdateVenueStocksBodyModel) -> None:
         # FIXME (dbaty, 2022-04-27): temporary log until we make the
         # price mandatory (if we decide to do so).
         logger.info("Stock API is used without a price", extra={"venue": venue_id})
-    synchronize_stocks_job.delay(stock_details, venue.id)
+    enqueue_stocks_synchronization(venue.id, stock_details)
 
 
 def _build_stock_details_from_body(raw_stocks: list[UpdateVenueStockBodyModel], venue_id: int) -> list:
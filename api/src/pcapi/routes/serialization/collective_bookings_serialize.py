@@ -1,12 +1,9 @@
-import csv
 from datetime import datetime
 from enum import Enum
-from io import BytesIO
-from io import StringIO
+import typing
 
 from flask_sqlalchemy import BaseQuery
 from pydantic import root_validator
-import xlsxwriter
 
 from pcapi.core.bookings.utils import convert_booking_dates_utc_to_venue_timezone
 from pcapi.core.educational import models
@@ -18,6 +15,7 @@ from pcapi.routes.serialization.collective_offers_serialize import CollectiveOff
 from pcapi.routes.serialization.educational_institutions import EducationalInstitutionResponseModel
 from pcapi.serialization.utils import dehumanize_field
 from pcapi.serialization.utils import to_camel
+from pcapi.utils import export as export_utils
 from pcapi.utils.date import format_into_timezoned_date
 from pcapi.utils.date import format_into_utc_date
 from pcapi.utils.human_ids import humanize
@@ -244,79 +242,67 @@ COLLECTIVE_BOOKING_EXPORT_HEADER = [
     "Statut de la réservation",
     "Date et heure de remboursement",
 ]
+COLLECTIVE_BOOKING_EXPORT_CURRENCY_COLUMNS = (7,)  # "Prix de la réservation"
 
 
-def serialize_collective_booking_csv_report(query: BaseQuery) -> str:
-    output = StringIO()
-    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
-    writer.writerow(COLLECTIVE_BOOKING_EXPORT_HEADER)
+def _get_collective_booking_csv_report_rows(query: BaseQuery) -> typing.Iterator[tuple]:
     for collective_booking in query.yield_per(1000):
-        writer.writerow(
-            (
-                collective_booking.venueName,
-                collective_booking.offerName,
-                convert_booking_dates_utc_to_venue_timezone(
-                    collective_booking.stockBeginningDatetime, collective_booking
-                ),
-                f"{collective_booking.lastName} {collective_booking.firstName}",
-                collective_booking.email,
-                convert_booking_dates_utc_to_venue_timezone(collective_booking.bookedAt, collective_booking),
-                convert_booking_dates_utc_to_venue_timezone(collective_booking.usedAt, collective_booking),
-                collective_booking.price,
-                _get_booking_status(collective_booking.status, collective_booking.isConfirmed),
-                convert_booking_dates_utc_to_venue_timezone(collective_booking.reimbursedAt, collective_booking),
-            )
+        yield (
+            collective_booking.venueName,
+            collective_booking.offerName,
+            convert_booking_dates_utc_to_venue_timezone(collective_booking.stockBeginningDatetime, collective_booking),
+            f"{collective_booking.lastName} {collective_booking.firstName}",
+            collective_booking.email,
+            convert_booking_dates_utc_to_venue_timezone(collective_booking.bookedAt, collective_booking),
+            convert_booking_dates_utc_to_venue_timezone(collective_booking.usedAt, collective_booking),
+            collective_booking.price,
+            _get_booking_status(collective_booking.status, collective_booking.isConfirmed),
+            convert_booking_dates_utc_to_venue_timezone(collective_booking.reimbursedAt, collective_booking),
         )
 
-    return output.getvalue()
-
-
-def serialize_collective_booking_excel_report(query: BaseQuery) -> bytes:
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-
-    bold = workbook.add_format({"bold": 1})
-    currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
-    col_width = 18
-
-    worksheet = workbook.add_worksheet()
-    row = 0
 
-    for col_num, title in enumerate(COLLECTIVE_BOOKING_EXPORT_HEADER):
-        worksheet.write(row, col_num, title, bold)
-        worksheet.set_column(col_num, col_num, col_width)
-    row = 1
+def _get_collective_booking_excel_report_rows(query: BaseQuery) -> typing.Iterator[tuple]:
     for collective_booking in query.yield_per(1000):
-        worksheet.write(row, 0, collective_booking.venueName)
-        worksheet.write(row, 1, collective_booking.offerName)
-        worksheet.write(
-            row,
-            2,
+        yield (
+            collective_booking.venueName,
+            collective_booking.offerName,
             str(
                 convert_booking_dates_utc_to_venue_timezone(
                     collective_booking.stockBeginningDatetime, collective_booking
                 )
             ),
-        )
-        worksheet.write(row, 3, f"{collective_booking.lastName} {collective_booking.firstName}")
-        worksheet.write(row, 4, collective_booking.email)
-        worksheet.write(
-            row, 5, str(convert_booking_dates_utc_to_venue_timezone(collective_booking.bookedAt, collective_booking))
-        )
-        worksheet.write(
-            row, 6, str(convert_booking_dates_utc_to_venue_timezone(collective_booking.usedAt, collective_booking))
-        )
-        worksheet.write(row, 7, collective_booking.price, currency_format)
-        worksheet.write(row, 8, _get_booking_status(collective_booking.status, collective_booking.isConfirmed))
-        worksheet.write(
-            row,
-            9,
+            f"{collective_booking.lastName} {collective_booking.firstName}",
+            collective_booking.email,
+            str(convert_booking_dates_utc_to_venue_timezone(collective_booking.bookedAt, collective_booking)),
+            str(convert_booking_dates_utc_to_venue_timezone(collective_booking.usedAt, collective_booking)),
+            collective_booking.price,
+            _get_booking_status(collective_booking.status, collective_booking.isConfirmed),
             str(convert_booking_dates_utc_to_venue_timezone(collective_booking.reimbursedAt, collective_booking)),
         )
-        row += 1
 
-    workbook.close()
-    return output.getvalue()
+
+def stream_collective_booking_csv_report(query: BaseQuery) -> typing.Iterator[bytes]:
+    return export_utils.encode(
+        export_utils.iter_csv(COLLECTIVE_BOOKING_EXPORT_HEADER, _get_collective_booking_csv_report_rows(query))
+    )
+
+
+def stream_collective_booking_excel_report(query: BaseQuery) -> typing.Iterator[bytes]:
+    return export_utils.iter_excel(
+        COLLECTIVE_BOOKING_EXPORT_HEADER,
+        _get_collective_booking_excel_report_rows(query),
+        currency_columns=COLLECTIVE_BOOKING_EXPORT_CURRENCY_COLUMNS,
+    )
+
+
+def serialize_collective_booking_csv_report(query: BaseQuery) -> str:
+    return "".join(
+        export_utils.iter_csv(COLLECTIVE_BOOKING_EXPORT_HEADER, _get_collective_booking_csv_report_rows(query))
+    )
+
+
+def serialize_collective_booking_excel_report(query: BaseQuery) -> bytes:
+    return b"".join(stream_collective_booking_excel_report(query))
 
 
 class CollectiveBookingEducationalRedactorResponseModel(BaseModel):
@@ -1,7 +1,13 @@
+import typing
+
+from pcapi.core.categories import subcategories
+from pcapi.core.offers.models import Mediation
+from pcapi.core.offers.models import Product
 from pcapi.domain.pro_offers.offers_recap import OfferRecap
 from pcapi.domain.pro_offers.offers_recap import OfferRecapStock
 from pcapi.domain.pro_offers.offers_recap import OfferRecapVenue
 from pcapi.domain.pro_offers.offers_recap import OffersRecap
+from pcapi.models.has_thumb_mixin import get_thumb_url
 from pcapi.utils.human_ids import humanize
 
 
@@ -52,3 +58,54 @@ def _serialize_venue(venue: OfferRecapVenue) -> dict:
         "publicName": venue.public_name,
         "departementCode": venue.departement_code,
     }
+
+
+def serialize_offers_page(rows: list, limit: int) -> dict:
+    """Serialize rows returned by `get_offers_page_for_filters()`."""
+    return {
+        "offers": [_serialize_offers_page_row(row) for row in rows],
+        # Rows are ordered by descending id: the next page starts
+        # after the last row, if this page is full.
+        "nextCursor": humanize(rows[-1].id) if len(rows) == limit else None,
+    }
+
+
+def _serialize_offers_page_row(row: typing.Any) -> dict:
+    is_event = subcategories.ALL_SUBCATEGORIES_DICT[row.subcategoryId].is_event
+    return {
+        "hasBookingLimitDatetimesPassed": row.hasBookingLimitDatetimesPassed,
+        "id": humanize(row.id),
+        "isActive": row.isActive,
+        "isEditable": row.isEditable,
+        "isEvent": is_event,
+        "isThing": not is_event,
+        "isSoldOut": row.isSoldOut,
+        "productIsbn": row.isbn,
+        "name": row.name,
+        "stocksCount": row.stocksCount,
+        "remainingQuantity": "unlimited" if row.hasUnlimitedQuantity else row.remainingQuantity,
+        "thumbUrl": _get_offers_page_row_thumb_url(row),
+        "subcategoryId": row.subcategoryId,
+        "venue": {
+            "id": humanize(row.venueId),
+            "isVirtual": row.venueIsVirtual,
+            "managingOffererId": humanize(row.venueManagingOffererId),
+            "name": row.venueName,
+            "offererName": row.offererName,
+            "publicName": row.venuePublicName,
+            "departementCode": row.venueDepartementCode,
+        },
+        "venueId": humanize(row.venueId),
+        "status": row.status,
+        "isShowcase": row.isShowcase,
+    }
+
+
+def _get_offers_page_row_thumb_url(row: typing.Any) -> str | None:
+    # Same as `Offer.thumbUrl`: the thumb of the active mediation, if
+    # any, otherwise the thumb of the product.
+    if row.mediationId is not None and row.mediationThumbCount:
+        return get_thumb_url(Mediation.thumb_path_component, row.mediationId)
+    if row.productId is not None and row.productThumbCount:
+        return get_thumb_url(Product.thumb_path_component, row.productId)
+    return None
@@ -270,6 +270,42 @@ class ListOffersQueryModel(BaseModel):
         arbitrary_types_allowed = True
 
 
+OFFERS_PAGE_DEFAULT_SIZE = 50
+OFFERS_PAGE_MAX_SIZE = 500
+
+
+class ListOffersPageQueryModel(ListOffersQueryModel):
+    after_id: int | None
+    limit: int = Field(OFFERS_PAGE_DEFAULT_SIZE, gt=0, le=OFFERS_PAGE_MAX_SIZE)
+
+    _dehumanize_after_id = dehumanize_field("after_id")
+
+
+class ListOffersPageOfferResponseModel(BaseModel):
+    hasBookingLimitDatetimesPassed: bool
+    id: str
+    isActive: bool
+    isEditable: bool
+    isEvent: bool
+    isThing: bool
+    isSoldOut: bool
+    name: str
+    stocksCount: int
+    remainingQuantity: int | str
+    thumbUrl: str | None
+    productIsbn: str | None
+    subcategoryId: SubcategoryIdEnum
+    venue: ListOffersVenueResponseModel
+    status: str
+    venueId: str
+    isShowcase: bool | None
+
+
+class ListOffersPageResponseModel(BaseModel):
+    offers: list[ListOffersPageOfferResponseModel]
+    nextCursor: str | None
+
+
 class GetOfferProductResponseModel(BaseModel):
     ageMax: int | None
     ageMin: int | None
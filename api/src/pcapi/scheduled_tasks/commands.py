@@ -16,15 +16,16 @@ import pcapi.core.finance.utils as finance_utils
 import pcapi.core.fraud.api as fraud_api
 import pcapi.core.mails.transactional as transactional_mails
 from pcapi.core.offerers.repository import find_offerers_validated_3_days_ago_with_no_venues
+import pcapi.core.offers.api as offers_api
 from pcapi.core.offers.models import Offer
 from pcapi.core.offers.models import Stock
-from pcapi.core.offers.repository import check_stock_consistency
 from pcapi.core.offers.repository import delete_past_draft_collective_offers
 from pcapi.core.offers.repository import delete_past_draft_offers
 from pcapi.core.offers.repository import find_event_stocks_happening_in_x_days
 from pcapi.core.providers.repository import get_provider_by_local_class
 from pcapi.core.users import api as users_api
 import pcapi.core.users.constants as users_constants
+from pcapi.core.users.external import batch as batch_operations
 from pcapi.core.users.external import user_automations
 from pcapi.core.users.repository import get_newly_eligible_age_18_users
 from pcapi.local_providers.provider_manager import synchronize_venue_providers_for_provider
@@ -37,7 +38,9 @@ from pcapi.scripts.booking import notify_soon_to_be_expired_bookings
 from pcapi.scripts.payment import user_recredit
 from pcapi.scripts.subscription import dms as dms_script
 from pcapi.scripts.subscription import ubble as ubble_script
+from pcapi.tasks import cloud_task
 from pcapi.utils.blueprint import Blueprint
+from pcapi.workers import synchronize_stocks_job
 
 
 DMS_OLD_PROCEDURE_ID = 44623
@@ -57,6 +60,15 @@ def update_booking_used() -> None:
     bookings_api.auto_mark_as_used_after_event()
 
 
+@blueprint.cli.command("redispatch_booking_side_effects")
+@log_cron_with_transaction
+def redispatch_booking_side_effects() -> None:
+    """Run side effects of bookings (emails, updates of external
+    services) that have been deferred and not run.
+    """
+    bookings_api.redispatch_booking_side_effects()
+
+
 @blueprint.cli.command("synchronize_allocine_stocks")
 @log_cron_with_transaction
 @cron_require_feature(FeatureToggle.SYNCHRONIZE_ALLOCINE)
@@ -163,10 +175,16 @@ def clean_expired_tokens() -> None:
 
 @blueprint.cli.command("check_stock_quantity_consistency")
 @log_cron_with_transaction
-def check_stock_quantity_consistency() -> None:
-    inconsistent_stocks = check_stock_consistency()
+@click.option("--full", help="Check all stocks, not only those modified since the last run", is_flag=True)
+@click.option("--dry-run", help="Only report inconsistent stocks, do not fix them", is_flag=True)
+def check_stock_quantity_consistency(full: bool, dry_run: bool) -> None:
+    checked, inconsistent_stocks = offers_api.check_stock_consistency(full=full, dry_run=dry_run)
     if inconsistent_stocks:
-        logger.error("Found inconsistent stocks: %s", ", ".join([str(stock_id) for stock_id in inconsistent_stocks]))
+        logger.error(
+            "Found inconsistent stocks: %s",
+            ", ".join([str(stock_id) for stock_id in inconsistent_stocks]),
+            extra={"checked": checked, "fixed": not dry_run},
+        )
 
 
 @blueprint.cli.command("send_today_events_notifications_metropolitan_france")
@@ -324,6 +342,35 @@ def users_whose_credit_expired_today_automation() -> None:
     user_automations.users_whose_credit_expired_today_automation()
 
 
+@blueprint.cli.command("flush_batch_user_attributes_queue")
+@log_cron_with_transaction
+def flush_batch_user_attributes_queue() -> None:
+    """Send queued attributes of users to Batch, by batches (see
+    BATCH_COALESCE_USER_ATTRIBUTES_UPDATES feature flag).
+    This command is meant to be called every minute."""
+    batch_operations.flush_user_attributes_queue()
+    logger.info("Batch user attributes queue metrics", extra=batch_operations.get_user_attributes_queue_metrics())
+
+
+@blueprint.cli.command("replay_failed_cloud_tasks")
+@log_cron_with_transaction
+@click.option("--max-tasks", help="Maximum number of tasks to enqueue again", type=int, default=1000)
+def replay_failed_cloud_tasks(max_tasks: int) -> None:
+    """Enqueue again buffered Cloud Tasks that could not be enqueued."""
+    replayed, failed = cloud_task.replay_failed_tasks(max_count=max_tasks)
+    logger.info("Replayed failed cloud tasks", extra={"tasks": replayed, "failed": failed})
+
+
+@blueprint.cli.command("enqueue_pending_stocks_synchronizations")
+@log_cron_with_transaction
+def enqueue_pending_stocks_synchronizations() -> None:
+    """Enqueue a job for venues whose stocks sent through the public API
+    have not been synchronized (e.g. because their job has failed).
+    This command is meant to be called every 10 minutes."""
+    enqueued = synchronize_stocks_job.enqueue_pending_venues_synchronization()
+    logger.info("Enqueued pending stocks synchronizations", extra={"venues": enqueued})
+
+
 @blueprint.cli.command("notify_users_bookings_not_retrieved")
 @log_cron_with_transaction
 def notify_users_bookings_not_retrieved_command() -> None:
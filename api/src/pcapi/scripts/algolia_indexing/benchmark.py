@@ -0,0 +1,78 @@
+import json
+import logging
+import time
+
+from sqlalchemy.orm import joinedload
+
+import pcapi.core.offerers.models as offerers_models
+import pcapi.core.offers.models as offers_models
+from pcapi.core.search.backends import algolia
+from pcapi.core.search.backends import algolia_bulk
+from pcapi.models import db
+from pcapi.utils.chunks import get_chunks
+
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize_with_orm(offer_ids: list[int]) -> dict[int, dict]:
+    # Load offers with everything `AlgoliaBackend.serialize_offer()` needs.
+    offers = (
+        offers_models.Offer.query.options(
+            joinedload(offers_models.Offer.venue).joinedload(offerers_models.Venue.managingOfferer)
+        )
+        .options(joinedload(offers_models.Offer.criteria))
+        .options(joinedload(offers_models.Offer.mediations))
+        .options(joinedload(offers_models.Offer.product))
+        .options(joinedload(offers_models.Offer.stocks))
+        .filter(offers_models.Offer.id.in_(offer_ids))
+    )
+    return {offer.id: algolia.AlgoliaBackend.serialize_offer(offer) for offer in offers}
+
+
+def benchmark_offer_serialization(count: int, chunk_size: int) -> dict:
+    """Serialize the ``count`` most recent active offers with both the
+    ORM-based serializer and the bulk serializer, in chunks of
+    ``chunk_size`` offers (like the indexation cron does), and report
+    the time spent by each one.
+
+    Payloads are compared, the benchmark fails if they differ.
+    """
+    offer_ids = [
+        offer_id
+        for offer_id, in offers_models.Offer.query.filter(offers_models.Offer.isActive.is_(True))
+        .order_by(offers_models.Offer.id.desc())
+        .limit(count)
+        .with_entities(offers_models.Offer.id)
+    ]
+
+    results: dict[str, float] = {}
+    payloads: dict[str, dict[int, dict]] = {}
+    for name, serialize in (("orm", _serialize_with_orm), ("bulk", algolia_bulk.serialize_offer_ids)):
+        # Start each run with an empty session, so that the ORM run
+        # does not benefit from objects loaded by the other one.
+        db.session.expunge_all()
+        payloads[name] = {}
+        start = time.perf_counter()
+        for chunk in get_chunks(offer_ids, chunk_size):
+            payloads[name].update(serialize(chunk))
+        results[name] = time.perf_counter() - start
+
+    mismatches = [
+        offer_id
+        for offer_id in offer_ids
+        if json.dumps(payloads["orm"].get(offer_id), default=str)
+        != json.dumps(payloads["bulk"].get(offer_id), default=str)
+    ]
+    report = {
+        "offers": len(offer_ids),
+        "chunk_size": chunk_size,
+        "orm_duration": round(results["orm"], 3),
+        "bulk_duration": round(results["bulk"], 3),
+        "speedup": round(results["orm"] / results["bulk"], 2) if results["bulk"] else None,
+        "mismatches": len(mismatches),
+    }
+    logger.info("Benchmarked offer serialization", extra=report)
+    if mismatches:
+        raise ValueError(f"Bulk serialization differs for {len(mismatches)} offers, e.g. {mismatches[:10]}")
+    return report
@@ -3,6 +3,7 @@ import click
 from pcapi.core import search
 import pcapi.core.educational.api as educational_api
 import pcapi.core.offers.api as offers_api
+from pcapi.scripts.algolia_indexing.benchmark import benchmark_offer_serialization
 from pcapi.scripts.algolia_indexing.indexing import batch_indexing_offers_in_algolia_from_database
 from pcapi.scripts.algolia_indexing.indexing import batch_indexing_venues_in_algolia_from_database
 from pcapi.utils.blueprint import Blueprint
@@ -12,8 +13,15 @@ blueprint = Blueprint(__name__, __name__)
 
 
 @blueprint.cli.command("process_offers")
-def process_offers():  # type: ignore [no-untyped-def]
-    search.index_offers_in_queue(stop_only_when_empty=True)
+@click.option(
+    "-w",
+    "--workers",
+    help="Number of threads per stage of the indexation pipeline (0 to process chunks sequentially)",
+    type=int,
+    default=None,
+)
+def process_offers(workers: int | None):  # type: ignore [no-untyped-def]
+    search.index_offers_in_queue(stop_only_when_empty=True, workers=workers)
 
 
 @blueprint.cli.command("process_offers_by_venue")
@@ -57,3 +65,15 @@ def process_venues_from_database(clear: bool, batch_size: int, max_venues: int):
     if clear:
         search.unindex_all_venues()
     batch_indexing_venues_in_algolia_from_database(algolia_batch_size=batch_size, max_venues=max_venues)
+
+
+@blueprint.cli.command("benchmark_offer_serialization")
+@click.option("--count", help="Number of offers to serialize", type=int, default=10_000)
+@click.option("--chunk-size", help="Number of offers per chunk", type=int, default=1_000)
+def benchmark_offer_serialization_command(count: int, chunk_size: int):  # type: ignore [no-untyped-def]
+    """Compare the ORM-based and bulk serializers of offers."""
+    report = benchmark_offer_serialization(count=count, chunk_size=chunk_size)
+    click.echo(
+        f"{report['offers']} offers: ORM {report['orm_duration']}s, bulk {report['bulk_duration']}s "
+        f"(x{report['speedup']})"
+    )
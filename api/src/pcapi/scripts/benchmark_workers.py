@@ -0,0 +1,94 @@
+import logging
+import time
+
+import click
+from rq import Connection
+from rq import Queue
+from rq import Worker
+from rq.job import Job
+import sqlalchemy as sa
+
+from pcapi.models import db
+from pcapi.utils.blueprint import Blueprint
+from pcapi.workers.decorators import job
+from pcapi.workers.pool import WorkerPool
+from pcapi.workers.worker import conn
+from pcapi.workers.worker import log_worker_error
+
+
+blueprint = Blueprint(__name__, __name__)
+logger = logging.getLogger(__name__)
+
+
+BENCHMARK_QUEUE_NAME = "benchmark"
+benchmark_queue = Queue(BENCHMARK_QUEUE_NAME, connection=conn)
+
+
+@job(benchmark_queue)
+def benchmark_job() -> None:
+    # A tiny job that uses the database, like most of our jobs.
+    db.session.execute(sa.text("SELECT 1"))
+
+
+def _enqueue_jobs(count: int) -> list[str]:
+    benchmark_queue.empty()
+    # Keep finished jobs long enough to read their timestamps.
+    return [benchmark_queue.enqueue(benchmark_job, result_ttl=3600).id for _ in range(count)]
+
+
+def _run_forking_worker() -> None:
+    # Like `run_worker()`, do not share connections with forked processes.
+    db.session.remove()
+    db.engine.dispose()
+    with Connection(conn):
+        Worker([Queue(BENCHMARK_QUEUE_NAME)], exception_handlers=[log_worker_error]).work(burst=True)
+
+
+def _get_report(job_ids: list[str], duration: float) -> dict:
+    jobs = [job for job in Job.fetch_many(job_ids, connection=conn) if job]
+    finished = [job for job in jobs if job.is_finished]
+    report = {"jobs": len(job_ids), "failed": len(job_ids) - len(finished), "duration": round(duration, 3)}
+    if finished:
+        # Startup time (application import, process spawning) is not
+        # included: only the time spent between the first and the last
+        # job is.
+        processing = (max(job.ended_at for job in finished) - min(job.started_at for job in finished)).total_seconds()
+        report["jobs_per_second"] = round(len(finished) / processing, 1) if processing else None
+    return report
+
+
+def benchmark_workers(count: int, processes: list[int], max_jobs_per_child: int | None = None) -> dict[str, dict]:
+    """Run ``count`` tiny jobs with the forking RQ worker, then with
+    pools of long-lived processes of each size in ``processes``, and
+    report how many jobs per second each of them has run.
+
+    Jobs are enqueued in a dedicated queue, that is emptied first.
+    """
+    reports = {}
+    job_ids = _enqueue_jobs(count)
+    start = time.perf_counter()
+    _run_forking_worker()
+    reports["fork"] = _get_report(job_ids, time.perf_counter() - start)
+
+    for size in processes:
+        job_ids = _enqueue_jobs(count)
+        start = time.perf_counter()
+        WorkerPool([BENCHMARK_QUEUE_NAME], size, max_jobs_per_child).run(burst=True)
+        reports[f"pool-{size}"] = _get_report(job_ids, time.perf_counter() - start)
+
+    logger.info("Benchmarked RQ workers", extra=reports)
+    return reports
+
+
+@blueprint.cli.command("benchmark_workers")
+@click.option("--jobs", help="Number of jobs to run with each worker", type=int, default=1000)
+@click.option("--processes", help="Comma-separated sizes of worker pools", type=str, default="1,4")
+@click.option("--max-jobs-per-child", help="Number of jobs run by each process of pools", type=int, default=None)
+def benchmark_workers_command(jobs: int, processes: str, max_jobs_per_child: int | None):  # type: ignore [no-untyped-def]
+    """Compare the forking RQ worker with pools of long-lived processes."""
+    reports = benchmark_workers(jobs, [int(size) for size in processes.split(",")], max_jobs_per_child)
+    for name, report in reports.items():
+        click.echo(
+            f"{name}: {report.get('jobs_per_second')} jobs/s "
+            f"({report['jobs']} jobs, {report['failed']} failed, {report['duration']}s in total)"
+        )
@@ -10,12 +10,14 @@ from pcapi.core.bookings.api import recompute_dnBookedQuantity
 from pcapi.core.bookings.models import Booking
 from pcapi.core.bookings.models import BookingCancellationReasons
 from pcapi.core.bookings.models import BookingStatus
+from pcapi.core.bookings.models import IndividualBooking
 import pcapi.core.bookings.repository as bookings_repository
 from pcapi.core.educational.models import CollectiveBooking
 from pcapi.core.educational.models import CollectiveBookingCancellationReasons
 from pcapi.core.educational.models import CollectiveBookingStatus
 import pcapi.core.educational.repository as educational_repository
 import pcapi.core.mails.transactional as transactional_mails
+from pcapi.core.payments import ledger as payments_ledger
 from pcapi.core.users.models import User
 from pcapi.models import db
 
@@ -93,6 +95,17 @@ def cancel_expired_bookings(query: BaseQuery, batch_size: int = 500) -> None:
             for row in db.session.query(Booking.stockId).filter(Booking.id.in_(booking_ids_to_update)).distinct().all()
         ]
         recompute_dnBookedQuantity(stocks_to_recompute)
+        # The bulk update above bypasses the session listeners that
+        # update amounts spent on deposits.
+        deposits_to_recompute = [
+            row[0]
+            for row in db.session.query(IndividualBooking.depositId)
+            .join(Booking, Booking.individualBookingId == IndividualBooking.id)
+            .filter(Booking.id.in_(booking_ids_to_update), IndividualBooking.depositId.isnot(None))
+            .distinct()
+            .all()
+        ]
+        payments_ledger.recompute_deposits(deposits_to_recompute)
         db.session.commit()
 
         updated_total += updated
@@ -4,19 +4,27 @@ Goal: some users do not have all the expected attributes, this script should
 fix this issue.
 """
 from itertools import islice
+import logging
+import time
 from typing import Generator
 
 from pcapi.core.users.external import batch
+from pcapi.core.users.external import get_bulk_user_attributes
 from pcapi.core.users.external import get_user_attributes
 from pcapi.core.users.external import get_user_or_pro_attributes
 from pcapi.core.users.external import sendinblue
 from pcapi.core.users.external.sendinblue import SendinblueUserUpdateData
 from pcapi.core.users.external.sendinblue import import_contacts_in_sendinblue
 from pcapi.core.users.models import User
+from pcapi.core.users.models import UserRole
+from pcapi.models import db
 from pcapi.notifications.push import update_users_attributes
 from pcapi.notifications.push.backends.batch import UserUpdateData
 
 
+logger = logging.getLogger(__name__)
+
+
 def get_users(batch_size: int) -> Generator[User, None, None]:
     """Fetch users from database, without loading all of them at once."""
     try:
@@ -78,3 +86,85 @@ def run(chunk_size: int, synchronize_batch: bool = True, synchronize_sendinblue:
             import_contacts_in_sendinblue(sendinblue_users_data)
 
     print("%s finished" % message)
+
+
+def get_user_ids_chunks(
+    chunk_size: int, min_user_id: int = 0, max_user_id: int | None = None, role: UserRole | None = None
+) -> Generator[list[tuple[int, str]], None, None]:
+    """Yield (id, email) of young users (neither pro nor admin), by
+    chunks of increasing ids, without loading all of them at once.
+    """
+    query = (
+        db.session.query(User.id, User.email)
+        .filter(User.has_pro_role.is_(False))  # type: ignore [attr-defined]
+        .filter(User.has_admin_role.is_(False))  # type: ignore [attr-defined]
+        .order_by(User.id)
+        .limit(chunk_size)
+    )
+    if max_user_id is not None:
+        query = query.filter(User.id <= max_user_id)
+    if role:
+        query = query.filter(User.roles.contains([role]))
+
+    last_id = min_user_id - 1
+    while True:
+        chunk = query.filter(User.id > last_id).all()
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            break
+        last_id = chunk[-1][0]
+
+
+def refresh_users_attributes(
+    chunk_size: int,
+    min_user_id: int = 0,
+    max_user_id: int | None = None,
+    role: UserRole | None = None,
+    synchronize_batch: bool = True,
+    synchronize_sendinblue: bool = True,
+) -> int:
+    """Update attributes of a cohort of young users in Batch and
+    Sendinblue, chunk by chunk. Attributes of each chunk are computed
+    with a fixed number of queries (see `get_bulk_user_attributes()`).
+
+    Return the number of users whose attributes have been updated.
+    """
+    updated = 0
+    for chunk in get_user_ids_chunks(chunk_size, min_user_id, max_user_id, role):
+        start = time.perf_counter()
+        emails = dict(chunk)
+        attributes_by_user_id = get_bulk_user_attributes(list(emails))
+
+        if synchronize_batch:
+            batch_users_data = [
+                UserUpdateData(user_id=str(user_id), attributes=batch.format_user_attributes(attributes))
+                for user_id, attributes in attributes_by_user_id.items()
+                if attributes.marketing_push_subscription
+            ]
+            if batch_users_data:
+                update_users_attributes(batch_users_data)
+        if synchronize_sendinblue:
+            sendinblue_users_data = [
+                SendinblueUserUpdateData(
+                    email=emails[user_id], attributes=sendinblue.format_user_attributes(attributes)
+                )
+                for user_id, attributes in attributes_by_user_id.items()
+            ]
+            if sendinblue_users_data:
+                import_contacts_in_sendinblue(sendinblue_users_data)
+
+        updated += len(attributes_by_user_id)
+        # Do not keep users, bookings, etc. of previous chunks in memory.
+        db.session.expunge_all()
+        logger.info(
+            "Refreshed attributes of users chunk",
+            extra={
+                "first_user_id": chunk[0][0],
+                "last_user_id": chunk[-1][0],
+                "count": len(attributes_by_user_id),
+                "duration": round(time.perf_counter() - start, 3),
+            },
+        )
+
+    return updated
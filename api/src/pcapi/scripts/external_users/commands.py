@@ -1,7 +1,9 @@
 import click
 
+from pcapi.core.users.models import UserRole
 from pcapi.utils.blueprint import Blueprint
 
+from .batch_update_users_attributes import refresh_users_attributes
 from .unstack_batch_cloud_task_queue import unstack_batch_queue
 
 
@@ -25,3 +27,30 @@ def run_unstack_batch_queue(queue_name: str, chunk_size: int, sleep: float) -> N
             f"unstack_batch_queue: {deleted_tasks} tasks processed and deleted"
             f", {len(missing_tasks)} missing ({missing_tasks})"
         )
+
+
+@blueprint.cli.command("refresh_users_attributes")
+@click.option("--chunk-size", required=False, default=1_000, help="Number of users per chunk", type=int)
+@click.option("--min-id", required=False, default=0, help="Lowest user id of the cohort", type=int)
+@click.option("--max-id", required=False, default=None, help="Highest user id of the cohort", type=int)
+@click.option(
+    "--role",
+    required=False,
+    default=None,
+    help="Only refresh users with this role",
+    type=click.Choice([UserRole.BENEFICIARY.name, UserRole.UNDERAGE_BENEFICIARY.name]),
+)
+@click.option("--skip-batch", is_flag=True, default=False, help="Do not update attributes in Batch")
+@click.option("--skip-sendinblue", is_flag=True, default=False, help="Do not update attributes in Sendinblue")
+def run_refresh_users_attributes(
+    chunk_size: int, min_id: int, max_id: int | None, role: str | None, skip_batch: bool, skip_sendinblue: bool
+) -> None:
+    updated = refresh_users_attributes(
+        chunk_size,
+        min_user_id=min_id,
+        max_user_id=max_id,
+        role=UserRole[role] if role else None,
+        synchronize_batch=not skip_batch,
+        synchronize_sendinblue=not skip_sendinblue,
+    )
+    print(f"refresh_users_attributes: attributes of {updated} users refreshed")
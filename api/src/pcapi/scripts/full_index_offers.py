@@ -32,7 +32,8 @@ def _get_eta(end, current, elapsed_per_batch):  # type: ignore [no-untyped-def]
 @blueprint.cli.command("full_index_offers")
 @click.argument("start", type=int, required=True)
 @click.argument("end", type=int, required=True)
-def full_index_offers(start, end):  # type: ignore [no-untyped-def]
+@click.option("--force", is_flag=True, help="Send offers to Algolia even if they have not changed since last indexed")
+def full_index_offers(start, end, force=False):  # type: ignore [no-untyped-def]
     """Reindex all bookable offers.
 
     The script iterates over all active offers. For each offer, it
@@ -45,6 +46,10 @@ def full_index_offers(start, end):  # type: ignore [no-untyped-def]
     This script processes batches of 1.000 offers and reports back
     every 10.000 offers.
 
+    Offers that have not changed since they were last indexed are
+    not sent again, unless ``--force`` is given (e.g. if the Algolia
+    index has been cleared by hand).
+
     Errors are logged and are not blocking. You MUST check the logs
     for batches that failed and MUST re-run all these batches.
 
@@ -70,7 +75,7 @@ def full_index_offers(start, end):  # type: ignore [no-untyped-def]
             q.append(offer)
         if force_index or len(q) > BATCH_SIZE:
             try:
-                backend.index_offers(q)
+                backend.index_offers(q, force=force)
             except Exception as exc:  # pylint: disable=broad-except
                 logger.exception(
                     "Full offer reindexation: error while reindexing from %d to %d: %s", q[0].id, q[-1].id, exc
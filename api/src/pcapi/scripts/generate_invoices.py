@@ -13,12 +13,19 @@ blueprint = Blueprint(__name__, __name__)
 
 
 @blueprint.cli.command("generate_invoices")
-def generate_invoices():  # type: ignore [no-untyped-def]
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of processes that render PDF files (default: FINANCE_INVOICE_RENDERING_WORKERS setting).",
+)
+def generate_invoices(workers):  # type: ignore [no-untyped-def]
     """Generate (and store) all invoices.
 
     This command can be run multiple times.
     """
-    finance_api.generate_invoices()
+    finance_api.generate_invoices(workers=workers)
 
 
 # FIXME (dbaty, 2022-03-11): do we really need this command?
@@ -10,6 +10,7 @@ def install_commands(app: flask.Flask) -> None:
         "pcapi.scheduled_tasks.commands",
         "pcapi.scheduled_tasks.titelive_commands",
         "pcapi.scripts.algolia_indexing.commands",
+        "pcapi.scripts.benchmark_workers",
         "pcapi.scripts.beneficiary.import_test_users",
         "pcapi.scripts.clean_database",
         "pcapi.scripts.external_users.commands",
@@ -19,8 +20,11 @@ def install_commands(app: flask.Flask) -> None:
         "pcapi.scripts.booking.commands",
         "pcapi.scripts.offerer.commands",
         "pcapi.scripts.payment.add_custom_offer_reimbursement_rule",
+        "pcapi.scripts.payment.reconcile_deposit_spendings",
+        "pcapi.scripts.provider.benchmark_providable_chunks",
         "pcapi.scripts.provider.check_provider_api",
         "pcapi.scripts.sandbox",
+        "pcapi.scripts.score_pending_offers",
         "pcapi.scripts.update_providables",
         "pcapi.scripts.ubble_archive_past_identifications",
         "pcapi.utils.human_ids",
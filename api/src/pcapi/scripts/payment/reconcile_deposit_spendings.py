@@ -0,0 +1,48 @@
+import logging
+
+import click
+
+from pcapi.core.payments import ledger as payments_ledger
+import pcapi.core.payments.models as payments_models
+from pcapi.models import db
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+logger = logging.getLogger(__name__)
+
+
+def reconcile_deposit_spendings(batch_size: int = 1000, fix: bool = False) -> list[int]:
+    """Check amounts spent stored on all deposits against their
+    bookings, and return ids of deposits that do not match.
+    """
+    Deposit = payments_models.Deposit
+    mismatches = []
+    last_id = 0
+    while True:
+        deposit_ids = [
+            deposit_id
+            for deposit_id, in Deposit.query.filter(Deposit.id > last_id)
+            .order_by(Deposit.id)
+            .limit(batch_size)
+            .with_entities(Deposit.id)
+        ]
+        if not deposit_ids:
+            break
+        mismatches.extend(payments_ledger.reconcile_deposits(deposit_ids, fix=fix))
+        db.session.commit()
+        last_id = deposit_ids[-1]
+    logger.info(
+        "Reconciled amounts spent on deposits",
+        extra={"last_deposit_id": last_id, "mismatches": len(mismatches), "fixed": fix},
+    )
+    return mismatches
+
+
+@blueprint.cli.command("reconcile_deposit_spendings")
+@click.option("--batch-size", help="Number of deposits to check at once", type=int, default=1000)
+@click.option("--fix", is_flag=True, help="Overwrite stored amounts that do not match bookings")
+def reconcile_deposit_spendings_command(batch_size: int, fix: bool):  # type: ignore [no-untyped-def]
+    """Check amounts spent stored on deposits against their bookings."""
+    mismatches = reconcile_deposit_spendings(batch_size=batch_size, fix=fix)
+    click.echo(f"{len(mismatches)} deposits do not match{' (fixed)' if fix else ''}: {mismatches[:100]}")
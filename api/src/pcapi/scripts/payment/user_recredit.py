@@ -13,6 +13,7 @@ from pcapi.core.users import external as users_external
 from pcapi.core.users import models as users_models
 from pcapi.models import db
 from pcapi.repository import transaction
+from pcapi.tasks import cloud_task
 
 
 logger = logging.getLogger(__name__)
@@ -103,13 +104,14 @@ def recredit_underage_users() -> None:
 
         logger.info("Recredited %s underage users deposits", len(users_to_recredit))
 
-        for user, recredit_amount in users_and_recredit_amounts:
-            users_external.update_external_user(user)
-            domains_credit = users_api.get_domains_credit(user)
-            if not transactional_mails.send_recredit_email_to_underage_beneficiary(
-                user, recredit_amount, domains_credit
-            ):
-                logger.error("Failed to send recredit email to: %s", user.email)
+        with cloud_task.buffered_tasks():
+            for user, recredit_amount in users_and_recredit_amounts:
+                users_external.update_external_user(user)
+                domains_credit = users_api.get_domains_credit(user)
+                if not transactional_mails.send_recredit_email_to_underage_beneficiary(
+                    user, recredit_amount, domains_credit
+                ):
+                    logger.error("Failed to send recredit email to: %s", user.email)
 
         start_index += RECREDIT_BATCH_SIZE
     logger.info("Recredited %s users successfully", total_users_recredited)
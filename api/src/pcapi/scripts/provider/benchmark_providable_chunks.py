@@ -0,0 +1,102 @@
+import logging
+import time
+import typing
+
+import click
+
+from pcapi.core.categories import subcategories
+import pcapi.core.offers.models as offers_models
+from pcapi.local_providers.local_provider import CHUNK_MAX_SIZE
+from pcapi.models import db
+from pcapi.repository import providable_queries
+from pcapi.utils.blueprint import Blueprint
+from pcapi.utils.chunks import get_chunks
+
+
+blueprint = Blueprint(__name__, __name__)
+logger = logging.getLogger(__name__)
+
+
+PATHS = {
+    "orm": (providable_queries.insert_chunk, providable_queries.update_chunk),
+    "copy": (providable_queries.insert_chunk_with_copy, providable_queries.update_chunk_with_copy),
+}
+
+
+def _build_products(prefix: str, count: int, name: str, ids: dict[str, int] | None = None) -> typing.Iterator:
+    for index in range(count):
+        id_at_providers = f"{prefix}{index}"
+        product = offers_models.Product(
+            idAtProviders=id_at_providers,
+            name=f"{name} {index}",
+            subcategoryId=subcategories.LIVRE_PAPIER.id,
+            extraData={"isbn": f"{index:013d}", "author": "Benchmark"},
+        )
+        if ids is not None:
+            product.id = ids[id_at_providers]
+        yield product
+
+
+def _save(products: typing.Iterator, save_chunk: typing.Callable[[dict], None], chunk_size: int) -> float:
+    start = time.perf_counter()
+    for chunk in get_chunks(products, chunk_size):
+        save_chunk({f"{product.idAtProviders}|Product": product for product in chunk})
+        db.session.expunge_all()
+    return time.perf_counter() - start
+
+
+def benchmark_providable_chunks(count: int, chunk_size: int = CHUNK_MAX_SIZE) -> dict:
+    """Insert then update ``count`` fake products, in chunks of
+    ``chunk_size`` (like local providers do), with the ORM-based
+    functions and with the ``COPY``-based ones, and report the time
+    spent by each one.
+
+    Products are deleted at the end of each run. Do NOT run this on
+    the production database.
+    """
+    report: dict[str, typing.Any] = {"rows": count, "chunk_size": chunk_size}
+    for name, (insert_chunk, update_chunk) in PATHS.items():
+        prefix = f"benchmark-{name}-"
+        Product = offers_models.Product
+        query = Product.query.filter(Product.idAtProviders.like(f"{prefix}%"))
+        try:
+            insert_duration = _save(_build_products(prefix, count, "Inserted"), insert_chunk, chunk_size)
+            ids = dict(query.with_entities(Product.idAtProviders, Product.id))
+            if len(ids) != count:
+                raise ValueError(f"{name}: {len(ids)} products were inserted, expected {count}")
+            update_duration = _save(_build_products(prefix, count, "Updated", ids), update_chunk, chunk_size)
+            updated = query.filter(Product.name.like("Updated %")).count()
+            if updated != count:
+                raise ValueError(f"{name}: {updated} products were updated, expected {count}")
+        finally:
+            query.delete(synchronize_session=False)
+            db.session.commit()
+        report[f"{name}_insert_duration"] = round(insert_duration, 3)
+        report[f"{name}_update_duration"] = round(update_duration, 3)
+
+    for step in ("insert", "update"):
+        copy_duration = report[f"copy_{step}_duration"]
+        report[f"{step}_speedup"] = round(report[f"orm_{step}_duration"] / copy_duration, 2) if copy_duration else None
+    logger.info("Benchmarked saving of providable chunks", extra=report)
+    return report
+
+
+@blueprint.cli.command("benchmark_providable_chunks")
+@click.option(
+    "--counts",
+    help="Comma-separated numbers of rows to insert and update",
+    type=str,
+    default="10000,100000,1000000",
+)
+@click.option("--chunk-size", help="Number of rows per chunk", type=int, default=CHUNK_MAX_SIZE)
+def benchmark_providable_chunks_command(counts: str, chunk_size: int):  # type: ignore [no-untyped-def]
+    """Compare the ORM-based and COPY-based saving of provider chunks."""
+    for count in (int(count) for count in counts.split(",")):
+        report = benchmark_providable_chunks(count=count, chunk_size=chunk_size)
+        click.echo(
+            f"{count} rows: "
+            f"insert ORM {report['orm_insert_duration']}s, COPY {report['copy_insert_duration']}s "
+            f"(x{report['insert_speedup']}); "
+            f"update ORM {report['orm_update_duration']}s, COPY {report['copy_update_duration']}s "
+            f"(x{report['update_speedup']})"
+        )
@@ -0,0 +1,64 @@
+import logging
+import time
+
+import click
+
+from pcapi.core.educational.models import CollectiveOffer
+from pcapi.core.educational.models import CollectiveOfferTemplate
+from pcapi.core.offers import offer_validation
+from pcapi.core.offers.models import Offer
+import pcapi.core.offers.repository as offers_repository
+from pcapi.models import db
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+logger = logging.getLogger(__name__)
+
+
+MODELS = (Offer, CollectiveOffer, CollectiveOfferTemplate)
+
+
+def score_pending_offers(batch_size: int = 1000) -> dict[str, dict[str, int]]:
+    """Score all pending offers (of all kinds) against the current
+    offer validation config, and return, for each kind of offer, how
+    many of them would be approved and how many would stay pending.
+
+    Offers are not updated.
+    """
+    program = offer_validation.get_offer_validation_program()
+    if not program:
+        raise ValueError("There is no offer validation config")
+
+    report = {}
+    for model in MODELS:
+        start = time.perf_counter()
+        counts = {"approved": 0, "pending": 0}
+        last_id = 0
+        while True:
+            offers = offers_repository.get_pending_offers_for_validation(model, after_id=last_id, limit=batch_size)
+            if not offers:
+                break
+            for score in program.score_many(offers).values():
+                counts["pending" if score < program.minimum_score else "approved"] += 1
+            last_id = offers[-1].id
+            db.session.expunge_all()
+        report[model.__name__] = counts
+        logger.info(
+            "Scored pending offers",
+            extra={
+                "model": model.__name__,
+                "config_id": program.config_id,
+                "duration": round(time.perf_counter() - start, 3),
+                **counts,
+            },
+        )
+    return report
+
+
+@blueprint.cli.command("score_pending_offers")
+@click.option("--batch-size", help="Number of offers to load at once", type=int, default=1000)
+def score_pending_offers_command(batch_size: int):  # type: ignore [no-untyped-def]
+    """Score pending offers against the current offer validation config."""
+    for model_name, counts in score_pending_offers(batch_size=batch_size).items():
+        click.echo(f"{model_name}: {counts['approved']} would be approved, {counts['pending']} would stay pending")
@@ -125,6 +125,13 @@ REDIS_VENUE_IDS_FOR_OFFERS_CHUNK_SIZE = int(os.environ.get("REDIS_VENUE_IDS_FOR_
 REDIS_VENUE_IDS_CHUNK_SIZE = int(os.environ.get("REDIS_VENUE_IDS_CHUNK_SIZE", 1000))
 
 
+# RQ WORKERS
+# Number of long-lived processes that run the jobs of a worker. 0 means
+# that the worker forks a new process for every job.
+WORKER_POOL_PROCESSES = int(os.environ.get("WORKER_POOL_PROCESSES", 0))
+# Number of jobs run by each of these processes before it is replaced.
+WORKER_POOL_MAX_JOBS_PER_CHILD = int(os.environ.get("WORKER_POOL_MAX_JOBS_PER_CHILD", 1000))
+
 # SENTRY
 SENTRY_DSN = secrets_utils.get("SENTRY_DSN", "")
 SENTRY_SAMPLE_RATE = float(os.environ.get("SENTRY_SAMPLE_RATE", 0))
@@ -197,6 +204,12 @@ ALGOLIA_DELETING_COLLECTIVE_OFFERS_CHUNK_SIZE = int(
     os.environ.get("ALGOLIA_DELETING_COLLECTIVE_OFFERS_CHUNK_SIZE", 10000)
 )
 ALGOLIA_OFFERS_BY_VENUE_CHUNK_SIZE = int(os.environ.get("ALGOLIA_OFFERS_BY_VENUE_CHUNK_SIZE", 10000))
+# Do not send offers to Algolia if their payload has not changed since
+# they were last indexed.
+ALGOLIA_SKIP_UNCHANGED_OFFERS = bool(int(os.environ.get("ALGOLIA_SKIP_UNCHANGED_OFFERS", "1")))
+# Number of threads per stage (loading, pushing) when indexing the
+# queue of offers. 0 means that chunks are processed sequentially.
+SEARCH_OFFER_INDEXING_WORKERS = int(os.environ.get("SEARCH_OFFER_INDEXING_WORKERS", 0))
 
 # BATCH
 BATCH_ANDROID_API_KEY = os.environ.get("BATCH_ANDROID_API_KEY", "")
@@ -218,6 +231,9 @@ SENDINBLUE_AUTOMATION_YOUNG_1_YEAR_WITH_PASS_LIST_ID = int(
 )
 SENDINBLUE_AUTOMATION_YOUNG_EXPIRATION_M3_ID = int(os.environ.get("SENDINBLUE_AUTOMATION_YOUNG_EXPIRATION_M3_ID", 23))
 SENDINBLUE_AUTOMATION_YOUNG_EX_BENEFICIARY_ID = int(os.environ.get("SENDINBLUE_AUTOMATION_YOUNG_EX_BENEFICIARY_ID", 24))
+# Number of contacts sent in each import request of list automations, and number of requests sent concurrently
+SENDINBLUE_AUTOMATION_CHUNK_SIZE = int(os.environ.get("SENDINBLUE_AUTOMATION_CHUNK_SIZE", 50000))
+SENDINBLUE_AUTOMATION_WORKERS = int(os.environ.get("SENDINBLUE_AUTOMATION_WORKERS", 4))
 
 # RECAPTCHA
 RECAPTCHA_RESET_PASSWORD_MINIMAL_SCORE = float(os.environ.get("RECAPTCHA_RESET_PASSWORD_MINIMAL_SCORE", 0.7))
@@ -281,6 +297,23 @@ LOCAL_STORAGE_DIR = Path(os.path.dirname(os.path.realpath(__file__))) / "static"
 
 # THUMBS
 THUMBS_FOLDER_NAME = os.environ.get("THUMBS_FOLDER_NAME", "thumbs")
+# Number of threads that download and store thumbs during providers
+# synchronizations. 0 means that thumbs are processed sequentially.
+PROVIDERS_THUMBS_WORKERS = int(os.environ.get("PROVIDERS_THUMBS_WORKERS", 0))
+# Number of processes that convert these thumbs. 0 means that thumbs
+# are converted by the threads above.
+PROVIDERS_THUMBS_CONVERSION_WORKERS = int(os.environ.get("PROVIDERS_THUMBS_CONVERSION_WORKERS", 0))
+# Number of venue providers of the same provider that are synchronized
+# at the same time. 0 means that they are synchronized sequentially.
+PROVIDERS_SYNCHRONIZATION_WORKERS = int(os.environ.get("PROVIDERS_SYNCHRONIZATION_WORKERS", 0))
+# Caps of the setting above for some providers (to respect their rate
+# limits), as "<provider local class or name>:<workers>,...".
+PROVIDERS_SYNCHRONIZATION_MAX_WORKERS = {
+    provider: int(workers)
+    for provider, workers in (
+        item.rsplit(":", 1) for item in os.environ.get("PROVIDERS_SYNCHRONIZATION_MAX_WORKERS", "").split(",") if item
+    )
+}
 
 # GOOGLE
 GCP_BUCKET_CREDENTIALS = json.loads(base64.b64decode(secrets_utils.get("GCP_BUCKET_CREDENTIALS", "")) or "{}")
@@ -289,6 +322,9 @@ GCP_ALTERNATE_BUCKET_NAME = os.environ.get("GCP_ALTERNATE_BUCKET_NAME", "")
 GCP_DATA_BUCKET_NAME = secrets_utils.get("GCP_DATA_BUCKET_NAME", "")
 GCP_DATA_PROJECT_ID = secrets_utils.get("GCP_DATA_PROJECT_ID", "")
 GCP_CULTURAL_SURVEY_ANSWERS_QUEUE_NAME = os.environ.get("GCP_CULTURAL_SURVEY_ANSWERS_QUEUE_NAME", "")
+GCP_BOOKING_SIDE_EFFECTS_QUEUE_NAME = os.environ.get("GCP_BOOKING_SIDE_EFFECTS_QUEUE_NAME", "")
+if not GCP_BOOKING_SIDE_EFFECTS_QUEUE_NAME and not IS_DEV:
+    raise RuntimeError("GCP_BOOKING_SIDE_EFFECTS_QUEUE_NAME is not set")
 GCP_ENCRYPTED_BUCKET_NAME = os.environ.get("GCP_ENCRYPTED_BUCKET_NAME", "")
 GCP_PROJECT = os.environ.get("GCP_PROJECT", "")
 GCP_REGION_CLOUD_TASK = os.environ.get("GCP_REGION_CLOUD_TASK", "europe-west3")
@@ -316,6 +352,14 @@ CLOUD_TASK_RETRY_INITIAL_DELAY = float(os.environ.get("CLOUD_TASK_RETRY_INITIAL_
 CLOUD_TASK_RETRY_MAXIMUM_DELAY = float(os.environ.get("CLOUD_TASK_RETRY_MAXIMUM_DELAY", 60.0))
 CLOUD_TASK_RETRY_MULTIPLIER = float(os.environ.get("CLOUD_TASK_RETRY_MULTIPLIER", 2.0))
 CLOUD_TASK_RETRY_DEADLINE = float(os.environ.get("CLOUD_TASK_RETRY_DEADLINE", 60.0 * 2.0))
+# Buffer the tasks enqueued during HTTP requests and RQ jobs, and
+# enqueue them when the database session is committed.
+CLOUD_TASK_BUFFERING = bool(int(os.environ.get("CLOUD_TASK_BUFFERING", "0")))
+# Number of buffered tasks above which the buffer is flushed anyway.
+CLOUD_TASK_BUFFER_MAX_SIZE = int(os.environ.get("CLOUD_TASK_BUFFER_MAX_SIZE", 1000))
+# Number of threads that enqueue buffered tasks. 0 means that they are
+# enqueued sequentially.
+CLOUD_TASK_ENQUEUE_WORKERS = int(os.environ.get("CLOUD_TASK_ENQUEUE_WORKERS", 8))
 
 GOOGLE_CLIENT_ID = secrets_utils.get("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = secrets_utils.get("GOOGLE_CLIENT_SECRET")
@@ -379,6 +423,12 @@ EMAIL_UPDATE_ATTEMPTS_TTL = int(os.environ.get("EMAIL_UPDATE_ATTEMPTS_TTL", 24 *
 SOON_EXPIRING_BOOKINGS_DAYS_BEFORE_EXPIRATION = int(os.environ.get("SOON_EXPIRING_BOOKINGS_DAYS_BEFORE_EXPIRATION", 3))
 
 
+# FEATURE FLAGS
+# Feature flags are cached in each process for this number of seconds
+# (0 disables the cache).
+FEATURE_FLAGS_CACHE_TTL = int(os.environ.get("FEATURE_FLAGS_CACHE_TTL", 10))
+
+
 # SLACK
 SLACK_BOT_TOKEN = secrets_utils.get("SLACK_BOT_TOKEN", None)
 SLACK_CHANGE_FEATURE_FLIP_CHANNEL = os.environ.get("SLACK_CHANGE_FEATURE_FLIP_CHANNEL", "feature-flip-ehp")
@@ -407,6 +457,9 @@ FINANCE_GOOGLE_DRIVE_ROOT_FOLDER_ID = secrets_utils.get("FINANCE_GOOGLE_DRIVE_RO
 FINANCE_OVERRIDE_PRICING_ORDERING_ON_SIRET_LIST = secrets_utils.get(
     "FINANCE_OVERRIDE_PRICING_ORDERING_ON_SIRET_LIST", ""
 ).split(",")
+# Number of processes that render invoice PDF files. 0 means that
+# invoices are rendered sequentially, by the main process.
+FINANCE_INVOICE_RENDERING_WORKERS = int(os.environ.get("FINANCE_INVOICE_RENDERING_WORKERS", 0))
 
 # BACKOFFICE
 BACKOFFICE_USER_EMAIL = secrets_utils.get("BACKOFFICE_USER_EMAIL", "dummy.backoffice@example.com")
@@ -0,0 +1,22 @@
+import logging
+
+from pcapi import settings
+from pcapi.routes.serialization import BaseModel
+from pcapi.tasks.decorator import task
+
+
+logger = logging.getLogger(__name__)
+
+BOOKING_SIDE_EFFECTS_QUEUE_NAME = settings.GCP_BOOKING_SIDE_EFFECTS_QUEUE_NAME
+
+
+class BookingSideEffectsRequest(BaseModel):
+    booking_id: int
+    first_venue_booking: bool
+
+
+@task(BOOKING_SIDE_EFFECTS_QUEUE_NAME, "/bookings/run_side_effects")
+def run_booking_side_effects_task(payload: BookingSideEffectsRequest) -> None:
+    from pcapi.core.bookings.api import handle_deferred_booking_side_effects
+
+    handle_deferred_booking_side_effects(payload.booking_id, payload.first_venue_booking)
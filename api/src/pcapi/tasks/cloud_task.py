@@ -1,3 +1,6 @@
+import concurrent.futures
+import contextlib
+import contextvars
 from dataclasses import InitVar
 from dataclasses import asdict
 from dataclasses import dataclass
@@ -5,12 +8,17 @@ from datetime import datetime
 import hashlib
 import json
 import logging
+import typing
 
 from dateutil.relativedelta import relativedelta
+from flask import current_app
 from google.api_core import retry
 from google.api_core.exceptions import AlreadyExists
 from google.cloud import tasks_v2
 from google.protobuf import timestamp_pb2  # type: ignore [import]
+import redis
+import sqlalchemy as sa
+import sqlalchemy.orm as sa_orm
 
 from pcapi import settings
 from pcapi.utils import requests
@@ -22,6 +30,7 @@ logger = logging.getLogger(__name__)
 AUTHORIZATION_HEADER_KEY = "AUTHORIZATION"
 AUTHORIZATION_HEADER_VALUE = f"Bearer {settings.CLOUD_TASK_BEARER_TOKEN}"
 CLOUD_TASK_SUBPATH = "/cloud-tasks"
+FAILED_TASKS_KEY = "cloud_tasks:failed"
 
 
 def get_client():  # type: ignore [no-untyped-def]
@@ -47,7 +56,27 @@ class CloudTaskHttpRequest:
 def enqueue_task(
     queue: str, http_request: CloudTaskHttpRequest, task_id: str = None, schedule_time: datetime = None
 ) -> str | None:
+    try:
+        task_id = _create_task(queue, http_request, task_id=task_id, schedule_time=schedule_time)
+    except AlreadyExists:
+        logger.info("Task on queue %s url %s already retried", queue, http_request.url)
+        return None
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.exception(
+            "Failed to enqueue a task: %s",
+            exc,
+            extra={"queue": queue, "task_url": http_request.url, "body": http_request.body},
+        )
+        return None
 
+    logger.info("Enqueued cloud task targetting %s", http_request.url, extra={"queue": queue, "task": task_id})
+
+    return task_id
+
+
+def _create_task(
+    queue: str, http_request: CloudTaskHttpRequest, task_id: str | None = None, schedule_time: datetime | None = None
+) -> str:
     client = get_client()
     parent = client.queue_path(settings.GCP_PROJECT, settings.GCP_REGION_CLOUD_TASK, queue)
 
@@ -63,31 +92,16 @@ def enqueue_task(
         timestamp.FromDatetime(schedule_time)
         task_request["schedule_time"] = timestamp
 
-    try:
-        response = client.create_task(
-            request={"parent": parent, "task": task_request},
-            retry=retry.Retry(
-                initial=settings.CLOUD_TASK_RETRY_INITIAL_DELAY,
-                maximum=settings.CLOUD_TASK_RETRY_MAXIMUM_DELAY,
-                multiplier=settings.CLOUD_TASK_RETRY_MULTIPLIER,
-                deadline=settings.CLOUD_TASK_RETRY_DEADLINE,
-            ),
-        )
-    except AlreadyExists:
-        logger.info("Task on queue %s url %s already retried", queue, http_request.url)
-        return None
-    except Exception as exc:  # pylint: disable=broad-except
-        logger.exception(
-            "Failed to enqueue a task: %s",
-            exc,
-            extra={"queue": queue, "task_url": http_request.url, "body": http_request.body},
-        )
-        return None
-
-    task_id = response.name.split("/")[-1]
-    logger.info("Enqueued cloud task targetting %s", http_request.url, extra={"queue": queue, "task": task_id})
-
-    return task_id
+    response = client.create_task(
+        request={"parent": parent, "task": task_request},
+        retry=retry.Retry(
+            initial=settings.CLOUD_TASK_RETRY_INITIAL_DELAY,
+            maximum=settings.CLOUD_TASK_RETRY_MAXIMUM_DELAY,
+            multiplier=settings.CLOUD_TASK_RETRY_MULTIPLIER,
+            deadline=settings.CLOUD_TASK_RETRY_DEADLINE,
+        ),
+    )
+    return response.name.split("/")[-1]
 
 
 def enqueue_internal_task(queue, path, payload, deduplicate: bool = False, delayed_seconds: int = 0):  # type: ignore [no-untyped-def]
@@ -97,20 +111,212 @@ def enqueue_internal_task(queue, path, payload, deduplicate: bool = False, delay
         _call_internal_api_endpoint(queue, url, payload)
         return None
 
-    http_request = CloudTaskHttpRequest(
+    # According to Google Cloud Tasks documentation, "Using hashed strings for the task id or for the prefix of the task
+    # id is recommended".
+    task_id = _get_payload_hash(payload) if deduplicate else None
+
+    schedule_time = datetime.utcnow() + relativedelta(seconds=delayed_seconds) if delayed_seconds else None
+
+    buffer = _current_buffer.get()
+    if buffer is not None:
+        buffer.add(BufferedTask(queue, path, payload, task_id, schedule_time))
+        return None
+
+    return enqueue_task(
+        queue, _build_internal_http_request(path, payload), task_id=task_id, schedule_time=schedule_time
+    )
+
+
+def _build_internal_http_request(path: str, payload: typing.Any) -> CloudTaskHttpRequest:
+    return CloudTaskHttpRequest(
         http_method=tasks_v2.HttpMethod.POST,  # type: ignore [arg-type]
-        url=url,
+        url=settings.API_URL + CLOUD_TASK_SUBPATH + path,
         headers={"Content-type": "application/json", AUTHORIZATION_HEADER_KEY: AUTHORIZATION_HEADER_VALUE},
         json=payload,
     )
 
-    # According to Google Cloud Tasks documentation, "Using hashed strings for the task id or for the prefix of the task
-    # id is recommended".
-    task_id = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() if deduplicate else None
 
-    schedule_time = datetime.utcnow() + relativedelta(seconds=delayed_seconds) if delayed_seconds else None
+def _get_payload_hash(payload: typing.Any) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class BufferedTask:
+    queue: str
+    path: str
+    payload: typing.Any
+    task_id: str | None = None
+    schedule_time: datetime | None = None
+
+    def serialize(self) -> str:
+        data = asdict(self)
+        data["schedule_time"] = self.schedule_time.isoformat() if self.schedule_time else None
+        return json.dumps(data)
+
+    @classmethod
+    def deserialize(cls, serialized: str) -> "BufferedTask":
+        data = json.loads(serialized)
+        if data["schedule_time"]:
+            data["schedule_time"] = datetime.fromisoformat(data["schedule_time"])
+        return cls(**data)
+
+
+class TaskBuffer:
+    """Internal tasks enqueued while the buffer is active, deduplicated
+    and enqueued concurrently by `flush()`.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[tuple, BufferedTask] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def add(self, task: BufferedTask) -> None:
+        key = (task.queue, task.path, task.task_id or _get_payload_hash(task.payload), task.schedule_time)
+        self._tasks.setdefault(key, task)
+        if len(self._tasks) >= settings.CLOUD_TASK_BUFFER_MAX_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        tasks, self._tasks = list(self._tasks.values()), {}
+        if tasks:
+            _enqueue_buffered_tasks(tasks)
+
+    def discard(self) -> None:
+        if self._tasks:
+            logger.info("Discarded buffered cloud tasks", extra={"tasks": len(self._tasks)})
+        self._tasks = {}
+
+
+_current_buffer: contextvars.ContextVar[TaskBuffer | None] = contextvars.ContextVar("cloud_tasks_buffer", default=None)
+
+
+def start_buffering() -> contextvars.Token | None:
+    """Buffer internal tasks until `stop_buffering()` is called with
+    the returned token. Buffered tasks are also enqueued when the
+    database session is committed, and discarded when it is rolled
+    back.
+    """
+    if _current_buffer.get() is not None:
+        # Already buffering: the outermost buffer will be flushed.
+        return None
+    return _current_buffer.set(TaskBuffer())
+
+
+def stop_buffering(token: contextvars.Token | None, exc: BaseException | None = None) -> None:
+    """Enqueue buffered tasks, or discard them if the request or job
+    failed with `exc`.
+    """
+    if token is None:
+        return
+    buffer = _current_buffer.get()
+    _current_buffer.reset(token)
+    if buffer is None:
+        return
+    if exc is not None:
+        buffer.discard()
+    else:
+        buffer.flush()
+
+
+@contextlib.contextmanager
+def buffered_tasks() -> typing.Iterator[None]:
+    token = start_buffering()
+    try:
+        yield
+    except Exception as exc:
+        stop_buffering(token, exc)
+        raise
+    stop_buffering(token)
+
+
+def _flush_buffer_after_commit(session: sa_orm.Session) -> None:  # pylint: disable=unused-argument
+    buffer = _current_buffer.get()
+    if buffer is not None:
+        buffer.flush()
+
+
+def _discard_buffer_after_rollback(
+    session: sa_orm.Session, previous_transaction: sa_orm.SessionTransaction  # pylint: disable=unused-argument
+) -> None:
+    # Rollbacks of savepoints do not undo the whole transaction.
+    if previous_transaction.parent is not None:
+        return
+    buffer = _current_buffer.get()
+    if buffer is not None:
+        buffer.discard()
+
+
+sa.event.listen(sa_orm.Session, "after_commit", _flush_buffer_after_commit)
+sa.event.listen(sa_orm.Session, "after_soft_rollback", _discard_buffer_after_rollback)
+
+
+def _enqueue_buffered_task(task: BufferedTask) -> bool:
+    try:
+        _create_task(
+            task.queue,
+            _build_internal_http_request(task.path, task.payload),
+            task_id=task.task_id,
+            schedule_time=task.schedule_time,
+        )
+    except AlreadyExists:
+        pass
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning(
+            "Failed to enqueue a buffered task: %s",
+            exc,
+            extra={"queue": task.queue, "path": task.path, "task": task.task_id},
+        )
+        return False
+    return True
+
+
+def _enqueue_buffered_tasks(tasks: list[BufferedTask]) -> list[BufferedTask]:
+    """Enqueue tasks (over the same client) and persist those that could
+    not be enqueued, so that they can be replayed later. Return them.
+    """
+    workers = min(settings.CLOUD_TASK_ENQUEUE_WORKERS, len(tasks))
+    if workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cloud-tasks") as executor:
+            results = list(executor.map(_enqueue_buffered_task, tasks))
+    else:
+        results = [_enqueue_buffered_task(task) for task in tasks]
+    failed_tasks = [task for task, enqueued in zip(tasks, results) if not enqueued]
+    if failed_tasks:
+        _persist_failed_tasks(failed_tasks)
+    logger.info("Enqueued buffered cloud tasks", extra={"tasks": len(tasks), "failed": len(failed_tasks)})
+    return failed_tasks
+
+
+def _persist_failed_tasks(tasks: list[BufferedTask]) -> None:
+    try:
+        current_app.redis_client.rpush(  # type: ignore [attr-defined]
+            FAILED_TASKS_KEY, *(task.serialize() for task in tasks)
+        )
+    except redis.exceptions.RedisError:
+        logger.exception(
+            "Could not persist cloud tasks that could not be enqueued",
+            extra={"tasks": [task.serialize() for task in tasks]},
+        )
+
 
-    return enqueue_task(queue, http_request, task_id=task_id, schedule_time=schedule_time)
+def replay_failed_tasks(max_count: int = 1000) -> tuple[int, int]:
+    """Enqueue again up to `max_count` tasks that could not be enqueued.
+    Return the number of replayed tasks and the number of tasks that
+    failed again (and have been persisted again).
+    """
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    tasks = []
+    for _ in range(max_count):
+        serialized = redis_client.lpop(FAILED_TASKS_KEY)
+        if serialized is None:
+            break
+        tasks.append(BufferedTask.deserialize(serialized))
+    if not tasks:
+        return 0, 0
+    failed_tasks = _enqueue_buffered_tasks(tasks)
+    return len(tasks), len(failed_tasks)
 
 
 def _call_internal_api_endpoint(queue, url, payload):  # type: ignore [no-untyped-def]
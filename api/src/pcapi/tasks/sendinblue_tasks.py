@@ -7,6 +7,7 @@ from pcapi.tasks.decorator import task
 from pcapi.tasks.serialization.sendinblue_tasks import SendTransactionalEmailRequest
 from pcapi.tasks.serialization.sendinblue_tasks import UpdateProAttributesRequest
 from pcapi.tasks.serialization.sendinblue_tasks import UpdateSendinblueContactRequest
+from pcapi.tasks.serialization.sendinblue_tasks import UpdateUserAttributesRequest
 
 
 logger = logging.getLogger(__name__)
@@ -52,3 +53,19 @@ def update_pro_attributes_task(payload: UpdateProAttributesRequest) -> None:
 
     attributes = get_pro_attributes(payload.email)
     update_contact_attributes(payload.email, attributes, asynchronous=False)
+
+
+# De-duplicate and delay by 1 minute, to collect user attributes and
+# update Batch and Sendinblue only once when a user makes several
+# changes (e.g. several bookings) in a short time. See comment of
+# `update_pro_attributes_task` about `time_id`.
+@task(SENDINBLUE_CONTACTS_QUEUE_NAME, "/sendinblue/update_user_attributes", True, 60)  # type: ignore [arg-type]
+def update_user_attributes_task(payload: UpdateUserAttributesRequest) -> None:
+    from pcapi.core.users.external import update_external_user
+    from pcapi.core.users.models import User
+
+    user = User.query.get(payload.user_id)
+    if not user:
+        logger.warning("Could not find user to update its attributes", extra={"user_id": payload.user_id})
+        return
+    update_external_user(user)
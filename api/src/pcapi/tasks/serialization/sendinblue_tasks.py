@@ -23,3 +23,8 @@ class SendTransactionalEmailRequest(BaseModel):
 class UpdateProAttributesRequest(BaseModel):
     email: str
     time_id: str  # see comment in update_pro_attributes_task
+
+
+class UpdateUserAttributesRequest(BaseModel):
+    user_id: int
+    time_id: str  # see comment in update_user_attributes_task
@@ -0,0 +1,86 @@
+"""Generate CSV and Excel files by chunks, without holding the whole
+file in memory.
+
+Rows are consumed from an iterator (typically a query with
+``yield_per()``) and the file is yielded by chunks of bytes, so that
+it can be sent as a streamed HTTP response.
+"""
+
+import codecs
+import csv
+from io import StringIO
+import tempfile
+import typing
+
+import xlsxwriter
+
+
+CSV_ROWS_PER_CHUNK = 1000
+EXCEL_BYTES_PER_CHUNK = 64 * 1024
+EXCEL_COLUMN_WIDTH = 18
+EXCEL_CURRENCY_FORMAT = {"num_format": "###0.00[$€-fr-FR]"}
+
+
+def iter_csv(
+    header: typing.Sequence[str],
+    rows: typing.Iterable[typing.Sequence],
+    rows_per_chunk: int = CSV_ROWS_PER_CHUNK,
+) -> typing.Iterator[str]:
+    """Yield CSV content (with our usual dialect) by chunks of
+    ``rows_per_chunk`` rows.
+    """
+    output = StringIO()
+    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerow(header)
+    for index, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if index % rows_per_chunk == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+
+def encode(chunks: typing.Iterable[str], encoding: str = "utf-8-sig") -> typing.Iterator[bytes]:
+    """Encode a stream of text. Unlike ``str.encode()``, the BOM of
+    "utf-8-sig" is only added to the first chunk.
+    """
+    encoder = codecs.getincrementalencoder(encoding)()
+    for chunk in chunks:
+        if chunk:
+            yield encoder.encode(chunk)
+    last = encoder.encode("", final=True)
+    if last:
+        yield last
+
+
+def iter_excel(
+    header: typing.Sequence[str],
+    rows: typing.Iterable[typing.Sequence],
+    currency_columns: typing.Collection[int] = (),
+    bytes_per_chunk: int = EXCEL_BYTES_PER_CHUNK,
+) -> typing.Iterator[bytes]:
+    """Yield the content of an Excel file by chunks of bytes.
+
+    The workbook is written in xlsxwriter's "constant memory" mode
+    (each row is flushed to disk as soon as the next one is written)
+    into a temporary file, which is then read by chunks. Cells of
+    ``currency_columns`` are formatted as amounts in euros.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = f"{tmpdir}/export.xlsx"
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "tmpdir": tmpdir})
+        bold = workbook.add_format({"bold": 1})
+        currency_format = workbook.add_format(EXCEL_CURRENCY_FORMAT)
+        worksheet = workbook.add_worksheet()
+        for col_num, title in enumerate(header):
+            worksheet.write(0, col_num, title, bold)
+            worksheet.set_column(col_num, col_num, EXCEL_COLUMN_WIDTH)
+        for row_num, row in enumerate(rows, 1):
+            for col_num, value in enumerate(row):
+                worksheet.write(row_num, col_num, value, currency_format if col_num in currency_columns else None)
+        workbook.close()
+
+        with open(path, "rb") as fp:
+            while chunk := fp.read(bytes_per_chunk):
+                yield chunk
@@ -0,0 +1,206 @@
+"""A minimal thread-based pipeline, where each stage runs in its own
+pool of worker threads and stages are connected by bounded queues.
+
+This is meant for I/O-bound work (database queries, HTTP calls to
+external services) where overlapping stages saves wall time. It does
+not help CPU-bound work because of the GIL.
+
+Example::
+
+    stats = run_pipeline(
+        source=chunks,
+        stages=[
+            Stage("load", load_chunk, workers=2),
+            Stage("push", push_chunk, workers=4),
+        ],
+    )
+"""
+
+import contextlib
+import dataclasses
+import logging
+import queue
+import threading
+import time
+import typing
+
+
+logger = logging.getLogger(__name__)
+
+
+_STOP = object()
+
+
+@dataclasses.dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    elements: int = 0
+    duration: float = 0.0  # cumulated time spent by all workers of the stage
+    errors: int = 0
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def record(self, elements: int, duration: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.elements += elements
+            self.duration += duration
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of elements processed per second by one
+        worker of this stage.
+        """
+        if not self.duration:
+            return 0.0
+        return self.elements / self.duration
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "elements": self.elements,
+            "duration": round(self.duration, 3),
+            "errors": self.errors,
+            "throughput": round(self.throughput, 1),
+        }
+
+
+@dataclasses.dataclass
+class Stage:
+    """A step of the pipeline.
+
+    ``func`` is called with each item produced by the previous stage
+    (or by the source). Its return value is passed to the next stage,
+    unless it is None, in which case the item is dropped.
+
+    ``context`` is an optional factory of context manager that is
+    entered once by each worker thread, e.g. ``app.app_context`` to
+    give each worker its own Flask application context (and thus its
+    own SQLAlchemy session).
+
+    ``count`` returns the number of elements within an item, to
+    compute a meaningful throughput when items are chunks.
+    """
+
+    name: str
+    func: typing.Callable[[typing.Any], typing.Any]
+    workers: int = 1
+    context: typing.Callable[[], typing.ContextManager] | None = None
+    count: typing.Callable[[typing.Any], int] = lambda item: 1
+
+
+class PipelineError(Exception):
+    def __init__(self, message: str, failed_items: list):
+        super().__init__(message)
+        # Items that have been dropped because of an error, as they
+        # were received by the stage that failed.
+        self.failed_items = failed_items
+
+
+def run_pipeline(
+    source: typing.Iterable,
+    stages: typing.Sequence[Stage],
+    queue_size: int | None = None,
+) -> dict[str, StageStats]:
+    """Feed items from ``source`` through ``stages`` and return
+    statistics about each stage.
+
+    Queues between stages are bounded (by default, twice the number of
+    workers of the consuming stage), so that a fast stage cannot
+    accumulate an unbounded number of items in memory when a later
+    stage is slow. The source is consumed lazily from the calling
+    thread.
+
+    If a stage function raises, the item is dropped, the error is
+    logged and the pipeline goes on. Once all items have been
+    processed, the first error is re-raised as a ``PipelineError``,
+    along with the dropped items.
+    """
+    if not stages:
+        raise ValueError("At least one stage is required")
+
+    queues: list[queue.Queue] = [queue.Queue(maxsize=queue_size or 2 * stage.workers) for stage in stages]
+    stats = {stage.name: StageStats(stage.name) for stage in stages}
+    errors: list[BaseException] = []
+    failed_items: list = []
+    threads_per_stage: list[list[threading.Thread]] = []
+
+    for index, stage in enumerate(stages):
+        input_queue = queues[index]
+        output_queue = queues[index + 1] if index + 1 < len(stages) else None
+        threads = [
+            threading.Thread(
+                target=_work,
+                args=(stage, input_queue, output_queue, stats[stage.name], errors, failed_items),
+                name=f"pipeline-{stage.name}-{worker}",
+                daemon=True,
+            )
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        threads_per_stage.append(threads)
+
+    try:
+        for item in source:
+            queues[0].put(item)
+    finally:
+        # Stop stages one after the other, so that each stage has
+        # processed everything sent by the previous one before being
+        # told to stop.
+        for stage, stage_queue, threads in zip(stages, queues, threads_per_stage):
+            for _ in range(stage.workers):
+                stage_queue.put(_STOP)
+            for thread in threads:
+                thread.join()
+
+    if errors:
+        raise PipelineError(f"{len(errors)} error(s) in pipeline", failed_items) from errors[0]
+    return stats
+
+
+def _work(
+    stage: Stage,
+    input_queue: queue.Queue,
+    output_queue: queue.Queue | None,
+    stats: StageStats,
+    errors: list[BaseException],
+    failed_items: list,
+) -> None:
+    stopped = False
+    try:
+        context = stage.context() if stage.context else contextlib.nullcontext()
+        with context:
+            while True:
+                item = input_queue.get()
+                if item is _STOP:
+                    stopped = True
+                    return
+                start = time.perf_counter()
+                try:
+                    result = stage.func(item)
+                except Exception as exc:  # pylint: disable=broad-except
+                    stats.record_error()
+                    errors.append(exc)
+                    failed_items.append(item)
+                    logger.exception("Error in pipeline stage", extra={"stage": stage.name})
+                    continue
+                stats.record(stage.count(item), time.perf_counter() - start)
+                if output_queue is not None and result is not None:
+                    output_queue.put(result)
+    except Exception as exc:  # pylint: disable=broad-except
+        errors.append(exc)
+        logger.exception("Pipeline worker crashed", extra={"stage": stage.name})
+        # Keep consuming (and dropping) items, otherwise the previous
+        # stage would block forever on a full queue.
+        while not stopped:
+            item = input_queue.get()
+            stopped = item is _STOP
+            if not stopped:
+                failed_items.append(item)
@@ -7,7 +7,9 @@ from flask import current_app
 from rq.job import get_current_job
 from rq.queue import Queue
 
+from pcapi import settings
 from pcapi.settings import IS_RUNNING_TESTS
+from pcapi.tasks import cloud_task
 from pcapi.workers.logger import job_extra_description
 
 
@@ -37,7 +39,13 @@ def job(queue: Queue):  # type: ignore [no-untyped-def]
             )
 
             with current_app.app_context():
-                result = func(*args, **kwargs)
+                token = cloud_task.start_buffering() if settings.CLOUD_TASK_BUFFERING else None
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as exc:
+                    cloud_task.stop_buffering(token, exc)
+                    raise
+                cloud_task.stop_buffering(token)
 
             logger.info(
                 "Ended job %s",
@@ -0,0 +1,119 @@
+"""Run RQ jobs in a pool of long-lived worker processes.
+
+The stock `rq.Worker` forks a new process for every job, which then
+has to open its own database connection. Here, each process of the
+pool is spawned once, imports the application once, and runs jobs
+one after the other with `rq.SimpleWorker`, reusing its application
+context and its database connection pool.
+
+A process is replaced when it has run `max_jobs_per_child` jobs (to
+bound the effect of memory leaks), or when it dies. A process that
+crashes only loses the job it was running, which is then handled by
+RQ like any job of a dead worker.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.context
+import signal
+import time
+import types
+
+from rq import Queue
+from rq import SimpleWorker
+import sentry_sdk
+
+from pcapi.workers.worker import conn
+from pcapi.workers.worker import log_worker_error
+
+
+logger = logging.getLogger(__name__)
+
+RESTART_DELAY = 5  # seconds, after a process has crashed
+
+
+def run_child(queue_names: list[str], max_jobs: int | None, burst: bool) -> None:
+    # pylint: disable=import-outside-toplevel
+    from pcapi.flask_app import app
+
+    sentry_sdk.set_tag("pcapi.app_type", "worker")
+    with app.app_context():
+        worker = SimpleWorker(
+            [Queue(name, connection=conn) for name in queue_names],
+            connection=conn,
+            exception_handlers=[log_worker_error],
+        )
+        worker.work(burst=burst, max_jobs=max_jobs)
+
+
+class WorkerPool:
+    def __init__(self, queue_names: list[str], processes: int, max_jobs_per_child: int | None = None):
+        self.queue_names = queue_names
+        self.processes = processes
+        self.max_jobs_per_child = max_jobs_per_child or None
+        # Use "spawn" and not "fork", so that processes do not inherit the
+        # database connections (and the rest of the state) of this process.
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._children: list[multiprocessing.context.SpawnProcess] = []
+        self._stop_requested = False
+
+    def run(self, burst: bool = False) -> None:
+        """Start the processes and replace them when they exit, until
+        a SIGINT or SIGTERM is received (or, in `burst` mode, until
+        queues are empty).
+        """
+        previous_handlers = {
+            signum: signal.signal(signum, self._request_stop) for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            self._supervise(burst)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _supervise(self, burst: bool) -> None:
+        logger.info(
+            "Worker pool: starting %d processes",
+            self.processes,
+            extra={"queues": self.queue_names, "max_jobs_per_child": self.max_jobs_per_child},
+        )
+        self._children = [self._start_child(burst) for _ in range(self.processes)]
+        while self._children:
+            time.sleep(1)
+            children = []
+            for child in self._children:
+                if child.is_alive():
+                    children.append(child)
+                    continue
+                child.join()
+                if child.exitcode != 0:
+                    logger.error("Worker pool: process %s died", child.pid, extra={"exitcode": child.exitcode})
+                    if self._stop_requested:
+                        continue
+                    time.sleep(RESTART_DELAY)
+                elif self._stop_requested or (burst and not self._has_pending_jobs()):
+                    continue
+                children.append(self._start_child(burst))
+            self._children = children
+        logger.info("Worker pool: stopped")
+
+    def _start_child(self, burst: bool) -> multiprocessing.context.SpawnProcess:
+        child = self._mp_context.Process(
+            target=run_child,
+            args=(self.queue_names, self.max_jobs_per_child, burst),
+            daemon=False,
+        )
+        child.start()
+        return child
+
+    def _has_pending_jobs(self) -> bool:
+        return any(Queue(name, connection=conn).count for name in self.queue_names)
+
+    def _request_stop(self, signum: int, frame: types.FrameType | None) -> None:  # pylint: disable=unused-argument
+        # RQ workers finish their current job before stopping on SIGTERM.
+        if not self._stop_requested:
+            logger.info("Worker pool: stopping on signal %s", signum)
+        self._stop_requested = True
+        for child in self._children:
+            if child.is_alive():
+                child.terminate()
@@ -1,5 +1,8 @@
+import decimal
 import logging
 
+from flask import current_app
+
 from pcapi.core.offerers.repository import find_venue_by_id
 from pcapi.core.providers import api
 from pcapi.core.providers.models import StockDetail
@@ -10,15 +13,110 @@ from pcapi.workers.decorators import job
 
 PASS_CULTURE_STOCKS_PROVIDER_NAME = "PCAPIStocks"
 
+# Stocks sent through the public API are not enqueued in job payloads:
+# the latest quantity and price of each reference are stored in a hash
+# per venue, and a single job per venue synchronizes them.
+PENDING_STOCKS_KEY = "synchronize_stocks:pending:{venue_id}"
+ENQUEUED_JOB_KEY = "synchronize_stocks:enqueued:{venue_id}"
+ENQUEUED_JOB_TTL = 24 * 60 * 60  # in case the job is lost
+PENDING_VENUES_KEY = "synchronize_stocks:pending-venues"
+METRICS_KEY = "synchronize_stocks:metrics"
+
 logger = logging.getLogger(__name__)
 
 
+def enqueue_stocks_synchronization(venue_id: int, serialized_stock_details: list[dict]) -> None:
+    """Store the latest quantity and price of each stock, and enqueue a
+    job to synchronize the stocks of the venue, unless such a job is
+    already enqueued (it will synchronize these stocks as well).
+    """
+    if not serialized_stock_details:
+        return
+    pending_stocks = {
+        stock_detail["products_provider_reference"]: _serialize_pending_stock(stock_detail)
+        for stock_detail in serialized_stock_details
+    }
+
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    pipeline = redis_client.pipeline(transaction=True)
+    pipeline.hset(PENDING_STOCKS_KEY.format(venue_id=venue_id), mapping=pending_stocks)
+    pipeline.sadd(PENDING_VENUES_KEY, venue_id)
+    pipeline.set(ENQUEUED_JOB_KEY.format(venue_id=venue_id), 1, nx=True, ex=ENQUEUED_JOB_TTL)
+    new_stocks, _, must_enqueue_job = pipeline.execute()
+
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.hincrby(METRICS_KEY, "received", len(pending_stocks))
+    pipeline.hincrby(METRICS_KEY, "coalesced", len(pending_stocks) - new_stocks)
+    pipeline.hincrby(METRICS_KEY, "payload_bytes", sum(len(ref) + len(value) for ref, value in pending_stocks.items()))
+    if must_enqueue_job:
+        pipeline.hincrby(METRICS_KEY, "enqueued_jobs", 1)
+    pipeline.execute()
+
+    if must_enqueue_job:
+        synchronize_venue_stocks_job.delay(venue_id)
+
+
+def enqueue_pending_venues_synchronization() -> int:
+    """Enqueue a job for each venue that has pending stocks but no
+    enqueued job, e.g. because the previous job has failed or has
+    been lost. Return the number of enqueued jobs.
+    """
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    enqueued = 0
+    for venue_id in redis_client.sscan_iter(PENDING_VENUES_KEY):
+        if redis_client.set(ENQUEUED_JOB_KEY.format(venue_id=venue_id), 1, nx=True, ex=ENQUEUED_JOB_TTL):
+            synchronize_venue_stocks_job.delay(int(venue_id))
+            enqueued += 1
+    if enqueued:
+        redis_client.hincrby(METRICS_KEY, "enqueued_jobs", enqueued)
+    return enqueued
+
+
+def get_stocks_synchronization_metrics() -> dict[str, int]:
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    metrics = {key: int(value) for key, value in redis_client.hgetall(METRICS_KEY).items()}
+    metrics["pending_venues"] = redis_client.scard(PENDING_VENUES_KEY)
+    metrics["queue_depth"] = worker.low_queue.count
+    return metrics
+
+
 @job(worker.low_queue)
-def synchronize_stocks_job(serialized_stock_details: list[dict | StockDetail], venue_id: str) -> None:
-    pc_provider = get_provider_by_local_class(PASS_CULTURE_STOCKS_PROVIDER_NAME)
+def synchronize_venue_stocks_job(venue_id: int) -> None:
+    redis_client = current_app.redis_client  # type: ignore [attr-defined]
+    pending_stocks_key = PENDING_STOCKS_KEY.format(venue_id=venue_id)
+    pipeline = redis_client.pipeline(transaction=True)
+    # Stocks received from now on will be synchronized by another job.
+    pipeline.delete(ENQUEUED_JOB_KEY.format(venue_id=venue_id))
+    pipeline.hgetall(pending_stocks_key)
+    pipeline.delete(pending_stocks_key)
+    pipeline.srem(PENDING_VENUES_KEY, venue_id)
+    _, pending_stocks, _, _ = pipeline.execute()
+    if not pending_stocks:
+        return
+
+    stock_details = [_deserialize_pending_stock(ref, value, venue_id) for ref, value in pending_stocks.items()]
+    try:
+        _synchronize_stocks(stock_details, venue_id)
+    except Exception:
+        # Keep the stocks for the next job of this venue, unless they
+        # have been updated in the meantime. If no other job has been
+        # enqueued, `enqueue_pending_venues_synchronization()` will
+        # enqueue one.
+        pipeline = redis_client.pipeline(transaction=True)
+        for ref, value in pending_stocks.items():
+            pipeline.hsetnx(pending_stocks_key, ref, value)
+        pipeline.sadd(PENDING_VENUES_KEY, venue_id)
+        pipeline.execute()
+        raise
+    redis_client.hincrby(METRICS_KEY, "synchronized", len(stock_details))
+
 
+@job(worker.low_queue)
+def synchronize_stocks_job(serialized_stock_details: list[dict | StockDetail], venue_id: str) -> None:
     # The worker is currently paused. In the queue there are both StockDetail and dict format
     # TODO(viconnex): remove StockDetail formatted case when the queue is empty
+    # Stocks are now synchronized by `synchronize_venue_stocks_job`. This job is
+    # only kept to run jobs that have been enqueued before.
     stock_details = [
         stock_detail
         if isinstance(stock_detail, StockDetail)
@@ -32,7 +130,11 @@ def synchronize_stocks_job(serialized_stock_details: list[dict | StockDetail], v
         )
         for stock_detail in serialized_stock_details
     ]
+    _synchronize_stocks(stock_details, venue_id)
+
 
+def _synchronize_stocks(stock_details: list[StockDetail], venue_id: int | str) -> None:
+    pc_provider = get_provider_by_local_class(PASS_CULTURE_STOCKS_PROVIDER_NAME)
     venue = find_venue_by_id(venue_id)  # type: ignore [arg-type]
     operations = api.synchronize_stocks(stock_details, venue, provider_id=pc_provider.id)  # type: ignore [arg-type]
     logger.info(
@@ -43,3 +145,20 @@ def synchronize_stocks_job(serialized_stock_details: list[dict | StockDetail], v
             **operations,
         },
     )
+
+
+def _serialize_pending_stock(stock_detail: dict) -> str:
+    price = stock_detail["price"]
+    return f"{stock_detail['available_quantity']}:{'' if price is None else price}"
+
+
+def _deserialize_pending_stock(ref: str, value: str, venue_id: int) -> StockDetail:
+    available_quantity, price = value.split(":")
+    return StockDetail(
+        products_provider_reference=ref,
+        offers_provider_reference=ref,
+        stocks_provider_reference=f"{ref}@{venue_id}",
+        venue_reference=f"{ref}@{venue_id}",
+        available_quantity=int(available_quantity),
+        price=decimal.Decimal(price) if price else None,  # type: ignore [arg-type]
+    )
@@ -62,7 +62,19 @@ def log_database_connection_status() -> None:
 
 @blueprint.cli.command("worker")
 @click.argument("queues", nargs=-1)
-def run_worker(queues=None):  # type: ignore [no-untyped-def]
+@click.option(
+    "--processes",
+    help="Number of long-lived processes that run jobs (0 to fork a process for every job)",
+    type=int,
+    default=settings.WORKER_POOL_PROCESSES,
+)
+@click.option(
+    "--max-jobs-per-child",
+    help="Number of jobs run by each long-lived process before it is replaced",
+    type=int,
+    default=settings.WORKER_POOL_MAX_JOBS_PER_CHILD,
+)
+def run_worker(queues=None, processes=0, max_jobs_per_child=None):  # type: ignore [no-untyped-def]
     from flask import current_app as app
 
     sentry_sdk.set_tag("pcapi.app_type", "worker")
@@ -73,6 +85,12 @@ def run_worker(queues=None):  # type: ignore [no-untyped-def]
     with app.app_context():
         log_database_connection_status()
 
+    if processes:
+        from pcapi.workers.pool import WorkerPool
+
+        WorkerPool(list(queues), processes, max_jobs_per_child).run()
+        return
+
     while True:
         try:
             with app.app_context():
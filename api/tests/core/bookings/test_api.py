@@ -169,6 +169,56 @@ class BookOfferTest:
             TransactionalEmail.BOOKING_CONFIRMATION_BY_BENEFICIARY.value
         )  # to beneficiary
 
+    @override_features(DEFER_BOOKING_SIDE_EFFECTS=True)
+    def test_defer_side_effects(self, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = offers_factories.StockFactory(price=10, offer__bookingEmail="offerer@example.com")
+
+        booking = api.book_offer(beneficiary=beneficiary, stock_id=stock.id, quantity=1)
+
+        # Tasks are run synchronously in tests.
+        assert len(mails_testing.outbox) == 2
+        assert mails_testing.outbox[0].sent_data["template"] == dataclasses.asdict(
+            TransactionalEmail.FIRST_VENUE_BOOKING_TO_PRO.value
+        )
+        assert push_testing.requests[0]["attribute_values"]["u.credit"] == 29_000
+        assert not app.redis_client.zrange(api.REDIS_PENDING_BOOKING_SIDE_EFFECTS, 0, -1)
+        assert booking.status == BookingStatus.CONFIRMED
+
+    def test_redispatch_pending_side_effects(self, app):
+        booking = booking_factories.IndividualBookingFactory(stock__offer__bookingEmail="offerer@example.com")
+        recent_booking = booking_factories.IndividualBookingFactory()
+        now = datetime.utcnow().timestamp()
+        app.redis_client.zadd(
+            api.REDIS_PENDING_BOOKING_SIDE_EFFECTS,
+            {
+                f"{booking.id}:0": now - api.BOOKING_SIDE_EFFECTS_REDISPATCH_DELAY - 1,
+                f"{recent_booking.id}:0": now,
+            },
+        )
+
+        api.redispatch_booking_side_effects()
+
+        assert len(mails_testing.outbox) == 2
+        assert {email.sent_data["To"] for email in mails_testing.outbox} == {
+            "offerer@example.com",
+            booking.individualBooking.user.email,
+        }
+        assert app.redis_client.zrange(api.REDIS_PENDING_BOOKING_SIDE_EFFECTS, 0, -1) == [f"{recent_booking.id}:0"]
+
+    def test_run_deferred_side_effects_only_once(self, app):
+        booking = booking_factories.IndividualBookingFactory(stock__offer__bookingEmail="offerer@example.com")
+        app.redis_client.zadd(
+            api.REDIS_PENDING_BOOKING_SIDE_EFFECTS,
+            {f"{booking.id}:0": datetime.utcnow().timestamp() - api.BOOKING_SIDE_EFFECTS_REDISPATCH_DELAY - 1},
+        )
+
+        api.redispatch_booking_side_effects()
+        # The delayed task eventually runs.
+        api.handle_deferred_booking_side_effects(booking.id, False)
+
+        assert len(mails_testing.outbox) == 2
+
     def test_if_it_is_first_venue_booking_to_send_specific_email(self):
         beneficiary = users_factories.BeneficiaryGrant18Factory()
         stock = offers_factories.StockFactory(price=10, dnBookedQuantity=5, offer__bookingEmail="offerer@example.com")
@@ -474,6 +524,7 @@ class CancelByBeneficiaryTest:
 
         queries = 2  # select stock ; select booking
         queries += 1  # update booking
+        queries += 2  # select offer (to know the domain of the booking) ; update deposit spent amounts
         queries += 1  # select feature_flag
         queries += 3  # update stock ; update booking ;  release savepoint
         queries += 7  # (update batch attributes): select booking ; individualBooking ; user_offerer exists ; user.bookings ;  favorites ; deposit ; wallet balance
@@ -3,8 +3,10 @@ from datetime import date
 from datetime import datetime
 from datetime import time
 from datetime import timedelta
+from decimal import Decimal
 from io import BytesIO
 from io import StringIO
+from types import SimpleNamespace
 
 from dateutil import tz
 from dateutil.relativedelta import relativedelta
@@ -32,6 +34,9 @@ from pcapi.models.api_errors import ResourceNotFoundError
 from pcapi.routes.serialization.bookings_recap_serialize import OfferType
 from pcapi.utils.date import utc_datetime_to_department_timezone
 
+from tests.test_utils import FakeExportQuery
+from tests.test_utils import get_peak_memory_of_stream
+
 
 pytestmark = pytest.mark.usefixtures("db_session")
 
@@ -2421,3 +2426,56 @@ class GetTomorrowEventOfferTest:
         bookings = booking_repository.find_individual_bookings_event_happening_tomorrow_query()
 
         assert len(bookings) == 2
+
+
+def _build_export_row(index):
+    return SimpleNamespace(
+        venueName="Le lieu",
+        offerName=f"Offre {index}",
+        stockBeginningDatetime=None,
+        isbn="9782123456789",
+        beneficiaryLastName="Doux",
+        beneficiaryFirstName="Jeanne",
+        beneficiaryEmail=f"jeanne.doux{index}@example.com",
+        beneficiaryPhoneNumber="+33600000000",
+        bookedAt=datetime(2022, 9, 1, 12, 0),
+        usedAt=None,
+        token=f"T{index:05d}",
+        status=BookingStatus.CONFIRMED,
+        isExternal=False,
+        amount=Decimal("12.50"),
+        isConfirmed=False,
+        reimbursedAt=None,
+        venueDepartmentCode="75",
+    )
+
+
+def _build_export_query(count):
+    return FakeExportQuery(_build_export_row, count)
+
+
+class StreamExportTest:
+    def test_csv_memory_does_not_depend_on_number_of_rows(self):
+        size, peak = get_peak_memory_of_stream(booking_repository.stream_csv_report(_build_export_query(500_000)))
+
+        assert size > 50_000_000
+        assert peak < 10_000_000
+
+    def test_excel_memory_does_not_depend_on_number_of_rows(self):
+        # xlsxwriter is much slower than the csv module, hence fewer
+        # rows. Without the "constant memory" mode, 10.000 rows take
+        # more than 20 MB.
+        size, peak = get_peak_memory_of_stream(booking_repository.stream_excel_report(_build_export_query(10_000)))
+
+        assert size > 300_000
+        assert peak < 5_000_000
+
+    def test_stream_is_the_same_as_the_export(self):
+        query = _build_export_query(3)
+
+        streamed = b"".join(booking_repository.stream_csv_report(query))
+
+        assert streamed == booking_repository._serialize_csv_report(query).encode("utf-8-sig")
+        rows = list(csv.reader(StringIO(streamed.decode("utf-8-sig")), delimiter=";"))
+        assert len(rows) == 4
+        assert rows[3][1] == "Offre 2"
@@ -1,7 +1,9 @@
 import csv
 import datetime
 from decimal import Decimal
+import gzip
 import io
+import logging
 import pathlib
 from unittest import mock
 import zipfile
@@ -531,8 +533,8 @@ class GetPricingPointIdAndCurrentRevenueTest:
 def auto_override_features(test_method):
     """Override pricing point and reimbursement-point-related feature
     flags for this test method, based on the value of the
-    `use_pricing_point` / `use_reimbursement_point` attribute of its
-    test class.
+    `use_pricing_point` / `use_reimbursement_point` (and
+    `price_in_batch`) attribute of its test class.
     """
 
     def wrapper(self_, *args, **kwargs):
@@ -540,6 +542,7 @@ def auto_override_features(test_method):
         with override_features(
             USE_PRICING_POINT_FOR_PRICING=active,
             USE_REIMBURSEMENT_POINT_FOR_CASHFLOWS=active,
+            PRICE_BOOKINGS_IN_BATCH=getattr(self_, "price_in_batch", False),
         ):
             return test_method(self_, *args, **kwargs)
 
@@ -1193,6 +1196,117 @@ class LegacyPriceBookingsTest(PriceBookingsTest):
     use_pricing_point = False
 
 
+class BatchPriceBookingsTest(PriceBookingsTest):
+    price_in_batch = True
+
+    @auto_override_features
+    @mock.patch("pcapi.core.finance.api.price_booking", lambda booking, use_pricing_point: None)
+    @mock.patch("pcapi.core.finance.api._price_bookings_of_pricing_point")
+    def test_num_queries(self, _mocked_price_bookings_of_pricing_point):
+        bookings_factories.UsedBookingFactory(
+            dateUsed=self.few_minutes_ago,
+            stock=self.individual_stock_factory(),
+        )
+        educational_factories.UsedCollectiveBookingFactory(
+            dateUsed=self.few_minutes_ago,
+            collectiveStock=self.collective_stock_factory(),
+        )
+        n_queries = 1  # fetch `USE_PRICING_POINT_FOR_PRICING` feature flag
+        n_queries += 1  # count of individual bookings to price
+        n_queries += 1  # count of collective bookings to price
+        n_queries += 1  # fetch `PRICE_BOOKINGS_IN_BATCH` feature flag
+        n_queries += 1  # select individual bookings
+        n_queries += 1  # select collective bookings
+        with assert_num_queries(n_queries):
+            api.price_bookings(self.few_minutes_ago)
+
+    def _get_pricings(self):
+        return {
+            pricing.bookingId: (
+                pricing.status,
+                pricing.pricingPointId,
+                pricing.venueId,
+                pricing.valueDate,
+                pricing.amount,
+                pricing.standardRule,
+                pricing.customRuleId,
+                pricing.revenue,
+                [(line.category, line.amount) for line in pricing.lines],
+            )
+            for pricing in models.Pricing.query.filter(models.Pricing.status != models.PricingStatus.CANCELLED)
+        }
+
+    @auto_override_features
+    def test_same_pricings_as_one_by_one(self):
+        now = datetime.datetime.utcnow()
+        user = create_rich_user()
+        pricing_point = offerers_factories.VenueFactory(pricing_point="self")
+        other_venue = offerers_factories.VenueFactory(
+            managingOfferer=pricing_point.managingOfferer,
+            pricing_point=pricing_point,
+        )
+        other_pricing_point = offerers_factories.VenueFactory(pricing_point="self")
+        # Go above 20.000 € of revenue (and thus change the
+        # reimbursement rate) with bookings of 2 venues.
+        for days_ago in range(20, 10, -1):
+            bookings_factories.UsedIndividualBookingFactory(
+                amount=3_000,
+                individualBooking__user=user,
+                dateUsed=now - datetime.timedelta(days=days_ago),
+                stock__offer__venue=pricing_point if days_ago % 2 else other_venue,
+            )
+        # An event that happens after it has been marked as used.
+        bookings_factories.UsedIndividualBookingFactory(
+            individualBooking__user=user,
+            dateUsed=now - datetime.timedelta(days=19),
+            stock=offers_factories.EventStockFactory(
+                beginningDatetime=now - datetime.timedelta(days=2),
+                offer__venue=pricing_point,
+            ),
+        )
+        # A booking of the previous revenue period.
+        bookings_factories.UsedIndividualBookingFactory(
+            amount=3_000,
+            individualBooking__user=user,
+            dateUsed=datetime.datetime(now.year - 1, 12, 31, 12),
+            stock__offer__venue=pricing_point,
+        )
+        # A booking with a custom reimbursement rule.
+        booking = bookings_factories.UsedIndividualBookingFactory(
+            amount=20,
+            dateUsed=now - datetime.timedelta(days=5),
+            stock__offer__venue=other_pricing_point,
+        )
+        payments_factories.CustomReimbursementRuleFactory(offer=booking.stock.offer, amount=5)
+        # A booking that has been used, unused and used again.
+        booking = bookings_factories.UsedIndividualBookingFactory(
+            dateUsed=now - datetime.timedelta(days=4),
+            stock__offer__venue=other_pricing_point,
+        )
+        factories.PricingFactory(booking=booking, status=models.PricingStatus.CANCELLED)
+        min_date = datetime.datetime(now.year - 1, 12, 1)
+
+        with override_features(PRICE_BOOKINGS_IN_BATCH=False):
+            api.price_bookings(min_date, batch_size=5)
+        expected = self._get_pricings()
+        assert len(expected) == 14
+
+        pricing_ids = [
+            pricing_id
+            for pricing_id, in models.Pricing.query.filter(
+                models.Pricing.status != models.PricingStatus.CANCELLED
+            ).with_entities(models.Pricing.id)
+        ]
+        models.PricingLine.query.filter(models.PricingLine.pricingId.in_(pricing_ids)).delete(synchronize_session=False)
+        models.Pricing.query.filter(models.Pricing.id.in_(pricing_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+        # Make sure that no booking is priced one by one.
+        with mock.patch("pcapi.core.finance.api.price_booking", side_effect=AssertionError("should not be called")):
+            api.price_bookings(min_date, batch_size=5)
+        assert self._get_pricings() == expected
+
+
 def test_get_next_cashflow_batch_label():
     label = api._get_next_cashflow_batch_label()
     assert label == "VIR1"
@@ -1982,6 +2096,36 @@ def test_generate_payments_file_legacy_with_business_units():
     }
 
 
+@clean_temporary_files
+def test_write_csv(caplog):
+    header = ("Nom", "Montant")
+    rows = iter([("a", 1), ("b", 2)])  # any iterable, not only lists
+    row_formatter = lambda row: (row[0].upper(), row[1])
+    expected = [{"Nom": "A", "Montant": 1}, {"Nom": "B", "Montant": 2}]
+
+    with caplog.at_level(logging.INFO):
+        path = api._write_csv("test", header, rows, row_formatter)
+    assert path.name == "test.csv"
+    with path.open(encoding="utf-8") as fp:
+        assert list(csv.DictReader(fp, quoting=csv.QUOTE_NONNUMERIC)) == expected
+    assert caplog.records[-1].message == "Generated CSV file"
+    assert caplog.records[-1].extra["rows"] == 2
+    assert caplog.records[-1].extra["peak_rss"] > 0
+
+    rows = [("a", 1), ("b", 2)]
+    path = api._write_csv("test", header, rows, row_formatter, compression="gzip")
+    assert path.name == "test.csv.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        assert list(csv.DictReader(fp, quoting=csv.QUOTE_NONNUMERIC)) == expected
+
+    path = api._write_csv("test", header, rows, row_formatter, compression="zip")
+    assert path.name == "test.csv.zip"
+    with zipfile.ZipFile(path) as zfile:
+        with zfile.open("test.csv") as csv_bytefile:
+            reader = csv.DictReader(io.TextIOWrapper(csv_bytefile), quoting=csv.QUOTE_NONNUMERIC)
+            assert list(reader) == expected
+
+
 @clean_temporary_files
 def test_generate_wallets_file():
     user1 = users_factories.BeneficiaryGrant18Factory(deposit__version=1, deposit__amount=500)
@@ -2307,6 +2451,54 @@ class GenerateInvoicesTest:
         assert invoiced_bookings == {booking1, booking2}
 
 
+    @mock.patch("pcapi.core.finance.api._generate_invoice_html")
+    @mock.patch("pcapi.core.finance.api._store_invoice_pdf")
+    @auto_override_features
+    def test_store_invoices_of_crashed_run(self, mocked_store_invoice_pdf, _mocked_generate_invoice_html):
+        booking = bookings_factories.UsedIndividualBookingFactory(stock=self.stock_factory())
+        factories.BankInformationFactory(venue=booking.venue)
+        api.price_booking(booking, self.use_pricing_point)
+        api.generate_cashflows_and_payment_files(datetime.datetime.utcnow())
+        cashflow = models.Cashflow.query.one()
+        # Simulate a run that crashed after having created the
+        # invoice but before having stored its PDF file.
+        invoice = api._generate_invoice(
+            business_unit_id=cashflow.businessUnitId if not self.use_reimbursement_point else None,
+            reimbursement_point_id=cashflow.reimbursementPointId if self.use_reimbursement_point else None,
+            cashflow_ids=[cashflow.id],
+        )
+
+        api.generate_invoices()
+
+        assert models.Invoice.query.one() == invoice
+        mocked_store_invoice_pdf.assert_called_once_with(
+            invoice_storage_id=invoice.storage_object_id,
+            invoice_html=mock.ANY,
+        )
+        assert len(mails_testing.outbox) == 1
+        assert not api._get_invoices_without_pdf()
+
+    @mock.patch("pcapi.core.finance.api.store_public_object")
+    @mock.patch("pcapi.core.finance.api._generate_invoice_html", lambda *args: "<p>Trust me, I am an invoice.</p>")
+    @auto_override_features
+    def test_render_in_parallel(self, mocked_store_public_object):
+        for _ in range(3):
+            booking = bookings_factories.UsedIndividualBookingFactory(stock=self.stock_factory())
+            factories.BankInformationFactory(venue=booking.venue)
+            api.price_booking(booking, self.use_pricing_point)
+        api.generate_cashflows_and_payment_files(datetime.datetime.utcnow())
+
+        api.generate_invoices(workers=2)
+
+        invoices = models.Invoice.query.all()
+        assert len(invoices) == 3
+        stored = {call.kwargs["object_id"]: call.kwargs["blob"] for call in mocked_store_public_object.call_args_list}
+        assert stored.keys() == {invoice.storage_object_id for invoice in invoices}
+        assert all(blob.startswith(b"%PDF") for blob in stored.values())
+        assert len(mails_testing.outbox) == 3
+        assert not api._get_invoices_without_pdf()
+
+
 class LegacyGenerateInvoicesTest(GenerateInvoicesTest):
     use_pricing_point = False
     use_reimbursement_point = False
@@ -7,6 +7,7 @@ import os
 import pathlib
 from unittest import mock
 
+from flask import current_app
 from freezegun import freeze_time
 import pytest
 
@@ -29,6 +30,7 @@ from pcapi.core.testing import override_settings
 import pcapi.core.users.factories as users_factories
 import pcapi.core.users.models as users_models
 from pcapi.models import api_errors
+from pcapi.models import db
 from pcapi.models.offer_mixin import OfferValidationStatus
 from pcapi.models.offer_mixin import OfferValidationType
 from pcapi.notifications.push import testing as push_testing
@@ -1658,9 +1660,9 @@ class ImportOfferValidationConfigTest:
         assert current_config.specs["rules"][1]["conditions"][0]["attribute"] == "max_price"
 
 
-class ParseOfferValidationConfigTest:
-    def test_parse_offer_validation_config(self):
-        offer = factories.OfferFactory(name="REJECTED")
+class CompileOfferValidationConfigTest:
+    def test_compile_offer_validation_config(self):
+        offer = factories.OfferFactory(name="REJECTED", withdrawalDetails="Envoi par la poste")
         config_yaml = """
         minimum_score: 0.6
         rules:
@@ -1678,154 +1680,105 @@ class ParseOfferValidationConfigTest:
                  - "Envoi"
             """
         offer_validation_config = api.import_offer_validation_config(config_yaml)
-        min_score, validation_rules = offer_validation.parse_offer_validation_config(offer, offer_validation_config)
-        assert min_score == 0.6
-        assert len(validation_rules) == 1
-        assert validation_rules[0].factor == 0
-        assert validation_rules[0].name == "modalités de retrait"
-        assert validation_rules[0].offer_validation_items[0].model == offer
-        assert validation_rules[0].offer_validation_items[0].attribute == "withdrawalDetails"
+        program = offer_validation.compile_offer_validation_config(offer_validation_config)
+        assert program.minimum_score == 0.6
+        [rule] = program.rules_by_offer_class["Offer"]
+        assert rule.factor == 0
+        assert rule.name == "modalités de retrait"
+        assert rule.conditions[0].getter(offer) == "Envoi par la poste"
+
+
+def _compute_score(offer, *rules):
+    config = models.OfferValidationConfig(id=1, specs={"minimum_score": 0.6, "rules": list(rules)})
+    return offer_validation.compile_offer_validation_config(config).score(offer)
+
+
+def _rule(name, factor, *conditions):
+    return {
+        "name": name,
+        "factor": factor,
+        "conditions": [
+            {"model": model, "attribute": attribute, "condition": {"operator": operator, "comparated": comparated}}
+            for model, attribute, operator, comparated in conditions
+        ],
+    }
 
 
 class ComputeOfferValidationScoreTest:
     def test_offer_validation_with_one_item_config_with_in(self):
         offer = factories.OfferFactory(name="REJECTED")
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer, attribute="name", type=["str"], condition={"operator": "in", "comparated": ["REJECTED"]}
-        )
-        validation_rules = offer_validation.OfferValidationRuleItem(
-            name="nom de l'offre", factor=0.2, offer_validation_items=[validation_item]
-        )
+        validation_rule = _rule("nom de l'offre", 0.2, ("Offer", "name", "in", ["REJECTED"]))
 
-        score = offer_validation.compute_offer_validation_score([validation_rules])
+        score = _compute_score(offer, validation_rule)
 
         assert score == 0.2
 
     def test_offer_validation_with_one_item_config_with_greater_than(self):
         offer = factories.OfferFactory(name="REJECTED")
         factories.StockFactory(offer=offer, price=12)
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer, attribute="max_price", type=["int"], condition={"operator": ">", "comparated": 10}
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="prix max", factor=0.2, offer_validation_items=[validation_item]
-        )
+        validation_rule = _rule("prix max", 0.2, ("Offer", "max_price", ">", 10))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
 
         assert score == 0.2
 
     def test_offer_validation_with_one_item_config_with_less_than(self):
         offer = factories.OfferFactory(name="REJECTED")
         factories.StockFactory(offer=offer, price=8)
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer, attribute="max_price", type=["int"], condition={"operator": "<", "comparated": 10}
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="prix max", factor=0.2, offer_validation_items=[validation_item]
-        )
+        validation_rule = _rule("prix max", 0.2, ("Offer", "max_price", "<", 10))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
 
         assert score == 0.2
 
     def test_offer_validation_with_one_item_config_with_greater_or_equal_than(self):
         offer = factories.OfferFactory(name="REJECTED")
         factories.StockFactory(offer=offer, price=12)
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer, attribute="max_price", type=["int"], condition={"operator": ">=", "comparated": 10}
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="prix max", factor=0.2, offer_validation_items=[validation_item]
-        )
+        validation_rule = _rule("prix max", 0.2, ("Offer", "max_price", ">=", 10))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
 
         assert score == 0.2
 
     def test_offer_validation_with_one_item_config_with_less_or_equal_than(self):
         offer = factories.OfferFactory(name="REJECTED")
         factories.StockFactory(offer=offer, price=8)
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer, attribute="max_price", type=["int"], condition={"operator": "<=", "comparated": 10}
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="prix max", factor=0.2, offer_validation_items=[validation_item]
-        )
+        validation_rule = _rule("prix max", 0.2, ("Offer", "max_price", "<=", 10))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
 
         assert score == 0.2
 
     def test_offer_validation_with_one_item_config_with_equal(self):
         offer = factories.OfferFactory(name="test offer")
         factories.StockFactory(offer=offer, price=15)
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="name",
-            type=["str"],
-            condition={"operator": "==", "comparated": "test offer"},
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="nom de l'offre", factor=0.3, offer_validation_items=[validation_item]
-        )
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        validation_rule = _rule("nom de l'offre", 0.3, ("Offer", "name", "==", "test offer"))
+        score = _compute_score(offer, validation_rule)
         assert score == 0.3
 
     def test_offer_validation_with_one_item_config_with_not_in(self):
         offer = factories.OfferFactory(name="rejected")
-        validation_item = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="name",
-            type=["str"],
-            condition={"operator": "not in", "comparated": "[approved]"},
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="nom de l'offre", factor=0.3, offer_validation_items=[validation_item]
-        )
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        validation_rule = _rule("nom de l'offre", 0.3, ("Offer", "name", "not in", "[approved]"))
+        score = _compute_score(offer, validation_rule)
         assert score == 0.3
 
     def test_offer_validation_with_multiple_item_config(self):
         offer = factories.OfferFactory(name="test offer")
         factories.StockFactory(offer=offer, price=15)
-        validation_item_1 = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="name",
-            type=["str"],
-            condition={"operator": "==", "comparated": "test offer"},
-        )
-        validation_item_2 = offer_validation.OfferValidationItem(
-            model=offer, attribute="max_price", type=["str"], condition={"operator": ">", "comparated": 10}
-        )
-        validation_rule_1 = offer_validation.OfferValidationRuleItem(
-            name="nom de l'offre", factor=0.3, offer_validation_items=[validation_item_1]
-        )
-        validation_rule_2 = offer_validation.OfferValidationRuleItem(
-            name="prix de l'offre", factor=0.2, offer_validation_items=[validation_item_2]
-        )
+        validation_rule_1 = _rule("nom de l'offre", 0.3, ("Offer", "name", "==", "test offer"))
+        validation_rule_2 = _rule("prix de l'offre", 0.2, ("Offer", "max_price", ">", 10))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule_1, validation_rule_2])
+        score = _compute_score(offer, validation_rule_1, validation_rule_2)
         assert score == 0.06
 
     def test_offer_validation_rule_with_multiple_conditions(self):
         offer = factories.OfferFactory(name="Livre")
         factories.StockFactory(offer=offer, price=75)
-        validation_item_1 = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="name",
-            type=["str"],
-            condition={"operator": "==", "comparated": "Livre"},
-        )
-        validation_item_2 = offer_validation.OfferValidationItem(
-            model=offer, attribute="max_price", type=["str"], condition={"operator": ">", "comparated": 70}
-        )
-
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="prix d'un livre", factor=0.5, offer_validation_items=[validation_item_1, validation_item_2]
+        validation_rule = _rule(
+            "prix d'un livre", 0.5, ("Offer", "name", "==", "Livre"), ("Offer", "max_price", ">", 70)
         )
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
         assert score == 0.5
 
     def test_offer_validation_with_emails_blacklist(self):
@@ -1833,68 +1786,39 @@ class ComputeOfferValidationScoreTest:
         venue = offerers_factories.VenueFactory(siret="12345678912345", bookingEmail="fake@yopmail.com")
         offer = factories.OfferFactory(name="test offer", venue=venue)
         factories.StockFactory(offer=offer, price=15)
-        validation_item_1 = offer_validation.OfferValidationItem(
-            model=venue,
-            attribute="bookingEmail",
-            type=["str"],
-            condition={"operator": "contains", "comparated": ["yopmail.com", "suspect.com"]},
+        validation_rule = _rule(
+            "adresses mail", 0.3, ("Venue", "bookingEmail", "contains", ["yopmail.com", "suspect.com"])
         )
 
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="adresses mail", factor=0.3, offer_validation_items=[validation_item_1]
-        )
-
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
         assert score == 0.3
 
     def test_offer_validation_with_description_rule_and_offer_without_description(self):
         offer = factories.OfferFactory(name="test offer", description=None)
         factories.StockFactory(offer=offer, price=15)
-        validation_item_1 = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="description",
-            type=["str"],
-            condition={"operator": "contains", "comparated": ["suspect", "fake"]},
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="description de l'offre", factor=0.3, offer_validation_items=[validation_item_1]
+        validation_rule = _rule(
+            "description de l'offre", 0.3, ("Offer", "description", "contains", ["suspect", "fake"])
         )
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
         assert score == 1
 
     def test_offer_validation_with_id_at_providers_is_none(self):
         offer = factories.OfferFactory(name="test offer", description=None)
         assert offer.idAtProvider is None
         factories.StockFactory(offer=offer, price=15)
-        validation_item_1 = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="idAtProvider",
-            type=["None"],
-            condition={"operator": "==", "comparated": None},
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="offre non synchro", factor=0.3, offer_validation_items=[validation_item_1]
-        )
+        validation_rule = _rule("offre non synchro", 0.3, ("Offer", "idAtProvider", "==", None))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
         assert score == 0.3
 
     def test_offer_validation_with_contains_exact_word(self):
         offer = factories.OfferFactory(name="test offer", description=None)
         assert offer.idAtProvider is None
         factories.StockFactory(offer=offer, price=15)
-        validation_item_1 = offer_validation.OfferValidationItem(
-            model=offer,
-            attribute="name",
-            type=["str"],
-            condition={"operator": "contains-exact", "comparated": ["test"]},
-        )
-        validation_rule = offer_validation.OfferValidationRuleItem(
-            name="offer name contains exact words", factor=0.3, offer_validation_items=[validation_item_1]
-        )
+        validation_rule = _rule("offer name contains exact words", 0.3, ("Offer", "name", "contains-exact", ["test"]))
 
-        score = offer_validation.compute_offer_validation_score([validation_rule])
+        score = _compute_score(offer, validation_rule)
         assert score == 0.3
 
 
@@ -2004,3 +1928,86 @@ class DeleteUnwantedExistingProductTest:
         assert models.Product.query.one() == product
         assert not product.isGcuCompatible
         assert not product.isSynchronizationCompatible
+
+
+class CheckStockConsistencyTest:
+    def _make_inconsistent(self, stock, dn_booked_quantity):
+        models.Stock.query.filter_by(id=stock.id).update({"dnBookedQuantity": dn_booked_quantity})
+        db.session.commit()
+
+    def test_full_check(self):
+        two_days_ago = datetime.utcnow() - timedelta(days=2)
+        consistent_stock = bookings_factories.BookingFactory(quantity=2).stock
+        old_stock = factories.StockFactory(dateModified=two_days_ago)
+        bookings_factories.BookingFactory(stock=old_stock, dateCreated=two_days_ago)
+        self._make_inconsistent(old_stock, 3)
+        cancelled_stock = bookings_factories.CancelledBookingFactory().stock
+        self._make_inconsistent(cancelled_stock, 1)
+
+        checked, inconsistent_stock_ids = api.check_stock_consistency(full=True)
+
+        assert checked == 3
+        assert inconsistent_stock_ids == sorted([old_stock.id, cancelled_stock.id])
+        assert consistent_stock.dnBookedQuantity == 2
+        assert old_stock.dnBookedQuantity == 1
+        assert cancelled_stock.dnBookedQuantity == 0
+        assert current_app.redis_client.get(api.STOCK_CONSISTENCY_WATERMARK_KEY)
+
+    def test_only_check_stocks_modified_since_last_run(self):
+        two_days_ago = datetime.utcnow() - timedelta(days=2)
+        current_app.redis_client.set(
+            api.STOCK_CONSISTENCY_WATERMARK_KEY, (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        )
+        # untouched since last run: not checked
+        old_stock = factories.StockFactory(dateModified=two_days_ago)
+        bookings_factories.BookingFactory(stock=old_stock, dateCreated=two_days_ago)
+        self._make_inconsistent(old_stock, 3)
+        # booked since last run
+        booked_stock = factories.StockFactory(dateModified=two_days_ago)
+        bookings_factories.BookingFactory(stock=booked_stock)
+        self._make_inconsistent(booked_stock, 3)
+        # booking cancelled since last run
+        cancelled_stock = factories.StockFactory(dateModified=two_days_ago)
+        bookings_factories.CancelledBookingFactory(stock=cancelled_stock, dateCreated=two_days_ago)
+        self._make_inconsistent(cancelled_stock, 1)
+        # quantity modified since last run
+        modified_stock = factories.StockFactory()
+
+        checked, inconsistent_stock_ids = api.check_stock_consistency()
+
+        assert checked == 3
+        assert inconsistent_stock_ids == sorted([booked_stock.id, cancelled_stock.id])
+        assert old_stock.dnBookedQuantity == 3
+        assert booked_stock.dnBookedQuantity == 1
+        assert cancelled_stock.dnBookedQuantity == 0
+        assert modified_stock.dnBookedQuantity == 0
+
+    def test_check_stocks_of_uncancelled_bookings(self):
+        two_days_ago = datetime.utcnow() - timedelta(days=2)
+        stock = factories.StockFactory(dateModified=two_days_ago)
+        booking = bookings_factories.CancelledBookingFactory(
+            stock=stock, dateCreated=two_days_ago, cancellationDate=two_days_ago
+        )
+        current_app.redis_client.set(
+            api.STOCK_CONSISTENCY_WATERMARK_KEY, (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        )
+        booking.uncancel_booking_set_used()
+        db.session.commit()
+        self._make_inconsistent(stock, 0)
+
+        checked, inconsistent_stock_ids = api.check_stock_consistency()
+
+        assert checked == 1
+        assert inconsistent_stock_ids == [stock.id]
+        assert stock.dnBookedQuantity == 1
+
+    def test_dry_run(self):
+        stock = bookings_factories.BookingFactory().stock
+        self._make_inconsistent(stock, 3)
+
+        checked, inconsistent_stock_ids = api.check_stock_consistency(dry_run=True)
+
+        assert checked == 1
+        assert inconsistent_stock_ids == [stock.id]
+        assert stock.dnBookedQuantity == 3
+        assert current_app.redis_client.get(api.STOCK_CONSISTENCY_WATERMARK_KEY) is None
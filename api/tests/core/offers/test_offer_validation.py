@@ -1,4 +1,7 @@
+import operator
+
 import pytest
+import yaml
 
 from pcapi.core.educational import factories as educational_factories
 from pcapi.core.educational import models as educational_models
@@ -7,10 +10,10 @@ import pcapi.core.offerers.factories as offerers_factories
 from pcapi.core.offers import api as offers_api
 from pcapi.core.offers import factories as offers_factories
 from pcapi.core.offers import models as offers_models
+from pcapi.core.offers import offer_validation
 from pcapi.core.offers import repository as offers_repository
-from pcapi.core.offers.exceptions import UnapplicableModel
-from pcapi.core.offers.offer_validation import _get_model
-from pcapi.core.offers.offer_validation import parse_offer_validation_config
+from pcapi.core.testing import assert_num_queries
+from pcapi.repository import repository
 
 
 pytestmark = pytest.mark.usefixtures("db_session")
@@ -48,7 +51,14 @@ SIMPLE_OFFER_VALIDATION_CONFIG = """
         """
 
 
-class GetModelTest:
+def _get_model(offer, parameter_model):
+    path = offer_validation._get_model_path(type(offer).__name__, parameter_model)
+    if path is None:
+        return None
+    return operator.attrgetter(path.rstrip("."))(offer) if path else offer
+
+
+class GetModelPathTest:
     def test_offer(self):
         offer = offers_factories.OfferFactory()
         model = _get_model(offer, "Offer")
@@ -76,8 +86,7 @@ class GetModelTest:
 
     def test_collective_stock_offer_fail(self):
         offer = offers_factories.OfferFactory()
-        with pytest.raises(UnapplicableModel):
-            _get_model(offer, "CollectiveStock")
+        assert _get_model(offer, "CollectiveStock") is None
 
     def test_collective_offer_template_venue(self):
         venue = offerers_factories.VenueFactory()
@@ -127,36 +136,144 @@ class GetModelTest:
         assert isinstance(model, offerers_models.Offerer)
 
 
-class ParseOfferValidationConfigTest:
-    def test_parse_offer_validation_config(self):
-        offers_api.import_offer_validation_config(SIMPLE_OFFER_VALIDATION_CONFIG)
-        offer = offers_factories.OfferFactory()
-        config = offers_repository.get_current_offer_validation_config()
-        minimum_score, rule_items = parse_offer_validation_config(offer, config)
-        assert len(rule_items) == 1
-        assert minimum_score == 0.6
-        assert len(rule_items[0].offer_validation_items) == 1
-        assert rule_items[0].offer_validation_items[0].model == offer
-        assert rule_items[0].offer_validation_items[0].condition["comparated"] == ["offer ?"]
-
-    def test_parse_collective_offer_template_validation_config(self):
+class CompileOfferValidationConfigTest:
+    def test_compile_offer_validation_config(self):
+        config = offers_api.import_offer_validation_config(SIMPLE_OFFER_VALIDATION_CONFIG)
+        offer = offers_factories.OfferFactory(name="Is it an offer ?")
+        program = offer_validation.compile_offer_validation_config(config)
+        assert program.minimum_score == 0.6
+        [rule] = program.rules_by_offer_class["Offer"]
+        assert len(rule.conditions) == 1
+        assert rule.conditions[0].resolve(offer)
+        assert program.score(offer) == 0
+
+    def test_compile_collective_offer_template_validation_config(self):
+        config = offers_api.import_offer_validation_config(SIMPLE_OFFER_VALIDATION_CONFIG)
+        offer = educational_factories.CollectiveOfferTemplateFactory(name="Are there templates ?")
+        program = offer_validation.compile_offer_validation_config(config)
+        [rule] = program.rules_by_offer_class["CollectiveOfferTemplate"]
+        assert len(rule.conditions) == 1
+        assert rule.conditions[0].resolve(offer)
+        assert program.score(offer) == 0
+
+    def test_compile_collective_offer_validation_config(self):
+        config = offers_api.import_offer_validation_config(SIMPLE_OFFER_VALIDATION_CONFIG)
+        offer = educational_factories.CollectiveOfferFactory(name="Is it a collective offer ?")
+        program = offer_validation.compile_offer_validation_config(config)
+        [rule] = program.rules_by_offer_class["CollectiveOffer"]
+        assert len(rule.conditions) == 1
+        assert rule.conditions[0].resolve(offer)
+        assert program.score(offer) == 0
+
+
+FULL_OFFER_VALIDATION_CONFIG = """
+        minimum_score: 0.6
+        rules:
+            - name: "check offer name"
+              factor: 0.5
+              conditions:
+               - model: "Offer"
+                 attribute: "name"
+                 condition:
+                    operator: "contains"
+                    comparated:
+                      - "suspicious"
+                      - "Offre Été"
+            - name: "check collective offer name"
+              factor: 0.5
+              conditions:
+               - model: "CollectiveOffer"
+                 attribute: "name"
+                 condition:
+                    operator: "contains-exact"
+                    comparated:
+                      - "douteuse"
+            - name: "check venue siret"
+              factor: 0.1
+              conditions:
+               - model: "Venue"
+                 attribute: "siret"
+                 condition:
+                    operator: "in"
+                    comparated:
+                      - "12345678900011"
+                      - "12345678900012"
+            - name: "check offerer and price"
+              factor: 0.8
+              conditions:
+               - model: "Offerer"
+                 attribute: "name"
+                 condition:
+                    operator: "not in"
+                    comparated:
+                      - "Structure de confiance"
+               - model: "Offer"
+                 attribute: "max_price"
+                 condition:
+                    operator: ">"
+                    comparated: 100
+            - name: "check collective stock price"
+              factor: 0.7
+              conditions:
+               - model: "CollectiveStock"
+                 attribute: "price"
+                 condition:
+                    operator: ">="
+                    comparated: 1000
+        """
+
+
+class OfferValidationProgramTest:
+    def _build_offers(self):
+        trusted = offerers_factories.OffererFactory(name="Structure de confiance")
+        venue = offerers_factories.VenueFactory(managingOfferer__siren="123456789", siret="12345678900011")
+        offers = [
+            offers_factories.OfferFactory(name="A suspicious offer"),
+            offers_factories.OfferFactory(name="Offre ete", venue=venue),
+            offers_factories.OfferFactory(name="Offre de confiance", venue__managingOfferer=trusted),
+            offers_factories.OfferFactory(name="Offre normale"),
+            offers_factories.StockFactory(price=150, offer__name="Offre chère").offer,
+            offers_factories.StockFactory(price=150, offer__venue__managingOfferer=trusted).offer,
+            educational_factories.CollectiveStockFactory(
+                price=1500, collectiveOffer__name="Une offre douteuse"
+            ).collectiveOffer,
+            educational_factories.CollectiveStockFactory(price=10, collectiveOffer__venue=venue).collectiveOffer,
+            educational_factories.CollectiveOfferTemplateFactory(name="Une offre douteuse"),
+            educational_factories.CollectiveOfferTemplateFactory(venue=venue),
+        ]
+        return offers
+
+    def test_scores(self):
+        offers = self._build_offers()
+        config = offers_api.import_offer_validation_config(FULL_OFFER_VALIDATION_CONFIG)
+
+        program = offer_validation.compile_offer_validation_config(config)
+
+        assert program.minimum_score == 0.6
+        scores = [program.score(offer) for offer in offers]
+        assert scores == [0.5, 0.05, 1.0, 1.0, 0.8, 1.0, 0.35, 0.1, 1.0, 0.1]
+        assert program.score_many(offers[:2]) == {offers[0].id: 0.5, offers[1].id: 0.05}
+
+    def test_program_is_cached_until_a_new_config_is_imported(self):
+        assert offer_validation.get_offer_validation_program() is None
+
         offers_api.import_offer_validation_config(SIMPLE_OFFER_VALIDATION_CONFIG)
-        offer = educational_factories.CollectiveOfferTemplateFactory()
-        config = offers_repository.get_current_offer_validation_config()
-        minimum_score, rule_items = parse_offer_validation_config(offer, config)
-        assert len(rule_items) == 1
-        assert minimum_score == 0.6
-        assert len(rule_items[0].offer_validation_items) == 1
-        assert rule_items[0].offer_validation_items[0].model == offer
-        assert rule_items[0].offer_validation_items[0].condition["comparated"] == ["templates ?"]
-
-    def test_parse_collective_offer_validation_config(self):
+        program = offer_validation.get_offer_validation_program()
+        with assert_num_queries(1):  # id of the current config
+            assert offer_validation.get_offer_validation_program() is program
+
+        config = offers_api.import_offer_validation_config(FULL_OFFER_VALIDATION_CONFIG)
+        new_program = offer_validation.get_offer_validation_program()
+        assert new_program is not program
+        assert new_program.config_id == config.id
+
+    def test_program_is_recompiled_when_another_process_imports_a_config(self):
         offers_api.import_offer_validation_config(SIMPLE_OFFER_VALIDATION_CONFIG)
-        offer = educational_factories.CollectiveOfferFactory()
-        config = offers_repository.get_current_offer_validation_config()
-        minimum_score, rule_items = parse_offer_validation_config(offer, config)
-        assert len(rule_items) == 1
-        assert minimum_score == 0.6
-        assert len(rule_items[0].offer_validation_items) == 1
-        assert rule_items[0].offer_validation_items[0].model == offer
-        assert rule_items[0].offer_validation_items[0].condition["comparated"] == ["collective offer ?"]
+        program = offer_validation.get_offer_validation_program()
+
+        # Like `import_offer_validation_config()` from another process,
+        # which does not clear the cache of this one.
+        config = offers_models.OfferValidationConfig(specs=yaml.safe_load(FULL_OFFER_VALIDATION_CONFIG))
+        repository.save(config)
+
+        assert offer_validation.get_offer_validation_program().config_id == config.id != program.config_id
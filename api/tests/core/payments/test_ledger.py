@@ -0,0 +1,114 @@
+from decimal import Decimal
+
+import pytest
+
+from pcapi.core.bookings import api as bookings_api
+import pcapi.core.bookings.factories as bookings_factories
+from pcapi.core.bookings.models import Booking
+from pcapi.core.bookings.models import BookingStatus
+from pcapi.core.categories import subcategories
+from pcapi.core.payments import ledger
+from pcapi.core.payments import models
+import pcapi.core.users.factories as users_factories
+from pcapi.models import db
+from pcapi.scripts.booking.handle_expired_bookings import cancel_expired_bookings
+from pcapi.scripts.payment.reconcile_deposit_spendings import reconcile_deposit_spendings
+
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+
+def _get_stored_spendings(deposit):
+    db.session.refresh(deposit)
+    return ledger.get_deposit_spendings(deposit)
+
+
+class LedgerTest:
+    def test_booking_updates_spendings(self):
+        user = users_factories.BeneficiaryGrant18Factory(deposit__version=1, deposit__amount=500)
+
+        bookings_factories.IndividualBookingFactory(
+            individualBooking__user=user,
+            amount=10,
+            quantity=2,
+            stock__offer__subcategoryId=subcategories.SEANCE_CINE.id,
+        )
+        bookings_factories.IndividualBookingFactory(
+            individualBooking__user=user,
+            amount=30,
+            stock__offer__subcategoryId=subcategories.JEU_EN_LIGNE.id,
+            stock__offer__url="http://on.line",
+        )
+        bookings_factories.IndividualBookingFactory(
+            individualBooking__user=user,
+            amount=40,
+            stock__offer__subcategoryId=subcategories.JEU_SUPPORT_PHYSIQUE.id,
+        )
+        bookings_factories.CancelledIndividualBookingFactory(
+            individualBooking__user=user,
+            amount=100,
+            stock__offer__subcategoryId=subcategories.JEU_SUPPORT_PHYSIQUE.id,
+        )
+
+        assert _get_stored_spendings(user.deposit) == ledger.Spendings(
+            total=Decimal(90), digital=Decimal(30), physical=Decimal(40)
+        )
+        assert user.wallet_balance == 410
+
+    def test_cancellation_and_uncancellation(self):
+        booking = bookings_factories.IndividualBookingFactory(
+            amount=20,
+            stock__offer__subcategoryId=subcategories.JEU_SUPPORT_PHYSIQUE.id,
+        )
+        deposit = booking.individualBooking.deposit
+
+        bookings_api.cancel_booking_by_beneficiary(booking.individualBooking.user, booking)
+        assert _get_stored_spendings(deposit) == ledger.Spendings()
+
+        bookings_api.mark_as_used_with_uncancelling(booking)
+        assert booking.status == BookingStatus.USED
+        assert _get_stored_spendings(deposit) == ledger.Spendings(total=Decimal(20))
+
+    def test_status_set_without_being_loaded(self):
+        booking = bookings_factories.IndividualBookingFactory(amount=20)
+        deposit = booking.individualBooking.deposit
+        db.session.expire(booking)
+
+        booking.status = BookingStatus.CANCELLED
+        db.session.commit()
+
+        assert _get_stored_spendings(deposit) == ledger.Spendings()
+
+    def test_deletion(self):
+        booking = bookings_factories.IndividualBookingFactory(amount=20)
+        deposit = booking.individualBooking.deposit
+
+        db.session.delete(booking)
+        db.session.commit()
+
+        assert _get_stored_spendings(deposit) == ledger.Spendings()
+
+    def test_bulk_cancellation_of_expired_bookings(self):
+        booking = bookings_factories.IndividualBookingFactory(amount=20)
+        deposit = booking.individualBooking.deposit
+
+        cancel_expired_bookings(Booking.query.filter_by(id=booking.id))
+
+        assert booking.status == BookingStatus.CANCELLED
+        assert _get_stored_spendings(deposit) == ledger.Spendings()
+
+
+class ReconcileDepositSpendingsTest:
+    def test_detect_and_fix_mismatches(self):
+        booking = bookings_factories.IndividualBookingFactory(amount=20)
+        deposit = booking.individualBooking.deposit
+        bookings_factories.IndividualBookingFactory()  # another deposit, that matches
+        models.Deposit.query.filter_by(id=deposit.id).update({"spentAmount": 0}, synchronize_session=False)
+        db.session.commit()
+
+        assert reconcile_deposit_spendings(batch_size=1) == [deposit.id]
+        assert _get_stored_spendings(deposit).total == 0
+
+        assert reconcile_deposit_spendings(batch_size=1, fix=True) == [deposit.id]
+        assert _get_stored_spendings(deposit).total == 20
+        assert reconcile_deposit_spendings() == []
@@ -313,21 +313,55 @@ class SynchronizeStocksTest:
             ),
         ]
 
+        spec.append(
+            StockDetail(  # existing and unchanged, must be ignored
+                offers_provider_reference="offer_ref5",
+                available_quantity=4,
+                price=12.3,
+                products_provider_reference="product_ref5",
+                stocks_provider_reference="stock_ref5",
+                venue_reference="venue_ref5",
+            )
+        )
+
         stocks_by_provider_reference = {
-            "stock_ref1": {"id": 1, "booking_quantity": 3, "price": 18.0, "quantity": 2},
-            "stock_ref4": {"id": 2, "booking_quantity": 3, "price": 18.0, "quantity": 2},
+            "stock_ref1": {
+                "id": 1,
+                "booking_quantity": 3,
+                "price": 18.0,
+                "quantity": 2,
+                "raw_provider_quantity": 2,
+                "last_provider_id": 1,
+            },
+            "stock_ref4": {
+                "id": 2,
+                "booking_quantity": 3,
+                "price": 18.0,
+                "quantity": 2,
+                "raw_provider_quantity": 2,
+                "last_provider_id": 1,
+            },
+            "stock_ref5": {
+                "id": 3,
+                "booking_quantity": 1,
+                "price": Decimal("12.30"),
+                "quantity": 5,
+                "raw_provider_quantity": 4,
+                "last_provider_id": 1,
+            },
         }
-        offers_by_provider_reference = {"offer_ref1": 123, "offer_ref2": 134, "offer_ref4": 123}
+        offers_by_provider_reference = {"offer_ref1": 123, "offer_ref2": 134, "offer_ref4": 123, "offer_ref5": 145}
         products_by_provider_reference = {
             "product_ref1": offers_models.Product(extraData={"prix_livre": 7.01}),
             "product_ref2": offers_models.Product(extraData={"prix_livre": 9.02}),
             "product_ref3": offers_models.Product(extraData={"prix_livre": 11.03}),
             "product_ref4": offers_models.Product(extraData={"prix_livre": 7.01}),
+            "product_ref5": offers_models.Product(extraData={"prix_livre": 12.3}),
         }
         provider_id = 1
 
         # When
-        update_stock_mapping, new_stocks, offer_ids = api._get_stocks_to_upsert(
+        update_stock_mapping, new_stocks, offer_ids, unchanged_stocks_count = api._get_stocks_to_upsert(
             spec,
             stocks_by_provider_reference,
             offers_by_provider_reference,
@@ -361,6 +395,34 @@ class SynchronizeStocksTest:
         assert new_stock.lastProviderId == 1
 
         assert offer_ids == set([123, 134])
+        assert unchanged_stocks_count == 1
+
+    @pytest.mark.usefixtures("db_session")
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_do_not_write_unchanged_stocks(self, mock_async_index_offer_ids):
+        venue = offerers_factories.VenueFactory()
+        siret = venue.siret
+        provider = providers_factories.ProviderFactory()
+        spec = [{"ref": "3010000101789", "available": 6}, {"ref": "3010000101797", "available": 4}]
+        stock = create_stock(spec[0]["ref"], siret, venue, quantity=20)
+        create_stock(spec[1]["ref"], siret, venue, quantity=20)
+        stock_details = synchronize_provider_api._build_stock_details_from_raw_stocks(spec, siret, provider, venue.id)
+        api.synchronize_stocks(stock_details, venue, provider_id=provider.id)
+        mock_async_index_offer_ids.reset_mock()
+
+        spec[1]["available"] = 3
+        stock_details = synchronize_provider_api._build_stock_details_from_raw_stocks(spec, siret, provider, venue.id)
+        operations = api.synchronize_stocks(stock_details, venue, provider_id=provider.id)
+
+        assert operations == {
+            "new_offers": 0,
+            "updated_offers": 0,
+            "new_stocks": 0,
+            "updated_stocks": 1,
+            "unchanged_stocks": 1,
+        }
+        assert stock.quantity == 6
+        mock_async_index_offer_ids.assert_called_once_with(set())
 
     @pytest.mark.parametrize(
         "new_quantity,new_price,existing_stock,expected_result",
@@ -99,9 +99,12 @@ class ReindexOfferIdsTest:
         offer_ids = [make_bookable_offer().id for _ in range(3)]
 
         # 1: get offers
-        # 2. get FF
-        # 3. get the offers's venue id
-        with assert_num_queries(3):
+        # 2. get stocks
+        # 3. get mediations
+        # 4. get tags
+        # 5. get FF
+        # 6. get the offers's venue id
+        with assert_num_queries(6):
             search.reindex_offer_ids(offer_ids)
 
     def test_unindex_unbookable_offer(self, app):
@@ -216,6 +219,47 @@ class IndexOffersInQueueTest:
         assert app.redis_client.scard("search:algolia:offer_ids") == 0
 
 
+@override_settings(REDIS_OFFER_IDS_CHUNK_SIZE=3)
+class IndexOffersInQueuePipelinedTest:
+    # A single worker per stage, so that only one thread at a time
+    # uses the database connection of the test transaction.
+    def test_index_and_unindex_offers(self, app):
+        bookable_offers = [make_bookable_offer() for _ in range(4)]
+        unbookable_offer = make_unbookable_offer()
+        search_testing.search_store["offers"][unbookable_offer.id] = "dummy"
+        app.redis_client.hset("indexed_offers", unbookable_offer.id, "")
+        offer_ids = [offer.id for offer in bookable_offers] + [unbookable_offer.id]
+        app.redis_client.sadd("search:algolia:offer_ids", *offer_ids)
+
+        search.index_offers_in_queue(stop_only_when_empty=True, workers=1)
+
+        assert app.redis_client.scard("search:algolia:offer_ids") == 0
+        assert search_testing.search_store["offers"].keys() == {offer.id for offer in bookable_offers}
+
+    @mock.patch("pcapi.core.search.backends.testing.FakeClient.save_objects", fail)
+    def test_handle_indexation_error(self, app):
+        offer = make_bookable_offer()
+        app.redis_client.sadd("search:algolia:offer_ids", offer.id)
+
+        with override_settings(IS_RUNNING_TESTS=False):  # as on prod: don't catch errors
+            search.index_offers_in_queue(workers=1)
+
+        assert offer.id not in search_testing.search_store["offers"]
+        assert app.redis_client.smembers("search:algolia:offer_ids_in_error") == {str(offer.id)}
+
+    @mock.patch("pcapi.core.search._get_offers_to_reindex", fail)
+    def test_requeue_offers_of_failed_chunks(self, app):
+        offer = make_bookable_offer()
+        app.redis_client.sadd("search:algolia:offer_ids", offer.id)
+
+        with override_settings(IS_RUNNING_TESTS=False):  # as on prod: don't catch errors
+            search.index_offers_in_queue(workers=1)
+
+        assert app.redis_client.scard("search:algolia:offer_ids") == 0
+        assert offer.id not in search_testing.search_store["offers"]
+        assert app.redis_client.smembers("search:algolia:offer_ids_in_error") == {str(offer.id)}
+
+
 @override_features(ENABLE_VENUE_STRICT_SEARCH=True)
 def test_unindex_offer_ids(app):
     offer1 = make_bookable_offer()
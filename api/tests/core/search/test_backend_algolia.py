@@ -1,4 +1,3 @@
-import dataclasses
 
 import pytest
 import requests_mock
@@ -7,6 +6,7 @@ import pcapi.core.educational.factories as educational_factories
 import pcapi.core.offerers.factories as offerers_factories
 import pcapi.core.offers.factories as offers_factories
 from pcapi.core.search.backends import algolia
+from pcapi.core.testing import override_settings
 
 
 pytestmark = pytest.mark.usefixtures("db_session")
@@ -16,11 +16,6 @@ def get_backend():
     return algolia.AlgoliaBackend()
 
 
-@dataclasses.dataclass
-class FakeOffer:
-    id: int
-
-
 def test_enqueue_offer_ids(app):
     backend = get_backend()
     backend.enqueue_offer_ids([1])
@@ -164,8 +159,8 @@ def test_count_offers_to_index_from_error_queue(app):
 def test_check_offer_is_indexed(app):
     backend = get_backend()
     app.redis_client.hset("indexed_offers", "1", "")
-    assert backend.check_offer_is_indexed(FakeOffer(id=1))
-    assert not backend.check_offer_is_indexed(FakeOffer(id=2))
+    assert backend.check_offer_is_indexed(1)
+    assert not backend.check_offer_is_indexed(2)
 
 
 def test_enqueue_venue_ids(app):
@@ -316,7 +311,50 @@ def test_index_offers(app):
         posted_json = posted.last_request.json()
         assert posted_json["requests"][0]["action"] == "updateObject"
         assert posted_json["requests"][0]["body"]["objectID"] == offer.id
-    assert backend.check_offer_is_indexed(offer)
+    assert backend.check_offer_is_indexed(offer.id)
+
+
+@pytest.mark.usefixtures("db_session")
+def test_index_offers_skips_unchanged_offers(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    other_offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer])
+        assert posted.call_count == 1
+
+        # Nothing has changed: nothing is sent.
+        backend.index_offers([offer])
+        assert posted.call_count == 1
+
+        # Only send what has changed.
+        offer.name = "Nouveau nom"
+        backend.index_offers([offer, other_offer])
+        assert posted.call_count == 2
+        posted_json = posted.last_request.json()
+        assert {request["body"]["objectID"] for request in posted_json["requests"]} == {offer.id, other_offer.id}
+
+        backend.index_offers([offer, other_offer])
+        assert posted.call_count == 2
+
+        # Unless we force it.
+        backend.index_offers([offer], force=True)
+        assert posted.call_count == 3
+
+    assert backend.get_offer_push_counters() == {"pushed": 4, "skipped": 3}
+
+
+@pytest.mark.usefixtures("db_session")
+@override_settings(ALGOLIA_SKIP_UNCHANGED_OFFERS=False)
+def test_index_offers_without_change_detection(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer])
+        backend.index_offers([offer])
+        assert posted.call_count == 2
 
 
 def test_unindex_offer_ids(app):
@@ -328,7 +366,7 @@ def test_unindex_offer_ids(app):
         posted_json = posted.last_request.json()
         assert posted_json["requests"][0]["action"] == "deleteObject"
         assert posted_json["requests"][0]["body"]["objectID"] == 1
-    assert not backend.check_offer_is_indexed(FakeOffer(id=1))
+    assert not backend.check_offer_is_indexed(1)
 
 
 def test_unindex_all_offers(app):
@@ -338,7 +376,7 @@ def test_unindex_all_offers(app):
         posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/clear", json={})
         backend.unindex_all_offers()
         assert posted.called
-    assert not backend.check_offer_is_indexed(FakeOffer(id=1))
+    assert not backend.check_offer_is_indexed(1)
 
 
 def test_index_venues(app):
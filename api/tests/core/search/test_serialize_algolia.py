@@ -1,5 +1,6 @@
 import datetime
 import decimal
+import json
 
 import pytest
 
@@ -11,6 +12,7 @@ import pcapi.core.offerers.factories as offerers_factories
 import pcapi.core.offerers.models as offerers_models
 import pcapi.core.offers.factories as offers_factories
 from pcapi.core.search.backends import algolia
+from pcapi.core.search.backends import algolia_bulk
 from pcapi.routes.adage_iframe.serialization.offers import OfferAddressType
 from pcapi.utils.human_ids import humanize
 
@@ -129,6 +131,54 @@ def test_serialize_offer_thumb_url():
     assert serialized["offer"]["thumbUrl"] == f"/storage/thumbs/products/{humanize(offer.productId)}"
 
 
+def test_bulk_serialization_matches_serialize_offer():
+    offerer = offerers_factories.OffererFactory()
+    event = offers_factories.EventOfferFactory(
+        venue__managingOfferer=offerer,
+        criteria=[
+            criteria_factories.CriterionFactory(name="zèbre"),
+            criteria_factories.CriterionFactory(name="aardvark"),
+        ],
+        extraData={"visa": "56070", "diffusionVersion": "VO", "stageDirector": "Director"},
+        rankingWeight=3,
+    )
+    for hour in (20, 10, 15):
+        offers_factories.EventStockFactory(
+            offer=event,
+            beginningDatetime=datetime.datetime(2032, 1, 1, hour, 30),
+            price=decimal.Decimal(hour),
+        )
+    offers_factories.EventStockFactory(offer=event, isSoftDeleted=True)
+    offers_factories.EventStockFactory(offer=event, quantity=0)
+    thing = offers_factories.ThingOfferFactory(
+        venue__managingOfferer=offerer,
+        product__thumbCount=1,
+        description="Une description AVEC des mots",
+    )
+    offers_factories.ThingStockFactory(offer=thing, price=0)
+    offers_factories.ThingStockFactory(offer=thing, bookingLimitDatetime=datetime.datetime(2020, 1, 1))
+    with_mediation = offers_factories.ThingOfferFactory(venue__latitude=None, venue__longitude=None)
+    offers_factories.MediationFactory(offer=with_mediation, thumbCount=1)
+    offers_factories.MediationFactory(offer=with_mediation, thumbCount=1, isActive=False)
+    offers_factories.ThingStockFactory(offer=with_mediation)
+    digital = offers_factories.DigitalOfferFactory()
+    offers_factories.StockFactory(offer=digital)
+    without_stock = offers_factories.OfferFactory()
+    inactive_offerer = offers_factories.OfferFactory(venue__managingOfferer__isActive=False)
+    offers_factories.StockFactory(offer=inactive_offerer)
+    offers = [event, thing, with_mediation, digital, without_stock, inactive_offerer]
+
+    expected = {offer.id: algolia.AlgoliaBackend.serialize_offer(offer) for offer in offers}
+    serialized = algolia_bulk.serialize_offer_ids([offer.id for offer in offers] + [0])
+
+    # Compare the JSON output to make sure that types (e.g. Decimal
+    # and float) are the same, not only values.
+    assert json.dumps(serialized, default=str) == json.dumps(expected, default=str)
+    objects, ineligible_ids = algolia_bulk.serialize_offers_eligible_for_search([offer.id for offer in offers] + [0])
+    assert [obj["objectID"] for obj in objects] == [offer.id for offer in offers if offer.is_eligible_for_search]
+    assert ineligible_ids == [offer.id for offer in offers if not offer.is_eligible_for_search]
+
+
 def test_serialize_venue():
     venue = offerers_factories.VenueFactory(
         venueTypeCode=offerers_models.VenueTypeCode.VISUAL_ARTS,
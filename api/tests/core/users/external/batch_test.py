@@ -1,8 +1,15 @@
 from copy import deepcopy
+from unittest.mock import patch
 
 import pytest
+import requests_mock
 
+from pcapi.core.testing import override_features
+from pcapi.core.testing import override_settings
+from pcapi.core.users.external import batch
 from pcapi.core.users.external.batch import format_user_attributes
+from pcapi.notifications.push import testing as push_testing
+from pcapi.utils.requests import ExternalAPIException
 
 from . import common_user_attributes
 
@@ -56,3 +63,102 @@ class FormatUserAttributesTest:
 
         assert formatted_attributes["date(u.last_booking_date)"] == None
         assert "ut.booking_categories" not in formatted_attributes
+
+
+class UserAttributesQueueTest:
+    @override_features(BATCH_COALESCE_USER_ATTRIBUTES_UPDATES=True)
+    def test_update_user_attributes_is_queued(self):
+        batch.update_user_attributes(1, common_user_attributes)
+
+        assert push_testing.requests == []
+        assert batch.get_user_attributes_queue_metrics()["pending"] == 1
+
+    @override_features(BATCH_COALESCE_USER_ATTRIBUTES_UPDATES=False)
+    def test_update_user_attributes_is_sent_right_away(self):
+        batch.update_user_attributes(1, common_user_attributes)
+
+        assert len(push_testing.requests) == 2  # Android and iOS
+        assert batch.get_user_attributes_queue_metrics()["pending"] == 0
+
+    def test_coalesce_and_flush(self):
+        for user_id in range(1, 6):
+            for version in range(3):
+                batch.enqueue_user_attributes(user_id, {"u.version": version})
+
+        sent = batch.flush_user_attributes_queue(batch_size=2)
+
+        assert sent == 5
+        # 3 flushes of at most 2 users, instead of 15 updates
+        assert [[user.user_id for user in users_data] for users_data in push_testing.requests] == [
+            ["1", "2"],
+            ["3", "4"],
+            ["5"],
+        ]
+        assert all(user.attributes == {"u.version": 2} for users_data in push_testing.requests for user in users_data)
+        metrics = batch.get_user_attributes_queue_metrics()
+        assert metrics["enqueued"] == 15
+        assert metrics["flushed"] == 5
+        assert metrics["flushes"] == 3
+        assert metrics["pending"] == 0
+        assert metrics["coalescing_ratio"] == 3
+        assert metrics["mean_latency"] >= 0
+
+        assert batch.flush_user_attributes_queue() == 0
+
+    def test_user_keeps_its_place_in_queue(self):
+        batch.enqueue_user_attributes(1, {"u.version": 0})
+        batch.enqueue_user_attributes(2, {"u.version": 0})
+        batch.enqueue_user_attributes(1, {"u.version": 1})
+
+        batch.flush_user_attributes_queue(batch_size=1)
+
+        assert [users_data[0] for users_data in push_testing.requests] == [
+            batch.UserUpdateData(user_id="1", attributes={"u.version": 1}),
+            batch.UserUpdateData(user_id="2", attributes={"u.version": 0}),
+        ]
+
+    def test_requeue_on_error(self):
+        batch.enqueue_user_attributes(1, {"u.version": 0})
+        batch.enqueue_user_attributes(2, {"u.version": 0})
+
+        with patch(
+            "pcapi.core.users.external.batch.update_users_attributes",
+            side_effect=ExternalAPIException(is_retryable=True),
+        ):
+            sent = batch.flush_user_attributes_queue()
+
+        assert sent == 0
+        assert batch.get_user_attributes_queue_metrics()["pending"] == 2
+
+        assert batch.flush_user_attributes_queue() == 2
+        assert len(push_testing.requests) == 1
+
+    def test_send_by_tasks_on_non_retryable_error(self):
+        batch.enqueue_user_attributes(1, {"u.version": 0})
+        batch.enqueue_user_attributes(2, {"u.version": 0})
+
+        with patch(
+            "pcapi.core.users.external.batch.update_users_attributes",
+            side_effect=ExternalAPIException(is_retryable=False),
+        ):
+            sent = batch.flush_user_attributes_queue()
+
+        assert sent == 0
+        assert batch.get_user_attributes_queue_metrics()["pending"] == 0
+        # One request per user and per platform
+        assert sorted(request["user_id"] for request in push_testing.requests) == [1, 1, 2, 2]
+
+    @override_settings(PUSH_NOTIFICATION_BACKEND="pcapi.notifications.push.backends.batch.BatchBackend")
+    def test_requeue_on_batch_server_error(self):
+        batch.enqueue_user_attributes(1, {"u.version": 0})
+        batch.enqueue_user_attributes(2, {"u.version": 0})
+
+        with requests_mock.Mocker() as mock:
+            android = mock.post("https://api.batch.com/1.0/fake_android_api_key/data/users/", status_code=500)
+            ios = mock.post("https://api.batch.com/1.0/fake_ios_api_key/data/users/", status_code=500)
+            sent = batch.flush_user_attributes_queue()
+
+        assert sent == 0
+        assert batch.get_user_attributes_queue_metrics()["pending"] == 2
+        # Neither retried synchronously, nor sent by tasks
+        assert android.call_count + ios.call_count == 1
@@ -11,27 +11,33 @@ from pcapi.core.bookings.models import BookingStatus
 from pcapi.core.categories import subcategories
 from pcapi.core.fraud import factories as fraud_factories
 from pcapi.core.fraud import models as fraud_models
+from pcapi.core.offerers.factories import UserOffererFactory
 from pcapi.core.offers.factories import OfferFactory
 from pcapi.core.payments.conf import GRANTED_DEPOSIT_AMOUNT_17
 from pcapi.core.testing import assert_num_queries
+from pcapi.core.testing import override_features
 from pcapi.core.users import testing as sendinblue_testing
 from pcapi.core.users.external import BookingsAttributes
 from pcapi.core.users.external import TRACKED_PRODUCT_IDS
 from pcapi.core.users.external import _get_bookings_categories_and_subcategories
 from pcapi.core.users.external import _get_user_bookings
+from pcapi.core.users.external import get_bulk_user_attributes
 from pcapi.core.users.external import get_user_attributes
 from pcapi.core.users.external import update_external_user
 from pcapi.core.users.external.models import UserAttributes
 from pcapi.core.users.factories import BeneficiaryGrant18Factory
+from pcapi.core.users.factories import FavoriteFactory
 from pcapi.core.users.factories import ProFactory
 from pcapi.core.users.factories import UnderageBeneficiaryFactory
 from pcapi.core.users.factories import UserFactory
+from pcapi.core.users.factories import UserSuspensionByFraudFactory
 from pcapi.core.users.models import Credit
 from pcapi.core.users.models import DomainsCredit
 from pcapi.core.users.models import EligibilityType
 from pcapi.core.users.models import PhoneValidationStatusType
 from pcapi.core.users.models import User
 from pcapi.core.users.models import UserRole
+from pcapi.models import db
 from pcapi.notifications.push import testing as batch_testing
 
 
@@ -476,3 +482,96 @@ def test_get_bookings_categories_and_subcategories_most_booked_on_count():
     assert set(booking_attributes.booking_categories) == {"FILM", "CINEMA"}
     assert set(booking_attributes.booking_subcategories) == {"SUPPORT_PHYSIQUE_FILM", "CINE_PLEIN_AIR"}
     assert booking_attributes.most_booked_subcategory == "CINE_PLEIN_AIR"
+
+
+def _create_users_of_all_kinds() -> list[User]:
+    beneficiary = BeneficiaryGrant18Factory(notificationSubscriptions={"marketing_push": False})
+    offer = OfferFactory(product__id=list(TRACKED_PRODUCT_IDS.keys())[0])
+    IndividualBookingFactory(individualBooking__user=beneficiary, stock__offer=offer, dateUsed=datetime.utcnow())
+    IndividualBookingFactory(
+        individualBooking__user=beneficiary, stock__offer__subcategoryId=subcategories.CINE_PLEIN_AIR.id
+    )
+    CancelledIndividualBookingFactory(individualBooking__user=beneficiary)
+    FavoriteFactory.create_batch(2, user=beneficiary)
+
+    with freeze_time(datetime.utcnow() - relativedelta(months=6)):
+        underage = UnderageBeneficiaryFactory(subscription_age=17)
+    IndividualBookingFactory(individualBooking__user=underage, amount=GRANTED_DEPOSIT_AMOUNT_17)
+    with freeze_time(datetime.utcnow() - relativedelta(years=2)):
+        former_underage = UnderageBeneficiaryFactory(subscription_age=17)
+    with freeze_time(datetime.utcnow() - relativedelta(years=3)):
+        expired = BeneficiaryGrant18Factory()
+
+    eligible = UserFactory(dateOfBirth=datetime.utcnow() - relativedelta(years=18, months=1))
+    fraud_factories.BeneficiaryFraudCheckFactory(
+        user=eligible, type=fraud_models.FraudCheckType.UBBLE, status=fraud_models.FraudCheckStatus.PENDING
+    )
+    suspended = UserSuspensionByFraudFactory().user
+    # Not a pro, but attached to an offerer
+    attached_to_offerer = UserFactory(dateOfBirth=datetime.utcnow() - relativedelta(years=18))
+    UserOffererFactory(user=attached_to_offerer)
+    FavoriteFactory(user=attached_to_offerer)
+    pro = ProFactory()
+    without_anything = UserFactory()
+
+    return [
+        beneficiary,
+        underage,
+        former_underage,
+        expired,
+        eligible,
+        suspended,
+        attached_to_offerer,
+        pro,
+        without_anything,
+    ]
+
+
+@pytest.mark.parametrize("use_deposit_ledger", [False, True])
+def test_get_bulk_user_attributes_is_the_same_as_get_user_attributes(use_deposit_ledger):
+    users = _create_users_of_all_kinds()
+    user_ids = [user.id for user in users]
+
+    with override_features(USE_DEPOSIT_LEDGER=use_deposit_ledger):
+        db.session.expunge_all()
+        expected = {user_id: get_user_attributes(User.query.get(user_id)) for user_id in user_ids}
+        db.session.expunge_all()
+        attributes = get_bulk_user_attributes(user_ids + [0])
+
+    assert attributes == expected
+
+
+def test_get_bulk_user_attributes_number_of_queries():
+    users = _create_users_of_all_kinds()
+    user_ids = [user.id for user in users]
+
+    n_query_get_users = 1
+    n_query_get_deposits = 1
+    n_query_get_fraud_checks = 1
+    n_query_get_suspensions = 1
+    n_query_is_pro = 1
+    n_query_get_bookings = 1
+    n_query_get_last_favorites = 1
+    n_query_get_wallet_balances = 1
+
+    with override_features(USE_DEPOSIT_LEDGER=False):
+        get_bulk_user_attributes(user_ids)  # warm up feature flags cache
+        db.session.expunge_all()
+        with assert_num_queries(
+            n_query_get_users
+            + n_query_get_deposits
+            + n_query_get_fraud_checks
+            + n_query_get_suspensions
+            + n_query_is_pro
+            + n_query_get_bookings
+            + n_query_get_last_favorites
+            + n_query_get_wallet_balances
+        ):
+            attributes = get_bulk_user_attributes(user_ids)
+
+    assert set(attributes) == set(user_ids)
+
+
+def test_get_bulk_user_attributes_no_user():
+    with assert_num_queries(0):
+        assert get_bulk_user_attributes([]) == {}
@@ -3,12 +3,16 @@ from datetime import datetime
 from unittest.mock import patch
 
 from dateutil.relativedelta import relativedelta
+from flask import current_app
 from freezegun import freeze_time
 import pytest
 from sib_api_v3_sdk import RequestContactImport
+from sib_api_v3_sdk.rest import ApiException as SendinblueApiException
 
 from pcapi import settings
 import pcapi.core.bookings.factories as bookings_factories
+from pcapi.core.testing import override_features
+from pcapi.core.testing import override_settings
 from pcapi.core.users.external import user_automations
 import pcapi.core.users.factories as users_factories
 from pcapi.core.users.models import User
@@ -414,3 +418,62 @@ class UserAutomationsTest:
 
         assert mock_update_batch.call_args.args[0] == user.id
         assert mock_update_batch.call_args.args[1].is_former_beneficiary is True
+
+
+@pytest.mark.usefixtures("db_session")
+class AddUsersToListTest:
+    def _get_imported_emails(self, mock_import_contacts):
+        return [
+            email for call in mock_import_contacts.call_args_list for email in call.args[0].file_body.split("\n")[1:]
+        ]
+
+    @override_settings(SENDINBLUE_AUTOMATION_CHUNK_SIZE=2, SENDINBLUE_AUTOMATION_WORKERS=2)
+    @patch("pcapi.core.users.external.sendinblue.sib_api_v3_sdk.api.contacts_api.ContactsApi.import_contacts")
+    def test_add_users_by_chunks(self, mock_import_contacts):
+        users = users_factories.UserFactory.create_batch(5)
+        users_factories.ProFactory()
+
+        result = user_automations.add_users_to_list("test", user_automations.get_young_users_query(), 42)
+
+        assert result is True
+        assert mock_import_contacts.call_count == 3
+        assert sorted(self._get_imported_emails(mock_import_contacts)) == sorted(user.email for user in users)
+        assert {call.args[0].notify_url for call in mock_import_contacts.call_args_list} == {
+            f"{settings.API_URL}/webhooks/sendinblue/importcontacts/42/{iteration}" for iteration in (1, 2, 3)
+        }
+        assert not current_app.redis_client.exists(user_automations._get_checkpoint_key("test"))
+
+    @override_settings(SENDINBLUE_AUTOMATION_CHUNK_SIZE=2, SENDINBLUE_AUTOMATION_WORKERS=1)
+    @patch("pcapi.core.users.external.sendinblue.sib_api_v3_sdk.api.contacts_api.ContactsApi.import_contacts")
+    def test_resume_after_failure(self, mock_import_contacts):
+        users = sorted(users_factories.UserFactory.create_batch(5), key=lambda user: user.id)
+        mock_import_contacts.side_effect = [None, SendinblueApiException(status=500)]
+
+        result = user_automations.add_users_to_list("test", user_automations.get_young_users_query(), 42)
+
+        assert result is False
+        assert int(current_app.redis_client.get(user_automations._get_checkpoint_key("test"))) == users[1].id
+
+        mock_import_contacts.reset_mock(side_effect=True)
+        result = user_automations.add_users_to_list("test", user_automations.get_young_users_query(), 42)
+
+        assert result is True
+        assert self._get_imported_emails(mock_import_contacts) == [user.email for user in users[2:]]
+        assert not current_app.redis_client.exists(user_automations._get_checkpoint_key("test"))
+
+    @pytest.mark.parametrize("use_deposit_ledger", [False, True])
+    def test_get_users_ex_beneficiary_with_spent_credit(self, use_deposit_ledger):
+        spent_all = users_factories.BeneficiaryGrant18Factory()
+        bookings_factories.IndividualBookingFactory(individualBooking__user=spent_all, amount=spent_all.deposit.amount)
+        spent_some = users_factories.BeneficiaryGrant18Factory()
+        bookings_factories.IndividualBookingFactory(individualBooking__user=spent_some, amount=10)
+        cancelled = users_factories.BeneficiaryGrant18Factory()
+        bookings_factories.CancelledIndividualBookingFactory(
+            individualBooking__user=cancelled, amount=cancelled.deposit.amount
+        )
+        users_factories.BeneficiaryGrant18Factory()
+
+        with override_features(USE_DEPOSIT_LEDGER=use_deposit_ledger):
+            results = list(user_automations.get_users_ex_beneficiary())
+
+        assert [user.email for user in results] == [spent_all.email]
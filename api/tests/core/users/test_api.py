@@ -574,7 +574,8 @@ class UpdateUserInfoTest:
 
 @pytest.mark.usefixtures("db_session")
 class DomainsCreditTest:
-    def test_get_domains_credit_v1(self):
+    @pytest.mark.parametrize("use_deposit_ledger", [False, True])
+    def test_get_domains_credit_v1(self, use_deposit_ledger):
         user = users_factories.BeneficiaryGrant18Factory(deposit__version=1, deposit__amount=500)
 
         # booking only in all domains
@@ -611,11 +612,12 @@ class DomainsCreditTest:
             stock__offer__subcategoryId=subcategories.JEU_SUPPORT_PHYSIQUE.id,
         )
 
-        assert users_api.get_domains_credit(user) == users_models.DomainsCredit(
-            all=users_models.Credit(initial=Decimal(500), remaining=Decimal(215)),
-            digital=users_models.Credit(initial=Decimal(200), remaining=Decimal(120)),
-            physical=users_models.Credit(initial=Decimal(200), remaining=Decimal(50)),
-        )
+        with override_features(USE_DEPOSIT_LEDGER=use_deposit_ledger):
+            assert users_api.get_domains_credit(user) == users_models.DomainsCredit(
+                all=users_models.Credit(initial=Decimal(500), remaining=Decimal(215)),
+                digital=users_models.Credit(initial=Decimal(200), remaining=Decimal(120)),
+                physical=users_models.Credit(initial=Decimal(200), remaining=Decimal(50)),
+            )
 
     def test_get_domains_credit(self):
         user = users_factories.BeneficiaryGrant18Factory()
@@ -633,7 +635,8 @@ class DomainsCreditTest:
             physical=None,
         )
 
-    def test_get_domains_credit_deposit_expired(self):
+    @pytest.mark.parametrize("use_deposit_ledger", [False, True])
+    def test_get_domains_credit_deposit_expired(self, use_deposit_ledger):
         user = users_factories.BeneficiaryGrant18Factory()
         bookings_factories.IndividualBookingFactory(
             individualBooking__user=user,
@@ -641,7 +644,8 @@ class DomainsCreditTest:
             stock__offer__subcategoryId=subcategories.JEU_SUPPORT_PHYSIQUE.id,
         )
 
-        with freeze_time(datetime.datetime.utcnow() + relativedelta(years=GRANT_18_VALIDITY_IN_YEARS, days=2)):
+        expired = datetime.datetime.utcnow() + relativedelta(years=GRANT_18_VALIDITY_IN_YEARS, days=2)
+        with override_features(USE_DEPOSIT_LEDGER=use_deposit_ledger), freeze_time(expired):
             assert users_api.get_domains_credit(user) == users_models.DomainsCredit(
                 all=users_models.Credit(initial=Decimal(300), remaining=Decimal(0)),
                 digital=users_models.Credit(initial=Decimal(100), remaining=Decimal(0)),
@@ -678,11 +678,10 @@ class UpdateObjectsTest:
 
     @patch("pcapi.local_providers.allocine.allocine_stocks.get_movie_poster")
     @patch("pcapi.local_providers.allocine.allocine_stocks.get_movies_showtimes")
-    @patch("pcapi.local_providers.allocine.allocine_stocks.AllocineStocks.get_object_thumb")
     @patch("pcapi.settings.ALLOCINE_API_KEY", "token")
     @pytest.mark.usefixtures("db_session")
     def test_should_create_product_with_correct_thumb_and_increase_thumbCount_by_1(
-        self, mock_get_object_thumb, mock_call_allocine_api, mock_api_poster
+        self, mock_call_allocine_api, mock_api_poster
     ):
         # Given
         mock_call_allocine_api.return_value = iter(
@@ -704,7 +703,7 @@ class UpdateObjectsTest:
         )
         file_path = Path(tests.__path__[0]) / "files" / "mouette_portrait.jpg"
         with open(file_path, "rb") as thumb_file:
-            mock_get_object_thumb.return_value = thumb_file.read()
+            mock_api_poster.return_value = thumb_file.read()
 
         offers_factories.ProductFactory(
             name="Test event",
@@ -737,11 +736,10 @@ class UpdateObjectsTest:
 
     @patch("pcapi.local_providers.allocine.allocine_stocks.get_movie_poster")
     @patch("pcapi.local_providers.allocine.allocine_stocks.get_movies_showtimes")
-    @patch("pcapi.local_providers.allocine.allocine_stocks.AllocineStocks.get_object_thumb")
     @patch("pcapi.settings.ALLOCINE_API_KEY", "token")
     @pytest.mark.usefixtures("db_session")
     def test_should_replace_product_thumb_when_product_has_already_one_thumb(
-        self, mock_get_object_thumb, mock_call_allocine_api, mock_api_poster
+        self, mock_call_allocine_api, mock_api_poster
     ):
         # Given
         mock_call_allocine_api.return_value = iter(
@@ -763,7 +761,7 @@ class UpdateObjectsTest:
         )
         file_path = Path(tests.__path__[0]) / "files" / "mouette_portrait.jpg"
         with open(file_path, "rb") as thumb_file:
-            mock_get_object_thumb.return_value = thumb_file.read()
+            mock_api_poster.return_value = thumb_file.read()
 
         offers_factories.ProductFactory(
             name="Test event",
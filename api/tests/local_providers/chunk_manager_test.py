@@ -4,6 +4,7 @@ import pcapi.core.offerers.factories as offerers_factories
 import pcapi.core.offers.factories as offers_factories
 from pcapi.core.offers.models import Offer
 from pcapi.core.offers.models import Stock
+from pcapi.core.testing import override_features
 from pcapi.local_providers.chunk_manager import save_chunks
 from pcapi.models import db
 
@@ -11,6 +12,12 @@ from pcapi.models import db
 pytestmark = pytest.mark.usefixtures("db_session")
 
 
+@pytest.fixture(autouse=True, params=[False, True], ids=["orm", "copy"])
+def save_providables_with_copy(request, db_session):  # pylint: disable=unused-argument
+    with override_features(SAVE_PROVIDABLES_WITH_COPY=request.param):
+        yield
+
+
 # XXX: These unit tests are too much tied to what happens before
 # `save_chunks()` is called, e.g. how ids are manually set on unsaved
 # objects by peeking at the next sequence number. Tests try (too) hard
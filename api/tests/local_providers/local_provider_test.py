@@ -8,7 +8,6 @@ import pcapi.core.offers.factories as offers_factories
 import pcapi.core.offers.models as offers_models
 import pcapi.core.providers.factories as providers_factories
 import pcapi.core.providers.models as providers_models
-from pcapi.local_providers.local_provider import _save_same_thumb_from_thumb_count_to_index
 from pcapi.local_providers.providable_info import ProvidableInfo
 from pcapi.models.api_errors import ApiErrors
 from pcapi.repository import repository
@@ -170,6 +169,35 @@ class UpdateObjectsTest:
         assert new_product.name == "New Product"
         assert new_product.subcategoryId == subcategories.LIVRE_PAPIER.id
 
+    @patch("pcapi.local_providers.chunk_manager.get_existing_object")
+    @patch("tests.local_providers.provider_test_utils.TestLocalProvider.__next__")
+    def test_looks_up_existing_objects_of_a_block_at_once(self, next_function, get_existing_object):
+        # Given
+        provider = providers_factories.AllocineProviderFactory(localClass="TestLocalProvider")
+        existing_product = offers_factories.ThingProductFactory(
+            dateModifiedAtLastProvider=datetime(2000, 1, 1),
+            lastProvider=provider,
+            idAtProviders="1",
+            name="Old product name",
+        )
+        providable_infos = [
+            ProvidableInfo(id_at_providers=str(i), date_modified_at_provider=datetime(2018, 1, 1)) for i in range(1, 4)
+        ]
+        local_provider = provider_test_utils.TestLocalProvider()
+        next_function.side_effect = [providable_infos]
+
+        # When
+        local_provider.updateObjects()
+
+        # Then
+        get_existing_object.assert_not_called()
+        products = offers_models.Product.query.order_by(offers_models.Product.idAtProviders).all()
+        assert [product.idAtProviders for product in products] == ["1", "2", "3"]
+        assert all(product.name == "New Product" for product in products)
+        assert products[0].id == existing_product.id
+        assert local_provider.createdObjects == 2
+        assert local_provider.updatedObjects == 1
+
 
 @pytest.mark.usefixtures("db_session")
 class CreateObjectTest:
@@ -295,44 +323,3 @@ class HandleThumbTest:
         assert local_provider.createdThumbs == 4
         assert product.thumbCount == 4
 
-
-@pytest.mark.usefixtures("db_session")
-class SaveThumbFromThumbCountToIndexTest:
-    def test_should_iterate_from_current_thumbCount_to_thumbIndex_when_thumbCount_is_0(self, app):
-        # Given
-        provider = providers_factories.AllocineProviderFactory(localClass="TestLocalProviderWithThumb")
-        providable_info = ProvidableInfo()
-        product = offers_factories.ThingProductFactory(
-            idAtProviders=providable_info.id_at_providers,
-            lastProvider=provider,
-            thumbCount=0,
-        )
-        local_provider = provider_test_utils.TestLocalProviderWithThumb()
-        thumb = local_provider.get_object_thumb()
-
-        # When
-        thumb_index = 4
-        _save_same_thumb_from_thumb_count_to_index(product, thumb_index, thumb)
-        repository.save(product)
-
-        # Then
-        assert product.thumbCount == 4
-
-    def test_should_only_replace_image_at_specific_thumb_index_when_thumbCount_is_superior_to_thumbIndex(self):
-        provider = providers_factories.AllocineProviderFactory(localClass="TestLocalProviderWithThumb")
-        providable_info = ProvidableInfo()
-        product = offers_factories.ThingProductFactory(
-            idAtProviders=providable_info.id_at_providers,
-            lastProvider=provider,
-            thumbCount=4,
-        )
-        local_provider = provider_test_utils.TestLocalProviderWithThumb()
-        thumb = local_provider.get_object_thumb()
-
-        # When
-        thumb_index = 1
-        _save_same_thumb_from_thumb_count_to_index(product, thumb_index, thumb)
-        repository.save(product)
-
-        # Then
-        assert product.thumbCount == 4
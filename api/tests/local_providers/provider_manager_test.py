@@ -10,6 +10,8 @@ from pcapi.core.categories import subcategories
 import pcapi.core.offers.factories as offers_factories
 from pcapi.core.offers.models import Offer
 import pcapi.core.providers.factories as providers_factories
+import pcapi.core.providers.repository as providers_repository
+from pcapi.core.testing import override_settings
 from pcapi.local_providers.provider_manager import synchronize_data_for_provider
 from pcapi.local_providers.provider_manager import synchronize_venue_provider
 from pcapi.local_providers.provider_manager import synchronize_venue_providers_for_provider
@@ -182,6 +184,52 @@ class SynchronizeVenueProvidersForProviderTest:
         assert mock_synchronize_venue_provider.call_count == 2
         assert mock_add_to_synchronization_error_db.call_count == 2
 
+    @pytest.mark.usefixtures("db_session")
+    @override_settings(PROVIDERS_SYNCHRONIZATION_WORKERS=4, PROVIDERS_SYNCHRONIZATION_MAX_WORKERS={"Unknown": 1})
+    @patch("pcapi.local_providers.provider_manager.synchronize_venue_provider")
+    @patch("pcapi.connectors.notion.add_to_synchronization_error_database")
+    def test_concurrent_synchronization(self, mock_add_to_synchronization_error_db, mock_synchronize_venue_provider):
+        provider = providers_factories.ProviderFactory(localClass="Unknown")
+        failing_venue_provider = providers_factories.VenueProviderFactory(provider=provider)
+        venue_provider = providers_factories.VenueProviderFactory(provider=provider)
+
+        def synchronize(venue_provider, limit):
+            if venue_provider.id == failing_venue_provider.id:
+                raise ValueError()
+
+        mock_synchronize_venue_provider.side_effect = synchronize
+
+        durations = synchronize_venue_providers_for_provider(provider.id, 10)
+
+        assert set(durations) == {failing_venue_provider.id, venue_provider.id}
+        assert {call.args[0].id for call in mock_synchronize_venue_provider.call_args_list} == set(durations)
+        assert mock_add_to_synchronization_error_db.call_count == 1
+        assert mock_add_to_synchronization_error_db.call_args.args[1].id == failing_venue_provider.id
+
+    @pytest.mark.usefixtures("db_session")
+    @override_settings(PROVIDERS_SYNCHRONIZATION_WORKERS=4, PROVIDERS_SYNCHRONIZATION_MAX_WORKERS={"Unknown": 1})
+    @patch("pcapi.local_providers.provider_manager.synchronize_venue_provider")
+    def test_concurrent_synchronization_continues_when_lookup_fails(self, mock_synchronize_venue_provider):
+        provider = providers_factories.ProviderFactory(localClass="Unknown")
+        failing_venue_provider = providers_factories.VenueProviderFactory(provider=provider)
+        venue_provider = providers_factories.VenueProviderFactory(provider=provider)
+
+        get_venue_provider_by_id = providers_repository.get_venue_provider_by_id
+
+        def get_venue_provider(venue_provider_id):
+            if venue_provider_id == failing_venue_provider.id:
+                raise ValueError()
+            return get_venue_provider_by_id(venue_provider_id)
+
+        with patch(
+            "pcapi.core.providers.repository.get_venue_provider_by_id",
+            side_effect=get_venue_provider,
+        ):
+            durations = synchronize_venue_providers_for_provider(provider.id, 10)
+
+        assert set(durations) == {failing_venue_provider.id, venue_provider.id}
+        assert [call.args[0].id for call in mock_synchronize_venue_provider.call_args_list] == [venue_provider.id]
+
 
 class SynchronizeDataForProviderTest:
     @patch("pcapi.local_providers.local_provider.LocalProvider.updateObjects")
@@ -0,0 +1,107 @@
+import pathlib
+from unittest import mock
+
+from flask import current_app
+import pytest
+
+import pcapi.core.offers.factories as offers_factories
+from pcapi.local_providers import thumbs_pipeline
+from pcapi.local_providers.thumbs_pipeline import ThumbStatus
+from pcapi.local_providers.thumbs_pipeline import ThumbsPipeline
+from pcapi.utils.human_ids import humanize
+
+import tests
+
+
+IMAGES_DIR = pathlib.Path(tests.__path__[0]) / "files"
+THUMB = (IMAGES_DIR / "mouette_portrait.jpg").read_bytes()
+OTHER_THUMB = (IMAGES_DIR / "mouette_small.jpg").read_bytes()
+
+
+@pytest.mark.usefixtures("db_session")
+@mock.patch("pcapi.core.object_storage.store_public_object")
+class ThumbsPipelineTest:
+    def test_store_new_thumbs(self, mocked_store_public_object):
+        product = offers_factories.ProductFactory(thumbCount=0)
+        pipeline = ThumbsPipeline()
+
+        pipeline.submit(product, 2, lambda: THUMB)
+        [job] = pipeline.collect()
+
+        assert job.status == ThumbStatus.STORED
+        assert product.thumbCount == 2
+        assert [call.kwargs["object_id"] for call in mocked_store_public_object.call_args_list] == [
+            f"products/{humanize(product.id)}",
+            f"products/{humanize(product.id)}_1",
+        ]
+
+    def test_add_thumbs_from_thumb_count_to_index(self, mocked_store_public_object):
+        product = offers_factories.ProductFactory(thumbCount=0)
+        pipeline = ThumbsPipeline()
+
+        pipeline.submit(product, 4, lambda: THUMB)
+        [job] = pipeline.collect()
+
+        assert job.status == ThumbStatus.STORED
+        assert product.thumbCount == 4
+        assert mocked_store_public_object.call_count == 4
+
+    def test_only_replace_thumb_at_index_when_thumb_count_is_greater(self, mocked_store_public_object):
+        product = offers_factories.ProductFactory(thumbCount=4)
+        pipeline = ThumbsPipeline()
+
+        pipeline.submit(product, 1, lambda: THUMB)
+        [job] = pipeline.collect()
+
+        assert job.status == ThumbStatus.STORED
+        assert product.thumbCount == 4
+        assert [call.kwargs["object_id"] for call in mocked_store_public_object.call_args_list] == [
+            f"products/{humanize(product.id)}_1",
+        ]
+
+    def test_skip_unchanged_thumbs(self, mocked_store_public_object):
+        product = offers_factories.ProductFactory(thumbCount=1)
+        pipeline = ThumbsPipeline()
+
+        pipeline.submit(product, 1, lambda: THUMB)
+        pipeline.submit(product, 1, lambda: THUMB)
+        pipeline.submit(product, 1, lambda: OTHER_THUMB)
+        jobs = pipeline.collect()
+
+        assert [job.status for job in jobs] == [ThumbStatus.STORED, ThumbStatus.UNCHANGED, ThumbStatus.STORED]
+        assert mocked_store_public_object.call_count == 2
+        assert product.thumbCount == 1
+        key = thumbs_pipeline.CONTENT_HASH_KEY_PREFIX + f"products/{humanize(product.id)}"
+        assert 0 < current_app.redis_client.ttl(key) <= thumbs_pipeline.CONTENT_HASH_TTL
+
+    def test_restore_thumb_count_on_error(self, mocked_store_public_object):
+        product = offers_factories.ProductFactory(thumbCount=1)
+        pipeline = ThumbsPipeline()
+
+        def load():
+            raise ValueError("Could not download thumb")
+
+        pipeline.submit(product, 3, load)
+        pipeline.submit(product, 2, bytes)
+        jobs = pipeline.collect()
+
+        assert [job.status for job in jobs] == [ThumbStatus.ERROR, ThumbStatus.EMPTY]
+        assert isinstance(jobs[0].error, ValueError)
+        assert product.thumbCount == 1
+        assert mocked_store_public_object.call_count == 0
+
+    def test_concurrent_processing(self, mocked_store_public_object):
+        products = offers_factories.ProductFactory.create_batch(5, thumbCount=0)
+        pipeline = ThumbsPipeline(workers=2, max_pending=2)
+
+        try:
+            for product in products:
+                pipeline.submit(product, 1, lambda: THUMB)
+            jobs = pipeline.collect(wait=True)
+        finally:
+            pipeline.shutdown()
+
+        assert [job.pc_object for job in jobs] == products
+        assert {job.status for job in jobs} == {ThumbStatus.STORED}
+        assert mocked_store_public_object.call_count == 5
+        assert {product.thumbCount for product in products} == {1}
@@ -1,4 +1,5 @@
 from datetime import datetime
+import json
 from unittest.mock import patch
 
 import pytest
@@ -14,6 +15,7 @@ import pcapi.core.providers.factories as providers_factories
 import pcapi.core.providers.models as providers_models
 from pcapi.core.providers.repository import get_provider_by_local_class
 from pcapi.local_providers import TiteLiveThings
+from pcapi.local_providers.titelive_things import titelive_things as titelive_things_module
 from pcapi.model_creators.specific_creators import create_product_with_thing_subcategory
 from pcapi.repository import repository
 
@@ -92,6 +94,35 @@ class TiteliveThingsTest:
         assert product.subcategoryId == subcategories.LIVRE_PAPIER.id
         assert product.extraData.get("isbn") == "9782895026310"
 
+    @pytest.mark.usefixtures("db_session")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.LINES_PER_BLOCK", 2)
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_files_to_process_from_titelive_ftp")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_lines_from_thing_file")
+    def test_create_things_from_blocks_of_lines(
+        self, get_lines_from_thing_file, get_files_to_process_from_titelive_ftp, app
+    ):
+        get_files_to_process_from_titelive_ftp.return_value = ["Quotidien30.tit"]
+        data_line_parts = BASE_DATA_LINE_PARTS[:]
+        data_line_parts[2] = "Nouvelles du Chili, 2e édition"
+        other_line_parts = BASE_DATA_LINE_PARTS[:]
+        other_line_parts[0] = "9782895026327"
+        data_lines = ["~".join(BASE_DATA_LINE_PARTS), "~".join(data_line_parts), "~".join(other_line_parts)]
+        get_lines_from_thing_file.return_value = iter(data_lines)
+        providers_factories.ProviderFactory(localClass="TiteLiveThings")
+        titelive_things = TiteLiveThings()
+
+        # The first block has 2 lines about the same product.
+        assert [info.id_at_providers for info in next(titelive_things)] == ["9782895026310"]
+        assert [info.id_at_providers for info in next(titelive_things)] == ["9782895026327"]
+
+        get_lines_from_thing_file.return_value = iter(data_lines)
+        TiteLiveThings().updateObjects()
+
+        products = offers_models.Product.query.order_by(offers_models.Product.idAtProviders).all()
+        assert [product.idAtProviders for product in products] == ["9782895026310", "9782895026327"]
+        assert products[0].name == "Nouvelles du Chili, 2e édition"
+        assert products[1].name == "nouvelles du Chili"
+
     @pytest.mark.usefixtures("db_session")
     @patch("pcapi.local_providers.titelive_things.titelive_things.get_files_to_process_from_titelive_ftp")
     @patch("pcapi.local_providers.titelive_things.titelive_things.get_lines_from_thing_file")
@@ -149,6 +180,94 @@ class TiteliveThingsTest:
         assert updated_product.name == "nouvelles du Chili"
         assert updated_product.extraData.get("bookFormat") == offers_models.BookFormat.BEAUX_LIVRES.value
 
+    @pytest.mark.usefixtures("db_session")
+    @patch("pcapi.local_providers.local_provider.CHUNK_MAX_SIZE", 1)
+    @patch("pcapi.local_providers.titelive_things.titelive_things.LINES_PER_BLOCK", 1)
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_files_to_process_from_titelive_ftp")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_lines_from_thing_file")
+    def test_save_checkpoint_after_saving_chunks(
+        self, get_lines_from_thing_file, get_files_to_process_from_titelive_ftp, app
+    ):
+        get_files_to_process_from_titelive_ftp.return_value = ["Quotidien30.tit"]
+        data_line = "~".join(BASE_DATA_LINE_PARTS) + "\n"
+
+        def lines():
+            yield data_line
+            raise ConnectionResetError()
+
+        get_lines_from_thing_file.return_value = lines()
+        providers_factories.ProviderFactory(localClass="TiteLiveThings")
+        titelive_things = TiteLiveThings()
+
+        with pytest.raises(ConnectionResetError):
+            titelive_things.updateObjects()
+
+        assert offers_models.Product.query.count() == 1
+        checkpoint = json.loads(app.redis_client.get(titelive_things_module.REDIS_CHECKPOINT))
+        assert checkpoint == {"file": "Quotidien30.tit", "line": 1, "offset": len(data_line)}
+
+    @pytest.mark.usefixtures("db_session")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.LINES_PER_BLOCK", 2)
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_files_to_process_from_titelive_ftp")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_lines_from_thing_file")
+    def test_save_checkpoint_after_blocks_of_unchanged_products(
+        self, get_lines_from_thing_file, get_files_to_process_from_titelive_ftp, app
+    ):
+        get_files_to_process_from_titelive_ftp.return_value = ["Quotidien30.tit"]
+        provider = providers_factories.ProviderFactory(localClass="TiteLiveThings")
+        data_lines = []
+        for ean in ("9782895026001", "9782895026002", "9782895026003", "9782895026004"):
+            ThingProductFactory(
+                idAtProviders=ean, lastProviderId=provider.id, dateModifiedAtLastProvider=datetime(2020, 1, 1)
+            )
+            data_lines.append("~".join([ean] + BASE_DATA_LINE_PARTS[1:]) + "\n")
+        new_data_lines = [
+            "~".join([ean] + BASE_DATA_LINE_PARTS[1:]) + "\n" for ean in ("9782895026005", "9782895026006")
+        ]
+
+        def lines():
+            yield from data_lines + new_data_lines
+            raise ConnectionResetError()
+
+        get_lines_from_thing_file.return_value = lines()
+
+        # Blocks of unchanged products are checkpointed, the block of
+        # new products has not been saved.
+        with pytest.raises(ConnectionResetError):
+            TiteLiveThings().updateObjects()
+
+        assert offers_models.Product.query.count() == 4
+        offset = sum(len(line) for line in data_lines)
+        checkpoint = json.loads(app.redis_client.get(titelive_things_module.REDIS_CHECKPOINT))
+        assert checkpoint == {"file": "Quotidien30.tit", "line": 4, "offset": offset}
+
+        get_lines_from_thing_file.reset_mock()
+        get_lines_from_thing_file.return_value = iter(new_data_lines)
+        TiteLiveThings().updateObjects()
+
+        get_lines_from_thing_file.assert_called_once_with("Quotidien30.tit", offset)
+        assert offers_models.Product.query.count() == 6
+
+    @pytest.mark.usefixtures("db_session")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_files_to_process_from_titelive_ftp")
+    @patch("pcapi.local_providers.titelive_things.titelive_things.get_lines_from_thing_file")
+    def test_resume_file_from_checkpoint(self, get_lines_from_thing_file, get_files_to_process_from_titelive_ftp, app):
+        get_files_to_process_from_titelive_ftp.return_value = ["Quotidien30.tit"]
+        app.redis_client.set(
+            titelive_things_module.REDIS_CHECKPOINT,
+            json.dumps({"file": "Quotidien30.tit", "line": 2, "offset": 1234}),
+        )
+        get_lines_from_thing_file.return_value = iter(["~".join(BASE_DATA_LINE_PARTS)])
+        providers_factories.ProviderFactory(localClass="TiteLiveThings")
+        titelive_things = TiteLiveThings()
+
+        titelive_things.updateObjects()
+
+        get_lines_from_thing_file.assert_called_once_with("Quotidien30.tit", 1234)
+        assert offers_models.Product.query.count() == 1
+        # The file has been fully processed: there is nothing to resume.
+        assert app.redis_client.get(titelive_things_module.REDIS_CHECKPOINT) is None
+
     @pytest.mark.usefixtures("db_session")
     @patch("pcapi.local_providers.titelive_things.titelive_things.get_files_to_process_from_titelive_ftp")
     def test_does_not_create_thing_when_no_files_found(self, get_files_to_process_from_titelive_ftp, app):
@@ -5,11 +5,14 @@ import flask
 import pytest
 
 from pcapi.core.testing import assert_num_queries
+from pcapi.core.testing import override_settings
 from pcapi.models import db
 from pcapi.models.feature import FEATURES_DISABLED_BY_DEFAULT
 from pcapi.models.feature import Feature
 from pcapi.models.feature import FeatureToggle
+from pcapi.models.feature import REDIS_FEATURE_FLAGS_VERSION
 from pcapi.models.feature import install_feature_flags
+from pcapi.models.feature import invalidate_feature_cache
 from pcapi.repository import repository
 
 
@@ -68,6 +71,63 @@ class FeatureToggleTest:
             flask._request_ctx_stack.push(context)
 
 
+@pytest.mark.usefixtures("db_session")
+@override_settings(FEATURE_FLAGS_CACHE_TTL=60)
+class FeatureCacheTest:
+    def setup_method(self):
+        invalidate_feature_cache()
+
+    def _set_active(self, feature_toggle, is_active):
+        Feature.query.filter_by(name=feature_toggle.name).update({"isActive": is_active})
+        db.session.commit()
+
+    def test_load_all_features_at_once_outside_request_context(self, app):
+        context = flask._request_ctx_stack.pop()
+        try:
+            with assert_num_queries(1):
+                FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+                FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+                FeatureToggle.PRICE_BOOKINGS.is_active()
+        finally:
+            flask._request_ctx_stack.push(context)
+
+    def test_invalidate(self, app):
+        self._set_active(FeatureToggle.SYNCHRONIZE_ALLOCINE, True)
+        context = flask._request_ctx_stack.pop()
+        try:
+            assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+            self._set_active(FeatureToggle.SYNCHRONIZE_ALLOCINE, False)
+            assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()  # still cached
+
+            invalidate_feature_cache()
+
+            assert not FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+        finally:
+            flask._request_ctx_stack.push(context)
+
+    def test_reload_when_toggled_by_another_process(self, app):
+        self._set_active(FeatureToggle.SYNCHRONIZE_ALLOCINE, True)
+        context = flask._request_ctx_stack.pop()
+        try:
+            with patch("pcapi.models.feature.time.monotonic", return_value=1000):
+                assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+            self._set_active(FeatureToggle.SYNCHRONIZE_ALLOCINE, False)
+
+            # Cache has expired but no flag has been toggled: no reload.
+            with patch("pcapi.models.feature.time.monotonic", return_value=1100):
+                with assert_num_queries(0):
+                    assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+            # Another process has toggled a flag.
+            app.redis_client.incr(REDIS_FEATURE_FLAGS_VERSION)
+            with patch("pcapi.models.feature.time.monotonic", return_value=1130):
+                assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()  # not expired yet
+            with patch("pcapi.models.feature.time.monotonic", return_value=1200):
+                assert not FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+        finally:
+            flask._request_ctx_stack.push(context)
+
+
 @pytest.mark.usefixtures("db_session")
 class FeatureTest:
     def test_features_installation(self):
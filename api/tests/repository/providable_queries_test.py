@@ -1,7 +1,14 @@
 from datetime import datetime
 
+import pytest
+
+import pcapi.core.offers.factories as offers_factories
+from pcapi.core.offers.models import Offer
+from pcapi.core.offers.models import Product
 from pcapi.core.offers.models import Stock
+from pcapi.repository.providable_queries import get_existing_objects
 from pcapi.repository.providable_queries import get_last_update_for_provider
+from pcapi.repository.providable_queries import insert_chunk_with_copy
 
 
 def test_get_last_update_for_provider_should_return_date_modified_at_last_provider_when_provided():
@@ -46,3 +53,40 @@ def test_get_last_update_for_provider_should_return_none_when_last_provider_id_m
 
     # Then
     assert date_modified_at_last_provider is None
+
+
+@pytest.mark.usefixtures("db_session")
+def test_get_existing_objects():
+    product = offers_factories.ThingProductFactory(idAtProviders="1")
+    offers_factories.ThingProductFactory(idAtProviders="2")
+    offer = offers_factories.OfferFactory(idAtProvider="1")
+
+    assert get_existing_objects(Product, ["1", "3"]) == {"1": product}
+    assert get_existing_objects(Offer, ["1", "2"]) == {"1": offer}
+    assert get_existing_objects(Product, []) == {}
+
+
+@pytest.mark.usefixtures("db_session")
+def test_insert_chunk_with_copy_sets_defaults_and_updates_existing_objects():
+    existing = offers_factories.ThingProductFactory(idAtProviders="1", name="Old name")
+    chunk = {
+        "1|Product": Product(idAtProviders="1", name="New name", subcategoryId=existing.subcategoryId),
+        "2|Product": Product(
+            idAtProviders="2",
+            name='A "quoted\\name"',
+            subcategoryId=existing.subcategoryId,
+            extraData={"isbn": "9782123456789"},
+            mediaUrls=["https://example.com/extract.pdf"],
+        ),
+    }
+
+    insert_chunk_with_copy(chunk)
+
+    products = Product.query.order_by(Product.idAtProviders).all()
+    assert products[0].id == existing.id
+    assert products[0].name == "New name"
+    assert products[1].name == 'A "quoted\\name"'
+    assert products[1].extraData == {"isbn": "9782123456789"}
+    assert products[1].mediaUrls == ["https://example.com/extract.pdf"]
+    assert products[1].isGcuCompatible
+    assert products[1].dateModifiedAtLastProvider is not None
@@ -0,0 +1,132 @@
+from pcapi.core import testing
+import pcapi.core.offerers.factories as offerers_factories
+import pcapi.core.offers.factories as offers_factories
+from pcapi.core.testing import assert_num_queries
+import pcapi.core.users.factories as users_factories
+from pcapi.utils.human_ids import humanize
+
+from tests.conftest import TestClient
+
+
+class Returns200Test:
+    def test_response(self, app, db_session):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.OffererFactory(name="My Offerer")
+        offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
+        venue = offerers_factories.VenueFactory(
+            managingOfferer=offerer, postalCode="97300", name="My Venue", publicName="My public name"
+        )
+        offer = offers_factories.ThingOfferFactory(venue=venue, extraData={"isbn": "123456789"}, name="My Offer")
+        offers_factories.StockFactory(offer=offer, quantity=10, dnBookedQuantity=3)
+        offers_factories.StockFactory(offer=offer, quantity=5)
+        offers_factories.StockFactory(offer=offer, isSoftDeleted=True)
+        offers_factories.MediationFactory(offer=offer, thumbCount=1)
+        client = TestClient(app.test_client()).with_session_auth(email=pro.email)
+
+        with assert_num_queries(testing.AUTHENTICATION_QUERIES + 1):
+            response = client.get("/offers/paginated")
+
+        assert response.status_code == 200
+        assert response.json == {
+            "offers": [
+                {
+                    "hasBookingLimitDatetimesPassed": False,
+                    "id": humanize(offer.id),
+                    "isActive": True,
+                    "isEditable": True,
+                    "isEvent": False,
+                    "isThing": True,
+                    "isSoldOut": False,
+                    "productIsbn": "123456789",
+                    "name": "My Offer",
+                    "status": "ACTIVE",
+                    "stocksCount": 2,
+                    "remainingQuantity": 12,
+                    "thumbUrl": offer.thumbUrl,
+                    "subcategoryId": "SUPPORT_PHYSIQUE_FILM",
+                    "venue": {
+                        "departementCode": "973",
+                        "id": humanize(venue.id),
+                        "isVirtual": False,
+                        "managingOffererId": humanize(offerer.id),
+                        "name": "My Venue",
+                        "offererName": "My Offerer",
+                        "publicName": "My public name",
+                    },
+                    "venueId": humanize(venue.id),
+                    "isShowcase": None,
+                }
+            ],
+            "nextCursor": None,
+        }
+
+    def test_stock_aggregates(self, app, db_session):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.UserOffererFactory(user=pro).offerer
+        unlimited = offers_factories.ThingStockFactory(offer__venue__managingOfferer=offerer, quantity=None).offer
+        offers_factories.ThingStockFactory(offer=unlimited, quantity=2)
+        sold_out = offers_factories.ThingStockFactory(
+            offer__venue__managingOfferer=offerer, quantity=2, dnBookedQuantity=2
+        ).offer
+        without_stock = offers_factories.ThingOfferFactory(venue__managingOfferer=offerer)
+        client = TestClient(app.test_client()).with_session_auth(email=pro.email)
+
+        response = client.get("/offers/paginated")
+
+        assert response.status_code == 200
+        offers = {offer["id"]: offer for offer in response.json["offers"]}
+        assert offers[humanize(unlimited.id)]["remainingQuantity"] == "unlimited"
+        assert offers[humanize(unlimited.id)]["stocksCount"] == 2
+        assert not offers[humanize(unlimited.id)]["isSoldOut"]
+        assert offers[humanize(sold_out.id)]["remainingQuantity"] == 0
+        assert offers[humanize(sold_out.id)]["isSoldOut"]
+        assert offers[humanize(sold_out.id)]["status"] == "SOLD_OUT"
+        assert offers[humanize(without_stock.id)]["remainingQuantity"] == 0
+        assert offers[humanize(without_stock.id)]["stocksCount"] == 0
+        assert offers[humanize(without_stock.id)]["isSoldOut"]
+
+    def test_keyset_pagination(self, app, db_session):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.UserOffererFactory(user=pro).offerer
+        offers = offers_factories.ThingOfferFactory.create_batch(5, venue__managingOfferer=offerer)
+        offers_factories.ThingOfferFactory()  # other offerer
+        expected_ids = [humanize(offer.id) for offer in sorted(offers, key=lambda offer: offer.id, reverse=True)]
+        client = TestClient(app.test_client()).with_session_auth(email=pro.email)
+
+        ids = []
+        cursor = None
+        for _ in range(3):
+            path = "/offers/paginated?limit=2"
+            if cursor:
+                path += f"&afterId={cursor}"
+            with assert_num_queries(testing.AUTHENTICATION_QUERIES + 1):
+                response = client.get(path)
+            assert response.status_code == 200
+            ids += [offer["id"] for offer in response.json["offers"]]
+            cursor = response.json["nextCursor"]
+
+        assert ids == expected_ids
+        assert cursor is None
+
+    def test_filters(self, app, db_session):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.UserOffererFactory(user=pro).offerer
+        offer = offers_factories.ThingOfferFactory(venue__managingOfferer=offerer, name="Le livre")
+        offers_factories.ThingOfferFactory(venue__managingOfferer=offerer, name="Le film")
+        client = TestClient(app.test_client()).with_session_auth(email=pro.email)
+
+        response = client.get("/offers/paginated?nameOrIsbn=livre")
+
+        assert response.status_code == 200
+        assert [offer["id"] for offer in response.json["offers"]] == [humanize(offer.id)]
+
+
+class Returns400Test:
+    def test_limit_is_too_high(self, app, db_session):
+        pro = users_factories.ProFactory()
+        client = TestClient(app.test_client()).with_session_auth(email=pro.email)
+
+        response = client.get("/offers/paginated?limit=1000")
+
+        assert response.status_code == 400
+        assert "limit" in response.json
@@ -0,0 +1,63 @@
+import csv
+from datetime import datetime
+from io import StringIO
+from types import SimpleNamespace
+
+from pcapi.core.educational.models import CollectiveBookingStatus
+from pcapi.routes.serialization import collective_bookings_serialize
+
+from tests.test_utils import FakeExportQuery
+from tests.test_utils import get_peak_memory_of_stream
+
+
+def _build_export_row(index):
+    return SimpleNamespace(
+        venueName="Le lieu",
+        offerName=f"Offre collective {index}",
+        stockBeginningDatetime=datetime(2022, 10, 1, 14, 0),
+        lastName="Doux",
+        firstName="Jeanne",
+        email=f"jeanne.doux{index}@example.com",
+        bookedAt=datetime(2022, 9, 1, 12, 0),
+        usedAt=None,
+        price=120,
+        status=CollectiveBookingStatus.CONFIRMED,
+        isConfirmed=False,
+        reimbursedAt=None,
+        venueDepartmentCode="75",
+    )
+
+
+def _build_export_query(count):
+    return FakeExportQuery(_build_export_row, count)
+
+
+class StreamCollectiveBookingReportTest:
+    def test_csv_memory_does_not_depend_on_number_of_rows(self):
+        stream = collective_bookings_serialize.stream_collective_booking_csv_report(_build_export_query(500_000))
+
+        size, peak = get_peak_memory_of_stream(stream)
+
+        assert size > 50_000_000
+        assert peak < 10_000_000
+
+    def test_excel_memory_does_not_depend_on_number_of_rows(self):
+        # xlsxwriter is much slower than the csv module, hence fewer rows.
+        stream = collective_bookings_serialize.stream_collective_booking_excel_report(_build_export_query(10_000))
+
+        size, peak = get_peak_memory_of_stream(stream)
+
+        assert size > 300_000
+        assert peak < 5_000_000
+
+    def test_stream_is_the_same_as_the_export(self):
+        query = _build_export_query(3)
+
+        streamed = b"".join(collective_bookings_serialize.stream_collective_booking_csv_report(query))
+
+        assert streamed == collective_bookings_serialize.serialize_collective_booking_csv_report(query).encode(
+            "utf-8-sig"
+        )
+        rows = list(csv.reader(StringIO(streamed.decode("utf-8-sig")), delimiter=";"))
+        assert len(rows) == 4
+        assert rows[3][1] == "Offre collective 2"
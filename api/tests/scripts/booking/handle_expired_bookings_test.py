@@ -164,6 +164,10 @@ class CancelExpiredIndividualBookingsTest:
             1  # update booking
             + 1  # select booking stockId
             + 1  # update stock dnBookedQuantity
+            + 1  # select booking depositId
+            + 1  # lock deposits
+            + 1  # select bookings of deposits
+            + 1  # update deposits spent amounts
             + 1  # release savepoint/COMMIT
         )
 
@@ -6,12 +6,16 @@ import pytest
 from pcapi.core.bookings.factories import IndividualBookingFactory
 from pcapi.core.users.external.batch import BATCH_DATETIME_FORMAT
 from pcapi.core.users.factories import BeneficiaryGrant18Factory
+from pcapi.core.users.factories import ProFactory
+from pcapi.core.users.factories import UnderageBeneficiaryFactory
 from pcapi.core.users.factories import UserFactory
 from pcapi.core.users.models import UserRole
 import pcapi.notifications.push.testing as push_testing
 from pcapi.scripts.external_users.batch_update_users_attributes import format_batch_users
 from pcapi.scripts.external_users.batch_update_users_attributes import format_sendinblue_users
+from pcapi.scripts.external_users.batch_update_users_attributes import get_user_ids_chunks
 from pcapi.scripts.external_users.batch_update_users_attributes import get_users_chunks
+from pcapi.scripts.external_users.batch_update_users_attributes import refresh_users_attributes
 from pcapi.scripts.external_users.batch_update_users_attributes import run
 
 
@@ -157,3 +161,46 @@ def test_format_sendinblue_user():
         "VENUE_NAME": None,
         "VENUE_TYPE": None,
     }
+
+
+@pytest.mark.usefixtures("db_session")
+def test_get_user_ids_chunks():
+    users = UserFactory.create_batch(5)
+    ProFactory()
+    underage = UnderageBeneficiaryFactory()
+
+    chunks = list(get_user_ids_chunks(2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2]
+    assert [user_id for chunk in chunks for user_id, _ in chunk] == sorted([user.id for user in users] + [underage.id])
+
+    chunks = list(get_user_ids_chunks(2, min_user_id=users[1].id, max_user_id=users[3].id))
+    assert chunks == [[(users[1].id, users[1].email), (users[2].id, users[2].email)], [(users[3].id, users[3].email)]]
+
+    chunks = list(get_user_ids_chunks(2, role=UserRole.UNDERAGE_BENEFICIARY))
+    assert chunks == [[(underage.id, underage.email)]]
+
+
+@pytest.mark.usefixtures("db_session")
+@patch("pcapi.core.users.external.sendinblue.sib_api_v3_sdk.api.contacts_api.ContactsApi.import_contacts")
+def test_refresh_users_attributes(mock_import_contacts):
+    UserFactory.create_batch(4, notificationSubscriptions={"marketing_push": True})
+    UserFactory(notificationSubscriptions={"marketing_push": False})
+    ProFactory()
+
+    updated = refresh_users_attributes(3)
+
+    assert updated == 5
+    assert len(push_testing.requests) == 2
+    assert sum(len(users_data) for users_data in push_testing.requests) == 4
+    assert len(mock_import_contacts.call_args_list) == 2
+
+
+@pytest.mark.usefixtures("db_session")
+def test_refresh_users_attributes_batch_only():
+    user = BeneficiaryGrant18Factory(departementCode="75", city="Paris")
+    IndividualBookingFactory(individualBooking__user=user)
+    expected = format_batch_users([user])
+
+    refresh_users_attributes(10, synchronize_sendinblue=False)
+
+    assert push_testing.requests == [expected]
@@ -0,0 +1,46 @@
+import pytest
+
+from pcapi.core.educational import factories as educational_factories
+from pcapi.core.offers import api as offers_api
+from pcapi.core.offers import factories as offers_factories
+from pcapi.core.offers.models import OfferValidationStatus
+from pcapi.scripts.score_pending_offers import score_pending_offers
+
+
+CONFIG = """
+        minimum_score: 0.6
+        rules:
+            - name: "check offer name"
+              factor: 0
+              conditions:
+               - model: "Offer"
+                 attribute: "name"
+                 condition:
+                    operator: "contains"
+                    comparated:
+                      - "suspicious"
+        """
+
+
+@pytest.mark.usefixtures("db_session")
+class ScorePendingOffersTest:
+    def test_score_pending_offers(self):
+        offers_api.import_offer_validation_config(CONFIG)
+        offers_factories.OfferFactory.create_batch(
+            3, name="A suspicious offer", validation=OfferValidationStatus.PENDING
+        )
+        offers_factories.OfferFactory.create_batch(2, validation=OfferValidationStatus.PENDING)
+        offers_factories.OfferFactory(validation=OfferValidationStatus.APPROVED)
+        educational_factories.CollectiveOfferFactory(validation=OfferValidationStatus.PENDING)
+
+        report = score_pending_offers(batch_size=2)
+
+        assert report == {
+            "Offer": {"approved": 2, "pending": 3},
+            "CollectiveOffer": {"approved": 1, "pending": 0},
+            "CollectiveOfferTemplate": {"approved": 0, "pending": 0},
+        }
+
+    def test_no_config(self):
+        with pytest.raises(ValueError):
+            score_pending_offers()
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+from flask import current_app
+import pytest
+
+from pcapi.core.testing import override_settings
+import pcapi.core.users.factories as users_factories
+from pcapi.models import db
+from pcapi.tasks import cloud_task
+
+
+def _get_enqueued_payloads(cloud_task_client):
+    return [
+        call.kwargs["request"]["task"]["http_request"]["body"] for call in cloud_task_client.create_task.call_args_list
+    ]
+
+
+@override_settings(IS_DEV=False)
+class BufferedTasksTest:
+    def test_enqueue_deduplicated_tasks_on_exit(self, cloud_task_client):
+        with cloud_task.buffered_tasks():
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1})
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 2})
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1})
+            cloud_task.enqueue_internal_task("other-queue", "/path", {"user_id": 1})
+
+            cloud_task_client.create_task.assert_not_called()
+
+        assert sorted(_get_enqueued_payloads(cloud_task_client)) == [
+            b'{"user_id": 1}',
+            b'{"user_id": 1}',
+            b'{"user_id": 2}',
+        ]
+
+    @override_settings(CLOUD_TASK_BUFFER_MAX_SIZE=2)
+    def test_flush_full_buffer(self, cloud_task_client):
+        with cloud_task.buffered_tasks():
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1})
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 2})
+
+            assert cloud_task_client.create_task.call_count == 2
+
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 3})
+
+        assert cloud_task_client.create_task.call_count == 3
+
+    def test_discard_tasks_on_error(self, cloud_task_client):
+        with pytest.raises(ValueError):
+            with cloud_task.buffered_tasks():
+                cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1})
+                raise ValueError()
+
+        cloud_task_client.create_task.assert_not_called()
+
+    @pytest.mark.usefixtures("db_session")
+    def test_enqueue_tasks_on_commit(self, cloud_task_client):
+        with cloud_task.buffered_tasks():
+            users_factories.UserFactory()
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1})
+            db.session.commit()
+
+            assert _get_enqueued_payloads(cloud_task_client) == [b'{"user_id": 1}']
+
+        assert cloud_task_client.create_task.call_count == 1
+
+    @pytest.mark.usefixtures("db_session")
+    def test_discard_tasks_on_rollback(self, cloud_task_client):
+        with cloud_task.buffered_tasks():
+            users_factories.UserFactory()
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1})
+            db.session.rollback()
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 2})
+
+        assert _get_enqueued_payloads(cloud_task_client) == [b'{"user_id": 2}']
+
+    @override_settings(CLOUD_TASK_ENQUEUE_WORKERS=0)
+    def test_persist_and_replay_failed_tasks(self, cloud_task_client):
+        cloud_task_client.create_task.side_effect = [ValueError("unavailable"), MagicMock()]
+
+        with cloud_task.buffered_tasks():
+            cloud_task.enqueue_internal_task("queue", "/path", {"user_id": 1}, deduplicate=True)
+
+        assert current_app.redis_client.llen(cloud_task.FAILED_TASKS_KEY) == 1
+
+        assert cloud_task.replay_failed_tasks() == (1, 0)
+        assert current_app.redis_client.llen(cloud_task.FAILED_TASKS_KEY) == 0
+        assert _get_enqueued_payloads(cloud_task_client) == [b'{"user_id": 1}', b'{"user_id": 1}']
+        task_names = [call.kwargs["request"]["task"]["name"] for call in cloud_task_client.create_task.call_args_list]
+        assert task_names[0] == task_names[1]
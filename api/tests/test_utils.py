@@ -1,6 +1,7 @@
 import datetime
 import enum
 import operator
+import tracemalloc
 import uuid
 
 
@@ -15,3 +16,32 @@ def json_default(data):
             return func(data)
 
     return data
+
+
+class FakeExportQuery:
+    """A query of `count` rows for exports, built lazily by `build_row`
+    like a query with `yield_per()` would.
+    """
+
+    def __init__(self, build_row, count):
+        self.build_row = build_row
+        self.count = count
+
+    def yield_per(self, count):
+        for index in range(self.count):
+            yield self.build_row(index)
+
+
+def get_peak_memory_of_stream(stream):
+    """Consume `stream` and return its size and the peak of memory
+    allocated meanwhile.
+    """
+    size = 0
+    tracemalloc.start()
+    try:
+        for chunk in stream:
+            size += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, peak
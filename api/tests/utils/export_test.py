@@ -0,0 +1,54 @@
+import csv
+from decimal import Decimal
+from io import BytesIO
+from io import StringIO
+
+import openpyxl
+
+from pcapi.utils import export
+
+
+class IterCsvTest:
+    def test_chunks(self):
+        rows = ([f"name {i}", i] for i in range(5))
+
+        chunks = list(export.iter_csv(["Nom", "Numéro"], rows, rows_per_chunk=2))
+
+        assert len(chunks) == 3
+        assert list(csv.reader(StringIO("".join(chunks)), delimiter=";")) == [
+            ["Nom", "Numéro"],
+            ["name 0", "0"],
+            ["name 1", "1"],
+            ["name 2", "2"],
+            ["name 3", "3"],
+            ["name 4", "4"],
+        ]
+
+    def test_no_rows(self):
+        assert list(export.iter_csv(["Nom"], [])) == ['"Nom"\r\n']
+
+
+class EncodeTest:
+    def test_bom_is_only_added_once(self):
+        encoded = b"".join(export.encode(["a;", "b", "", "é"]))
+
+        assert encoded == "a;bé".encode("utf-8-sig")
+        assert encoded.count(b"\xef\xbb\xbf") == 1
+
+
+class IterExcelTest:
+    def test_content(self):
+        rows = [["Offre 1", Decimal("12.50")], ["Offre 2", Decimal("3")]]
+
+        chunks = list(export.iter_excel(["Offre", "Prix"], rows, currency_columns=(1,), bytes_per_chunk=1024))
+
+        assert len(chunks) > 1
+        worksheet = openpyxl.load_workbook(BytesIO(b"".join(chunks))).active
+        assert [[cell.value for cell in row] for row in worksheet.rows] == [
+            ["Offre", "Prix"],
+            ["Offre 1", 12.5],
+            ["Offre 2", 3],
+        ]
+        assert worksheet.cell(row=1, column=1).font.b
+        assert "€" in worksheet.cell(row=2, column=2).number_format
+        assert worksheet.cell(row=2, column=1).number_format == "General"
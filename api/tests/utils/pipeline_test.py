@@ -0,0 +1,103 @@
+import contextlib
+import threading
+
+import pytest
+
+from pcapi.utils import pipeline
+
+
+class RunPipelineTest:
+    def test_items_go_through_all_stages(self):
+        results = []
+        lock = threading.Lock()
+
+        def collect(item):
+            with lock:
+                results.append(item)
+
+        stats = pipeline.run_pipeline(
+            source=range(10),
+            stages=[
+                pipeline.Stage("double", lambda item: item * 2, workers=3),
+                pipeline.Stage("increment", lambda item: item + 1, workers=2),
+                pipeline.Stage("collect", collect),
+            ],
+        )
+
+        assert sorted(results) == [item * 2 + 1 for item in range(10)]
+        assert stats["double"].items == 10
+        assert stats["increment"].items == 10
+        assert stats["collect"].items == 10
+
+    def test_none_results_are_dropped(self):
+        results = []
+        pipeline.run_pipeline(
+            source=range(10),
+            stages=[
+                pipeline.Stage("filter", lambda item: item if item % 2 else None),
+                pipeline.Stage("collect", results.append),
+            ],
+        )
+
+        assert sorted(results) == [1, 3, 5, 7, 9]
+
+    def test_count_elements_of_chunks(self):
+        stats = pipeline.run_pipeline(
+            source=[[1, 2, 3], [4, 5]],
+            stages=[pipeline.Stage("noop", lambda chunk: None, count=len)],
+        )
+
+        assert stats["noop"].items == 2
+        assert stats["noop"].elements == 5
+        assert stats["noop"].to_dict()["elements"] == 5
+
+    def test_each_worker_enters_context(self):
+        entered = []
+
+        @contextlib.contextmanager
+        def context():
+            entered.append(threading.current_thread().name)
+            yield
+
+        pipeline.run_pipeline(
+            source=range(10),
+            stages=[pipeline.Stage("noop", lambda item: None, workers=3, context=context)],
+        )
+
+        assert sorted(entered) == ["pipeline-noop-0", "pipeline-noop-1", "pipeline-noop-2"]
+
+    def test_errors_do_not_stop_pipeline(self):
+        results = []
+
+        def fail_on_odd(item):
+            if item % 2:
+                raise ValueError(item)
+            return item
+
+        with pytest.raises(pipeline.PipelineError) as exc_info:
+            pipeline.run_pipeline(
+                source=range(10),
+                stages=[
+                    pipeline.Stage("fail", fail_on_odd),
+                    pipeline.Stage("collect", results.append),
+                ],
+            )
+
+        assert isinstance(exc_info.value.__cause__, ValueError)
+        assert sorted(exc_info.value.failed_items) == [1, 3, 5, 7, 9]
+        assert sorted(results) == [0, 2, 4, 6, 8]
+
+    def test_crashed_worker_does_not_block_pipeline(self):
+        def broken_context():
+            raise ValueError("cannot set up worker")
+
+        with pytest.raises(pipeline.PipelineError) as exc_info:
+            pipeline.run_pipeline(
+                source=range(100),
+                stages=[
+                    pipeline.Stage("identity", lambda item: item),
+                    pipeline.Stage("broken", lambda item: None, context=broken_context),
+                ],
+            )
+
+        assert sorted(exc_info.value.failed_items) == list(range(100))
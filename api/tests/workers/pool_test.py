@@ -0,0 +1,40 @@
+from unittest import mock
+
+from pcapi.workers.pool import WorkerPool
+
+
+class FakeProcess:
+    def __init__(self, exitcode):
+        self.pid = id(self)
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return False
+
+    def join(self):
+        pass
+
+
+@mock.patch("time.sleep")
+class WorkerPoolTest:
+    def test_replace_crashed_processes(self, _mocked_sleep):
+        pool = WorkerPool(["default"], processes=2)
+        started = [FakeProcess(exitcode=0), FakeProcess(exitcode=1), FakeProcess(exitcode=0)]
+
+        with mock.patch.object(pool, "_start_child", side_effect=started) as mocked_start_child:
+            with mock.patch.object(pool, "_has_pending_jobs", return_value=False):
+                pool.run(burst=True)
+
+        # The process that crashed has been replaced, the others have
+        # stopped because queues are empty.
+        assert mocked_start_child.call_count == 3
+
+    def test_replace_processes_while_jobs_are_pending(self, _mocked_sleep):
+        pool = WorkerPool(["default"], processes=1, max_jobs_per_child=10)
+        started = [FakeProcess(exitcode=0), FakeProcess(exitcode=0)]
+
+        with mock.patch.object(pool, "_start_child", side_effect=started) as mocked_start_child:
+            with mock.patch.object(pool, "_has_pending_jobs", side_effect=[True, False]):
+                pool.run(burst=True)
+
+        assert mocked_start_child.call_count == 2
@@ -0,0 +1,89 @@
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+
+import pcapi.core.offerers.factories as offerers_factories
+import pcapi.core.offers.factories as offers_factories
+import pcapi.core.providers.factories as providers_factories
+from pcapi.workers import synchronize_stocks_job
+
+
+def _stock_detail(ref, venue_id, available, price):
+    return {
+        "products_provider_reference": ref,
+        "offers_provider_reference": ref,
+        "stocks_provider_reference": f"{ref}@{venue_id}",
+        "available_quantity": available,
+        "price": price,
+    }
+
+
+@pytest.mark.usefixtures("db_session")
+class EnqueueStocksSynchronizationTest:
+    @mock.patch("pcapi.workers.synchronize_stocks_job.synchronize_venue_stocks_job.delay")
+    def test_coalesce_updates_of_a_venue(self, mocked_delay):
+        synchronize_stocks_job.enqueue_stocks_synchronization(1, [_stock_detail("123", 1, 4, Decimal("10.5"))])
+        synchronize_stocks_job.enqueue_stocks_synchronization(
+            1, [_stock_detail("123", 1, 2, Decimal("10.5")), _stock_detail("456", 1, 1, None)]
+        )
+        synchronize_stocks_job.enqueue_stocks_synchronization(2, [_stock_detail("123", 2, 3, None)])
+
+        assert mocked_delay.call_args_list == [mock.call(1), mock.call(2)]
+        metrics = synchronize_stocks_job.get_stocks_synchronization_metrics()
+        assert metrics["received"] == 4
+        assert metrics["coalesced"] == 1
+        assert metrics["enqueued_jobs"] == 2
+        assert metrics["pending_venues"] == 2
+
+    def test_synchronize_latest_updates(self):
+        providers_factories.ProviderFactory(localClass="PCAPIStocks")
+        venue = offerers_factories.VenueFactory()
+        offer = offers_factories.OfferFactory(
+            product__idAtProviders="123",
+            product__subcategoryId="LIVRE_PAPIER",
+            idAtProvider="123",
+            venue=venue,
+        )
+
+        with mock.patch("pcapi.workers.synchronize_stocks_job.synchronize_venue_stocks_job.delay"):
+            synchronize_stocks_job.enqueue_stocks_synchronization(
+                venue.id, [_stock_detail("123", venue.id, 4, Decimal("12.3"))]
+            )
+            synchronize_stocks_job.enqueue_stocks_synchronization(
+                venue.id, [_stock_detail("123", venue.id, 2, Decimal("12.3"))]
+            )
+        synchronize_stocks_job.synchronize_venue_stocks_job(venue.id)
+
+        assert len(offer.stocks) == 1
+        assert offer.stocks[0].quantity == 2
+        assert offer.stocks[0].price == Decimal("12.3")
+        metrics = synchronize_stocks_job.get_stocks_synchronization_metrics()
+        assert metrics["synchronized"] == 1
+        assert metrics["pending_venues"] == 0
+
+    @mock.patch("pcapi.core.providers.api.synchronize_stocks", side_effect=ValueError)
+    def test_keep_updates_on_error(self, _mocked_synchronize_stocks):
+        providers_factories.ProviderFactory(localClass="PCAPIStocks")
+        venue = offerers_factories.VenueFactory()
+
+        with mock.patch("pcapi.workers.synchronize_stocks_job.synchronize_venue_stocks_job.delay"):
+            synchronize_stocks_job.enqueue_stocks_synchronization(venue.id, [_stock_detail("123", venue.id, 4, None)])
+        with pytest.raises(ValueError):
+            synchronize_stocks_job.synchronize_venue_stocks_job(venue.id)
+
+        assert synchronize_stocks_job.get_stocks_synchronization_metrics()["pending_venues"] == 1
+
+    @mock.patch("pcapi.workers.synchronize_stocks_job.synchronize_venue_stocks_job.delay")
+    def test_enqueue_jobs_of_pending_venues(self, mocked_delay):
+        with mock.patch("pcapi.workers.synchronize_stocks_job._synchronize_stocks", side_effect=ValueError):
+            synchronize_stocks_job.enqueue_stocks_synchronization(1, [_stock_detail("123", 1, 4, None)])
+            with pytest.raises(ValueError):
+                synchronize_stocks_job.synchronize_venue_stocks_job(1)
+        synchronize_stocks_job.enqueue_stocks_synchronization(2, [_stock_detail("123", 2, 4, None)])
+        mocked_delay.reset_mock()
+
+        # Venue 2 already has an enqueued job.
+        assert synchronize_stocks_job.enqueue_pending_venues_synchronization() == 1
+        assert mocked_delay.call_args_list == [mock.call(1)]
+        assert synchronize_stocks_job.enqueue_pending_venues_synchronization() == 0